@@ -14,99 +14,95 @@ import asyncio
 import json
 import os
 import sys
-from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any
 
-import httpx
+import requests
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+# Token e governador de chamadas compartilhados com o Data Hub
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.utils.api_governor import get_governor
+from src.utils.token_provider import get_token_provider
+
 
 class SankhyaAPI:
     """Cliente para API Sankhya com gerenciamento automático de token."""
 
     def __init__(self):
-        self.auth_url = "https://api.sankhya.com.br"  # Autenticação
         self.gateway_url = "https://api.sankhya.com.br/gateway/v1"  # Queries
         self.client_id = os.getenv("SANKHYA_CLIENT_ID")
         self.client_secret = os.getenv("SANKHYA_CLIENT_SECRET")
         self.x_token = os.getenv("SANKHYA_X_TOKEN")
 
-        self.access_token: Optional[str] = None
-        self.token_expiry: Optional[datetime] = None
-
         if not all([self.client_id, self.client_secret, self.x_token]):
             raise ValueError(
                 "Credenciais Sankhya não configuradas! "
                 "Configure SANKHYA_CLIENT_ID, SANKHYA_CLIENT_SECRET e SANKHYA_X_TOKEN"
             )
 
-    async def _get_token(self) -> str:
-        """Obtém ou renova o token de acesso."""
-        # Se token existe e ainda é válido, retorna
-        if self.access_token and self.token_expiry:
-            if datetime.now() < self.token_expiry:
-                return self.access_token
-
-        # Renovar token
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.auth_url}/authenticate",
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "X-Token": self.x_token
-                },
-                data={
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "grant_type": "client_credentials"
-                },
-                timeout=30.0
-            )
-            response.raise_for_status()
+        # Mesmo token dos extractors/scripts: não autentica de novo se houver um válido
+        self.tokens = get_token_provider()
+        self.governor = get_governor()
 
-            data = response.json()
-            self.access_token = data["access_token"]
-            # Token válido por 24h, renovar 1h antes
-            self.token_expiry = datetime.now() + timedelta(hours=23)
-
-            return self.access_token
+    def _get_token(self) -> str:
+        """Obtém o token de acesso do cache compartilhado (renova se necessário)."""
+        token = self.tokens.get_token()
+        if not token:
+            raise RuntimeError("Falha na autenticação Sankhya")
+        return token
 
     async def execute_query(self, sql: str) -> dict:
         """
         Executa uma query SQL na API Sankhya.
 
+        A chamada passa pelo governador do Data Hub (limite de taxa,
+        concorrência, retry e circuit breaker), o mesmo dos extractors
+        e scripts, e roda em uma thread para não bloquear o servidor.
+
         Args:
             sql: Query SQL a executar
 
         Returns:
             dict: Resposta da API com os dados
         """
-        token = await self._get_token()
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.gateway_url}/mge/service.sbr",
-                params={
-                    "serviceName": "DbExplorerSP.executeQuery",
-                    "outputType": "json"
-                },
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "requestBody": {
-                        "sql": sql
-                    }
-                },
-                timeout=120.0  # Queries podem demorar
+        return await asyncio.to_thread(self._execute_query, sql)
+
+    def _execute_query(self, sql: str) -> dict:
+        token = self._get_token()
+
+        for _ in range(2):
+            response = self.governor.call(
+                lambda: requests.post(
+                    f"{self.gateway_url}/mge/service.sbr",
+                    params={
+                        "serviceName": "DbExplorerSP.executeQuery",
+                        "outputType": "json"
+                    },
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Content-Type": "application/json"
+                    },
+                    json={
+                        "requestBody": {
+                            "sql": sql
+                        }
+                    },
+                    timeout=120  # Queries podem demorar
+                )
             )
-            response.raise_for_status()
 
-            return response.json()
+            # Token rejeitado: renovar uma vez (outro processo pode já ter renovado)
+            if response.status_code == 401 and self.tokens.invalidate(token):
+                token = self._get_token()
+                continue
+            break
+
+        response.raise_for_status()
+
+        return response.json()
 
 
 class SankhyaMCPServer:
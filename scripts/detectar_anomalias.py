@@ -134,6 +134,15 @@ def detectar_anomalias_vendas(top_n: int = 20):
         df_anomalias.to_csv(relatorio_path, index=False, encoding='utf-8-sig')
         print(f"\n  Relatório CSV salvo em: {relatorio_path}")
 
+    # 8. Atualizar índice RAG (incremental: só os arquivos novos/alterados)
+    try:
+        from src.agents.shared.rag import DocumentStore
+        rag_stats = DocumentStore().update_index()
+        print(f"  Índice RAG atualizado: {rag_stats['adicionados']} novos, "
+              f"{rag_stats['alterados']} alterados")
+    except Exception as e:
+        logger.warning(f"Não foi possível atualizar o índice RAG: {e}")
+
     print("\n" + "=" * 70)
     print(f"Fim: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
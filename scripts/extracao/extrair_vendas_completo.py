@@ -2,6 +2,15 @@
 """
 Extrai TODAS as vendas do Sankhya por faixas de NUNOTA.
 Salva apenas localmente (sem Azure).
+
+Retomável: cada faixa concluída fica em staging (src/data/raw/_staging/vendas/).
+Se a extração cair no meio, rodar de novo refaz só as faixas pendentes e as
+que falharam. O vendas.parquet só é substituído (de uma vez) quando todas as
+faixas estão completas.
+
+Uso:
+    python scripts/extracao/extrair_vendas_completo.py
+    python scripts/extracao/extrair_vendas_completo.py --reset   # ignora o checkpoint
 """
 
 import sys
@@ -23,23 +32,28 @@ logger = logging.getLogger(__name__)
 
 from src.utils.sankhya_client import SankhyaClient
 from src.config import RAW_DATA_DIR
+from src.agents.engineer.extractors.checkpoint import RangeCrawl
 
 
 def extrair_vendas_por_faixas(
     client: SankhyaClient,
     nunota_max: int = 2000000,
-    faixa_size: int = 10000
-) -> pd.DataFrame:
+    faixa_size: int = 10000,
+    reset: bool = False
+) -> tuple:
     """
     Extrai vendas em faixas de NUNOTA para contornar limite da API.
 
+    Faixas já concluídas numa execução anterior são puladas.
+
     Args:
         client: Cliente Sankhya autenticado
         nunota_max: NUNOTA máximo esperado
         faixa_size: Tamanho de cada faixa
+        reset: Ignorar o checkpoint de execuções anteriores
 
     Returns:
-        DataFrame com todas as vendas
+        (RangeCrawl, resumo da execução)
     """
     colunas = [
         "NUNOTA", "NUMNOTA", "CODEMP", "CODPARC", "NOMEPARC",
@@ -73,46 +87,27 @@ def extrair_vendas_por_faixas(
     ORDER BY c.NUNOTA, i.SEQUENCIA
     """
 
-    all_dfs = []
-    nunota_ini = 0
-    total = 0
-    faixas_vazias = 0
+    def buscar_faixa(nunota_ini: int, nunota_fim: int) -> pd.DataFrame:
+        query = query_template.format(NUNOTA_INI=nunota_ini, NUNOTA_FIM=nunota_fim)
+        # strict: erro na faixa vira falha registrada no manifesto (refeita na próxima execução)
+        result = client.executar_query(query, timeout=180, strict=True)
+        rows = (result or {}).get("rows") or []
+        if rows:
+            print(f"  NUNOTA {nunota_ini:>7}-{nunota_fim:<7}: +{len(rows):>5}")
+        return pd.DataFrame(rows, columns=colunas)
+
+    crawl = RangeCrawl(
+        "vendas",
+        fetch=buscar_faixa,
+        id_max=nunota_max,
+        range_size=faixa_size,
+        params={"query": query_template}
+    )
 
     print(f"\nExtraindo vendas em faixas de {faixa_size}...")
     print("-" * 60)
 
-    while nunota_ini <= nunota_max:
-        nunota_fim = nunota_ini + faixa_size
-        query = query_template.format(NUNOTA_INI=nunota_ini, NUNOTA_FIM=nunota_fim)
-
-        try:
-            result = client.executar_query(query, timeout=180)
-        except Exception as e:
-            logger.warning(f"Erro na faixa {nunota_ini}-{nunota_fim}: {e}")
-            nunota_ini = nunota_fim
-            continue
-
-        if result and result.get("rows"):
-            rows = result["rows"]
-            df_faixa = pd.DataFrame(rows, columns=colunas)
-            all_dfs.append(df_faixa)
-            total += len(rows)
-            faixas_vazias = 0
-            print(f"  NUNOTA {nunota_ini:>7}-{nunota_fim:<7}: +{len(rows):>5} (total: {total:>7})")
-        else:
-            faixas_vazias += 1
-            # Se muitas faixas vazias consecutivas, pular
-            if faixas_vazias >= 10:
-                print(f"  NUNOTA {nunota_ini:>7}: 10 faixas vazias, pulando 100k...")
-                nunota_ini += 100000 - faixa_size
-                faixas_vazias = 0
-
-        nunota_ini = nunota_fim
-
-    if not all_dfs:
-        return pd.DataFrame(columns=colunas)
-
-    return pd.concat(all_dfs, ignore_index=True)
+    return crawl, crawl.run(reset=reset)
 
 
 def main():
@@ -127,32 +122,43 @@ def main():
         print("[ERRO] Falha na autenticacao")
         return 1
 
-    # Extrair
-    df = extrair_vendas_por_faixas(client, nunota_max=2000000, faixa_size=10000)
+    # Extrair (retoma o checkpoint, se houver)
+    crawl, resultado = extrair_vendas_por_faixas(
+        client, nunota_max=2000000, faixa_size=10000, reset="--reset" in sys.argv
+    )
+
+    print("-" * 60)
+    print(f"Faixas: {resultado['ranges']} ({resultado['skipped']} do checkpoint, "
+          f"{resultado['extracted']} extraidas agora)")
 
-    if df.empty:
+    if not resultado["success"]:
+        print(f"[ERRO] {len(resultado['failed'])} faixas falharam: {', '.join(resultado['failed'][:5])}")
+        print(f"Faixas concluidas mantidas em {resultado['staging']}")
+        print("Rode o script de novo para extrair so as pendentes.")
+        return 1
+
+    if resultado["rows"] == 0:
+        crawl.cleanup()
         print("[ERRO] Nenhum dado extraido")
         return 1
 
-    print("-" * 60)
-    print(f"Total extraido: {len(df)} registros")
+    print(f"Total extraido: {resultado['rows']} registros")
 
-    # Converter datas
-    if 'DTNEG' in df.columns:
-        df['DTNEG'] = pd.to_datetime(df['DTNEG'], errors='coerce')
-    if 'DTFATUR' in df.columns:
-        df['DTFATUR'] = pd.to_datetime(df['DTFATUR'], errors='coerce')
+    # Converter datas e gravar vendas.parquet de uma vez (limpa o staging)
+    def converter_datas(df: pd.DataFrame) -> pd.DataFrame:
+        if 'DTNEG' in df.columns:
+            df['DTNEG'] = pd.to_datetime(df['DTNEG'], errors='coerce')
+        if 'DTFATUR' in df.columns:
+            df['DTFATUR'] = pd.to_datetime(df['DTFATUR'], errors='coerce')
+        return df
 
-    # Salvar
-    pasta = RAW_DATA_DIR / "vendas"
-    pasta.mkdir(parents=True, exist_ok=True)
-    arquivo = pasta / "vendas.parquet"
+    arquivo = RAW_DATA_DIR / "vendas" / "vendas.parquet"
+    commit = crawl.commit(arquivo, transform=converter_datas)
 
-    df.to_parquet(arquivo, index=False)
+    print(f"Salvo em: {commit['path']}")
+    print(f"Tamanho: {commit['size_mb']:.2f} MB")
 
-    tamanho_mb = arquivo.stat().st_size / (1024 * 1024)
-    print(f"Salvo em: {arquivo}")
-    print(f"Tamanho: {tamanho_mb:.2f} MB")
+    df = pd.read_parquet(arquivo)
 
     # Estatísticas
     print("\n" + "=" * 60)
@@ -3,33 +3,31 @@ Script para REPLICAR emails no cadastro de parceiros (TGFPAR) do Sankhya
 Copia EMAILNFE para EMAILNFSE, EMAIL e EMAILNOTIFENTREGA
 MMARRA DISTRIBUIDORA AUTOMOTIVA LTDA
 
+Grava em lote com SankhyaBulkWriter (threads e retomada; limite de taxa e
+retry ficam com o governador do SankhyaClient). Se o script for
+interrompido, rodar de novo continua de onde parou: parceiros ja
+atualizados com o mesmo email sao pulados.
+
 Uso:
   python scripts/manutencao/replicar_email_parceiros.py
+  python scripts/manutencao/replicar_email_parceiros.py --reset   # ignora execucoes anteriores
 """
 
-import os
-import requests
-import time
+import sys
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
 import pandas as pd
 
-# Carregar .env do mcp_sankhya
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
-load_dotenv(ROOT_DIR / "mcp_sankhya" / ".env")
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.config import SANKHYA_CLIENT_ID, SANKHYA_CLIENT_SECRET
+from src.utils import SankhyaClient, SankhyaAPIError, SankhyaBulkWriter
 
 # ============================================
 # CONFIGURACAO
 # ============================================
-SANKHYA_CLIENT_ID = os.getenv("SANKHYA_CLIENT_ID", "")
-SANKHYA_CLIENT_SECRET = os.getenv("SANKHYA_CLIENT_SECRET", "")
-SANKHYA_X_TOKEN = os.getenv("SANKHYA_X_TOKEN", "")
-
-AUTH_URL = "https://api.sankhya.com.br/authenticate"
-BASE_URL = "https://api.sankhya.com.br/gateway/v1/mge/service.sbr"
-
-ACCESS_TOKEN = ""
+JOB_NAME = "replicar_email_parceiros"
 
 # Colunas
 COLUNA_ORIGEM = "EMAILNFE"
@@ -38,72 +36,13 @@ COLUNA_DESTINO_EMAIL = "EMAIL"
 COLUNA_DESTINO_ENTREGA = "EMAILNOTIFENTREGA"
 
 
-def autenticar() -> bool:
-    """Autentica na API Sankhya e obtem access_token"""
-    global ACCESS_TOKEN
-
-    try:
-        response = requests.post(
-            AUTH_URL,
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "X-Token": SANKHYA_X_TOKEN
-            },
-            data={
-                "client_id": SANKHYA_CLIENT_ID,
-                "client_secret": SANKHYA_CLIENT_SECRET,
-                "grant_type": "client_credentials"
-            },
-            timeout=30
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            ACCESS_TOKEN = data.get("access_token", "")
-            if ACCESS_TOKEN:
-                return True
-
-        print(f"  HTTP {response.status_code}: {response.text[:200]}")
-        return False
-    except Exception as e:
-        print(f"  Erro: {e}")
-        return False
-
-
-def executar_sql(sql: str):
-    """Executa SQL na API Sankhya"""
+def buscar_parceiros(client: SankhyaClient) -> list:
+    """
+    Busca todos os parceiros que tem EMAILNFE preenchido (paginado com ROWNUM).
 
-    payload = {
-        "serviceName": "DbExplorerSP.executeQuery",
-        "requestBody": {"sql": sql}
-    }
-
-    headers = {
-        "Authorization": f"Bearer {ACCESS_TOKEN}",
-        "Content-Type": "application/json"
-    }
-
-    try:
-        response = requests.post(
-            f"{BASE_URL}?serviceName=DbExplorerSP.executeQuery&outputType=json",
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
-
-        result = response.json()
-        if result.get("status") == "1":
-            return result.get("responseBody", {})
-        else:
-            print(f"  ❌ Erro API: {result.get('statusMessage', 'Erro desconhecido')}")
-            return None
-    except Exception as e:
-        print(f"  ❌ Erro: {e}")
-        return None
-
-
-def buscar_parceiros() -> list:
-    """Busca todos os parceiros que tem EMAILNFE preenchido (paginado com ROWNUM)"""
+    Levanta SankhyaAPIError se alguma pagina falhar: lista parcial faria o
+    script replicar so parte dos parceiros sem avisar.
+    """
 
     # Primeiro contar quantos sao
     sql_count = (
@@ -111,13 +50,10 @@ def buscar_parceiros() -> list:
         f"WHERE {COLUNA_ORIGEM} IS NOT NULL "
         f"AND TRIM({COLUNA_ORIGEM}) IS NOT NULL"
     )
-    result_count = executar_sql(sql_count)
-    if result_count and result_count.get("rows"):
-        total = result_count["rows"][0][0]
-        print(f"  Total encontrado: {total}")
-    else:
-        print("  ❌ Nao foi possivel contar registros")
-        return []
+    result_count = client.executar_query(sql_count, timeout=60, strict=True)
+    if not result_count.get("rows"):
+        raise SankhyaAPIError("Contagem de parceiros sem resultado")
+    print(f"  Total encontrado: {result_count['rows'][0][0]}")
 
     # Buscar por faixas de CODPARC
     todos = []
@@ -135,8 +71,8 @@ def buscar_parceiros() -> list:
             f"ORDER BY CODPARC"
         )
 
-        result = executar_sql(sql)
-        if not result or not result.get("rows"):
+        result = client.executar_query(sql, timeout=60, strict=True)
+        if not result.get("rows"):
             break
 
         rows = result["rows"]
@@ -174,86 +110,38 @@ def exportar_erros_excel(erros: list, filename: str = None):
     return filepath
 
 
-def atualizar_emails(codparc: int, email: str) -> tuple:
-    """Atualiza os 3 campos de email usando CRUDServiceProvider.saveRecord"""
-
-    payload = {
-        "serviceName": "CRUDServiceProvider.saveRecord",
-        "requestBody": {
-            "dataSet": {
-                "rootEntity": "Parceiro",
-                "includePresentationFields": "S",
-                "dataRow": {
-                    "key": {
-                        "CODPARC": {"$": str(codparc)}
-                    },
-                    "localFields": {
-                        COLUNA_DESTINO_NFSE: {"$": str(email)},
-                        COLUNA_DESTINO_EMAIL: {"$": str(email)},
-                        COLUNA_DESTINO_ENTREGA: {"$": str(email)},
-                    }
-                },
-                "entity": {
-                    "fieldset": {
-                        "list": f"CODPARC,NOMEPARC,{COLUNA_DESTINO_NFSE},{COLUNA_DESTINO_EMAIL},{COLUNA_DESTINO_ENTREGA}"
-                    }
-                }
-            }
-        }
-    }
-
-    headers = {
-        "Authorization": f"Bearer {ACCESS_TOKEN}",
-        "Content-Type": "application/json"
-    }
-
-    max_tentativas = 3
-    for tentativa in range(max_tentativas):
-        try:
-            response = requests.post(
-                f"{BASE_URL}?serviceName=CRUDServiceProvider.saveRecord&outputType=json",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-
-            # Token expirou - renovar e tentar de novo
-            if response.status_code == 401:
-                print(" (renovando token...)", end="")
-                if autenticar():
-                    headers["Authorization"] = f"Bearer {ACCESS_TOKEN}"
-                    continue
-                else:
-                    return False, "Falha ao renovar token"
-
-            # Rate limit / Forbidden - aguardar e tentar novamente
-            if response.status_code == 403:
-                if tentativa < max_tentativas - 1:
-                    wait_time = (tentativa + 1) * 2  # 2s, 4s
-                    print(f" (403, aguardando {wait_time}s...)", end="")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return False, f"HTTP 403 - Rate limit excedido"
-
-            result = response.json()
-            status = result.get("status", "0")
-
-            if status == "1":
-                entity = result.get("responseBody", {}).get("entities", {}).get("entity", {})
-                nome = entity.get("NOMEPARC", {}).get("$", "")
-                return True, nome
-            else:
-                msg = result.get("statusMessage") or result.get("message") or f"HTTP {response.status_code}"
-                return False, msg
-
-        except Exception as e:
-            if tentativa < max_tentativas - 1:
-                time.sleep(1)
-                continue
-            return False, str(e)
-
-    return False, "Falha apos 3 tentativas"
+def montar_registros(parceiros: list) -> tuple:
+    """Monta os registros a gravar e o email de origem de cada CODPARC"""
+    registros = []
+    origem = {}
+
+    for row in parceiros:
+        codparc = row[0]
+        email_raw = str(row[1]).strip()
+
+        # Se tiver multiplos emails separados por ; usa so o primeiro
+        email = email_raw.split(";")[0].strip()
+
+        origem[str(codparc)] = email_raw
+        registros.append({
+            "CODPARC": codparc,
+            COLUNA_DESTINO_NFSE: email,
+            COLUNA_DESTINO_EMAIL: email,
+            COLUNA_DESTINO_ENTREGA: email,
+        })
+
+    return registros, origem
+
+
+def mostrar_progresso(progresso: dict):
+    """Linha de progresso atualizada a cada lote"""
+    feitos = progresso["atualizados"] + progresso["erros"]
+    print(
+        f"\r  [{feitos:05d}/{progresso['total']}] "
+        f"✅ {progresso['atualizados']}  ❌ {progresso['erros']}  "
+        f"({progresso['rate']:.1f} chamadas/s)",
+        end="", flush=True
+    )
 
 
 def main():
@@ -267,15 +155,21 @@ def main():
         print("\n❌ ERRO: Credenciais nao encontradas em mcp_sankhya/.env")
         return
 
+    client = SankhyaClient()
+
     print("\nAutenticando na API Sankhya...")
-    if not autenticar():
+    if not client.autenticar():
         print("❌ Falha na autenticacao!")
         return
     print("✅ Autenticado com sucesso!")
 
     # 1. Buscar parceiros
     print("\nBuscando parceiros com EMAILNFE preenchido...")
-    parceiros = buscar_parceiros()
+    try:
+        parceiros = buscar_parceiros(client)
+    except SankhyaAPIError as e:
+        print(f"❌ Falha ao buscar parceiros (nada foi gravado): {e}")
+        sys.exit(1)
 
     if not parceiros:
         print("❌ Nenhum parceiro encontrado com EMAILNFE preenchido!")
@@ -284,42 +178,42 @@ def main():
     print(f"✅ Encontrados: {len(parceiros)} parceiros")
     print("\n" + "-" * 60)
 
-    # 2. Atualizar cada parceiro
-    sucessos = 0
-    erros = []
-
-    for i, row in enumerate(parceiros, 1):
-        codparc = row[0]
-        email_raw = str(row[1]).strip()
-
-        # Se tiver multiplos emails separados por ; usa so o primeiro
-        email = email_raw.split(";")[0].strip()
-
-        print(f"\n[{i:04d}/{len(parceiros)}] CODPARC: {codparc}", end="")
+    # 2. Gravar em lote
+    registros, origem = montar_registros(parceiros)
 
-        sucesso, resultado = atualizar_emails(codparc, email)
-
-        if sucesso:
-            print(f" ✅ {resultado}")
-            sucessos += 1
-        else:
-            print(f" ❌ {resultado}")
-            erros.append({
-                "CODPARC": codparc,
-                "EMAIL_ORIGEM": email_raw,
-                "EMAIL_USADO": email,
-                "ERRO": resultado
-            })
-
-        time.sleep(0.5)  # Delay para evitar rate limit
+    writer = SankhyaBulkWriter(
+        "Parceiro",
+        key_fields=["CODPARC"],
+        job_name=JOB_NAME,
+        client=client,
+        fieldset=["NOMEPARC"]
+    )
+    if "--reset" in sys.argv:
+        writer.reset()
+
+    resultado = writer.run(registros, on_progress=mostrar_progresso)
+    print()
+
+    erros = [
+        {
+            "CODPARC": e["key"],
+            "EMAIL_ORIGEM": origem.get(e["key"], ""),
+            "EMAIL_USADO": e["record"].get(COLUNA_DESTINO_EMAIL, ""),
+            "ERRO": e["erro"],
+        }
+        for e in writer.get_errors()
+    ]
 
     # 3. Resumo
     print("\n" + "=" * 60)
     print("RESUMO")
     print("=" * 60)
-    print(f"✅ Atualizados: {sucessos}")
+    print(f"✅ Atualizados: {resultado['atualizados']}")
+    print(f"⏭️  Ja atualizados (execucao anterior): {resultado['pulados']}")
     print(f"❌ Erros: {len(erros)}")
-    print(f"📊 Total: {len(parceiros)}")
+    print(f"📊 Total: {resultado['total']}")
+    print(f"⏱️  {resultado['duracao_s']}s, {resultado['chamadas']} chamadas, "
+          f"taxa final {resultado['api']['rate']} chamadas/s")
 
     if erros:
         print("\n--- PRIMEIROS 10 ERROS ---")
@@ -329,6 +223,9 @@ def main():
         if len(erros) > 10:
             print(f"  ... e mais {len(erros) - 10} erros")
 
+        print(f"\nRegistro completo: {resultado['errors_file']}")
+        print("Rodar o script de novo reenvia apenas os pendentes e os erros.")
+
         # Exportar para Excel
         print("\n")
         exportar = input("Deseja exportar os erros para Excel? (s/n): ").strip().lower()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Script para Re-segmentar Clientes (job noturno)
+
+Le o RFM incremental da feature store (src/data/features/),
+escolhe k automaticamente (avaliacao paralela em amostra) e salva
+o modelo em src/agents/scientist/models/clustering/. As atribuicoes
+de clientes e produtos sao publicadas para o SegmentLookup.
+
+Se a feature store estiver vazia (ou com --rebuild), ela e recriada
+a partir do historico completo em src/data/raw/vendas/vendas.parquet.
+
+Uso:
+    python scripts/segmentar_clientes.py
+    python scripts/segmentar_clientes.py --k 4       # k fixo
+    python scripts/segmentar_clientes.py --rebuild   # recria a feature store
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Adicionar src ao path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import pandas as pd
+import logging
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Função principal para segmentar clientes."""
+    parser = argparse.ArgumentParser(description="Segmentação RFM de clientes")
+    parser.add_argument("--k", type=int, help="Número de clusters fixo (default: automático)")
+    parser.add_argument("--rebuild", action="store_true", help="Recriar a feature store do histórico completo")
+    args = parser.parse_args()
+
+    from src.agents.shared.features import get_feature_store
+
+    store = get_feature_store()
+
+    # 1. Recriar feature store a partir do histórico (primeira execução)
+    if store.is_empty or args.rebuild:
+        vendas_path = ROOT_DIR / "src/data/raw/vendas/vendas.parquet"
+
+        if not vendas_path.exists():
+            logger.error(f"Arquivo não encontrado: {vendas_path}")
+            return 1
+
+        logger.info(f"Recriando feature store a partir de: {vendas_path}")
+        df = pd.read_parquet(vendas_path)
+        logger.info(f"Registros carregados: {len(df)}")
+
+        stats = store.rebuild(df)
+        if not stats.get("success"):
+            logger.error(f"Erro ao recriar feature store: {stats.get('error')}")
+            return 1
+
+    logger.info(f"Feature store: {store.get_stats()}")
+
+    # 2. Segmentar
+    from src.agents.scientist.clustering import CustomerSegmentation
+
+    segmenter = CustomerSegmentation()
+    resultado = segmenter.fit_from_store(store, n_clusters=args.k, auto_k=args.k is None)
+
+    if not resultado.get("success"):
+        logger.error(f"Erro na segmentação: {resultado.get('error')}")
+        return 1
+
+    logger.info(
+        f"{resultado['n_customers']} clientes em {resultado['n_clusters']} segmentos "
+        f"({resultado['algorithm']})"
+    )
+
+    # 3. Salvar modelo (publica CODPARC -> segmento para o SegmentLookup)
+    path = segmenter.save()
+    logger.info(f"Modelo salvo: {path}")
+
+    for seg in segmenter.get_segmentation_summary()["segmentos"]:
+        logger.info(
+            f"  {seg['nome']:<12} {seg['quantidade_clientes']:>7} clientes | "
+            f"{seg['percentual_receita']:>5.1f}% da receita"
+        )
+
+    # 4. Segmentar produtos e publicar CODPROD -> segmento (SegmentLookup)
+    from src.agents.scientist.clustering import ProductSegmentation
+
+    produtos = ProductSegmentation()
+    resultado = produtos.fit_from_store(store)
+
+    if resultado.get("success"):
+        logger.info(f"Segmentos de produtos publicados: {produtos.publish_segments()}")
+    else:
+        logger.warning(f"Segmentação de produtos ignorada: {resultado.get('error')}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark do DataCleaner - backend pandas x arrow
+
+Gera um DataFrame sintetico de vendas no formato devolvido pelo Sankhya
+(strings com espacos, nulos, "None"/"nan", numeros como texto e datas
+DDMMYYYY HH:MM:SS) e limpa com os dois backends:
+- tempo de clean() por backend (melhor de --repeat execucoes)
+- confere que os resultados sao iguais (exceto _extracted_at)
+
+Uso:
+    python scripts/testes/benchmark_cleaner.py
+    python scripts/testes/benchmark_cleaner.py --rows 200000 --repeat 3
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from src.agents.engineer.transformers.cleaner import DataCleaner
+
+
+def gerar_vendas(rows: int, seed: int = 42) -> pd.DataFrame:
+    """DataFrame de vendas parecido com o retorno da API do Sankhya."""
+    rng = np.random.default_rng(seed)
+
+    def com_nulos(values: np.ndarray, fracao: float) -> np.ndarray:
+        values = values.astype(object)
+        values[rng.random(rows) < fracao] = None
+        return values
+
+    nomes = np.array(["  CLIENTE A ", "CLIENTE B", "None", " nan", "Distribuidora  ", ""])
+    produtos = np.array(["PARAFUSO 10MM ", " PORCA M8", "ARRUELA", "null", "  "])
+
+    segundos = rng.integers(0, 3 * 365 * 86400, rows)
+    datas = pd.Timestamp("2023-01-01") + pd.to_timedelta(segundos, unit="s")
+    dtneg = datas.strftime("%d%m%Y %H:%M:%S").to_numpy()
+    dtfatur = (datas + pd.Timedelta(days=1)).strftime("%d%m%Y %H:%M:%S").to_numpy()
+
+    return pd.DataFrame({
+        "NUNOTA": (np.arange(rows) // 3 + 1).astype(str),
+        "SEQUENCIA": (np.arange(rows) % 3 + 1).astype(str),
+        "CODPARC": com_nulos(rng.integers(1, 100000, rows).astype(str), 0.01),
+        "NOMEPARC": com_nulos(rng.choice(nomes, rows), 0.02),
+        "CODPROD": rng.integers(1, 600000, rows).astype(str),
+        "DESCRPROD": com_nulos(rng.choice(produtos, rows), 0.02),
+        "QTDNEG": rng.integers(1, 100, rows).astype(str),
+        "VLRUNIT": com_nulos(np.round(rng.random(rows) * 500, 2).astype(str), 0.01),
+        "VLRTOT": np.round(rng.random(rows) * 5000, 2).astype(str),
+        "DTNEG": com_nulos(dtneg, 0.01),
+        "DTFATUR": com_nulos(dtfatur, 0.2),
+        "PENDENTE": com_nulos(rng.choice(np.array(["S", "N"]), rows), 0.05),
+    })
+
+
+def medir(backend: str, df: pd.DataFrame, repeat: int):
+    """Melhor tempo de clean() e o ultimo resultado."""
+    tempos = []
+    resultado = None
+    for _ in range(repeat):
+        entrada = df.copy()
+        inicio = time.perf_counter()
+        resultado = DataCleaner(backend=backend).clean(entrada, entity="vendas")
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do DataCleaner (pandas x arrow)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas de vendas geradas")
+    parser.add_argument("--repeat", type=int, default=3, help="Execucoes por backend")
+    args = parser.parse_args()
+
+    print(f"Gerando {args.rows:,} linhas de vendas...")
+    df = gerar_vendas(args.rows)
+
+    resultados = {}
+    for backend in ("pandas", "arrow"):
+        segundos, resultado = medir(backend, df, args.repeat)
+        resultados[backend] = (segundos, resultado)
+        print(f"  {backend:<7} {segundos:8.2f}s  ({args.rows / segundos:,.0f} linhas/s)")
+
+    esperado = resultados["pandas"][1].drop(columns=["_extracted_at"])
+    obtido = resultados["arrow"][1].drop(columns=["_extracted_at"])
+    try:
+        pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+        print("Resultados iguais: OK")
+    except AssertionError as e:
+        print(f"Resultados DIFERENTES:\n{e}")
+
+    speedup = resultados["pandas"][0] / resultados["arrow"][0]
+    print(f"Speedup arrow: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark do RAG - TF-IDF x BM25
+
+Constroi o indice em uma pasta temporaria (nao altera src/data/rag_index)
+e compara os rankings no conjunto fixo de benchmark_rag_perguntas.json:
+- hit@1 / hit@k: algum resultado vem do arquivo esperado
+- MRR@k: posicao do primeiro acerto
+- latencia media e p95 por busca
+
+Uso:
+    python scripts/testes/benchmark_rag.py
+    python scripts/testes/benchmark_rag.py --k 3 --repeat 50
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+
+# Perguntas fixas: {"pergunta": ..., "esperados": [trechos do caminho]}
+# Ficam em JSON (fora das fontes indexadas) para nao contaminar o indice
+PERGUNTAS_PATH = Path(__file__).parent / "benchmark_rag_perguntas.json"
+
+
+def carregar_perguntas() -> list:
+    """Carrega o conjunto fixo de perguntas."""
+    with open(PERGUNTAS_PATH, "r", encoding="utf-8") as f:
+        return [(p["pergunta"], p["esperados"]) for p in json.load(f)]
+
+
+def avaliar(store, perguntas: list, scorer: str, k: int, repeat: int) -> dict:
+    """Roda o conjunto de perguntas com um ranking."""
+    hits_1 = hits_k = 0
+    reciprocal_ranks = []
+    latencias = []
+
+    for pergunta, esperados in perguntas:
+        # Aquecimento + medicao
+        store.search(pergunta, k=k, scorer=scorer)
+        for _ in range(repeat):
+            inicio = time.perf_counter()
+            docs = store.search(pergunta, k=k, scorer=scorer)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+        fontes = [doc.metadata.get("file_path", "").replace("\\", "/") for doc in docs]
+        posicoes = [i for i, f in enumerate(fontes) if any(e in f for e in esperados)]
+
+        if posicoes:
+            hits_k += 1
+            hits_1 += posicoes[0] == 0
+            reciprocal_ranks.append(1 / (posicoes[0] + 1))
+        else:
+            reciprocal_ranks.append(0.0)
+
+    n = len(perguntas)
+    return {
+        "scorer": scorer,
+        "hit@1": hits_1 / n,
+        f"hit@{k}": hits_k / n,
+        f"mrr@{k}": float(np.mean(reciprocal_ranks)),
+        "latencia_media_ms": float(np.mean(latencias)),
+        "latencia_p95_ms": float(np.percentile(latencias, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TF-IDF x BM25 do RAG")
+    parser.add_argument("--k", type=int, default=5, help="Resultados por busca (default: 5)")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticoes por pergunta (default: 20)")
+    args = parser.parse_args()
+
+    from src.agents.shared.rag.vectorstore import DocumentStore, SCORERS
+
+    perguntas = carregar_perguntas()
+
+    print("=" * 60)
+    print("BENCHMARK RAG - TF-IDF x BM25")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DocumentStore(index_path=Path(tmp))
+
+        inicio = time.perf_counter()
+        n_chunks = store.build_index(force=True)
+        print(f"\nIndice: {n_chunks} chunks em {time.perf_counter() - inicio:.2f}s")
+        print(f"Perguntas: {len(perguntas)} | k={args.k} | repeticoes={args.repeat}\n")
+
+        resultados = [avaliar(store, perguntas, scorer, args.k, args.repeat) for scorer in SCORERS]
+
+    colunas = list(resultados[0].keys())
+    print(" | ".join(f"{c:>18}" for c in colunas))
+    print("-" * (21 * len(colunas)))
+    for r in resultados:
+        print(" | ".join(
+            f"{v:>18.3f}" if isinstance(v, float) else f"{v:>18}" for v in r.values()
+        ))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
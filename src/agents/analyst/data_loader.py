@@ -17,9 +17,10 @@ Exemplo de uso:
 """
 
 import logging
+import threading
 from datetime import datetime, date
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Tuple
 
 import pandas as pd
 
@@ -43,6 +44,10 @@ class AnalystDataLoader:
         self._cache: Dict[str, pd.DataFrame] = {}
         self._cache_timestamps: Dict[str, datetime] = {}
 
+        # Arquivos do Data Lake ja lidos: entidade -> (assinatura dos arquivos, DataFrame)
+        self._lake_frames: Dict[str, Tuple[tuple, pd.DataFrame]] = {}
+        self._lake_lock = threading.Lock()
+
     @property
     def sankhya_client(self):
         """Retorna cliente Sankhya, criando se necessario (lazy)."""
@@ -156,24 +161,46 @@ class AnalystDataLoader:
             logger.debug(f"[{entity}] Nenhum arquivo Parquet encontrado")
             return pd.DataFrame()
 
-        # Carregar todos os arquivos
-        dfs = []
-        for pf in parquet_files:
-            try:
-                df = pd.read_parquet(pf)
-                dfs.append(df)
-            except Exception as e:
-                logger.warning(f"[{entity}] Erro ao ler {pf.name}: {e}")
+        df = self._read_lake_files(entity, parquet_files)
+        if df.empty:
+            return df
 
-        if not dfs:
-            return pd.DataFrame()
+        # Aplicar filtros de data se especificados (sobre uma copia: o frame lido fica em memoria)
+        df = self._apply_date_filter(df.copy(), data_inicio, data_fim)
 
-        df = pd.concat(dfs, ignore_index=True)
+        return df
 
-        # Aplicar filtros de data se especificados
-        df = self._apply_date_filter(df, data_inicio, data_fim)
+    def _read_lake_files(self, entity: str, parquet_files: list) -> pd.DataFrame:
+        """
+        Le e concatena os Parquet de uma entidade.
 
-        return df
+        O resultado fica em memoria enquanto os arquivos nao mudam (nome,
+        tamanho e mtime): outros periodos da mesma entidade nao releem o disco.
+        """
+        signature = tuple(sorted(
+            (pf.name, pf.stat().st_size, pf.stat().st_mtime_ns) for pf in parquet_files
+        ))
+
+        with self._lake_lock:
+            cached = self._lake_frames.get(entity)
+            if cached is not None and cached[0] == signature:
+                logger.debug(f"[{entity}] Data Lake em memoria")
+                return cached[1]
+
+            dfs = []
+            for pf in parquet_files:
+                try:
+                    df = pd.read_parquet(pf)
+                    dfs.append(df)
+                except Exception as e:
+                    logger.warning(f"[{entity}] Erro ao ler {pf.name}: {e}")
+
+            if not dfs:
+                return pd.DataFrame()
+
+            df = pd.concat(dfs, ignore_index=True)
+            self._lake_frames[entity] = (signature, df)
+            return df
 
     def _load_from_sankhya(
         self,
@@ -350,10 +377,12 @@ class AnalystDataLoader:
                 del self._cache[k]
                 if k in self._cache_timestamps:
                     del self._cache_timestamps[k]
+            self._lake_frames.pop(entity, None)
             logger.info(f"Cache limpo para: {entity}")
         else:
             self._cache.clear()
             self._cache_timestamps.clear()
+            self._lake_frames.clear()
             logger.info("Cache completamente limpo")
 
     def get_available_entities(self) -> list:
@@ -274,15 +274,16 @@ class Analista:
         "1y": timedelta(days=365),
     }
 
-    def __init__(self, salvar_disco: bool = True):
+    def __init__(self, salvar_disco: bool = True, loader: Optional[AnalystDataLoader] = None):
         """
         Inicializa o Analista.
 
         Args:
             salvar_disco: Se True, salva relatorios em disco automaticamente
+            loader: Data loader compartilhado (None = cria um novo)
         """
         self.salvar_disco = salvar_disco
-        self.loader = AnalystDataLoader()
+        self.loader = loader or AnalystDataLoader()
         self.generator = ReportGenerator()
         self._output_dir = Path(ANALYST_CONFIG.get("output_dir", "output/reports"))
 
@@ -424,6 +425,8 @@ class Analista:
         Args:
             modulo: "vendas", "compras" ou "estoque"
             **filtros: Filtros de dados (periodo, cliente, etc.)
+                       periodo="historico" (vendas) usa a feature store
+                       data_inicio/data_fim (YYYY-MM-DD) substituem o periodo
 
         Returns:
             Dict estruturado com KPIs calculados
@@ -432,6 +435,9 @@ class Analista:
             kpis = analista.kpis("vendas", periodo="7d")
             print(f"Faturamento: {kpis['faturamento_total']['formatted']}")
             print(f"Ticket medio: {kpis['ticket_medio']['formatted']}")
+
+            # Historico completo (feature store incremental, sem filtros)
+            base = analista.kpis("vendas", periodo="historico")["base_clientes"]
         """
         modulo_lower = modulo.lower()
 
@@ -440,9 +446,17 @@ class Analista:
                 "error": f"Modulo '{modulo}' nao existe. Disponiveis: {list(self.KPI_CLASSES.keys())}"
             }
 
-        # Extrair periodo
+        # Extrair periodo (datas explicitas tem prioridade sobre o atalho)
         periodo = filtros.pop("periodo", "30d")
-        data_inicio, data_fim = self._calcular_periodo(periodo)
+        data_inicio = filtros.pop("data_inicio", None)
+        data_fim = filtros.pop("data_fim", None)
+
+        # Historico completo de vendas vem da feature store incremental
+        if periodo == "historico" and modulo_lower == "vendas" and not filtros:
+            return self._kpis_historicos()
+
+        if data_inicio is None and data_fim is None:
+            data_inicio, data_fim = self._calcular_periodo(periodo)
 
         try:
             # Carregar dados
@@ -527,6 +541,22 @@ class Analista:
     # Metodos Privados
     # -------------------------------------------------------------------------
 
+    def _kpis_historicos(self) -> Dict[str, Any]:
+        """KPIs de vendas sobre todo o historico via feature store."""
+        try:
+            result = VendasKPI().calculate_from_store()
+            result["_metadata"] = {
+                "modulo": "vendas",
+                "periodo": "historico",
+                "fonte": "feature_store",
+                "calculado_em": datetime.now().isoformat()
+            }
+            return result
+
+        except Exception as e:
+            logger.error(f"[vendas] Erro ao calcular KPIs historicos: {e}")
+            return {"error": str(e)}
+
     def _calcular_periodo(self, periodo: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
         """Calcula datas de inicio e fim baseado no periodo."""
         if not periodo:
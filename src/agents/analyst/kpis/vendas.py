@@ -13,6 +13,10 @@ KPIs disponiveis:
 - top_produtos: Produtos mais vendidos
 - curva_abc_clientes: Classificacao ABC de clientes
 
+KPIs historicos (feature store incremental, sem carregar o historico):
+- base_clientes: Clientes ativos/inativos por recencia
+- curva_abc_clientes e top_produtos sobre todo o historico
+
 Retorna dados estruturados para consumo pelo Agente LLM.
 """
 
@@ -109,6 +113,76 @@ class VendasKPI(BaseKPI):
 
         return self._build_response(df, kpis, data_inicio, data_fim)
 
+    def calculate_from_store(
+        self,
+        store=None,
+        reference_date: Optional[str] = None,
+        top_n: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Calcula KPIs historicos a partir da feature store de vendas.
+
+        Usa os agregados por cliente/produto mantidos incrementalmente,
+        sem reler todo o historico de vendas.
+
+        Args:
+            store: SalesFeatureStore (None = singleton get_feature_store())
+            reference_date: Data de referencia para recencia (None = watermark)
+            top_n: Quantidade de produtos no ranking
+
+        Returns:
+            Dict estruturado com os KPIs historicos
+        """
+        if store is None:
+            from src.agents.shared.features import get_feature_store
+            store = get_feature_store()
+
+        df_rfm = store.get_customer_rfm(reference_date=reference_date)
+        if df_rfm.empty:
+            return self._build_response(df_rfm, {"error": "Feature store vazia"})
+
+        kpis = {
+            "base_clientes": self._calc_base_clientes(df_rfm),
+            "curva_abc_clientes": self._curva_abc(
+                df_rfm[["CODPARC", "monetary"]].set_axis(["cod_cliente", "faturamento"], axis=1)
+            ),
+        }
+
+        df_produtos = store.get_product_metrics()
+        if not df_produtos.empty:
+            vendas = df_produtos[["codprod", "volume_vendas", "receita_total"]]
+            vendas.columns = ["cod_produto", "qtd_vendida", "valor_total"]
+            kpis["top_produtos"] = {
+                "top": vendas.nlargest(top_n, "qtd_vendida").to_dict(orient="records"),
+                "total_produtos": len(vendas),
+                "descricao": f"Top {top_n} produtos mais vendidos por quantidade (historico)"
+            }
+
+        data_inicio = store.customers["first_purchase"].min()
+        return self._build_response(
+            df_rfm, kpis,
+            data_inicio.strftime("%Y-%m-%d") if pd.notna(data_inicio) else None,
+            store.watermark.strftime("%Y-%m-%d") if store.watermark is not None else None
+        )
+
+    def _calc_base_clientes(self, df_rfm: pd.DataFrame) -> Dict[str, Any]:
+        """Calcula ativos/inativos por recencia a partir do RFM."""
+        recency = df_rfm["recency"].to_numpy()
+        faturamento = float(df_rfm["monetary"].sum())
+        pedidos = int(df_rfm["frequency"].sum())
+
+        return {
+            "total_clientes": len(df_rfm),
+            "ativos_30d": int((recency <= 30).sum()),
+            "ativos_90d": int((recency <= 90).sum()),
+            "ativos_180d": int((recency <= 180).sum()),
+            "inativos_180d": int((recency > 180).sum()),
+            "faturamento_historico": faturamento,
+            "faturamento_historico_formatted": self._format_currency(faturamento),
+            "ticket_medio_historico": self._safe_divide(faturamento, pedidos),
+            "descricao": "Base de clientes por recencia da ultima compra"
+        }
+
     def _calc_faturamento_total(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Calcula faturamento total."""
         # Agrupar por NUNOTA para evitar duplicatas de itens
@@ -296,6 +370,11 @@ class VendasKPI(BaseKPI):
 
         vendas = df_pedidos.groupby("CODPARC")["VLRNOTA"].sum().reset_index()
         vendas.columns = ["cod_cliente", "faturamento"]
+
+        return self._curva_abc(vendas)
+
+    def _curva_abc(self, vendas: pd.DataFrame) -> Dict[str, Any]:
+        """Classifica clientes [cod_cliente, faturamento] na curva ABC."""
         vendas = vendas.sort_values("faturamento", ascending=False)
 
         # Calcular percentual acumulado
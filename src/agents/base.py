@@ -7,11 +7,17 @@ Todos os agentes (Engenheiro, Analista, Cientista, Orquestrador) herdam desta cl
 Características:
 - Usa Groq como provider de LLM
 - Suporta ferramentas (tools)
+- Executa em paralelo as tool calls de um mesmo turno
 - Tem memória de conversação
+- Compacta resultados das tools e histórico antigo (orçamento de tokens)
 """
 
 import os
+import time
+import asyncio
 import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
 
@@ -19,11 +25,17 @@ from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, ToolMessage
 from langchain_core.tools import BaseTool
 
+from .compaction import TOOL_OUTPUT_TOKENS, compact_history, compact_tool_output, estimate_tokens
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Tempo máximo de cada tool call (segundos) e paralelismo por turno
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "120"))
+MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "8"))
+
 
 class BaseAgent:
     """
@@ -44,7 +56,10 @@ class BaseAgent:
         system_prompt: str,
         tools: Optional[List[BaseTool]] = None,
         model: Optional[str] = None,
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        tool_timeout: float = TOOL_TIMEOUT,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        tool_output_tokens: int = TOOL_OUTPUT_TOKENS
     ):
         """
         Inicializa o agente.
@@ -55,11 +70,19 @@ class BaseAgent:
             tools: Lista de ferramentas disponíveis
             model: Modelo LLM (default: llama-3.1-70b-versatile)
             temperature: Temperatura do modelo (0.0 = determinístico, 1.0 = criativo)
+            tool_timeout: Tempo máximo padrão de cada tool call (segundos)
+            tool_timeouts: Tempo máximo por tool (nome -> segundos)
+            tool_output_tokens: Orçamento de tokens de cada resultado de tool no prompt
         """
         self.name = name
         self.system_prompt = system_prompt
         self.tools = tools or []
         self.temperature = temperature
+        self.tool_timeout = tool_timeout
+        self.tool_timeouts = tool_timeouts or {}
+        self.tool_output_tokens = tool_output_tokens
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
         # Configurar modelo
         self.model = model or os.getenv("LLM_MODEL", "llama-3.1-70b-versatile")
@@ -97,6 +120,166 @@ class BaseAgent:
                 return tool
         return None
 
+    def _tool_timeout(self, name: str) -> float:
+        return self.tool_timeouts.get(name, self.tool_timeout)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Pool de threads das tools (criado no primeiro uso)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=MAX_PARALLEL_TOOLS,
+                thread_name_prefix=f"tools-{self.name}"
+            )
+        return self._executor
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop das tools assíncronas, em thread própria (fora do pool)."""
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever,
+                name=f"tools-{self.name}-loop",
+                daemon=True
+            ).start()
+            self._loop = loop
+        return self._loop
+
+    def _discard_executor(self, executor: ThreadPoolExecutor) -> None:
+        """
+        Troca o pool depois de um timeout: a thread da tool estourada não é
+        interrompida e continuaria ocupando uma vaga nos próximos turnos.
+        """
+        if self._executor is executor:
+            self._executor = None
+        executor.shutdown(wait=False)
+
+    def _invoke_tool(self, tool: BaseTool, tool_args: Dict[str, Any]) -> Any:
+        """Executa uma tool síncrona (erros viram resultado)."""
+        try:
+            tool_result = tool.invoke(tool_args)
+            logger.info(f"Resultado da tool {tool.name}: {tool_result}")
+            return tool_result
+        except Exception as e:
+            logger.error(f"Erro na tool {tool.name}: {e}")
+            return {"error": str(e)}
+
+    async def _ainvoke_tool(self, tool: BaseTool, tool_args: Dict[str, Any]) -> Any:
+        """Executa uma tool assíncrona (erros viram resultado; timeout fica com quem espera)."""
+        try:
+            tool_result = await tool.ainvoke(tool_args)
+            logger.info(f"Resultado da tool {tool.name}: {tool_result}")
+            return tool_result
+        except Exception as e:
+            logger.error(f"Erro na tool {tool.name}: {e}")
+            return {"error": str(e)}
+
+    def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[ToolMessage]:
+        """
+        Executa as tool calls de um turno em paralelo.
+
+        - Tools síncronas: uma thread do pool cada
+        - Tools assíncronas: no event loop do agente (thread própria, não
+          disputam vaga com as síncronas)
+        - Cada tool tem seu timeout, contado de quando começa a rodar (call
+          na fila do pool não perde prazo esperando vaga); a que estourar vira
+          um erro na resposta. Corrotinas são canceladas; threads não são
+          interrompidas, então o pool é trocado e as calls que ainda estavam
+          na fila vão para o pool novo
+        - As ToolMessages saem na ordem das tool calls, não na de término
+
+        Args:
+            tool_calls: tool_calls da resposta do LLM
+
+        Returns:
+            Lista de ToolMessage na ordem das tool calls
+        """
+        executor = self._get_executor()
+        inicio = time.monotonic()
+
+        results: List[Any] = [None] * len(tool_calls)
+        pending: Dict[int, Future] = {}
+        # Quando cada tool começou a rodar (síncronas: quando a thread pega a call)
+        started: Dict[int, float] = {}
+        sync_calls: Dict[int, BaseTool] = {}
+        # Calls enviadas ao pool atual (thread presa em pool já trocado não troca de novo)
+        in_pool = set()
+
+        def run_sync(pos: int, tool: BaseTool, tool_args: Dict[str, Any]) -> Any:
+            started[pos] = time.monotonic()
+            return self._invoke_tool(tool, tool_args)
+
+        for pos, tool_call in enumerate(tool_calls):
+            tool_name = tool_call["name"]
+            tool_args = tool_call["args"]
+
+            logger.info(f"Executando tool: {tool_name}({tool_args})")
+
+            tool = self._get_tool_by_name(tool_name)
+            if tool is None:
+                results[pos] = {"error": f"Tool '{tool_name}' não encontrada"}
+            elif getattr(tool, "coroutine", None) is not None:
+                started[pos] = inicio
+                pending[pos] = asyncio.run_coroutine_threadsafe(
+                    self._ainvoke_tool(tool, tool_args), self._get_loop()
+                )
+            else:
+                sync_calls[pos] = tool
+                in_pool.add(pos)
+                pending[pos] = executor.submit(run_sync, pos, tool, tool_args)
+
+        # Aguardar cada tool até o seu prazo (contado do início da execução)
+        while pending:
+            for pos in [p for p, f in pending.items() if f.done()]:
+                results[pos] = pending.pop(pos).result()
+
+            now = time.monotonic()
+            deadlines = {
+                pos: started[pos] + self._tool_timeout(tool_calls[pos]["name"])
+                for pos in pending if pos in started
+            }
+
+            stuck_threads = False
+            for pos in [p for p, d in deadlines.items() if d <= now]:
+                future = pending.pop(pos)
+                timeout = self._tool_timeout(tool_calls[pos]["name"])
+                # Corrotina: cancela a task no loop. Thread: continua presa
+                if not future.cancel() and pos in in_pool:
+                    stuck_threads = stuck_threads or not future.done()
+                logger.error(f"Tool {tool_calls[pos]['name']} excedeu {timeout}s")
+                results[pos] = {"error": f"Tool '{tool_calls[pos]['name']}' excedeu o tempo limite de {timeout}s"}
+
+            if stuck_threads:
+                logger.warning(f"Agente '{self.name}': tool síncrona presa, usando um novo pool de threads")
+                self._discard_executor(executor)
+                executor = self._get_executor()
+                in_pool = set()
+                # Calls que ainda não começaram saem da fila do pool antigo
+                for pos in [p for p in pending if p in sync_calls and p not in started]:
+                    if pending[pos].cancel():
+                        in_pool.add(pos)
+                        pending[pos] = executor.submit(run_sync, pos, sync_calls[pos], tool_calls[pos]["args"])
+
+            if not pending:
+                break
+
+            wait_for = min((d for pos, d in deadlines.items() if pos in pending), default=None)
+            wait_for = None if wait_for is None else max(0.0, wait_for - now)
+            if any(pos not in started for pos in pending):
+                # Call na fila: reavaliar logo para começar a contar o prazo dela
+                wait_for = 0.05 if wait_for is None else min(wait_for, 0.05)
+            wait(list(pending.values()), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        if len(tool_calls) > 1:
+            logger.info(f"{len(tool_calls)} tools executadas em {time.monotonic() - inicio:.2f}s")
+
+        return [
+            ToolMessage(
+                content=compact_tool_output(tool_result, self.tool_output_tokens, tool_call["name"]),
+                tool_call_id=tool_call["id"]
+            )
+            for tool_call, tool_result in zip(tool_calls, results)
+        ]
+
     def run(self, task: str) -> str:
         """
         Executa uma tarefa.
@@ -107,13 +290,19 @@ class BaseAgent:
         Returns:
             Resposta do agente
         """
+        # Histórico: mensagens recentes inteiras, antigas resumidas no prompt de sistema
+        summary, recent = compact_history(self.memory)
+        system_prompt = self.system_prompt
+        if summary:
+            system_prompt += f"\n\nRESUMO DA CONVERSA ANTERIOR:\n{summary}"
+
         # Montar mensagens
         messages = [
-            SystemMessage(content=self.system_prompt),
+            SystemMessage(content=system_prompt),
         ]
 
         # Adicionar histórico
-        for msg in self.memory[-10:]:  # Últimas 10 mensagens
+        for msg in recent:
             if msg["role"] == "user":
                 messages.append(HumanMessage(content=msg["content"]))
             else:
@@ -127,6 +316,10 @@ class BaseAgent:
             max_iterations = 5
             for _ in range(max_iterations):
                 # Chamar LLM
+                logger.debug(
+                    f"Prompt: ~{sum(estimate_tokens(str(m.content)) for m in messages)} tokens "
+                    f"em {len(messages)} mensagens"
+                )
                 response = self.llm_with_tools.invoke(messages)
 
                 # Verificar se há tool calls
@@ -134,31 +327,8 @@ class BaseAgent:
                     # Adicionar resposta do AI às mensagens
                     messages.append(response)
 
-                    # Executar cada tool call
-                    for tool_call in response.tool_calls:
-                        tool_name = tool_call["name"]
-                        tool_args = tool_call["args"]
-                        tool_id = tool_call["id"]
-
-                        logger.info(f"Executando tool: {tool_name}({tool_args})")
-
-                        # Encontrar e executar a tool
-                        tool = self._get_tool_by_name(tool_name)
-                        if tool:
-                            try:
-                                tool_result = tool.invoke(tool_args)
-                                logger.info(f"Resultado da tool {tool_name}: {tool_result}")
-                            except Exception as e:
-                                tool_result = {"error": str(e)}
-                                logger.error(f"Erro na tool {tool_name}: {e}")
-                        else:
-                            tool_result = {"error": f"Tool '{tool_name}' não encontrada"}
-
-                        # Adicionar resultado da tool às mensagens
-                        messages.append(ToolMessage(
-                            content=str(tool_result),
-                            tool_call_id=tool_id
-                        ))
+                    # Executar as tool calls do turno em paralelo
+                    messages.extend(self._execute_tool_calls(response.tool_calls))
                 else:
                     # Sem tool calls - temos a resposta final
                     break
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Compactação do Prompt dos Agentes
+
+Reduz o que vai para o LLM a cada turno (menos tokens = menos latência e custo):
+
+1. Resultados das tools: projetados para uma forma compacta e limitados
+   a um orçamento de tokens (TOOL_OUTPUT_TOKENS)
+   - Remove metadados (descricao, metadata, calculado_em, ...) e as
+     chaves internas de cada tool (TOOL_DROP_KEYS)
+   - KPIs {"valor", "formatted"} viram só o texto formatado; "x" some
+     quando existe "x_formatted"
+   - Floats arredondados; JSON compacto no lugar do repr do dict
+   - Listas cortadas (20, 10, 5, 3, 1 itens) até caber no orçamento,
+     com o marcador "... +N itens"
+2. Histórico: as últimas HISTORY_RECENT_MESSAGES mensagens vão inteiras;
+   as anteriores viram um resumo de uma linha por mensagem, limitado a
+   HISTORY_TOKENS (as mais antigas saem primeiro)
+
+Tokens são estimados por caracteres (~4 por token), sem tokenizador.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configuração (.env)
+TOOL_OUTPUT_TOKENS = int(os.getenv("TOOL_OUTPUT_TOKENS", "1500"))
+HISTORY_TOKENS = int(os.getenv("HISTORY_TOKENS", "1500"))
+HISTORY_RECENT_MESSAGES = int(os.getenv("HISTORY_RECENT_MESSAGES", "4"))
+
+# Mensagens antigas consideradas no resumo
+HISTORY_MAX_MESSAGES = 30
+
+# Caracteres por token (estimativa para português/JSON)
+CHARS_PER_TOKEN = 4
+
+# Metadados que não ajudam o LLM a responder (qualquer tool)
+DROP_KEYS = {
+    "descricao", "metadata", "_metadata", "calculated_at", "calculado_em",
+}
+
+# Chaves internas removidas só do resultado de uma tool
+TOOL_DROP_KEYS = {
+    "detect_anomalies": {"features_analisadas"},
+    "get_segments": {"cluster_id"},
+}
+
+# Tamanhos de lista tentados até o resultado caber no orçamento
+LIST_LIMITS = (20, 10, 5, 3, 1)
+
+# Tamanho de cada linha do resumo do histórico (caracteres)
+SUMMARY_LINE_CHARS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa de tokens de um texto."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _truncate_text(text: str, max_tokens: int) -> str:
+    """Corta o texto no orçamento, marcando o corte."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + " ... [truncado]"
+
+
+def compact_value(value: Any, drop_keys: Optional[set] = None) -> Any:
+    """
+    Forma compacta de um resultado (sem cortar listas).
+
+    Args:
+        value: Resultado de uma tool (dict, list, escalares)
+        drop_keys: Chaves removidas (padrão DROP_KEYS)
+
+    Returns:
+        Estrutura equivalente, sem metadados e duplicatas formatadas
+    """
+    if drop_keys is None:
+        drop_keys = DROP_KEYS
+
+    if isinstance(value, dict):
+        # KPI padrão do Analista: so o texto formatado interessa
+        if "formatted" in value and set(value) - drop_keys <= {"valor", "formatted"}:
+            return value["formatted"]
+
+        compact = {}
+        for key, item in value.items():
+            key = str(key)
+            if key in drop_keys:
+                continue
+            if key == "valor" and "formatted" in value:
+                continue
+            if f"{key}_formatted" in value:
+                continue
+            compact[key] = compact_value(item, drop_keys)
+        return compact
+
+    if isinstance(value, (list, tuple)):
+        return [compact_value(item, drop_keys) for item in value]
+
+    if isinstance(value, float):
+        return round(value, 2) if abs(value) >= 1 else round(value, 4)
+
+    # numpy e afins
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        try:
+            return compact_value(value.item(), drop_keys)
+        except (TypeError, ValueError):
+            return str(value)
+
+    return value
+
+
+def _truncate_lists(value: Any, max_items: int) -> Any:
+    """Limita todas as listas a max_items (mantendo as primeiras, que ja vem ordenadas)."""
+    if isinstance(value, dict):
+        return {key: _truncate_lists(item, max_items) for key, item in value.items()}
+
+    if isinstance(value, list):
+        items = [_truncate_lists(item, max_items) for item in value[:max_items]]
+        if len(value) > max_items:
+            items.append(f"... +{len(value) - max_items} itens")
+        return items
+
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def compact_tool_output(
+    result: Any,
+    max_tokens: int = TOOL_OUTPUT_TOKENS,
+    tool_name: Optional[str] = None
+) -> str:
+    """
+    Conteúdo da ToolMessage: resultado compacto dentro do orçamento.
+
+    Args:
+        result: Resultado da tool
+        max_tokens: Orçamento de tokens do resultado
+        tool_name: Nome da tool (aplica TOOL_DROP_KEYS)
+
+    Returns:
+        Texto (JSON compacto) a enviar ao LLM
+    """
+    if isinstance(result, str):
+        return _truncate_text(result, max_tokens)
+
+    value = compact_value(result, DROP_KEYS | TOOL_DROP_KEYS.get(tool_name, set()))
+    text = _dumps(value)
+
+    for max_items in LIST_LIMITS:
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        text = _dumps(_truncate_lists(value, max_items))
+
+    return _truncate_text(text, max_tokens)
+
+
+def compact_history(
+    memory: List[Dict[str, Any]],
+    recent: int = HISTORY_RECENT_MESSAGES,
+    max_tokens: int = HISTORY_TOKENS
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Divide o histórico em resumo (mensagens antigas) e mensagens recentes.
+
+    Args:
+        memory: Histórico do agente [{"role", "content"}]
+        recent: Mensagens mais recentes enviadas inteiras
+        max_tokens: Orçamento do resumo e de cada mensagem recente
+
+    Returns:
+        Tupla (resumo ou None, mensagens recentes)
+    """
+    recent_messages = memory[-recent:] if recent > 0 else []
+    older = memory[-(HISTORY_MAX_MESSAGES + len(recent_messages)):len(memory) - len(recent_messages)]
+
+    recent_messages = [
+        {**msg, "content": _truncate_text(str(msg["content"]), max_tokens)}
+        for msg in recent_messages
+    ]
+
+    # Resumo: uma linha por mensagem, das mais novas para as mais antigas
+    lines: List[str] = []
+    used = 0
+    for msg in reversed(older):
+        autor = "Usuário" if msg["role"] == "user" else "Assistente"
+        content = " ".join(str(msg["content"]).split())
+        if len(content) > SUMMARY_LINE_CHARS:
+            content = content[:SUMMARY_LINE_CHARS].rstrip() + "..."
+        line = f"- {autor}: {content}"
+
+        used += estimate_tokens(line) + 1
+        if used > max_tokens:
+            break
+        lines.append(line)
+
+    summary = "\n".join(reversed(lines)) if lines else None
+    return summary, recent_messages
@@ -5,6 +5,11 @@ Configurações do Agente Engenheiro de Dados
 Centraliza configurações específicas do agente.
 """
 
+import os
+from pathlib import Path
+
+from src.config import ROOT_DIR, RAW_DATA_DIR
+
 # Configurações de extração
 EXTRACTION_CONFIG = {
     # Tamanho padrão das faixas para extração por range
@@ -17,7 +22,49 @@ EXTRACTION_CONFIG = {
     "max_retries": 3,
 
     # Intervalo entre tentativas (segundos)
-    "retry_interval": 5
+    "retry_interval": 5,
+
+    # Extração por faixas com checkpoint (faixas concluídas não são refeitas)
+    "checkpoint": True,
+
+    # Idade máxima de um checkpoint para ser retomado (horas)
+    "checkpoint_max_age_hours": 24,
+
+    # Faixas extraídas em paralelo (taxa limitada pelo governador da API)
+    "range_workers": 2,
+
+    # Entidades com FINGERPRINT (estoque, produtos) só extraem faixas alteradas
+    "fingerprint": True,
+
+    # Fatos com DIMENSIONS (vendas, compras) extraem só chaves e medidas;
+    # descrições vêm das tabelas dim_* juntadas localmente
+    "star_schema": True,
+
+    # Dimensão mais velha que isso é atualizada antes de juntar a um fato (horas)
+    "dimension_max_age_hours": 24
+}
+
+# Fila de trabalho para extração por faixas em vários processos/máquinas
+# (extractors/work_queue.py)
+WORK_QUEUE_CONFIG = {
+    # extract_by_range distribui as faixas pela fila em vez de threads locais
+    "enabled": False,
+
+    # Pasta da fila (queue.db + chunks); em volume compartilhado para outras máquinas
+    "dir": Path(os.getenv("ENGINEER_QUEUE_DIR", RAW_DATA_DIR / "_queue")),
+
+    # Processos worker iniciados pelo coordenador nesta máquina (0 = só workers externos).
+    # Cada processo tem seu governador: a taxa total na API soma a de todos
+    "local_workers": 2,
+
+    # Sem renovação nesse prazo, a faixa volta para a fila (worker caiu)
+    "lease_seconds": 600,
+
+    # Tentativas por faixa antes de marcar falha
+    "max_attempts": 3,
+
+    # Intervalo de consulta da fila (segundos)
+    "poll_seconds": 2
 }
 
 # Configurações de transformação
@@ -32,7 +79,10 @@ TRANSFORMATION_CONFIG = {
     "remove_duplicates": True,
 
     # Preencher valores nulos
-    "fill_nulls": True
+    "fill_nulls": True,
+
+    # DataCleaner: "arrow" (kernels pyarrow, uma passada por coluna) ou "pandas"
+    "cleaner_backend": "arrow"
 }
 
 # Configurações de carga
@@ -47,8 +97,71 @@ LOAD_CONFIG = {
     "default_layer": "raw"
 }
 
+# Configurações do pipeline (DAG de entidades no Orchestrator)
+PIPELINE_CONFIG = {
+    # Executar como DAG (etapas de entidades diferentes se sobrepõem)
+    "parallel": True,
+
+    # Classe de recurso de cada etapa
+    "stage_resources": {
+        "extract": "api",
+        "transform": "cpu",
+        "load": "io",
+        "features": "cpu"
+    },
+
+    # Etapas simultâneas por recurso ("api" também passa pelo governador)
+    "resource_limits": {
+        "api": 2,
+        "cpu": 2,
+        "io": 2
+    }
+}
+
+# Núcleo do Scheduler (fila de próximas execuções + pool de workers)
+SCHEDULER_CONFIG = {
+    # Jobs executados ao mesmo tempo (um mesmo job nunca se sobrepõe)
+    "workers": 3,
+
+    # Janela perdida (scheduler parado, job ainda rodando):
+    # "run_once" = roda uma vez ao retomar; "skip" = espera a próxima janela
+    "catchup": "run_once",
+
+    # Atraso tolerado antes de uma execução contar como janela perdida (segundos)
+    "misfire_grace_seconds": 300,
+
+    # Estado dos jobs (jobs.json) e histórico de execuções (history.jsonl)
+    "state_dir": ROOT_DIR / "output" / "scheduler",
+
+    # Execuções mantidas no histórico
+    "history_max": 1000
+}
+
 # Configurações de agendamento
+# frequency: hourly (minute), daily (hour, minute), weekly (day, hour, minute);
+# "catchup" opcional sobrescreve SCHEDULER_CONFIG["catchup"]
 SCHEDULE_CONFIG = {
+    # Dimensões (star schema): antes dos fatos que as usam
+    "dim_parceiros": {
+        "frequency": "daily",
+        "hour": 5,
+        "minute": 30
+    },
+    "dim_produtos": {
+        "frequency": "daily",
+        "hour": 5,
+        "minute": 30
+    },
+    "dim_vendedores": {
+        "frequency": "daily",
+        "hour": 5,
+        "minute": 45
+    },
+    "dim_tipos_operacao": {
+        "frequency": "daily",
+        "hour": 5,
+        "minute": 45
+    },
     "vendedores": {
         "frequency": "weekly",
         "day": 0,  # Segunda-feira
@@ -93,5 +206,7 @@ ENTITY_LIMITS = {
     "estoque": {"id_column": "e.CODPROD", "id_max": 600000},
     "vendas": {"id_column": "c.NUNOTA", "id_max": 500000},
     "compras": {"id_column": "c.NUNOTA", "id_max": 500000},
-    "pedidos_compra": {"id_column": "c.NUNOTA", "id_max": 500000}
+    "pedidos_compra": {"id_column": "c.NUNOTA", "id_max": 500000},
+    "dim_parceiros": {"id_column": "p.CODPARC", "id_max": 100000},
+    "dim_produtos": {"id_column": "p.CODPROD", "id_max": 600000}
 }
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+DAG de Tarefas com Limite de Concorrência por Recurso
+
+Executa tarefas respeitando dependências explícitas, com um limite de
+execuções simultâneas por classe de recurso:
+
+- "api": chamadas ao Sankhya (já limitadas pelo governador da API)
+- "cpu": limpeza, mapeamento, agregados
+- "io": gravação local e upload para o Azure
+
+Uma tarefa entra em execução assim que suas dependências terminam e há vaga
+no seu recurso: a extração de uma entidade roda enquanto outra é limpa ou
+enviada, e o caminho crítico do pipeline encurta.
+
+Dependências:
+- depends_on: a tarefa só roda se todas terminaram com sucesso (senão é pulada)
+- after: só ordena (espera terminar, com ou sem sucesso)
+
+Entre as tarefas prontas, sai primeiro a que tem mais tarefas esperando por
+ela (caminho crítico) e, no empate, a de menor prioridade.
+
+Uso:
+    dag = DagRunner(limits={"api": 2, "cpu": 2, "io": 1})
+    dag.add(DagTask("vendas.extract", extrair, resource="api"))
+    dag.add(DagTask("vendas.load", carregar, resource="io", depends_on=["vendas.extract"]))
+    status = dag.run()
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DagTask:
+    """Tarefa do DAG. func() retorna algo falso para marcar falha sem exceção."""
+    name: str
+    func: Callable[[], Any]
+    resource: str = "cpu"
+    depends_on: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+    priority: int = 99
+
+
+class DagRunner:
+    """
+    Executa um DAG de tarefas com limite de concorrência por recurso.
+
+    Métodos principais:
+    - add(): Adiciona uma tarefa
+    - order(): Ordem topológica (valida dependências e ciclos)
+    - run(): Executa o DAG e retorna o status de cada tarefa
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        """
+        Args:
+            limits: Execuções simultâneas por recurso (ex: {"api": 2, "cpu": 2})
+        """
+        self.limits = {resource: max(1, n) for resource, n in limits.items()}
+        self.tasks: Dict[str, DagTask] = {}
+
+    def add(self, task: DagTask) -> None:
+        if task.name in self.tasks:
+            raise ValueError(f"Tarefa '{task.name}' duplicada no DAG")
+        self.tasks[task.name] = task
+
+    def _upstream(self, task: DagTask) -> List[str]:
+        return task.depends_on + task.after
+
+    def order(self) -> List[str]:
+        """
+        Ordem topológica das tarefas (prioridade desempata).
+
+        Raises:
+            ValueError: Dependência desconhecida ou ciclo
+        """
+        for task in self.tasks.values():
+            unknown = [d for d in self._upstream(task) if d not in self.tasks]
+            if unknown:
+                raise ValueError(f"Tarefa '{task.name}' depende de tarefas inexistentes: {unknown}")
+
+        ordered: List[str] = []
+        done = set()
+        pending = sorted(self.tasks.values(), key=lambda t: (t.priority, t.name))
+        while pending:
+            ready = [t for t in pending if all(d in done for d in self._upstream(t))]
+            if not ready:
+                raise ValueError(f"Ciclo no DAG entre: {[t.name for t in pending]}")
+            for task in ready:
+                ordered.append(task.name)
+                done.add(task.name)
+            pending = [t for t in pending if t.name not in done]
+        return ordered
+
+    def _downstream_counts(self, order: List[str]) -> Dict[str, int]:
+        """Quantas tarefas dependem (direta ou indiretamente) de cada tarefa."""
+        downstream: Dict[str, set] = {name: set() for name in self.tasks}
+        for name in reversed(order):
+            for upstream in self._upstream(self.tasks[name]):
+                downstream[upstream] |= downstream[name] | {name}
+        return {name: len(names) for name, names in downstream.items()}
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Executa o DAG.
+
+        Returns:
+            Dict {tarefa: {"status": done|failed|skipped, "duration_s", "error"}}
+
+        Raises:
+            ValueError: Dependência desconhecida, ciclo ou recurso sem limite
+        """
+        order = self.order()
+        for task in self.tasks.values():
+            if task.resource not in self.limits:
+                raise ValueError(f"Recurso '{task.resource}' sem limite (tarefa '{task.name}')")
+
+        downstream = self._downstream_counts(order)
+        rank = {
+            name: (-downstream[name], self.tasks[name].priority, i)
+            for i, name in enumerate(order)
+        }
+
+        status: Dict[str, Dict[str, Any]] = {}
+        pending = set(self.tasks)
+        running: Dict[Any, str] = {}
+        started: Dict[str, float] = {}
+        in_use = {resource: 0 for resource in self.limits}
+
+        pools = {
+            resource: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"dag-{resource}")
+            for resource, limit in self.limits.items()
+        }
+
+        try:
+            while pending or running:
+                ready = sorted(
+                    (n for n in pending if all(d in status for d in self._upstream(self.tasks[n]))),
+                    key=rank.get
+                )
+
+                for name in ready:
+                    task = self.tasks[name]
+                    failed = [d for d in task.depends_on if status[d]["status"] != "done"]
+                    if failed:
+                        logger.info(f"[DAG] {name} pulada: dependências sem sucesso {failed}")
+                        status[name] = {"status": "skipped", "duration_s": 0.0,
+                                        "error": f"Dependências sem sucesso: {', '.join(failed)}"}
+                        pending.discard(name)
+                        continue
+
+                    if in_use[task.resource] >= self.limits[task.resource]:
+                        continue
+
+                    logger.debug(f"[DAG] {name} iniciada ({task.resource})")
+                    started[name] = time.time()
+                    in_use[task.resource] += 1
+                    running[pools[task.resource].submit(task.func)] = name
+                    pending.discard(name)
+
+                if not running:
+                    # Pulos liberam novas tarefas: reavaliar antes de esperar
+                    continue
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    task = self.tasks[name]
+                    in_use[task.resource] -= 1
+                    duration = round(time.time() - started[name], 1)
+
+                    try:
+                        ok = bool(future.result())
+                        error = None if ok else "Tarefa retornou falha"
+                    except Exception as e:
+                        logger.error(f"[DAG] {name} falhou: {e}")
+                        ok, error = False, str(e)
+
+                    status[name] = {"status": "done" if ok else "failed",
+                                    "duration_s": duration, "error": error}
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        return status
@@ -12,6 +12,12 @@ from .produtos import ProdutosExtractor
 from .estoque import EstoqueExtractor
 from .vendedores import VendedoresExtractor
 from .compras import ComprasExtractor, PedidosCompraExtractor
+from .dimensoes import (
+    DimParceirosExtractor,
+    DimProdutosExtractor,
+    DimVendedoresExtractor,
+    DimTiposOperacaoExtractor,
+)
 
 __all__ = [
     'BaseExtractor',
@@ -22,4 +28,8 @@ __all__ = [
     'VendedoresExtractor',
     'ComprasExtractor',
     'PedidosCompraExtractor',
+    'DimParceirosExtractor',
+    'DimProdutosExtractor',
+    'DimVendedoresExtractor',
+    'DimTiposOperacaoExtractor',
 ]
@@ -13,7 +13,11 @@ from typing import Optional, List, Dict, Any
 
 import pandas as pd
 
-from src.utils.sankhya_client import SankhyaClient
+from src.utils.sankhya_client import SankhyaClient, SankhyaAPIError
+
+from ..config import EXTRACTION_CONFIG, WORK_QUEUE_CONFIG
+from .checkpoint import RangeCrawl
+from .fingerprint import RangeSnapshot, build_fingerprint_query
 
 logger = logging.getLogger(__name__)
 
@@ -40,12 +44,31 @@ class BaseExtractor(ABC):
 
         extractor = VendasExtractor()
         df = extractor.extract()
+
+    Entidades "foto" (posição atual) podem definir FINGERPRINT para que
+    extract_by_range só baixe as faixas que mudaram desde a última execução:
+        FINGERPRINT = {"sum": ["ESTOQUE"], "max": ["DTALTER"]}
+
+    Fatos de itens podem definir DIMENSIONS: a query (get_query(narrow=True))
+    traz só chaves e medidas, e as colunas descritivas são juntadas
+    localmente a partir das dimensões (StarSchemaBuilder):
+        DIMENSIONS = [{"dimension": "dim_produtos", "key": "CODPROD",
+                       "columns": {"DESCRPROD": "DESCRPROD"}}]
     """
 
+    # Colunas da impressão por faixa (None = sempre extrair todas as faixas)
+    FINGERPRINT: Optional[Dict[str, List[str]]] = None
+
+    # Joins com dimensões (vazio = a query já traz as descrições)
+    DIMENSIONS: List[Dict[str, Any]] = []
+
     def __init__(self):
         """Inicializa o extractor com cliente Sankhya."""
         self._client: Optional[SankhyaClient] = None
         self._authenticated = False
+        self.last_crawl: Optional[RangeCrawl] = None
+        self.last_refresh: Optional[Dict[str, Any]] = None
+        self._star = None
 
     @property
     def nome(self) -> str:
@@ -56,7 +79,10 @@ class BaseExtractor(ABC):
     def client(self) -> SankhyaClient:
         """Retorna cliente Sankhya, criando se necessário."""
         if self._client is None:
-            self._client = SankhyaClient()
+            self._client = SankhyaClient(
+                max_retries=EXTRACTION_CONFIG["max_retries"],
+                retry_interval=EXTRACTION_CONFIG["retry_interval"]
+            )
         return self._client
 
     @abstractmethod
@@ -90,6 +116,39 @@ class BaseExtractor(ABC):
                 logger.error(f"[{self.get_entity_name()}] Falha na autenticação")
         return self._authenticated
 
+    def get_narrow_columns(self) -> List[str]:
+        """Colunas da query estreita (sem as que vêm das dimensões)."""
+        from_dimensions = {col for join in self.DIMENSIONS for col in join["columns"]}
+        return [col for col in self.get_columns() if col not in from_dimensions]
+
+    def _query_columns(self, kwargs: Dict[str, Any]) -> List[str]:
+        return self.get_narrow_columns() if kwargs.get("narrow") else self.get_columns()
+
+    def _load_dimensions(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Dimensões para a extração estreita.
+
+        Returns:
+            Dict de dimensões, ou None para extrair largo (sem DIMENSIONS,
+            star schema desligado ou dimensão indisponível)
+        """
+        if not self.DIMENSIONS or not EXTRACTION_CONFIG.get("star_schema", False):
+            return None
+
+        from ..transformers.star_schema import StarSchemaBuilder
+
+        if self._star is None:
+            self._star = StarSchemaBuilder()
+        dimensions = self._star.get_dimensions(self.DIMENSIONS)
+        if dimensions is None:
+            logger.warning(f"[{self.get_entity_name()}] Dimensões indisponíveis, extraindo com JOINs no ERP")
+        return dimensions
+
+    def _denormalize(self, df: pd.DataFrame, dimensions: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Junta as dimensões ao fato estreito (mesmas colunas da query larga)."""
+        df = self._star.denormalize(df, self.DIMENSIONS, dimensions)
+        return df[self.get_columns()]
+
     def extract(
         self,
         data_inicio: Optional[str] = None,
@@ -109,8 +168,23 @@ class BaseExtractor(ABC):
         Returns:
             DataFrame com os dados extraídos (vazio se erro)
         """
+        dimensions = self._load_dimensions()
+        if dimensions is None:
+            return self._extract(data_inicio, data_fim, limit, **kwargs)
+
+        df = self._extract(data_inicio, data_fim, limit, narrow=True, **kwargs)
+        return self._denormalize(df, dimensions)
+
+    def _extract(
+        self,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        limit: Optional[int] = None,
+        **kwargs
+    ) -> pd.DataFrame:
+        """Extração numa query só (larga ou estreita, conforme kwargs["narrow"])."""
         entity = self.get_entity_name()
-        columns = self.get_columns()
+        columns = self._query_columns(kwargs)
 
         logger.info(f"[{entity}] Iniciando extração...")
 
@@ -165,6 +239,17 @@ class BaseExtractor(ABC):
         """
         Extrai dados em faixas para contornar limite da API (5000 registros).
 
+        Cada faixa é repetida pelo governador de chamadas (backoff, circuit
+        breaker). Se ainda assim falhar, a extração é interrompida: pular a
+        faixa deixaria um buraco silencioso nos dados.
+
+        Com EXTRACTION_CONFIG["checkpoint"], cada faixa concluída fica em
+        staging (RangeCrawl): rodar de novo após uma falha refaz só as faixas
+        pendentes. Depois de gravar o resultado, chamar commit_checkpoint().
+
+        Com WORK_QUEUE_CONFIG["enabled"], as faixas são executadas por
+        processos worker (locais e de outras máquinas) via fila com lease.
+
         Args:
             id_column: Nome da coluna de ID para filtrar (ex: 'CODPROD')
             id_max: Valor máximo do ID
@@ -173,52 +258,186 @@ class BaseExtractor(ABC):
 
         Returns:
             DataFrame consolidado com todos os dados
+
+        Raises:
+            SankhyaAPIError: Se uma faixa falhar após as tentativas
         """
+        dimensions = self._load_dimensions()
+        if dimensions is None:
+            return self._extract_by_range(id_column, id_max, range_size, **kwargs)
+
+        df = self._extract_by_range(id_column, id_max, range_size, narrow=True, **kwargs)
+        return self._denormalize(df, dimensions)
+
+    def _extract_by_range(
+        self,
+        id_column: str,
+        id_max: int,
+        range_size: int,
+        **kwargs
+    ) -> pd.DataFrame:
+        """Extração por faixas (larga ou estreita, conforme kwargs["narrow"])."""
         entity = self.get_entity_name()
-        columns = self.get_columns()
+        columns = self._query_columns(kwargs)
 
         logger.info(f"[{entity}] Extração por faixas (0 a {id_max}, step {range_size})")
 
         if not self._ensure_authenticated():
             return pd.DataFrame(columns=columns)
 
-        all_dfs = []
-        id_start = 0
-        total = 0
+        checkpoint = EXTRACTION_CONFIG.get("checkpoint", False)
+        kwargs.pop("id_range", None)
+
+        def fetch(id_start: int, id_end: int) -> pd.DataFrame:
+            query = self.get_query(id_range=(id_column, id_start, id_end), **kwargs)
+            result = self.client.executar_query(query, timeout=180, strict=True)
+            return pd.DataFrame((result or {}).get("rows") or [], columns=columns)
+
+        if self.FINGERPRINT is not None and EXTRACTION_CONFIG.get("fingerprint", False):
+            return self._extract_changed_ranges(fetch, id_column, id_max, range_size, **kwargs)
+
+        def task(id_start: int, id_end: int) -> Dict[str, Any]:
+            # Mesma query de fetch(), executada por um worker da fila
+            return {
+                "query": self.get_query(id_range=(id_column, id_start, id_end), **kwargs),
+                "columns": columns,
+            }
+
+        work_queue = None
+        if WORK_QUEUE_CONFIG.get("enabled", False):
+            from .work_queue import WorkQueue
+
+            work_queue = WorkQueue()
+
+        crawl = RangeCrawl(
+            entity,
+            fetch=fetch,
+            id_max=id_max,
+            range_size=range_size,
+            params={"query": self.get_query(id_range=(id_column, 0, 0), **kwargs)},
+            # Sem checkpoint, staging de execuções anteriores nunca é retomado
+            max_age_hours=EXTRACTION_CONFIG.get("checkpoint_max_age_hours", 24) if checkpoint else 0,
+            task=task,
+            work_queue=work_queue
+        )
+        resultado = crawl.run()
+
+        if not resultado["success"]:
+            failed = resultado["failed"]
+            logger.error(
+                f"[{entity}] {len(failed)} faixas falharam, extração interrompida "
+                f"(as concluídas ficam em {resultado['staging']})"
+            )
+            if not checkpoint:
+                crawl.cleanup()
+            raise SankhyaAPIError(f"[{entity}] Faixas com falha: {', '.join(failed[:5])}")
+
+        df = crawl.load(columns=columns)
+        if checkpoint:
+            self.last_crawl = crawl
+        else:
+            crawl.cleanup()
+
+        if df.empty:
+            logger.warning(f"[{entity}] Nenhum dado extraído")
+            return df
 
-        while id_start <= id_max:
-            id_end = id_start + range_size
+        logger.info(
+            f"[{entity}] Total extraído: {len(df)} registros "
+            f"({resultado['skipped']} faixas reaproveitadas do checkpoint)"
+        )
 
-            # Adicionar filtro de faixa aos kwargs
-            kwargs['id_range'] = (id_column, id_start, id_end)
+        return df
 
-            query = self.get_query(**kwargs)
+    def get_fingerprints(self, id_column: str, range_size: int, **kwargs) -> Dict[int, List[Any]]:
+        """
+        Impressão de cada faixa numa única query agrupada.
 
-            try:
-                result = self.client.executar_query(query, timeout=180)
-            except Exception as e:
-                logger.warning(f"[{entity}] Erro na faixa {id_start}-{id_end}: {e}")
-                id_start = id_end
-                continue
+        Args:
+            id_column: Coluna de ID das faixas
+            range_size: Tamanho de cada faixa
+            **kwargs: Parâmetros da query
 
-            if result and result.get("rows"):
-                rows = result["rows"]
-                df_range = pd.DataFrame(rows, columns=columns)
-                all_dfs.append(df_range)
-                total += len(rows)
-                logger.debug(f"[{entity}] Faixa {id_start}-{id_end}: +{len(rows)} (total: {total})")
+        Returns:
+            {início da faixa: [QTD, somas..., máximos..., HASH]} (faixas vazias ficam de fora)
 
-            id_start = id_end
+        Raises:
+            SankhyaAPIError: Se a query falhar
+        """
+        query = build_fingerprint_query(
+            self.get_query(**kwargs),
+            id_column,
+            range_size,
+            self._query_columns(kwargs),
+            sums=self.FINGERPRINT.get("sum"),
+            maxes=self.FINGERPRINT.get("max")
+        )
+        result = self.client.executar_query(query, timeout=300, strict=True)
+        return {
+            int(float(row[0])) * range_size: list(row[1:])
+            for row in (result or {}).get("rows") or []
+        }
 
-        if not all_dfs:
-            logger.warning(f"[{entity}] Nenhum dado extraído")
-            return pd.DataFrame(columns=columns)
+    def _extract_changed_ranges(
+        self,
+        fetch,
+        id_column: str,
+        id_max: int,
+        range_size: int,
+        **kwargs
+    ) -> pd.DataFrame:
+        """
+        Atualiza o snapshot local só nas faixas cuja impressão mudou.
 
-        df = pd.concat(all_dfs, ignore_index=True)
-        logger.info(f"[{entity}] Total extraído: {len(df)} registros")
+        Se a query de impressões falhar, todas as faixas são extraídas.
+
+        Raises:
+            SankhyaAPIError: Se uma faixa alterada falhar após as tentativas
+        """
+        entity = self.get_entity_name()
+        columns = self._query_columns(kwargs)
+
+        snapshot = RangeSnapshot(
+            entity,
+            fetch=fetch,
+            fingerprint=lambda: self.get_fingerprints(id_column, range_size, **kwargs),
+            id_max=id_max,
+            range_size=range_size,
+            params={"query": self.get_query(id_range=(id_column, 0, 0), **kwargs)}
+        )
 
+        try:
+            resultado = snapshot.refresh()
+        except SankhyaAPIError as e:
+            logger.warning(f"[{entity}] Impressões indisponíveis ({e}), extraindo todas as faixas")
+            snapshot.fingerprint = lambda: {}
+            resultado = snapshot.refresh(full=True)
+
+        self.last_refresh = resultado
+
+        if not resultado["success"]:
+            failed = resultado["failed"]
+            logger.error(f"[{entity}] {len(failed)} faixas alteradas falharam, snapshot incompleto")
+            raise SankhyaAPIError(f"[{entity}] Faixas com falha: {', '.join(failed[:5])}")
+
+        df = snapshot.load(columns=columns)
+        logger.info(
+            f"[{entity}] Snapshot: {len(df)} registros "
+            f"({resultado['changed']} faixas extraídas, {resultado['reused']} reaproveitadas)"
+        )
         return df
 
+    def commit_checkpoint(self) -> None:
+        """
+        Descarta o staging da última extração por faixas.
+
+        Chamar depois que o resultado foi gravado no Data Lake; até lá, uma
+        nova execução reaproveita as faixas já extraídas.
+        """
+        if self.last_crawl is not None:
+            self.last_crawl.cleanup()
+            self.last_crawl = None
+
     def get_metadata(self) -> Dict[str, Any]:
         """
         Retorna metadados da extração.
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+Extração por Faixas com Checkpoint
+
+Extrações longas por faixa de ID (vendas por NUNOTA, produtos/estoque por
+CODPROD) não recomeçam do zero após uma queda ou timeout:
+
+- Cada faixa concluída vira um chunk Parquet próprio na área de staging
+  (gravação atômica: arquivo temporário + os.replace)
+- Um manifesto (manifest.json) registra o status de cada faixa
+  (done / failed, registros, erro)
+- Rodar de novo com os mesmos parâmetros pula as faixas concluídas e
+  repete só as pendentes e as que falharam
+- No fim, os chunks são lidos em ordem (load) ou gravados atomicamente
+  no destino (commit), e o staging é apagado
+
+Staging em RAW_DATA_DIR/_staging/<entidade>/<chave>/, onde a chave é o
+hash dos parâmetros da extração (query, coluna, faixas). Staging mais
+antigo que EXTRACTION_CONFIG["checkpoint_max_age_hours"] é descartado; o de
+outras chaves da entidade só sai quando o manifesto dele também passou da
+idade (extrações simultâneas com parâmetros diferentes não se apagam).
+
+Com `work_queue` (e `task`), as faixas pendentes são executadas por
+processos worker via fila com lease (work_queue.py) em vez de threads
+locais; os chunks concluídos entram no mesmo manifesto.
+
+Uso:
+    crawl = RangeCrawl("vendas", fetch=buscar_faixa, id_max=2_000_000, range_size=10_000,
+                       params={"query": query_template})
+    resultado = crawl.run()          # retomável (reset=True recomeça)
+    if resultado["success"]:
+        crawl.commit(RAW_DATA_DIR / "vendas" / "vendas.parquet")
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.config import RAW_DATA_DIR
+
+from ..config import EXTRACTION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = RAW_DATA_DIR / "_staging"
+
+
+def write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    """Grava JSON sem deixar arquivo pela metade (temporário + os.replace)."""
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def write_parquet_atomic(df: pd.DataFrame, path: Path) -> None:
+    """Grava Parquet sem deixar arquivo pela metade (temporário + os.replace)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        df.to_parquet(tmp, index=False, engine="pyarrow")
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class RangeCrawl:
+    """
+    Percorre faixas de ID gravando cada uma como chunk, com retomada.
+
+    Métodos principais:
+    - run(): Extrai as faixas pendentes/falhas e retorna o resumo
+    - load(): DataFrame com todos os chunks (em ordem de faixa)
+    - commit(): Grava os chunks atomicamente no destino e limpa o staging
+    - cleanup(): Apaga o staging
+    """
+
+    def __init__(
+        self,
+        entity: str,
+        fetch: Callable[[int, int], pd.DataFrame],
+        id_max: int,
+        range_size: int,
+        params: Optional[Dict[str, Any]] = None,
+        id_min: int = 0,
+        max_workers: int = EXTRACTION_CONFIG.get("range_workers", 1),
+        max_age_hours: float = EXTRACTION_CONFIG.get("checkpoint_max_age_hours", 24),
+        staging_dir: Optional[Path] = None,
+        task: Optional[Callable[[int, int], Dict[str, Any]]] = None,
+        work_queue: Optional[Any] = None
+    ):
+        """
+        Args:
+            entity: Nome da entidade (pasta do staging)
+            fetch: Função (inicio, fim) -> DataFrame da faixa [inicio, fim); levanta exceção em erro
+            id_max: Maior ID esperado
+            range_size: Tamanho de cada faixa
+            params: Parâmetros que definem a extração (query, filtros); mudam a chave do staging
+            id_min: Primeiro ID
+            max_workers: Faixas extraídas em paralelo (o governador da API limita a taxa)
+            max_age_hours: Idade máxima de um staging para ser retomado
+            staging_dir: Pasta base do staging (padrão RAW_DATA_DIR/_staging)
+            task: Função (inicio, fim) -> tarefa serializável {"query", "columns"} para workers da fila
+            work_queue: WorkQueue para executar as faixas em outros processos (exige task)
+        """
+        self.entity = entity
+        self.fetch = fetch
+        self.id_min = id_min
+        self.id_max = id_max
+        self.range_size = range_size
+        self.max_workers = max(1, max_workers)
+        self.max_age_hours = max_age_hours
+        self.task = task
+        self.work_queue = work_queue
+
+        signature = json.dumps(
+            {"params": params or {}, "id_min": id_min, "id_max": id_max, "range_size": range_size},
+            sort_keys=True, default=str
+        )
+        self.key = hashlib.sha1(signature.encode("utf-8")).hexdigest()[:12]
+        self.entity_dir = Path(staging_dir or STAGING_DIR) / entity
+        self.stage_dir = self.entity_dir / self.key
+        self.manifest_file = self.stage_dir / "manifest.json"
+
+        self._lock = threading.Lock()
+        self.manifest: Dict[str, Any] = {}
+
+    # =========================================================================
+    # MANIFESTO
+    # =========================================================================
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        """Faixas [inicio, fim) cobrindo id_min..id_max."""
+        return [
+            (start, start + self.range_size)
+            for start in range(self.id_min, self.id_max + 1, self.range_size)
+        ]
+
+    @staticmethod
+    def _range_id(start: int, end: int) -> str:
+        return f"{start:010d}-{end:010d}"
+
+    def _manifest_age_hours(self, stage_dir: Path) -> float:
+        """Horas desde a última gravação do manifesto (ou da pasta, se não houver)."""
+        try:
+            with open(stage_dir / "manifest.json", "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            updated = datetime.fromisoformat(manifest.get("updated_at") or manifest["created_at"])
+        except (OSError, ValueError, KeyError):
+            try:
+                updated = datetime.fromtimestamp(stage_dir.stat().st_mtime)
+            except OSError:
+                return 0.0
+        return (datetime.now() - updated).total_seconds() / 3600
+
+    def _discard_stale(self) -> None:
+        """Apaga staging de outras chaves da entidade parado há mais de max_age_hours."""
+        if not self.entity_dir.exists():
+            return
+        for stage_dir in self.entity_dir.iterdir():
+            if not stage_dir.is_dir() or stage_dir == self.stage_dir:
+                continue
+            age_hours = self._manifest_age_hours(stage_dir)
+            if age_hours > self.max_age_hours:
+                logger.info(f"[{self.entity}] Staging antigo {stage_dir.name} ({age_hours:.1f}h) descartado")
+                shutil.rmtree(stage_dir, ignore_errors=True)
+
+    def _prepare(self, reset: bool = False) -> None:
+        """Carrega o manifesto existente ou cria um novo (descartando staging antigo)."""
+        self.manifest = {}
+        if self.manifest_file.exists() and not reset:
+            try:
+                with open(self.manifest_file, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                created = datetime.fromisoformat(manifest["created_at"])
+                age_hours = (datetime.now() - created).total_seconds() / 3600
+                if age_hours <= self.max_age_hours:
+                    self.manifest = manifest
+                else:
+                    logger.info(f"[{self.entity}] Checkpoint com {age_hours:.1f}h descartado")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"[{self.entity}] Manifesto inválido, recomeçando: {e}")
+
+        if not self.manifest:
+            # Só o staging desta chave; outras chaves podem estar em execução
+            if self.stage_dir.exists():
+                shutil.rmtree(self.stage_dir)
+            self._discard_stale()
+            self.stage_dir.mkdir(parents=True, exist_ok=True)
+            self.manifest = {
+                "entity": self.entity,
+                "key": self.key,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "id_min": self.id_min,
+                "id_max": self.id_max,
+                "range_size": self.range_size,
+                "ranges": {},
+            }
+            self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        with self._lock:
+            self.manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+            write_json_atomic(self.manifest_file, self.manifest)
+
+    def _mark(self, range_id: str, **info) -> None:
+        with self._lock:
+            self.manifest["ranges"][range_id] = {**info, "ts": datetime.now().isoformat(timespec="seconds")}
+        self._save_manifest()
+
+    # =========================================================================
+    # EXECUÇÃO
+    # =========================================================================
+
+    def _run_range(self, start: int, end: int) -> Tuple[str, int]:
+        range_id = self._range_id(start, end)
+        try:
+            df = self.fetch(start, end)
+        except Exception as e:
+            logger.warning(f"[{self.entity}] Faixa {start}-{end} falhou: {e}")
+            self._mark(range_id, status="failed", error=str(e))
+            return "failed", 0
+
+        chunk = None
+        if df is not None and not df.empty:
+            chunk = f"chunk_{range_id}.parquet"
+            write_parquet_atomic(df, self.stage_dir / chunk)
+
+        rows = 0 if df is None else len(df)
+        # Manifesto depois do chunk: "done" sempre aponta para arquivo completo
+        self._mark(range_id, status="done", rows=rows, file=chunk)
+        logger.debug(f"[{self.entity}] Faixa {start}-{end}: +{rows}")
+        return "done", rows
+
+    def _adopt(self, outcome: Dict[str, Any]) -> Tuple[str, int]:
+        """Registra uma faixa executada por um worker da fila (move o chunk para o staging)."""
+        range_id = outcome["task_id"]
+        if outcome["status"] != "done":
+            logger.warning(f"[{self.entity}] Faixa {range_id} falhou na fila: {outcome.get('error')}")
+            self._mark(range_id, status="failed", error=outcome.get("error"))
+            return "failed", 0
+
+        chunk = None
+        if outcome.get("file"):
+            chunk = f"chunk_{range_id}.parquet"
+            source, target = Path(outcome["file"]), self.stage_dir / chunk
+            try:
+                os.replace(source, target)
+            except OSError:
+                # Fila em outro volume: copia para temporário e troca de uma vez
+                tmp = target.with_name(f".{chunk}.tmp")
+                shutil.copyfile(source, tmp)
+                os.replace(tmp, target)
+                source.unlink()
+
+        self._mark(range_id, status="done", rows=outcome["rows"], file=chunk)
+        return "done", outcome["rows"]
+
+    def _run_queue(self, pending: List[Tuple[int, int]]):
+        """Executa as faixas pela fila de trabalho (resultados conforme terminam)."""
+        tasks = {self._range_id(s, e): self.task(s, e) for s, e in pending}
+        logger.info(f"[{self.entity}] {len(tasks)} faixas enviadas para a fila de trabalho")
+        for outcome in self.work_queue.map(f"{self.entity}-{self.key}", tasks):
+            yield self._adopt(outcome)
+
+    def run(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Extrai as faixas ainda não concluídas.
+
+        Args:
+            reset: Ignorar o checkpoint e extrair todas as faixas
+
+        Returns:
+            Resumo: faixas totais, puladas (já concluídas), extraídas, falhas, registros
+        """
+        inicio = time.time()
+        self._prepare(reset)
+
+        done = {rid for rid, info in self.manifest["ranges"].items() if info.get("status") == "done"}
+        pending = [(s, e) for s, e in self.ranges() if self._range_id(s, e) not in done]
+
+        if done:
+            logger.info(f"[{self.entity}] Retomando extração: {len(done)} faixas já concluídas, {len(pending)} pendentes")
+
+        failed = 0
+        rows = 0
+        if pending and self.work_queue is not None and self.task is not None:
+            for status, n in self._run_queue(pending):
+                rows += n
+                failed += status == "failed"
+        elif pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self._run_range, s, e) for s, e in pending]
+                for future in as_completed(futures):
+                    status, n = future.result()
+                    rows += n
+                    failed += status == "failed"
+
+        total_rows = sum(info.get("rows", 0) for info in self.manifest["ranges"].values() if info.get("status") == "done")
+        failed_ranges = sorted(rid for rid, info in self.manifest["ranges"].items() if info.get("status") == "failed")
+
+        return {
+            "success": not failed_ranges,
+            "entity": self.entity,
+            "ranges": len(self.ranges()),
+            "skipped": len(done),
+            "extracted": len(pending) - failed,
+            "failed": failed_ranges,
+            "rows": total_rows,
+            "new_rows": rows,
+            "duration_s": round(time.time() - inicio, 1),
+            "staging": str(self.stage_dir),
+        }
+
+    # =========================================================================
+    # RESULTADO
+    # =========================================================================
+
+    def _chunk_files(self) -> List[Path]:
+        return [
+            self.stage_dir / info["file"]
+            for _, info in sorted(self.manifest.get("ranges", {}).items())
+            if info.get("status") == "done" and info.get("file")
+        ]
+
+    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Junta os chunks concluídos (em ordem de faixa).
+
+        Args:
+            columns: Colunas do DataFrame vazio, se não houver chunks
+        """
+        files = self._chunk_files()
+        if not files:
+            return pd.DataFrame(columns=columns)
+        return pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+
+    def commit(
+        self,
+        target: Path,
+        transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+    ) -> Dict[str, Any]:
+        """
+        Grava todos os chunks no destino de forma atômica e limpa o staging.
+
+        Args:
+            target: Arquivo Parquet de destino (substituído de uma vez)
+            transform: Ajuste opcional antes de gravar (ex.: conversão de datas)
+
+        Returns:
+            Dict com caminho, registros e tamanho
+        """
+        failed = [rid for rid, info in self.manifest.get("ranges", {}).items() if info.get("status") != "done"]
+        if failed or len(self.manifest.get("ranges", {})) < len(self.ranges()):
+            return {"success": False, "error": f"Extração incompleta ({len(failed)} faixas com falha)"}
+
+        df = self.load()
+        if transform is not None:
+            df = transform(df)
+
+        target = Path(target)
+        write_parquet_atomic(df, target)
+        self.cleanup()
+
+        return {
+            "success": True,
+            "path": str(target),
+            "records": len(df),
+            "size_mb": round(target.stat().st_size / (1024 * 1024), 2),
+        }
+
+    def cleanup(self) -> None:
+        """Apaga o staging desta extração."""
+        if self.stage_dir.exists():
+            shutil.rmtree(self.stage_dir)
+        try:
+            if self.entity_dir.exists() and not any(self.entity_dir.iterdir()):
+                self.entity_dir.rmdir()
+        except OSError:
+            # Outra extração da entidade criou staging nesse meio tempo
+            pass
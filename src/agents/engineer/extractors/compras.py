@@ -29,6 +29,16 @@ class ComprasExtractor(BaseExtractor):
         df = extractor.extract(data_inicio="2026-01-01", tipo_mov="O")
     """
 
+    # Descricoes montadas localmente (star schema) em vez de JOIN por item
+    DIMENSIONS = [
+        {"dimension": "dim_parceiros", "key": "CODPARC", "columns": {"NOMEPARC": "NOMEPARC"}},
+        {"dimension": "dim_parceiros", "key": "CODCOMPRADOR", "dim_key": "CODPARC",
+         "columns": {"NOMECOMPRADOR": "NOMEPARC"}},
+        {"dimension": "dim_tipos_operacao", "key": "CODTIPOPER", "columns": {"DESCROPER": "DESCROPER"}},
+        {"dimension": "dim_produtos", "key": "CODPROD",
+         "columns": {"DESCRPROD": "DESCRPROD", "REFERENCIA": "REFERENCIA"}},
+    ]
+
     def get_entity_name(self) -> str:
         return "compras"
 
@@ -74,6 +84,7 @@ class ComprasExtractor(BaseExtractor):
         tipo_mov: str = "C",
         apenas_pendentes: bool = False,
         id_range: Optional[tuple] = None,
+        narrow: bool = False,
         **kwargs
     ) -> str:
         """
@@ -87,8 +98,39 @@ class ComprasExtractor(BaseExtractor):
             tipo_mov: 'C' para compras, 'O' para pedidos (default: 'C')
             apenas_pendentes: Se True, retorna apenas itens pendentes
             id_range: Tupla (coluna, inicio, fim) para extracao por faixas
+            narrow: So chaves e medidas (sem JOINs de cadastro; ver DIMENSIONS)
         """
-        query = """
+        if narrow:
+            query = """
+        SELECT
+            c.NUNOTA,
+            c.NUMNOTA,
+            c.CODEMP,
+            c.CODPARC,
+            c.DTNEG,
+            c.DTENTSAI,
+            c.DTFATUR,
+            c.VLRNOTA,
+            c.PENDENTE,
+            c.STATUSNOTA,
+            c.TIPMOV,
+            c.CODTIPOPER,
+            c.CODCOMPRADOR,
+            i.SEQUENCIA,
+            i.CODPROD,
+            i.QTDNEG,
+            i.QTDENTREGUE,
+            i.VLRUNIT,
+            i.VLRTOT,
+            i.VLRDESC,
+            i.CODLOCALDESTINO,
+            i.CONTROLE
+        FROM TGFCAB c
+        INNER JOIN TGFITE i ON i.NUNOTA = c.NUNOTA
+        WHERE c.TIPMOV = '{tipo_mov}'
+        """.format(tipo_mov=tipo_mov)
+        else:
+            query = """
         SELECT
             c.NUNOTA,
             c.NUMNOTA,
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Extractors de Dimensões (star schema)
+
+Tabelas estreitas (chave + descrição) usadas para montar localmente os nomes
+que os fatos (vendas, compras) antes traziam por JOIN em cada linha de item:
+
+- dim_parceiros: TGFPAR (CODPARC, NOMEPARC) - clientes, fornecedores, compradores
+- dim_produtos: TGFPRO (CODPROD, DESCRPROD, REFERENCIA)
+- dim_vendedores: TGFVEN (CODVEND, APELIDO)
+- dim_tipos_operacao: TGFTOP, versão mais recente de cada CODTIPOPER
+
+Sem filtros de ativo: um fato antigo pode apontar para um cadastro inativo.
+Todas aceitam `codigos` para buscar só membros específicos (membros novos
+que ainda não estão na dimensão do Data Lake).
+"""
+
+from typing import Optional, List
+
+from .base import BaseExtractor
+
+
+def _filtro_codigos(coluna: str, codigos: Optional[List[int]]) -> str:
+    """Filtro IN para membros específicos (até 1000 por query no Oracle)."""
+    if not codigos:
+        return ""
+    lista = ", ".join(str(int(c)) for c in codigos)
+    return f"\n  AND {coluna} IN ({lista})"
+
+
+class DimParceirosExtractor(BaseExtractor):
+    """Dimensão de parceiros (TGFPAR)."""
+
+    KEY = "CODPARC"
+
+    # Impressão só pelo hash das linhas (nomes mudam sem alterar quantidades)
+    FINGERPRINT = {}
+
+    def get_entity_name(self) -> str:
+        return "dim_parceiros"
+
+    def get_columns(self) -> List[str]:
+        return ["CODPARC", "NOMEPARC"]
+
+    def get_query(
+        self,
+        id_range: Optional[tuple] = None,
+        codigos: Optional[List[int]] = None,
+        **kwargs
+    ) -> str:
+        query = """
+        SELECT p.CODPARC, p.NOMEPARC
+        FROM TGFPAR p
+        WHERE 1=1
+        """
+
+        if id_range:
+            col, start, end = id_range
+            query += f"\n  AND {col} >= {start} AND {col} < {end}"
+
+        query += _filtro_codigos("p.CODPARC", codigos)
+        query += "\nORDER BY p.CODPARC"
+
+        return query
+
+
+class DimProdutosExtractor(BaseExtractor):
+    """Dimensão de produtos (TGFPRO)."""
+
+    KEY = "CODPROD"
+
+    FINGERPRINT = {}
+
+    def get_entity_name(self) -> str:
+        return "dim_produtos"
+
+    def get_columns(self) -> List[str]:
+        return ["CODPROD", "DESCRPROD", "REFERENCIA"]
+
+    def get_query(
+        self,
+        id_range: Optional[tuple] = None,
+        codigos: Optional[List[int]] = None,
+        **kwargs
+    ) -> str:
+        query = """
+        SELECT p.CODPROD, p.DESCRPROD, p.REFERENCIA
+        FROM TGFPRO p
+        WHERE 1=1
+        """
+
+        if id_range:
+            col, start, end = id_range
+            query += f"\n  AND {col} >= {start} AND {col} < {end}"
+
+        query += _filtro_codigos("p.CODPROD", codigos)
+        query += "\nORDER BY p.CODPROD"
+
+        return query
+
+
+class DimVendedoresExtractor(BaseExtractor):
+    """Dimensão de vendedores/compradores (TGFVEN)."""
+
+    KEY = "CODVEND"
+
+    def get_entity_name(self) -> str:
+        return "dim_vendedores"
+
+    def get_columns(self) -> List[str]:
+        return ["CODVEND", "APELIDO"]
+
+    def get_query(self, codigos: Optional[List[int]] = None, **kwargs) -> str:
+        query = """
+        SELECT v.CODVEND, v.APELIDO
+        FROM TGFVEN v
+        WHERE 1=1
+        """
+        query += _filtro_codigos("v.CODVEND", codigos)
+        query += "\nORDER BY v.CODVEND"
+
+        return query
+
+
+class DimTiposOperacaoExtractor(BaseExtractor):
+    """Dimensão de tipos de operação (TGFTOP, versão mais recente)."""
+
+    KEY = "CODTIPOPER"
+
+    def get_entity_name(self) -> str:
+        return "dim_tipos_operacao"
+
+    def get_columns(self) -> List[str]:
+        return ["CODTIPOPER", "DESCROPER"]
+
+    def get_query(self, codigos: Optional[List[int]] = None, **kwargs) -> str:
+        query = """
+        SELECT t.CODTIPOPER, t.DESCROPER
+        FROM (
+            SELECT CODTIPOPER, DESCROPER,
+                   ROW_NUMBER() OVER (PARTITION BY CODTIPOPER ORDER BY DHALTER DESC) AS RN
+            FROM TGFTOP
+        ) t
+        WHERE t.RN = 1
+        """
+        query += _filtro_codigos("t.CODTIPOPER", codigos)
+        query += "\nORDER BY t.CODTIPOPER"
+
+        return query
@@ -13,6 +13,9 @@ from .base import BaseExtractor
 class EstoqueExtractor(BaseExtractor):
     """Extrai dados de estoque do Sankhya."""
 
+    # TGFEST não tem data de alteração: quantidades + hash das linhas
+    FINGERPRINT = {"sum": ["ESTOQUE", "RESERVADO"]}
+
     def get_entity_name(self) -> str:
         return "estoque"
 
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot por Faixas com Detecção de Mudanças
+
+Para entidades que são uma "foto" do ERP (estoque, produtos), a extração
+horária não precisa baixar a tabela inteira: a maioria das faixas de ID não
+muda entre uma execução e outra.
+
+- Pré-passo barato: uma única query agrupada por faixa devolve a impressão
+  digital de cada faixa (COUNT, SUMs de quantidades, MAX de datas de
+  alteração, soma de ORA_HASH das linhas)
+- Faixas com impressão igual à da execução anterior são reaproveitadas do
+  snapshot local; só as que mudaram são extraídas de novo
+- Cada faixa é um chunk Parquet; a impressão só é gravada depois do chunk,
+  então uma faixa que falhou continua "diferente" e é refeita na próxima
+
+A impressão é tirada antes da extração: se a faixa mudar no meio, a
+próxima execução vê a diferença e a extrai de novo (nunca fica defasada).
+
+Snapshot em RAW_DATA_DIR/_snapshots/<entidade>/<chave>/, onde a chave é o
+hash dos parâmetros da query. Parâmetros novos descartam o snapshot anterior.
+
+Uso:
+    snapshot = RangeSnapshot("estoque", fetch=buscar_faixa, fingerprint=impressoes,
+                             id_max=600_000, range_size=5_000, params={"query": query})
+    resultado = snapshot.refresh()
+    df = snapshot.load()
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.config import RAW_DATA_DIR
+
+from ..config import EXTRACTION_CONFIG
+from .checkpoint import write_json_atomic, write_parquet_atomic
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = RAW_DATA_DIR / "_snapshots"
+
+
+def build_fingerprint_query(
+    query: str,
+    id_column: str,
+    range_size: int,
+    columns: List[str],
+    sums: Optional[List[str]] = None,
+    maxes: Optional[List[str]] = None
+) -> str:
+    """
+    Query que resume a extração por faixa de ID (uma linha por faixa).
+
+    Args:
+        query: Query da extração (sem filtro de faixa)
+        id_column: Coluna de ID (o prefixo da tabela é removido)
+        range_size: Tamanho da faixa
+        columns: Colunas da extração (entram no hash das linhas)
+        sums: Colunas numéricas somadas (ex: ESTOQUE)
+        maxes: Colunas com MAX (ex: DTALTER)
+
+    Returns:
+        SQL com FAIXA, QTD, somas, máximos e HASH
+    """
+    id_col = id_column.split(".")[-1]
+    # Hash de hashes por coluna: a concatenação fica curta mesmo com textos longos
+    row_hash = " || '|' || ".join(f"ORA_HASH({col})" for col in columns)
+
+    select = [f"FLOOR({id_col} / {range_size}) AS FAIXA", "COUNT(*) AS QTD"]
+    select += [f"SUM({col}) AS SUM_{col}" for col in sums or []]
+    select += [f"MAX({col}) AS MAX_{col}" for col in maxes or []]
+    select.append(f"SUM(ORA_HASH({row_hash})) AS HASH")
+
+    return (
+        f"SELECT {', '.join(select)}\n"
+        f"FROM ({query})\n"
+        f"GROUP BY FLOOR({id_col} / {range_size})"
+    )
+
+
+class RangeSnapshot:
+    """
+    Snapshot local por faixas, atualizado só onde o ERP mudou.
+
+    Métodos principais:
+    - refresh(): Compara impressões e extrai as faixas alteradas
+    - load(): DataFrame com o snapshot completo (em ordem de faixa)
+    - reset(): Apaga o snapshot (próximo refresh extrai tudo)
+    """
+
+    def __init__(
+        self,
+        entity: str,
+        fetch: Callable[[int, int], pd.DataFrame],
+        fingerprint: Callable[[], Dict[int, List[Any]]],
+        id_max: int,
+        range_size: int,
+        params: Optional[Dict[str, Any]] = None,
+        max_workers: int = EXTRACTION_CONFIG.get("range_workers", 1),
+        snapshot_dir: Optional[Path] = None
+    ):
+        """
+        Args:
+            entity: Nome da entidade (pasta do snapshot)
+            fetch: Função (inicio, fim) -> DataFrame da faixa [inicio, fim); levanta exceção em erro
+            fingerprint: Função -> {início da faixa: impressão}; faixas sem linhas ficam de fora
+            id_max: Maior ID esperado
+            range_size: Tamanho de cada faixa
+            params: Parâmetros que definem a extração (query, filtros)
+            max_workers: Faixas extraídas em paralelo
+            snapshot_dir: Pasta base (padrão RAW_DATA_DIR/_snapshots)
+        """
+        self.entity = entity
+        self.fetch = fetch
+        self.fingerprint = fingerprint
+        self.id_max = id_max
+        self.range_size = range_size
+        self.max_workers = max(1, max_workers)
+
+        signature = json.dumps(
+            {"params": params or {}, "id_max": id_max, "range_size": range_size},
+            sort_keys=True, default=str
+        )
+        self.key = hashlib.sha1(signature.encode("utf-8")).hexdigest()[:12]
+        self.entity_dir = Path(snapshot_dir or SNAPSHOT_DIR) / entity
+        self.snapshot_dir = self.entity_dir / self.key
+        self.manifest_file = self.snapshot_dir / "manifest.json"
+
+        self._lock = threading.Lock()
+        self.manifest: Dict[str, Any] = {}
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        """Faixas [inicio, fim) cobrindo 0..id_max."""
+        return [(start, start + self.range_size) for start in range(0, self.id_max + 1, self.range_size)]
+
+    @staticmethod
+    def _range_id(start: int, end: int) -> str:
+        return f"{start:010d}-{end:010d}"
+
+    # =========================================================================
+    # MANIFESTO
+    # =========================================================================
+
+    def _load_manifest(self) -> None:
+        self.manifest = {}
+        if self.manifest_file.exists():
+            try:
+                with open(self.manifest_file, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"[{self.entity}] Manifesto do snapshot inválido, recomeçando: {e}")
+
+        if not self.manifest:
+            # Snapshot de outros parâmetros da entidade sai junto
+            if self.entity_dir.exists():
+                shutil.rmtree(self.entity_dir)
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            self.manifest = {
+                "entity": self.entity,
+                "key": self.key,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "id_max": self.id_max,
+                "range_size": self.range_size,
+                "ranges": {},
+            }
+
+    def _save_manifest(self) -> None:
+        with self._lock:
+            self.manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+            write_json_atomic(self.manifest_file, self.manifest)
+
+    # =========================================================================
+    # ATUALIZAÇÃO
+    # =========================================================================
+
+    def _fetch_range(self, start: int, end: int, fingerprint: Optional[List[str]]) -> Tuple[bool, int]:
+        range_id = self._range_id(start, end)
+        try:
+            df = self.fetch(start, end)
+        except Exception as e:
+            # Impressão antiga fica: a faixa continua "diferente" e é refeita depois
+            logger.warning(f"[{self.entity}] Faixa {start}-{end} falhou: {e}")
+            return False, 0
+
+        old = self.manifest["ranges"].get(range_id, {})
+        chunk = None
+        if df is not None and not df.empty:
+            chunk = f"chunk_{range_id}.parquet"
+            write_parquet_atomic(df, self.snapshot_dir / chunk)
+        elif old.get("file"):
+            (self.snapshot_dir / old["file"]).unlink(missing_ok=True)
+
+        rows = 0 if df is None else len(df)
+        with self._lock:
+            self.manifest["ranges"][range_id] = {"fingerprint": fingerprint, "rows": rows, "file": chunk}
+        self._save_manifest()
+        return True, rows
+
+    def refresh(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Atualiza o snapshot extraindo só as faixas que mudaram.
+
+        Args:
+            full: Extrair todas as faixas (ignora as impressões guardadas)
+
+        Returns:
+            Resumo: faixas totais, alteradas, reaproveitadas, falhas, registros
+
+        Raises:
+            Exception: Erro da query de impressões (repassado de fingerprint())
+        """
+        inicio = time.time()
+        self._load_manifest()
+
+        current = {
+            start: [str(v) for v in values]
+            for start, values in self.fingerprint().items()
+        }
+
+        beyond = [start for start in current if start > self.id_max]
+        if beyond:
+            logger.warning(
+                f"[{self.entity}] {len(beyond)} faixas acima de id_max={self.id_max} "
+                f"não são extraídas (aumentar ENTITY_LIMITS)"
+            )
+
+        changed = []
+        for start, end in self.ranges():
+            stored = self.manifest["ranges"].get(self._range_id(start, end))
+            new = current.get(start)
+            if full or stored is None or stored.get("fingerprint") != new:
+                changed.append((start, end, new))
+
+        logger.info(
+            f"[{self.entity}] Impressões: {len(changed)} de {len(self.ranges())} faixas mudaram"
+        )
+
+        failed = []
+        if changed:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(self._fetch_range, start, end, fp): self._range_id(start, end)
+                    for start, end, fp in changed
+                }
+                for future in as_completed(futures):
+                    ok, _ = future.result()
+                    if not ok:
+                        failed.append(futures[future])
+        else:
+            self._save_manifest()
+
+        return {
+            "success": not failed,
+            "entity": self.entity,
+            "ranges": len(self.ranges()),
+            "changed": len(changed),
+            "reused": len(self.ranges()) - len(changed),
+            "failed": sorted(failed),
+            "rows": sum(info.get("rows", 0) for info in self.manifest["ranges"].values()),
+            "duration_s": round(time.time() - inicio, 1),
+        }
+
+    # =========================================================================
+    # RESULTADO
+    # =========================================================================
+
+    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Snapshot completo (chunks em ordem de faixa).
+
+        Args:
+            columns: Colunas do DataFrame vazio, se não houver chunks
+        """
+        files = [
+            self.snapshot_dir / info["file"]
+            for _, info in sorted(self.manifest.get("ranges", {}).items())
+            if info.get("file")
+        ]
+        if not files:
+            return pd.DataFrame(columns=columns)
+        return pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+
+    def reset(self) -> None:
+        """Apaga o snapshot da entidade."""
+        if self.entity_dir.exists():
+            shutil.rmtree(self.entity_dir)
+        self.manifest = {}
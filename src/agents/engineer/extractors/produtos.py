@@ -13,6 +13,8 @@ from .base import BaseExtractor
 class ProdutosExtractor(BaseExtractor):
     """Extrai dados de produtos do Sankhya."""
 
+    FINGERPRINT = {"max": ["DTALTER"]}
+
     def get_entity_name(self) -> str:
         return "produtos"
 
@@ -13,6 +13,15 @@ from .base import BaseExtractor
 class VendasExtractor(BaseExtractor):
     """Extrai dados de vendas do Sankhya."""
 
+    # Descrições montadas localmente (star schema) em vez de JOIN por item
+    DIMENSIONS = [
+        {"dimension": "dim_parceiros", "key": "CODPARC", "columns": {"NOMEPARC": "NOMEPARC"}},
+        {"dimension": "dim_tipos_operacao", "key": "CODTIPOPER", "columns": {"DESCROPER": "DESCROPER"}},
+        {"dimension": "dim_vendedores", "key": "CODVEND", "columns": {"APELIDO_VEND": "APELIDO"}},
+        {"dimension": "dim_produtos", "key": "CODPROD",
+         "columns": {"DESCRPROD": "DESCRPROD", "REFERENCIA": "REFERENCIA"}},
+    ]
+
     def get_entity_name(self) -> str:
         return "vendas"
 
@@ -55,6 +64,7 @@ class VendasExtractor(BaseExtractor):
         codemp: Optional[int] = None,
         codparc: Optional[int] = None,
         id_range: Optional[tuple] = None,
+        narrow: bool = False,
         **kwargs
     ) -> str:
         """
@@ -66,8 +76,38 @@ class VendasExtractor(BaseExtractor):
             codemp: Código da empresa (filtro opcional)
             codparc: Código do parceiro (filtro opcional)
             id_range: Tupla (coluna, inicio, fim) para extração por faixas
+            narrow: Só chaves e medidas (sem JOINs de cadastro; ver DIMENSIONS)
+        """
+        if narrow:
+            query = """
+        SELECT
+            c.NUNOTA,
+            c.NUMNOTA,
+            c.CODEMP,
+            c.CODPARC,
+            c.DTNEG,
+            c.DTFATUR,
+            c.VLRNOTA,
+            c.PENDENTE,
+            c.STATUSNOTA,
+            c.TIPMOV,
+            c.CODTIPOPER,
+            c.CODVEND,
+            c.CODCENCUS,
+            i.SEQUENCIA,
+            i.CODPROD,
+            i.QTDNEG,
+            i.VLRUNIT,
+            i.VLRTOT,
+            i.VLRDESC,
+            i.CODLOCALORIG,
+            i.CONTROLE
+        FROM TGFCAB c
+        INNER JOIN TGFITE i ON i.NUNOTA = c.NUNOTA
+        WHERE c.TIPMOV = 'V'
         """
-        query = """
+        else:
+            query = """
         SELECT
             c.NUNOTA,
             c.NUMNOTA,
@@ -0,0 +1,551 @@
+# -*- coding: utf-8 -*-
+"""
+Fila de Trabalho para Extração por Faixas (vários processos / máquinas)
+
+Num processo só, threads dividem o GIL com a decodificação do JSON e a
+montagem dos DataFrames. Com a fila, as faixas de uma extração viram
+tarefas num banco SQLite compartilhado e qualquer número de workers
+(processos locais ou outras máquinas com o mesmo volume) as executa:
+
+- Coordenador (RangeCrawl com work_queue): enfileira as faixas pendentes
+  (SQL já montado + colunas), sobe workers locais e adota cada chunk
+  concluído no manifesto do checkpoint; o commit continua no coordenador
+- Worker: reivindica uma tarefa com lease, executa a query, grava o chunk
+  (Parquet atômico) e confirma (ack)
+- Lease com renovação periódica: se o worker cair, o lease expira e outra
+  instância reivindica a tarefa; o ack de um lease perdido é recusado
+- Tentativas por tarefa (max_attempts); a última falha fica registrada
+
+Tudo em WORK_QUEUE_CONFIG["dir"] (queue.db + chunks/). Para várias
+máquinas, a pasta precisa estar num volume compartilhado com lock de
+arquivo (SQLite não é confiável sobre todo tipo de compartilhamento).
+
+Uso:
+    # Coordenador (extract_by_range com WORK_QUEUE_CONFIG["enabled"])
+    crawl = RangeCrawl("vendas", fetch=..., task=montar_tarefa, work_queue=WorkQueue(), ...)
+    resultado = crawl.run()
+
+    # Worker em outra máquina (aguarda tarefas até Ctrl+C)
+    python -m src.agents.engineer.extractors.work_queue worker --wait
+
+    # Situação da fila
+    python -m src.agents.engineer.extractors.work_queue status
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from ..config import EXTRACTION_CONFIG, WORK_QUEUE_CONFIG
+from .checkpoint import write_parquet_atomic
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    job TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 1,
+    lease_until REAL,
+    rows INTEGER,
+    file TEXT,
+    error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (job, task_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (status, lease_until);
+"""
+
+
+def new_worker_id(prefix: str = "worker") -> str:
+    return f"{socket.gethostname()}-{prefix}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """
+    Fila de tarefas com lease em SQLite.
+
+    Métodos principais:
+    - enqueue(): Enfileira as tarefas de um job (idempotente)
+    - claim(): Reivindica a próxima tarefa livre (ou de lease vencido)
+    - renew() / ack() / fail(): Renova, conclui ou devolve uma tarefa
+    - map(): Coordena um job até todas as tarefas terminarem
+    - progress() / purge(): Situação e limpeza de um job
+    """
+
+    def __init__(
+        self,
+        queue_dir: Optional[Path] = None,
+        lease_seconds: int = WORK_QUEUE_CONFIG.get("lease_seconds", 600),
+        max_attempts: int = WORK_QUEUE_CONFIG.get("max_attempts", 3)
+    ):
+        """
+        Args:
+            queue_dir: Pasta da fila (padrão WORK_QUEUE_CONFIG["dir"])
+            lease_seconds: Validade do lease sem renovação
+            max_attempts: Tentativas por tarefa (gravadas com a tarefa: vale a do coordenador)
+        """
+        self.dir = Path(queue_dir or WORK_QUEUE_CONFIG["dir"])
+        self.db_path = self.dir / "queue.db"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Conexão por operação: segura entre threads e processos
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def chunk_path(self, job: str, task_id: str, attempt: int) -> Path:
+        return self.dir / "chunks" / job / f"{task_id}.{attempt}.parquet"
+
+    # =========================================================================
+    # TAREFAS
+    # =========================================================================
+
+    def enqueue(self, job: str, tasks: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Enfileira as tarefas de um job.
+
+        Tarefas já existentes são mantidas (um coordenador que reinicia
+        reaproveita as concluídas); falhas e concluídas sem chunk voltam
+        para a fila, e tarefas que saíram do job são removidas.
+
+        Args:
+            job: Identificador do job
+            tasks: {task_id: payload serializável}
+
+        Returns:
+            Tarefas pendentes após enfileirar
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            existing = {
+                task_id: (status, file)
+                for task_id, status, file in conn.execute(
+                    "SELECT task_id, status, file FROM tasks WHERE job = ?", (job,)
+                )
+            }
+
+            stale = [task_id for task_id in existing if task_id not in tasks]
+            conn.executemany("DELETE FROM tasks WHERE job = ? AND task_id = ?", [(job, t) for t in stale])
+
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (job, task_id, payload, max_attempts, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (job, task_id, json.dumps(payload, default=str), self.max_attempts, now)
+                    for task_id, payload in tasks.items()
+                ]
+            )
+
+            retry = [
+                task_id for task_id, (status, file) in existing.items()
+                if task_id in tasks and (
+                    status == "failed" or (status == "done" and file and not (self.dir / file).exists())
+                )
+            ]
+            conn.executemany(
+                "UPDATE tasks SET status = 'pending', attempts = 0, owner = NULL, error = NULL, "
+                "file = NULL, updated_at = ? WHERE job = ? AND task_id = ?",
+                [(now, job, task_id) for task_id in retry]
+            )
+
+            (pending,) = conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE job = ? AND status != 'done'", (job,)
+            ).fetchone()
+        return pending
+
+    def claim(self, worker_id: str, job: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Reivindica a próxima tarefa pendente ou com lease vencido.
+
+        Args:
+            worker_id: Identificador do worker (dono do lease)
+            job: Só tarefas deste job (None = qualquer job)
+
+        Returns:
+            Tarefa (job, task_id, attempt, payload) ou None se não há trabalho livre
+        """
+        now = time.time()
+        job_filter = " AND job = ?" if job else ""
+        args = (job,) if job else ()
+
+        with self._transaction() as conn:
+            # Lease vencido na última tentativa: worker caiu de novo, desiste
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', owner = NULL, updated_at = ?, "
+                "error = COALESCE(error, 'Lease expirado (worker sem resposta)') "
+                f"WHERE status = 'leased' AND lease_until < ? AND attempts >= max_attempts{job_filter}",
+                (now, now) + args
+            )
+
+            row = conn.execute(
+                "SELECT job, task_id, payload, attempts FROM tasks "
+                f"WHERE (status = 'pending' OR (status = 'leased' AND lease_until < ?)){job_filter} "
+                "ORDER BY job, task_id LIMIT 1",
+                (now,) + args
+            ).fetchone()
+            if row is None:
+                return None
+
+            task_job, task_id, payload, attempts = row
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', owner = ?, attempts = ?, lease_until = ?, updated_at = ? "
+                "WHERE job = ? AND task_id = ?",
+                (worker_id, attempts + 1, now + self.lease_seconds, now, task_job, task_id)
+            )
+
+        return {
+            "job": task_job,
+            "task_id": task_id,
+            "attempt": attempts + 1,
+            "owner": worker_id,
+            "payload": json.loads(payload),
+        }
+
+    def _update_leased(self, task: Dict[str, Any], sql: str, params: Tuple) -> bool:
+        """UPDATE só se o lease ainda é deste worker e desta tentativa."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"{sql} WHERE job = ? AND task_id = ? AND owner = ? AND attempts = ? AND status = 'leased'",
+                params + (task["job"], task["task_id"], task["owner"], task["attempt"])
+            )
+            return cursor.rowcount > 0
+
+    def renew(self, task: Dict[str, Any]) -> bool:
+        """Renova o lease; False se o lease foi perdido."""
+        now = time.time()
+        return self._update_leased(
+            task, "UPDATE tasks SET lease_until = ?, updated_at = ?", (now + self.lease_seconds, now)
+        )
+
+    def ack(self, task: Dict[str, Any], rows: int, file: Optional[str]) -> bool:
+        """Conclui a tarefa; False se o lease foi perdido (resultado descartado)."""
+        return self._update_leased(
+            task,
+            "UPDATE tasks SET status = 'done', rows = ?, file = ?, lease_until = NULL, error = NULL, updated_at = ?",
+            (rows, file, time.time())
+        )
+
+    def fail(self, task: Dict[str, Any], error: str) -> bool:
+        """Devolve a tarefa à fila (ou marca falha na última tentativa)."""
+        return self._update_leased(
+            task,
+            "UPDATE tasks SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+            "owner = NULL, lease_until = NULL, error = ?, updated_at = ?",
+            (error, time.time())
+        )
+
+    def expire(self, owner: str) -> int:
+        """Vence os leases de um worker que morreu (liberação imediata)."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_until = 0 WHERE owner = ? AND status = 'leased'", (owner,)
+            )
+            return cursor.rowcount
+
+    # =========================================================================
+    # JOBS
+    # =========================================================================
+
+    def progress(self, job: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """Tarefas por status: {job: {status: quantidade}}."""
+        query = "SELECT job, status, COUNT(*) FROM tasks"
+        args: Tuple = ()
+        if job:
+            query += " WHERE job = ?"
+            args = (job,)
+        query += " GROUP BY job, status"
+
+        summary: Dict[str, Dict[str, int]] = {}
+        with self._connect() as conn:
+            for task_job, status, count in conn.execute(query, args):
+                summary.setdefault(task_job, {})[status] = count
+        return summary
+
+    def finished(self, job: str) -> List[Dict[str, Any]]:
+        """Tarefas terminadas (done/failed) do job."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT task_id, status, rows, file, error FROM tasks "
+                "WHERE job = ? AND status IN ('done', 'failed')",
+                (job,)
+            ).fetchall()
+        return [
+            {"task_id": task_id, "status": status, "rows": n or 0,
+             "file": str(self.dir / file) if file else None, "error": error}
+            for task_id, status, n, file, error in rows
+        ]
+
+    def claimable(self, job: str) -> int:
+        """Tarefas que um worker pode reivindicar agora."""
+        with self._connect() as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE job = ? AND "
+                "(status = 'pending' OR (status = 'leased' AND lease_until < ?))",
+                (job, time.time())
+            ).fetchone()
+        return count
+
+    def purge(self, job: str) -> None:
+        """Remove as tarefas e chunks restantes do job."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tasks WHERE job = ?", (job,))
+        chunk_dir = self.dir / "chunks" / job
+        if chunk_dir.exists():
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    def map(
+        self,
+        job: str,
+        tasks: Dict[str, Dict[str, Any]],
+        local_workers: int = WORK_QUEUE_CONFIG.get("local_workers", 0),
+        poll_seconds: float = WORK_QUEUE_CONFIG.get("poll_seconds", 2)
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Executa as tarefas pela fila e devolve cada uma ao terminar.
+
+        Sobe `local_workers` processos worker para o job (repostos se morrerem
+        com tarefas ainda livres); workers de outras máquinas também ajudam.
+        Ao fim, as tarefas e os chunks não adotados são removidos.
+
+        Args:
+            job: Identificador do job
+            tasks: {task_id: payload}
+            local_workers: Processos worker nesta máquina
+            poll_seconds: Intervalo de consulta da fila
+
+        Yields:
+            {"task_id", "status": done|failed, "rows", "file", "error"}
+        """
+        self.enqueue(job, tasks)
+        seen = set()
+        processes: Dict[str, multiprocessing.Process] = {}
+        context = multiprocessing.get_context("spawn")
+        last_log = time.time()
+        completed = False
+        crashes = 0
+
+        try:
+            while len(seen) < len(tasks):
+                for outcome in self.finished(job):
+                    if outcome["task_id"] not in seen:
+                        seen.add(outcome["task_id"])
+                        yield outcome
+
+                if len(seen) >= len(tasks):
+                    break
+
+                # Worker morto: libera seus leases agora (sem esperar o vencimento)
+                for worker_id, process in list(processes.items()):
+                    if not process.is_alive():
+                        process.join()
+                        if process.exitcode:
+                            logger.warning(f"[fila] Worker {worker_id} saiu com código {process.exitcode}")
+                            self.expire(worker_id)
+                            crashes += 1
+                        del processes[worker_id]
+
+                if crashes > max(1, local_workers) * self.max_attempts:
+                    raise RuntimeError(f"[fila] {job}: workers locais falhando seguidamente ({crashes} quedas)")
+
+                free = self.claimable(job)
+                while free > 0 and len(processes) < local_workers:
+                    worker_id = new_worker_id("local")
+                    process = context.Process(
+                        target=run_worker, args=(str(self.dir), job, worker_id), daemon=True
+                    )
+                    process.start()
+                    processes[worker_id] = process
+                    free -= 1
+
+                if time.time() - last_log >= 30:
+                    logger.info(
+                        f"[fila] {job}: {len(seen)}/{len(tasks)} faixas terminadas "
+                        f"({len(processes)} workers locais)"
+                    )
+                    last_log = time.time()
+
+                time.sleep(poll_seconds)
+            completed = True
+        finally:
+            for process in processes.values():
+                process.join(timeout=poll_seconds)
+                if process.is_alive():
+                    process.terminate()
+            if completed:
+                self.purge(job)
+
+
+class QueueWorker:
+    """
+    Executa tarefas da fila (uma por vez, com lease renovado em segundo plano).
+
+    Métodos principais:
+    - run(): Reivindica e executa tarefas até a fila esvaziar (ou para sempre)
+    - execute(): Executa uma tarefa (query → chunk Parquet)
+    """
+
+    def __init__(self, queue: WorkQueue, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.worker_id = worker_id or new_worker_id()
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from src.utils.sankhya_client import SankhyaClient
+
+            self._client = SankhyaClient(
+                max_retries=EXTRACTION_CONFIG["max_retries"],
+                retry_interval=EXTRACTION_CONFIG["retry_interval"]
+            )
+            self._client.autenticar()
+        return self._client
+
+    def execute(self, task: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+        """
+        Executa a query da tarefa e grava o chunk.
+
+        Returns:
+            (registros, caminho do chunk relativo à fila ou None se vazio)
+        """
+        payload = task["payload"]
+        result = self.client.executar_query(payload["query"], timeout=payload.get("timeout", 180), strict=True)
+        df = pd.DataFrame((result or {}).get("rows") or [], columns=payload["columns"])
+        if df.empty:
+            return 0, None
+
+        path = self.queue.chunk_path(task["job"], task["task_id"], task["attempt"])
+        write_parquet_atomic(df, path)
+        return len(df), str(path.relative_to(self.queue.dir))
+
+    def _heartbeat(self, task: Dict[str, Any], stop: threading.Event) -> None:
+        while not stop.wait(max(1.0, self.queue.lease_seconds / 3)):
+            if not self.queue.renew(task):
+                logger.warning(f"[fila] Lease perdido: {task['job']}/{task['task_id']}")
+                return
+
+    def run(self, job: Optional[str] = None, wait: bool = False, max_tasks: Optional[int] = None) -> int:
+        """
+        Reivindica e executa tarefas.
+
+        Args:
+            job: Só tarefas deste job (None = qualquer job)
+            wait: Continuar esperando tarefas novas quando a fila esvaziar
+            max_tasks: Parar depois de N tarefas
+
+        Returns:
+            Tarefas executadas
+        """
+        done = 0
+        poll = WORK_QUEUE_CONFIG.get("poll_seconds", 2)
+
+        while max_tasks is None or done < max_tasks:
+            task = self.queue.claim(self.worker_id, job=job)
+            if task is None:
+                if not wait:
+                    break
+                time.sleep(poll)
+                continue
+
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(task, stop), daemon=True)
+            heartbeat.start()
+            try:
+                rows, file = self.execute(task)
+            except Exception as e:
+                logger.warning(f"[fila] {task['job']}/{task['task_id']} falhou (tentativa {task['attempt']}): {e}")
+                self.queue.fail(task, str(e))
+                continue
+            finally:
+                stop.set()
+                heartbeat.join()
+                done += 1
+
+            if not self.queue.ack(task, rows, file):
+                # Outro worker assumiu a tarefa: este resultado não vale
+                if file:
+                    (self.queue.dir / file).unlink(missing_ok=True)
+            else:
+                logger.debug(f"[fila] {task['job']}/{task['task_id']}: +{rows}")
+
+        return done
+
+
+def run_worker(queue_dir: str, job: Optional[str] = None, worker_id: Optional[str] = None) -> int:
+    """Entrada dos processos worker locais (multiprocessing spawn)."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    worker = QueueWorker(WorkQueue(Path(queue_dir)), worker_id=worker_id)
+    return worker.run(job=job)
+
+
+# Entry point para workers em outras máquinas
+def main():
+    """Worker ou status da fila via CLI."""
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Fila de extração do Agente Engenheiro")
+    parser.add_argument("command", choices=["worker", "status"])
+    parser.add_argument("--dir", help="Pasta da fila (padrão WORK_QUEUE_CONFIG['dir'])")
+    parser.add_argument("--job", help="Só tarefas deste job")
+    parser.add_argument("--wait", action="store_true", help="Esperar tarefas novas (worker permanente)")
+
+    args = parser.parse_args()
+    queue = WorkQueue(Path(args.dir) if args.dir else None)
+
+    if args.command == "status":
+        for job, counts in sorted(queue.progress(args.job).items()):
+            print(f"{job}: " + ", ".join(f"{status}={n}" for status, n in sorted(counts.items())))
+        return
+
+    worker = QueueWorker(queue)
+    print(f"Worker {worker.worker_id} em {queue.dir}. Pressione Ctrl+C para parar.")
+    try:
+        done = worker.run(job=args.job, wait=args.wait)
+        print(f"{done} tarefas executadas")
+    except KeyboardInterrupt:
+        print("\nWorker parado (lease da tarefa atual vence e ela volta para a fila).")
+
+
+if __name__ == "__main__":
+    main()
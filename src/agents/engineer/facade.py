@@ -41,6 +41,10 @@ from .extractors import (
     VendedoresExtractor,
     ComprasExtractor,
     PedidosCompraExtractor,
+    DimParceirosExtractor,
+    DimProdutosExtractor,
+    DimVendedoresExtractor,
+    DimTiposOperacaoExtractor,
 )
 from .transformers import DataCleaner
 from .loaders import DataLakeLoader
@@ -121,6 +125,10 @@ class Engenheiro:
         "vendedores": VendedoresExtractor,
         "compras": ComprasExtractor,
         "pedidos_compra": PedidosCompraExtractor,
+        "dim_parceiros": DimParceirosExtractor,
+        "dim_produtos": DimProdutosExtractor,
+        "dim_vendedores": DimVendedoresExtractor,
+        "dim_tipos_operacao": DimTiposOperacaoExtractor,
     }
 
     # Configuracao de periodos
@@ -215,6 +223,7 @@ class Engenheiro:
             )
 
             if df.empty:
+                extractor.commit_checkpoint()
                 return self._error_result(
                     entidade_lower,
                     start_time,
@@ -240,12 +249,15 @@ class Engenheiro:
             load_result = self.loader.load(df, entidade_lower, layer="raw")
 
             if not load_result.get("success"):
+                # Checkpoint das faixas fica: a próxima execução não extrai de novo
                 return self._error_result(
                     entidade_lower,
                     start_time,
                     load_result.get("error", "Erro ao salvar")
                 )
 
+            extractor.commit_checkpoint()
+
             # 5. Montar resultado de sucesso
             duracao = (datetime.now() - start_time).total_seconds()
 
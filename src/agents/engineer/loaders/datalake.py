@@ -10,6 +10,7 @@ Responsável por:
 """
 
 import logging
+import os
 from typing import Optional, Dict, Any
 from datetime import datetime
 from pathlib import Path
@@ -18,6 +19,7 @@ import pandas as pd
 
 from src.config import RAW_DATA_DIR, PROCESSED_DATA_DIR
 from src.utils import _AZURE_AVAILABLE
+from src.utils.data_version import bump_data_version
 
 # Importar Azure apenas se disponivel
 if _AZURE_AVAILABLE:
@@ -148,6 +150,12 @@ class DataLakeLoader:
         # Atualizar estatísticas
         self.stats[entity] = result
 
+        # Nova versão dos dados (invalida caches que dependem do lake)
+        try:
+            result["data_version"] = bump_data_version(entity, layer=layer, records=len(df))
+        except OSError as e:
+            logger.warning(f"[{entity}] Não foi possível atualizar a versão dos dados: {e}")
+
         logger.info(f"[{entity}] Carga concluída: {len(df)} registros ({size_mb:.2f} MB)")
 
         return result
@@ -167,8 +175,11 @@ class DataLakeLoader:
             # Nome do arquivo
             file_path = entity_dir / f"{entity}.parquet"
 
-            # Salvar
-            df.to_parquet(file_path, index=False, engine="pyarrow")
+            # Salvar em arquivo temporário e trocar de uma vez: leitores
+            # (e uma extração interrompida) nunca veem arquivo pela metade
+            tmp_path = entity_dir / f".{entity}.parquet.tmp"
+            df.to_parquet(tmp_path, index=False, engine="pyarrow")
+            os.replace(tmp_path, file_path)
 
             logger.debug(f"[{entity}] Salvo localmente: {file_path}")
 
@@ -7,22 +7,33 @@ Responsável por:
 - Gerenciar dependências entre entidades
 - Controlar execução paralela ou sequencial
 - Gerar relatórios de execução
+
+Execução paralela é um DAG (ver dag.py): cada entidade vira as etapas
+extract → transform → load (→ features), cada etapa com sua classe de
+recurso (PIPELINE_CONFIG). A extração de uma entidade começa assim que as
+entidades de que depende (depends_on) foram carregadas, e roda enquanto
+outras entidades são limpas ou enviadas.
 """
 
 import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from .extractors import (
     ClientesExtractor,
     VendasExtractor,
     ProdutosExtractor,
     EstoqueExtractor,
-    VendedoresExtractor
+    VendedoresExtractor,
+    DimParceirosExtractor,
+    DimProdutosExtractor,
+    DimVendedoresExtractor,
+    DimTiposOperacaoExtractor,
 )
 from .transformers import DataCleaner, DataMapper
 from .loaders import DataLakeLoader
+from .config import PIPELINE_CONFIG
+from .dag import DagRunner, DagTask
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +56,36 @@ class Orchestrator:
     """
 
     # Configuração de entidades
+    # depends_on: entidades carregadas antes (só vale se estiverem na execução);
+    # require_dependencies=False roda mesmo se a dependência falhar
     ENTITIES = {
+        # Dimensões do star schema: antes dos fatos (vendas junta localmente)
+        "dim_parceiros": {
+            "extractor": DimParceirosExtractor,
+            "priority": 0,
+            "use_range": True,
+            "range_config": {"id_column": "p.CODPARC", "id_max": 100000, "range_size": 5000},
+            "description": "Dimensão de parceiros"
+        },
+        "dim_produtos": {
+            "extractor": DimProdutosExtractor,
+            "priority": 0,
+            "use_range": True,
+            "range_config": {"id_column": "p.CODPROD", "id_max": 600000, "range_size": 5000},
+            "description": "Dimensão de produtos"
+        },
+        "dim_vendedores": {
+            "extractor": DimVendedoresExtractor,
+            "priority": 0,
+            "use_range": False,
+            "description": "Dimensão de vendedores"
+        },
+        "dim_tipos_operacao": {
+            "extractor": DimTiposOperacaoExtractor,
+            "priority": 0,
+            "use_range": False,
+            "description": "Dimensão de tipos de operação"
+        },
         "vendedores": {
             "extractor": VendedoresExtractor,
             "priority": 1,
@@ -77,6 +117,9 @@ class Orchestrator:
             "extractor": VendasExtractor,
             "priority": 5,
             "use_range": False,
+            # Star schema lê as dimensões do lake; sem elas cai no JOIN largo
+            "depends_on": ["dim_parceiros", "dim_produtos", "dim_vendedores", "dim_tipos_operacao"],
+            "require_dependencies": False,
             "description": "Notas de venda com itens"
         }
     }
@@ -85,7 +128,8 @@ class Orchestrator:
         self,
         upload_to_cloud: bool = True,
         clean_data: bool = True,
-        map_data: bool = False
+        map_data: bool = False,
+        update_features: bool = True
     ):
         """
         Inicializa o orchestrator.
@@ -94,10 +138,12 @@ class Orchestrator:
             upload_to_cloud: Fazer upload para Azure Data Lake
             clean_data: Aplicar limpeza de dados
             map_data: Aplicar mapeamento de colunas
+            update_features: Aplicar o delta de vendas na feature store
         """
         self.upload_to_cloud = upload_to_cloud
         self.clean_data = clean_data
         self.map_data = map_data
+        self.update_features = update_features
 
         self.cleaner = DataCleaner()
         self.mapper = DataMapper()
@@ -120,7 +166,7 @@ class Orchestrator:
     def run_pipeline(
         self,
         entities: List[str],
-        parallel: bool = False,
+        parallel: Optional[bool] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -128,7 +174,9 @@ class Orchestrator:
 
         Args:
             entities: Lista de entidades a processar
-            parallel: Executar em paralelo (experimental)
+            parallel: Executar como DAG com etapas sobrepostas
+                      (padrão PIPELINE_CONFIG["parallel"]); False = uma
+                      entidade por vez, em ordem de dependência
             **kwargs: Argumentos adicionais para extractors
 
         Returns:
@@ -145,16 +193,13 @@ class Orchestrator:
         print(f"Upload Azure: {'Sim' if self.upload_to_cloud else 'Não'}")
         print("=" * 60)
 
-        # Ordenar por prioridade
-        sorted_entities = sorted(
-            entities,
-            key=lambda e: self.ENTITIES.get(e, {}).get("priority", 99)
-        )
+        if parallel is None:
+            parallel = PIPELINE_CONFIG.get("parallel", True)
 
         if parallel:
-            self._run_parallel(sorted_entities, **kwargs)
+            self._run_dag(entities, **kwargs)
         else:
-            self._run_sequential(sorted_entities, **kwargs)
+            self._run_sequential(self._entity_order(entities), **kwargs)
 
         self.end_time = datetime.now()
         duration = (self.end_time - self.start_time).total_seconds()
@@ -164,26 +209,123 @@ class Orchestrator:
 
         return self.results
 
+    def _dependencies(self, entity: str, entities: List[str]) -> List[str]:
+        """Dependências da entidade que estão nesta execução."""
+        return [
+            dep for dep in self.ENTITIES.get(entity, {}).get("depends_on", [])
+            if dep in entities and dep != entity
+        ]
+
+    def _entity_order(self, entities: List[str]) -> List[str]:
+        """Entidades em ordem topológica (prioridade desempata)."""
+        dag = DagRunner(limits={"cpu": 1})
+        for entity in dict.fromkeys(entities):
+            dag.add(DagTask(
+                entity, func=lambda: True,
+                after=self._dependencies(entity, entities),
+                priority=self.ENTITIES.get(entity, {}).get("priority", 99)
+            ))
+        return dag.order()
+
+    def _dependency_failed(self, entity: str, entities: List[str]) -> Optional[List[str]]:
+        """Dependências obrigatórias que falharam (None se a entidade pode rodar)."""
+        if not self.ENTITIES.get(entity, {}).get("require_dependencies", True):
+            return None
+        failed = [
+            dep for dep in self._dependencies(entity, entities)
+            if not self.results.get(dep, {}).get("success")
+        ]
+        return failed or None
+
     def _run_sequential(self, entities: List[str], **kwargs):
-        """Executa entidades sequencialmente."""
+        """Executa entidades sequencialmente (em ordem topológica)."""
         for entity in entities:
             print(f"\n>>> {entity.upper()}")
+            failed = self._dependency_failed(entity, entities)
+            if failed:
+                logger.warning(f"[{entity}] Pulada: dependências falharam {failed}")
+                self.results[entity] = self._skipped_result(entity, failed)
+                continue
             self.results[entity] = self._process_entity(entity, **kwargs)
 
-    def _run_parallel(self, entities: List[str], max_workers: int = 3, **kwargs):
-        """Executa entidades em paralelo."""
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(self._process_entity, entity, **kwargs): entity
-                for entity in entities
+    def _run_dag(self, entities: List[str], **kwargs):
+        """
+        Executa as entidades como DAG de etapas (extract/transform/load/features).
+
+        A etapa extract de uma entidade depende da etapa load das entidades em
+        depends_on; cada etapa roda no limite de concorrência do seu recurso.
+        """
+        resources = PIPELINE_CONFIG.get("stage_resources", {})
+        dag = DagRunner(limits=PIPELINE_CONFIG.get("resource_limits", {"api": 1, "cpu": 1, "io": 1}))
+        states = {}
+
+        for entity in dict.fromkeys(entities):
+            if entity not in self.ENTITIES:
+                logger.error(f"Entidade '{entity}' não configurada")
+                self.results[entity] = {"success": False, "error": "Entidade não configurada"}
+                continue
+
+            config = self.ENTITIES[entity]
+            state = states[entity] = {"result": self._new_result(entity)}
+            self.results[entity] = state["result"]
+            priority = config.get("priority", 99)
+
+            deps = [f"{dep}.load" for dep in self._dependencies(entity, entities) if dep in self.ENTITIES]
+            hard = config.get("require_dependencies", True)
+
+            stages = [
+                ("extract", lambda s=state, e=entity: self._stage_extract(e, s, **kwargs)),
+                ("transform", lambda s=state, e=entity: self._stage_transform(e, s)),
+                ("load", lambda s=state, e=entity: self._stage_load(e, s)),
+            ]
+            if self._wants_features(entity):
+                stages.append(("features", lambda s=state: self._stage_features(s)))
+
+            previous = None
+            for stage, func in stages:
+                dag.add(DagTask(
+                    name=f"{entity}.{stage}",
+                    func=func,
+                    resource=resources.get(stage, "cpu"),
+                    depends_on=[previous] if previous else (deps if hard else []),
+                    after=[] if previous or hard else deps,
+                    priority=priority
+                ))
+                previous = f"{entity}.{stage}"
+
+        status = dag.run()
+
+        for entity, state in states.items():
+            if status.get(f"{entity}.extract", {}).get("status") == "skipped":
+                failed = [
+                    dep for dep in self._dependencies(entity, entities)
+                    if not self.results.get(dep, {}).get("success")
+                ]
+                logger.warning(f"[{entity}] Pulada: dependências falharam {failed}")
+                state["result"]["error"] = self._skipped_result(entity, failed)["error"]
+            state["result"]["durations"] = {
+                name.split(".", 1)[1]: info["duration_s"]
+                for name, info in status.items()
+                if name.startswith(f"{entity}.") and info["status"] != "skipped"
             }
+            state.pop("df", None)
 
-            for future in as_completed(futures):
-                entity = futures[future]
-                try:
-                    self.results[entity] = future.result()
-                except Exception as e:
-                    self.results[entity] = {"success": False, "error": str(e)}
+    def _new_result(self, entity: str) -> Dict[str, Any]:
+        return {
+            "entity": entity,
+            "success": False,
+            "records": 0,
+            "stages": {}
+        }
+
+    def _skipped_result(self, entity: str, failed: List[str]) -> Dict[str, Any]:
+        result = self._new_result(entity)
+        result["error"] = f"Dependências sem sucesso: {', '.join(failed)}"
+        return result
+
+    def _wants_features(self, entity: str) -> bool:
+        # Colunas mapeadas nao seguem o padrao Sankhya esperado pela store
+        return entity == "vendas" and self.update_features and not self.map_data
 
     def _process_entity(self, entity: str, **kwargs) -> Dict[str, Any]:
         """
@@ -200,18 +342,26 @@ class Orchestrator:
             logger.error(f"Entidade '{entity}' não configurada")
             return {"success": False, "error": "Entidade não configurada"}
 
-        config = self.ENTITIES[entity]
-        result = {
-            "entity": entity,
-            "success": False,
-            "records": 0,
-            "stages": {}
-        }
+        state = {"result": self._new_result(entity)}
+
+        if (self._stage_extract(entity, state, **kwargs)
+                and self._stage_transform(entity, state)
+                and self._stage_load(entity, state)
+                and self._wants_features(entity)):
+            self._stage_features(state)
 
+        return state["result"]
+
+    # =========================================================================
+    # ETAPAS (cada uma retorna False para interromper a entidade)
+    # =========================================================================
+
+    def _stage_extract(self, entity: str, state: Dict[str, Any], **kwargs) -> bool:
+        result = state["result"]
         try:
-            # === EXTRACT ===
             logger.info(f"[{entity}] EXTRACT...")
-            extractor = config["extractor"]()
+            config = self.ENTITIES[entity]
+            extractor = state["extractor"] = config["extractor"]()
 
             if config.get("use_range"):
                 range_cfg = config["range_config"]
@@ -231,40 +381,86 @@ class Orchestrator:
 
             if df.empty:
                 logger.warning(f"[{entity}] Extração vazia")
-                return result
+                extractor.commit_checkpoint()
+                return False
+
+            state["df"] = df
+            return True
 
-            # === TRANSFORM ===
+        except Exception as e:
+            logger.error(f"[{entity}] Erro: {e}")
+            result["error"] = str(e)
+            return False
+
+    def _stage_transform(self, entity: str, state: Dict[str, Any]) -> bool:
+        result = state["result"]
+        try:
             if self.clean_data:
                 logger.info(f"[{entity}] TRANSFORM (clean)...")
-                df = self.cleaner.clean(df, entity)
+                state["df"] = self.cleaner.clean(state["df"], entity)
                 result["stages"]["clean"] = {
                     "success": True,
-                    "records": len(df)
+                    "records": len(state["df"])
                 }
 
             if self.map_data:
                 logger.info(f"[{entity}] TRANSFORM (map)...")
-                df = self.mapper.map(df, entity)
+                state["df"] = self.mapper.map(state["df"], entity)
                 result["stages"]["map"] = {
                     "success": True,
-                    "records": len(df)
+                    "records": len(state["df"])
                 }
+            return True
 
-            # === LOAD ===
+        except Exception as e:
+            logger.error(f"[{entity}] Erro: {e}")
+            result["error"] = str(e)
+            return False
+
+    def _stage_load(self, entity: str, state: Dict[str, Any]) -> bool:
+        result = state["result"]
+        try:
             logger.info(f"[{entity}] LOAD...")
-            load_result = self.loader.load(df, entity, layer="raw")
+            load_result = self.loader.load(state["df"], entity, layer="raw")
 
             result["stages"]["load"] = load_result
             result["success"] = load_result.get("success", False)
+
+            # Faixas em staging só saem depois da carga (falha na carga = retomável)
+            if result["success"]:
+                state["extractor"].commit_checkpoint()
             result["records"] = load_result.get("records", 0)
             result["size_mb"] = load_result.get("size_mb", 0)
 
-            return result
+            # Features ainda usam o DataFrame; o resto já pode liberar memória
+            if not self._wants_features(entity):
+                state.pop("df", None)
+            return result["success"]
 
         except Exception as e:
             logger.error(f"[{entity}] Erro: {e}")
             result["error"] = str(e)
-            return result
+            return False
+
+    def _stage_features(self, state: Dict[str, Any]) -> bool:
+        # === FEATURES (agregados incrementais de vendas) ===
+        # Falha na feature store não muda o sucesso da entidade
+        state["result"]["stages"]["features"] = self._update_feature_store(state.pop("df"))
+        return True
+
+    def _update_feature_store(self, df) -> Dict[str, Any]:
+        """Aplica o delta de vendas na feature store (falha nao interrompe o ETL)."""
+        try:
+            from src.agents.shared.features import get_feature_store
+
+            logger.info("[vendas] FEATURES...")
+            return get_feature_store().update(
+                df, delta_id=datetime.now().strftime("%Y-%m-%d")
+            )
+
+        except Exception as e:
+            logger.error(f"[vendas] Erro ao atualizar feature store: {e}")
+            return {"success": False, "error": str(e)}
 
     def extract(self, entity: str, **kwargs):
         """
@@ -285,12 +481,14 @@ class Orchestrator:
 
         if config.get("use_range"):
             range_cfg = config["range_config"]
-            return extractor.extract_by_range(
+            df = extractor.extract_by_range(
                 id_column=range_cfg["id_column"],
                 id_max=range_cfg["id_max"],
                 range_size=range_cfg["range_size"],
                 **kwargs
             )
+            extractor.commit_checkpoint()
+            return df
         else:
             return extractor.extract(**kwargs)
 
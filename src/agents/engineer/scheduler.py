@@ -4,26 +4,45 @@ Scheduler - Agendamento de Execuções
 
 Responsável por:
 - Agendar execuções periódicas do pipeline
-- Definir frequência por entidade
+- Definir frequência por entidade (SCHEDULE_CONFIG)
 - Controlar horários de execução
 - Gerar logs de execução
 
+Núcleo orientado a eventos:
+- Fila de prioridade (heap) com a próxima execução de cada job; o loop dorme
+  até a próxima execução vencer (ou até um job novo / stop acordá-lo)
+- Jobs rodam num pool de workers (SCHEDULER_CONFIG["workers"]): um job longo
+  de vendas não atrasa o job horário de estoque
+- Um mesmo job nunca roda duas vezes ao mesmo tempo
+- Estado dos jobs (última/próxima execução) e histórico ficam em disco
+  (SCHEDULER_CONFIG["state_dir"]) e sobrevivem a reinícios
+- Janela perdida (scheduler parado ou job ainda rodando): "run_once" roda uma
+  vez ao retomar, "skip" espera a próxima janela
+
 NOTA: Para produção, recomenda-se usar:
 - Azure Functions (Timer Trigger)
 - Azure Data Factory
 - Cron (Linux) ou Task Scheduler (Windows)
 """
 
+import heapq
+import itertools
+import json
 import logging
-import time
-from typing import Optional, List, Dict, Any, Callable
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
-from threading import Thread, Event
+from threading import Condition, Event, RLock, Thread, current_thread
 
+from .config import SCHEDULE_CONFIG, SCHEDULER_CONFIG
 from .orchestrator import Orchestrator
 
 logger = logging.getLogger(__name__)
 
+CATCHUP_POLICIES = ("run_once", "skip")
+
 
 class Scheduler:
     """
@@ -38,6 +57,9 @@ class Scheduler:
         # Agendar execução a cada hora
         scheduler.schedule_interval(hours=1, entities=["estoque"])
 
+        # Ou todas as entidades conforme SCHEDULE_CONFIG
+        scheduler.schedule_from_config()
+
         # Iniciar scheduler
         scheduler.start()
 
@@ -49,38 +71,57 @@ class Scheduler:
     """
 
     # Configuração padrão de frequência por entidade
-    DEFAULT_SCHEDULES = {
-        "vendedores": {"frequency": "weekly", "day": 0, "hour": 6},  # Segunda 6h
-        "clientes": {"frequency": "daily", "hour": 6},
-        "produtos": {"frequency": "daily", "hour": 6, "minute": 15},
-        "estoque": {"frequency": "hourly"},
-        "vendas": {"frequency": "daily", "hour": 6, "minute": 30}
-    }
-
-    def __init__(self, upload_to_cloud: bool = True):
+    DEFAULT_SCHEDULES = SCHEDULE_CONFIG
+
+    def __init__(
+        self,
+        upload_to_cloud: bool = True,
+        workers: int = SCHEDULER_CONFIG.get("workers", 3),
+        state_dir: Optional[Any] = None
+    ):
         """
         Inicializa o scheduler.
 
         Args:
             upload_to_cloud: Fazer upload para Azure Data Lake
+            workers: Jobs executados ao mesmo tempo
+            state_dir: Pasta do estado e histórico (padrão SCHEDULER_CONFIG)
         """
         self.upload_to_cloud = upload_to_cloud
         self.orchestrator = Orchestrator(upload_to_cloud=upload_to_cloud)
+        self.workers = max(1, workers)
+
+        self.state_dir = Path(state_dir or SCHEDULER_CONFIG["state_dir"])
+        self.state_file = self.state_dir / "jobs.json"
+        self.history_file = self.state_dir / "history.jsonl"
+        self._saved_state = self._load_state()
 
         self._jobs: List[Dict[str, Any]] = []
+        self._jobs_by_name: Dict[str, Dict[str, Any]] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+
+        self._lock = RLock()
+        self._wakeup = Condition(self._lock)
         self._stop_event = Event()
         self._thread: Optional[Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
         self._running = False
 
         self.execution_log: List[Dict[str, Any]] = []
 
+    # =========================================================================
+    # AGENDAMENTO
+    # =========================================================================
+
     def schedule_interval(
         self,
         entities: List[str],
         hours: int = 0,
         minutes: int = 0,
         seconds: int = 0,
-        job_name: Optional[str] = None
+        job_name: Optional[str] = None,
+        catchup: Optional[str] = None
     ):
         """
         Agenda execução em intervalos fixos.
@@ -91,6 +132,7 @@ class Scheduler:
             minutes: Intervalo em minutos
             seconds: Intervalo em segundos
             job_name: Nome do job (opcional)
+            catchup: Política para janela perdida ("run_once" ou "skip")
         """
         interval_seconds = hours * 3600 + minutes * 60 + seconds
 
@@ -102,19 +144,44 @@ class Scheduler:
             "type": "interval",
             "interval_seconds": interval_seconds,
             "entities": entities,
-            "next_run": datetime.now(),
-            "last_run": None
         }
 
-        self._jobs.append(job)
+        self._add_job(job, catchup, first_run=datetime.now())
         logger.info(f"Job '{job['name']}' agendado: a cada {interval_seconds}s para {entities}")
 
+    def schedule_hourly(
+        self,
+        entities: List[str],
+        minute: int = 0,
+        job_name: Optional[str] = None,
+        catchup: Optional[str] = None
+    ):
+        """
+        Agenda execução de hora em hora, num minuto fixo.
+
+        Args:
+            entities: Entidades a processar
+            minute: Minuto de cada hora (0-59)
+            job_name: Nome do job (opcional)
+            catchup: Política para janela perdida ("run_once" ou "skip")
+        """
+        job = {
+            "name": job_name or f"hourly_{minute:02d}",
+            "type": "hourly",
+            "minute": minute,
+            "entities": entities,
+        }
+
+        self._add_job(job, catchup)
+        logger.info(f"Job '{job['name']}' agendado: a cada hora no minuto {minute:02d} para {entities}")
+
     def schedule_daily(
         self,
         entities: List[str],
         hour: int = 6,
         minute: int = 0,
-        job_name: Optional[str] = None
+        job_name: Optional[str] = None,
+        catchup: Optional[str] = None
     ):
         """
         Agenda execução diária em horário fixo.
@@ -124,6 +191,7 @@ class Scheduler:
             hour: Hora do dia (0-23)
             minute: Minuto (0-59)
             job_name: Nome do job (opcional)
+            catchup: Política para janela perdida ("run_once" ou "skip")
         """
         job = {
             "name": job_name or f"daily_{hour:02d}{minute:02d}",
@@ -131,11 +199,9 @@ class Scheduler:
             "hour": hour,
             "minute": minute,
             "entities": entities,
-            "next_run": self._calculate_next_daily(hour, minute),
-            "last_run": None
         }
 
-        self._jobs.append(job)
+        self._add_job(job, catchup)
         logger.info(f"Job '{job['name']}' agendado: diário às {hour:02d}:{minute:02d} para {entities}")
 
     def schedule_weekly(
@@ -144,7 +210,8 @@ class Scheduler:
         day: int = 0,
         hour: int = 6,
         minute: int = 0,
-        job_name: Optional[str] = None
+        job_name: Optional[str] = None,
+        catchup: Optional[str] = None
     ):
         """
         Agenda execução semanal.
@@ -155,6 +222,7 @@ class Scheduler:
             hour: Hora do dia (0-23)
             minute: Minuto (0-59)
             job_name: Nome do job (opcional)
+            catchup: Política para janela perdida ("run_once" ou "skip")
         """
         days = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
 
@@ -165,39 +233,124 @@ class Scheduler:
             "hour": hour,
             "minute": minute,
             "entities": entities,
-            "next_run": self._calculate_next_weekly(day, hour, minute),
-            "last_run": None
         }
 
-        self._jobs.append(job)
+        self._add_job(job, catchup)
         logger.info(f"Job '{job['name']}' agendado: {days[day]} às {hour:02d}:{minute:02d} para {entities}")
 
-    def _calculate_next_daily(self, hour: int, minute: int) -> datetime:
-        """Calcula próxima execução diária."""
-        now = datetime.now()
-        next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    def schedule_from_config(self, config: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+        """
+        Agenda um job por entidade conforme SCHEDULE_CONFIG.
 
-        if next_run <= now:
-            next_run += timedelta(days=1)
+        Entidades que o Orchestrator não conhece são ignoradas.
 
-        return next_run
+        Args:
+            config: Configuração no formato de SCHEDULE_CONFIG (padrão: SCHEDULE_CONFIG)
 
-    def _calculate_next_weekly(self, day: int, hour: int, minute: int) -> datetime:
-        """Calcula próxima execução semanal."""
-        now = datetime.now()
-        days_ahead = day - now.weekday()
+        Returns:
+            Número de jobs agendados
+        """
+        count = 0
+        for entity, cfg in (config or SCHEDULE_CONFIG).items():
+            if entity not in Orchestrator.ENTITIES:
+                logger.warning(f"Entidade '{entity}' sem extractor no Orchestrator, não agendada")
+                continue
+
+            frequency = cfg.get("frequency")
+            catchup = cfg.get("catchup")
+            if frequency == "hourly":
+                self.schedule_hourly([entity], minute=cfg.get("minute", 0), job_name=entity, catchup=catchup)
+            elif frequency == "daily":
+                self.schedule_daily([entity], hour=cfg.get("hour", 6), minute=cfg.get("minute", 0),
+                                    job_name=entity, catchup=catchup)
+            elif frequency == "weekly":
+                self.schedule_weekly([entity], day=cfg.get("day", 0), hour=cfg.get("hour", 6),
+                                     minute=cfg.get("minute", 0), job_name=entity, catchup=catchup)
+            else:
+                logger.warning(f"Frequência '{frequency}' inválida para '{entity}', não agendada")
+                continue
+            count += 1
+        return count
+
+    def _add_job(
+        self,
+        job: Dict[str, Any],
+        catchup: Optional[str],
+        first_run: Optional[datetime] = None
+    ):
+        """Registra o job, retomando a próxima execução salva (se o agendamento não mudou)."""
+        catchup = catchup or SCHEDULER_CONFIG.get("catchup", "run_once")
+        if catchup not in CATCHUP_POLICIES:
+            raise ValueError(f"Política de catch-up inválida: {catchup} (use {CATCHUP_POLICIES})")
+
+        with self._lock:
+            if job["name"] in self._jobs_by_name:
+                raise ValueError(f"Job '{job['name']}' já agendado")
+
+            job.update({
+                "catchup": catchup,
+                "signature": self._signature(job),
+                "next_run": None,
+                "last_run": None,
+                "last_success": None,
+                "running": False,
+                "pending_catchup": False,
+            })
+
+            saved = self._saved_state.get(job["name"], {})
+            if saved.get("last_run"):
+                job["last_run"] = datetime.fromisoformat(saved["last_run"])
+                job["last_success"] = saved.get("last_success")
+
+            if saved.get("signature") == job["signature"] and saved.get("next_run"):
+                # Pode estar no passado: janela perdida enquanto o scheduler estava parado
+                job["next_run"] = datetime.fromisoformat(saved["next_run"])
+            else:
+                job["next_run"] = first_run or self._next_occurrence(job, datetime.now())
+
+            self._jobs.append(job)
+            self._jobs_by_name[job["name"]] = job
+            self._push(job)
+            self._save_state()
+
+    @staticmethod
+    def _signature(job: Dict[str, Any]) -> str:
+        keys = ("type", "interval_seconds", "day", "hour", "minute", "entities")
+        return json.dumps({k: job.get(k) for k in keys}, sort_keys=True)
+
+    def _push(self, job: Dict[str, Any]):
+        """Coloca a próxima execução do job na fila (entradas antigas viram obsoletas)."""
+        job["seq"] = next(self._seq)
+        heapq.heappush(self._heap, (job["next_run"], job["seq"], job["name"]))
+        self._wakeup.notify()
+
+    def _next_occurrence(self, job: Dict[str, Any], after: datetime) -> datetime:
+        """Próxima janela do job estritamente depois de `after`."""
+        if job["type"] == "interval":
+            return after + timedelta(seconds=job["interval_seconds"])
 
-        if days_ahead < 0:
-            days_ahead += 7
+        if job["type"] == "hourly":
+            next_run = after.replace(minute=job["minute"], second=0, microsecond=0)
+            if next_run <= after:
+                next_run += timedelta(hours=1)
+            return next_run
 
-        next_run = now + timedelta(days=days_ahead)
-        next_run = next_run.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        next_run = after.replace(hour=job["hour"], minute=job["minute"], second=0, microsecond=0)
 
-        if next_run <= now:
-            next_run += timedelta(weeks=1)
+        if job["type"] == "weekly":
+            next_run += timedelta(days=(job["day"] - after.weekday()) % 7)
+            if next_run <= after:
+                next_run += timedelta(weeks=1)
+            return next_run
 
+        if next_run <= after:
+            next_run += timedelta(days=1)
         return next_run
 
+    # =========================================================================
+    # EXECUÇÃO
+    # =========================================================================
+
     def start(self, blocking: bool = True):
         """
         Inicia o scheduler.
@@ -215,8 +368,9 @@ class Scheduler:
 
         self._running = True
         self._stop_event.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler")
 
-        logger.info(f"Iniciando scheduler com {len(self._jobs)} jobs...")
+        logger.info(f"Iniciando scheduler com {len(self._jobs)} jobs ({self.workers} workers)...")
 
         if blocking:
             self._run_loop()
@@ -224,42 +378,91 @@ class Scheduler:
             self._thread = Thread(target=self._run_loop, daemon=True)
             self._thread.start()
 
-    def stop(self):
-        """Para o scheduler."""
+    def stop(self, wait: bool = False):
+        """
+        Para o scheduler.
+
+        Args:
+            wait: Esperar os jobs em execução terminarem
+        """
         if not self._running:
             return
 
         logger.info("Parando scheduler...")
-        self._stop_event.set()
-        self._running = False
+        with self._lock:
+            self._stop_event.set()
+            self._running = False
+            self._wakeup.notify_all()
 
-        if self._thread:
+        if self._thread and self._thread is not current_thread():
             self._thread.join(timeout=5)
 
-    def _run_loop(self):
-        """Loop principal do scheduler."""
-        while not self._stop_event.is_set():
-            now = datetime.now()
+        if self._pool:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
 
-            for job in self._jobs:
-                if job["next_run"] <= now:
-                    self._execute_job(job)
-                    self._update_next_run(job)
+    def _run_loop(self):
+        """Loop principal: dorme até a próxima execução vencer."""
+        with self._lock:
+            while not self._stop_event.is_set():
+                if not self._heap:
+                    self._wakeup.wait()
+                    continue
+
+                when, seq, name = self._heap[0]
+                job = self._jobs_by_name[name]
+                if seq != job["seq"]:
+                    heapq.heappop(self._heap)  # reagendado depois desta entrada
+                    continue
+
+                delay = (when - datetime.now()).total_seconds()
+                if delay > 0:
+                    # Teto de 60s: acompanha ajustes no relógio do sistema
+                    self._wakeup.wait(timeout=min(delay, 60))
+                    continue
+
+                heapq.heappop(self._heap)
+                self._dispatch(job, when)
+
+    def _dispatch(self, job: Dict[str, Any], scheduled_for: datetime):
+        """Trata uma execução vencida (chamado com o lock)."""
+        now = datetime.now()
+        late = (now - scheduled_for).total_seconds() > SCHEDULER_CONFIG.get("misfire_grace_seconds", 300)
+
+        # Próxima janela a partir de agora: várias janelas perdidas viram uma só
+        job["next_run"] = self._next_occurrence(job, max(now, scheduled_for))
+        self._push(job)
+
+        if job["running"]:
+            logger.warning(f"Job '{job['name']}' ainda em execução, janela de {scheduled_for:%H:%M} perdida")
+            self._record_missed(job, scheduled_for, "overlap")
+            # run_once: roda assim que a execução atual terminar
+            job["pending_catchup"] = job["catchup"] == "run_once"
+        elif late and job["catchup"] == "skip":
+            logger.warning(f"Job '{job['name']}' perdeu a janela de {scheduled_for:%Y-%m-%d %H:%M}, aguardando a próxima")
+            self._record_missed(job, scheduled_for, "skipped")
+        else:
+            if late:
+                logger.info(f"Job '{job['name']}' recuperando janela de {scheduled_for:%Y-%m-%d %H:%M}")
+            job["running"] = True
+            self._pool.submit(self._execute_job, job, scheduled_for)
 
-            # Verificar a cada 10 segundos
-            self._stop_event.wait(10)
+        self._save_state()
 
-    def _execute_job(self, job: Dict[str, Any]):
-        """Executa um job."""
+    def _execute_job(self, job: Dict[str, Any], scheduled_for: Optional[datetime] = None):
+        """Executa um job (num worker do pool)."""
         logger.info(f"Executando job '{job['name']}'...")
 
         start_time = datetime.now()
 
         try:
-            results = self.orchestrator.run_pipeline(entities=job["entities"])
+            # Orchestrator próprio: jobs simultâneos não dividem resultados
+            orchestrator = Orchestrator(upload_to_cloud=self.upload_to_cloud)
+            results = orchestrator.run_pipeline(entities=job["entities"])
 
             execution = {
                 "job": job["name"],
+                "status": "done",
+                "scheduled_for": scheduled_for.isoformat() if scheduled_for else None,
                 "start_time": start_time.isoformat(),
                 "end_time": datetime.now().isoformat(),
                 "success": all(r.get("success") for r in results.values()),
@@ -271,25 +474,27 @@ class Scheduler:
             logger.error(f"Erro no job '{job['name']}': {e}")
             execution = {
                 "job": job["name"],
+                "status": "done",
+                "scheduled_for": scheduled_for.isoformat() if scheduled_for else None,
                 "start_time": start_time.isoformat(),
                 "end_time": datetime.now().isoformat(),
                 "success": False,
+                "entities": job["entities"],
                 "error": str(e)
             }
 
-        job["last_run"] = datetime.now()
-        self.execution_log.append(execution)
-
-    def _update_next_run(self, job: Dict[str, Any]):
-        """Atualiza próxima execução de um job."""
-        if job["type"] == "interval":
-            job["next_run"] = datetime.now() + timedelta(seconds=job["interval_seconds"])
+        with self._lock:
+            job["last_run"] = datetime.now()
+            job["last_success"] = execution["success"]
+            job["running"] = False
 
-        elif job["type"] == "daily":
-            job["next_run"] = self._calculate_next_daily(job["hour"], job["minute"])
+            if job["pending_catchup"] and self._running:
+                job["next_run"] = datetime.now()
+                self._push(job)
+            job["pending_catchup"] = False
 
-        elif job["type"] == "weekly":
-            job["next_run"] = self._calculate_next_weekly(job["day"], job["hour"], job["minute"])
+            self._record(execution)
+            self._save_state()
 
     def run_once(self, entities: Optional[List[str]] = None):
         """
@@ -303,26 +508,121 @@ class Scheduler:
         else:
             return self.orchestrator.run_full_pipeline()
 
+    # =========================================================================
+    # ESTADO E HISTÓRICO
+    # =========================================================================
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("jobs", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Estado do scheduler inválido, ignorando: {e}")
+            return {}
+
+    def _save_state(self):
+        """Grava o estado dos jobs (chamado com o lock)."""
+        jobs = dict(self._saved_state)
+        for job in self._jobs:
+            jobs[job["name"]] = {
+                "signature": job["signature"],
+                "next_run": job["next_run"].isoformat() if job["next_run"] else None,
+                "last_run": job["last_run"].isoformat() if job["last_run"] else None,
+                "last_success": job["last_success"],
+            }
+        self._saved_state = jobs
+
+        try:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_suffix(".json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"updated_at": datetime.now().isoformat(), "jobs": jobs}, f, indent=2)
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o estado do scheduler: {e}")
+
+    def _record_missed(self, job: Dict[str, Any], scheduled_for: datetime, reason: str):
+        self._record({
+            "job": job["name"],
+            "status": reason,
+            "scheduled_for": scheduled_for.isoformat(),
+            "success": False,
+            "entities": job["entities"],
+        })
+
+    def _record(self, execution: Dict[str, Any]):
+        """Guarda a execução na memória e no histórico em disco (chamado com o lock)."""
+        self.execution_log.append(execution)
+        history_max = SCHEDULER_CONFIG.get("history_max", 1000)
+        del self.execution_log[:-history_max]
+
+        # Histórico enxuto: por entidade só sucesso, registros e erro
+        entry = {k: v for k, v in execution.items() if k != "results"}
+        if "results" in execution:
+            entry["results"] = {
+                entity: {
+                    "success": r.get("success"),
+                    "records": r.get("records", 0),
+                    "error": r.get("error")
+                }
+                for entity, r in execution["results"].items()
+            }
+
+        try:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.history_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+            self._trim_history(history_max)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o histórico do scheduler: {e}")
+
+    def _trim_history(self, history_max: int):
+        with open(self.history_file, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        # Regrava só quando passa 10% do limite (não a cada execução)
+        if len(lines) <= history_max * 1.1:
+            return
+        tmp = self.history_file.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(lines[-history_max:])
+        os.replace(tmp, self.history_file)
+
     def get_status(self) -> Dict[str, Any]:
         """Retorna status do scheduler."""
-        return {
-            "running": self._running,
-            "jobs": [
-                {
-                    "name": j["name"],
-                    "type": j["type"],
-                    "entities": j["entities"],
-                    "next_run": j["next_run"].isoformat() if j["next_run"] else None,
-                    "last_run": j["last_run"].isoformat() if j["last_run"] else None
-                }
-                for j in self._jobs
-            ],
-            "execution_count": len(self.execution_log)
-        }
+        with self._lock:
+            return {
+                "running": self._running,
+                "workers": self.workers,
+                "jobs": [
+                    {
+                        "name": j["name"],
+                        "type": j["type"],
+                        "entities": j["entities"],
+                        "catchup": j["catchup"],
+                        "executing": j["running"],
+                        "next_run": j["next_run"].isoformat() if j["next_run"] else None,
+                        "last_run": j["last_run"].isoformat() if j["last_run"] else None,
+                        "last_success": j["last_success"]
+                    }
+                    for j in sorted(self._jobs, key=lambda j: j["next_run"])
+                ],
+                "execution_count": len(self.execution_log)
+            }
 
     def get_execution_log(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Retorna log de execuções recentes."""
-        return self.execution_log[-limit:]
+        """Retorna log de execuções recentes (inclui execuções anteriores a um reinício)."""
+        if not self.history_file.exists():
+            return self.execution_log[-limit:]
+
+        try:
+            with open(self.history_file, "r", encoding="utf-8") as f:
+                lines = f.readlines()[-limit:]
+            return [json.loads(line) for line in lines if line.strip()]
+        except (OSError, ValueError) as e:
+            logger.warning(f"Histórico do scheduler ilegível: {e}")
+            return self.execution_log[-limit:]
 
 
 # Entry point para execução via linha de comando
@@ -351,6 +651,11 @@ def main():
         type=int,
         help="Intervalo em minutos para execução periódica"
     )
+    parser.add_argument(
+        "--from-config",
+        action="store_true",
+        help="Agendar cada entidade conforme SCHEDULE_CONFIG"
+    )
     parser.add_argument(
         "--no-upload",
         action="store_true",
@@ -364,6 +669,11 @@ def main():
     if args.run_once:
         # Execução única
         scheduler.run_once(entities=args.entities)
+        return
+
+    if args.from_config:
+        count = scheduler.schedule_from_config()
+        print(f"Scheduler iniciado com {count} jobs de SCHEDULE_CONFIG.")
     else:
         # Execução periódica
         entities = args.entities or list(Orchestrator.ENTITIES.keys())
@@ -376,13 +686,14 @@ def main():
         )
 
         print(f"Scheduler iniciado. Executando a cada {interval} minutos.")
-        print("Pressione Ctrl+C para parar.")
 
-        try:
-            scheduler.start(blocking=True)
-        except KeyboardInterrupt:
-            scheduler.stop()
-            print("\nScheduler parado.")
+    print("Pressione Ctrl+C para parar.")
+
+    try:
+        scheduler.start(blocking=True)
+    except KeyboardInterrupt:
+        scheduler.stop()
+        print("\nScheduler parado.")
 
 
 if __name__ == "__main__":
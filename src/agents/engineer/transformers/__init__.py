@@ -7,5 +7,6 @@ Responsáveis por limpar, validar e transformar os dados extraídos.
 
 from .cleaner import DataCleaner
 from .mapper import DataMapper
+from .star_schema import StarSchemaBuilder
 
-__all__ = ['DataCleaner', 'DataMapper']
+__all__ = ['DataCleaner', 'DataMapper', 'StarSchemaBuilder']
@@ -8,13 +8,26 @@ Responsável por:
 - Validar tipos de dados
 - Normalizar strings
 - Validar regras de negócio
+
+Backends (TRANSFORMATION_CONFIG["cleaner_backend"]):
+- "arrow" (padrão): cada coluna é tratada uma vez, com kernels do
+  pyarrow.compute. Strings passam por trim e normalização de nulos num só
+  trecho, numéricos são convertidos uma vez, e o formato de cada data é
+  detectado numa amostra antes de um único parse
+- "pandas": implementação original (comparação em
+  scripts/testes/benchmark_cleaner.py)
 """
 
 import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ..config import TRANSFORMATION_CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +39,17 @@ class DataCleaner:
     Exemplo de uso:
         cleaner = DataCleaner()
         df_limpo = cleaner.clean(df, entity="clientes")
+
+        # Implementação original (pandas)
+        df_limpo = DataCleaner(backend="pandas").clean(df, entity="clientes")
     """
 
+    # Textos tratados como nulo em campos string
+    NULL_TOKENS = ["None", "nan", "NaN", "null"]
+
+    # Valores não nulos usados para detectar o formato de uma coluna de data
+    DATE_SAMPLE_SIZE = 1000
+
     # Configurações de limpeza por entidade
     ENTITY_CONFIG = {
         "clientes": {
@@ -72,8 +94,16 @@ class DataCleaner:
         }
     }
 
-    def __init__(self):
-        """Inicializa o cleaner."""
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Inicializa o cleaner.
+
+        Args:
+            backend: "arrow" ou "pandas" (padrão TRANSFORMATION_CONFIG["cleaner_backend"])
+        """
+        self.backend = backend or TRANSFORMATION_CONFIG.get("cleaner_backend", "arrow")
+        if self.backend not in ("arrow", "pandas"):
+            raise ValueError(f"Backend de limpeza inválido: {self.backend}")
         self.stats = {}
 
     def clean(
@@ -112,17 +142,21 @@ class DataCleaner:
         if remove_duplicates and config.get("primary_key"):
             df = self._remove_duplicates(df, config["primary_key"], entity)
 
-        # 2. Normalizar strings
-        if normalize_strings and config.get("string_fields"):
-            df = self._normalize_strings(df, config["string_fields"], entity)
+        if self.backend == "arrow":
+            # 2-4. Strings, nulos e tipos: uma passada por coluna
+            df = self._clean_columns_arrow(df, config, entity, normalize_strings, fill_nulls, validate_types)
+        else:
+            # 2. Normalizar strings
+            if normalize_strings and config.get("string_fields"):
+                df = self._normalize_strings(df, config["string_fields"], entity)
 
-        # 3. Preencher nulos
-        if fill_nulls:
-            df = self._fill_nulls(df, config, entity)
+            # 3. Preencher nulos
+            if fill_nulls:
+                df = self._fill_nulls(df, config, entity)
 
-        # 4. Validar tipos
-        if validate_types:
-            df = self._validate_types(df, config, entity)
+            # 4. Validar tipos
+            if validate_types:
+                df = self._validate_types(df, config, entity)
 
         # 5. Adicionar metadados
         df = self._add_metadata(df, entity)
@@ -134,6 +168,7 @@ class DataCleaner:
             "original": original_count,
             "final": final_count,
             "removed": removed,
+            "backend": self.backend,
             "timestamp": datetime.now().isoformat()
         }
 
@@ -275,6 +310,103 @@ class DataCleaner:
         logger.warning(f"[{entity}] Coluna {col_name} - nenhum formato conhecido funcionou, tentando inferir...")
         return pd.to_datetime(series, errors="coerce")
 
+    # =========================================================================
+    # BACKEND ARROW
+    # =========================================================================
+
+    def _clean_columns_arrow(
+        self,
+        df: pd.DataFrame,
+        config: Dict[str, Any],
+        entity: str,
+        normalize_strings: bool,
+        fill_nulls: bool,
+        validate_types: bool
+    ) -> pd.DataFrame:
+        """Mesmo resultado de _normalize_strings + _fill_nulls + _validate_types, uma vez por coluna."""
+        for col in config.get("string_fields", []):
+            if col not in df.columns:
+                continue
+            if normalize_strings:
+                df[col] = self._normalize_string_column(df[col])
+            elif fill_nulls:
+                df[col] = df[col].fillna("")
+
+        if fill_nulls or validate_types:
+            for col in config.get("numeric_fields", []):
+                if col not in df.columns:
+                    continue
+                values = df[col]
+                if not pd.api.types.is_numeric_dtype(values):
+                    values = pd.to_numeric(values, errors="coerce")
+                df[col] = values.fillna(0) if fill_nulls else values
+
+        if fill_nulls:
+            for col in config.get("boolean_fields", {}):
+                if col in df.columns:
+                    df[col] = df[col].fillna("N")
+
+        if validate_types:
+            for col in config.get("date_fields", []):
+                if col in df.columns:
+                    df[col] = self._parse_date_column(df[col], col, entity)
+
+        return df
+
+    @staticmethod
+    def _to_arrow_strings(series: pd.Series) -> pa.Array:
+        """Coluna como pa.string(); números são formatados como em astype(str)."""
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            series = series.astype(str)
+        try:
+            return pa.array(series, from_pandas=True, type=pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Coluna object com tipos misturados
+            return pa.array(series.astype(str), from_pandas=True, type=pa.string())
+
+    def _normalize_string_column(self, series: pd.Series) -> pd.Series:
+        """Trim + nulos e textos nulos ("None", "nan"...) viram vazio."""
+        values = pc.utf8_trim_whitespace(self._to_arrow_strings(series))
+        values = pc.if_else(pc.is_in(values, value_set=pa.array(self.NULL_TOKENS)), "", values)
+        values = pc.fill_null(values, "")
+        return pd.Series(values.to_pandas(), index=series.index, name=series.name)
+
+    def _detect_date_format(self, values: pa.Array) -> Optional[str]:
+        """Primeiro formato do Sankhya que converte ao menos 80% de uma amostra."""
+        valid = values.drop_null()
+        if len(valid) > self.DATE_SAMPLE_SIZE:
+            positions = np.linspace(0, len(valid) - 1, self.DATE_SAMPLE_SIZE).astype(np.int64)
+            valid = valid.take(pa.array(positions))
+
+        for fmt in self.SANKHYA_DATE_FORMATS:
+            parsed = pc.strptime(valid, format=fmt, unit="us", error_is_null=True)
+            if len(valid) - parsed.null_count >= len(valid) * 0.8:
+                return fmt
+        return None
+
+    def _parse_date_column(self, series: pd.Series, col_name: str, entity: str) -> pd.Series:
+        """Detecta o formato numa amostra e converte a coluna num único parse."""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+
+        try:
+            values = pa.array(series, from_pandas=True, type=pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return self._parse_sankhya_date(series, col_name, entity)
+
+        if values.null_count == len(values):
+            logger.warning(f"[{entity}] Coluna {col_name} está 100% nula")
+            return pd.to_datetime(series, errors="coerce")
+
+        fmt = self._detect_date_format(values)
+        if fmt is None:
+            logger.warning(f"[{entity}] Coluna {col_name} - nenhum formato conhecido funcionou, tentando inferir...")
+            return pd.to_datetime(series, errors="coerce")
+
+        logger.debug(f"[{entity}] Coluna {col_name} convertida com formato {fmt}")
+        parsed = pc.strptime(values, format=fmt, unit="us", error_is_null=True)
+        return pd.Series(parsed.to_pandas(), index=series.index, name=series.name)
+
     def _add_metadata(self, df: pd.DataFrame, entity: str) -> pd.DataFrame:
         """Adiciona colunas de metadados."""
         df["_extracted_at"] = datetime.now()
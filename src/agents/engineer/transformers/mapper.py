@@ -7,12 +7,14 @@ Responsável por:
 - Criar colunas calculadas
 - Mapear códigos para descrições
 - Preparar dados para star schema (dimensões e fatos)
+- Montar o fato largo a partir do fato estreito + dimensões (denormalize)
 """
 
 import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -249,6 +251,48 @@ class DataMapper:
         """Retorna estatísticas de mapeamento."""
         return self.stats
 
+    def denormalize(
+        self,
+        df: pd.DataFrame,
+        joins: List[Dict[str, Any]],
+        dimensions: Dict[str, pd.DataFrame]
+    ) -> pd.DataFrame:
+        """
+        Preenche no fato as colunas descritivas a partir das dimensões (join local).
+
+        Vetorizado: a posição de cada chave na dimensão vem de um único
+        Index.get_indexer, sem merge (não duplica linhas nem reordena o fato).
+
+        Args:
+            df: DataFrame fato (chaves + medidas)
+            joins: Lista de {"dimension", "key", "dim_key" (default = key),
+                   "columns": {coluna_fato: coluna_dimensao}}
+            dimensions: Dict {nome: DataFrame dimensão com chave única}
+
+        Returns:
+            DataFrame com as colunas descritivas (None onde a chave não existe na dimensão)
+        """
+        for join in joins:
+            dim = dimensions.get(join["dimension"])
+            if dim is None or join["key"] not in df.columns:
+                continue
+
+            positions = self.lookup_positions(df[join["key"]], dim[join.get("dim_key", join["key"])])
+            found = positions >= 0
+
+            for fact_col, dim_col in join["columns"].items():
+                values = np.full(len(df), None, dtype=object)
+                values[found] = dim[dim_col].to_numpy(dtype=object)[positions[found]]
+                df[fact_col] = values
+
+        return df
+
+    @staticmethod
+    def lookup_positions(keys: pd.Series, dim_keys: pd.Series) -> np.ndarray:
+        """Posição de cada chave na dimensão (-1 = não encontrada)."""
+        index = pd.Index(pd.to_numeric(dim_keys, errors="coerce"))
+        return index.get_indexer(pd.to_numeric(keys, errors="coerce"))
+
     def to_dimension(
         self,
         df: pd.DataFrame,
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Star Schema - Fatos Estreitos + Dimensões
+
+Os fatos de itens (vendas, compras) são extraídos só com chaves e medidas;
+nomes de parceiro, produto, vendedor e operação vêm de tabelas de dimensão
+extraídas à parte e juntadas localmente (DataMapper.denormalize):
+
+- A API transfere cada nome uma vez por cadastro, e não uma vez por item
+- Dimensões ficam no Data Lake (raw/dim_*/) e têm agenda própria; se estiverem
+  ausentes ou mais velhas que EXTRACTION_CONFIG["dimension_max_age_hours"],
+  são atualizadas antes do join
+- Membros novos (produto cadastrado depois da última atualização da dimensão)
+  são buscados pela chave e acrescentados à dimensão
+- Mudou um nome? rebuild() refaz as colunas descritivas do fato já gravado,
+  sem extrair o fato de novo
+
+O fato gravado continua largo (mesmas colunas de antes) para os consumidores.
+
+Uso:
+    builder = StarSchemaBuilder()
+    dims = builder.get_dimensions(VendasExtractor.DIMENSIONS)
+    df_largo = builder.denormalize(df_estreito, VendasExtractor.DIMENSIONS, dims)
+
+    builder.rebuild("vendas", VendasExtractor.DIMENSIONS)
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from src.config import RAW_DATA_DIR
+
+from ..config import EXTRACTION_CONFIG, ENTITY_LIMITS
+from ..extractors.dimensoes import (
+    DimParceirosExtractor,
+    DimProdutosExtractor,
+    DimVendedoresExtractor,
+    DimTiposOperacaoExtractor,
+)
+from ..loaders import DataLakeLoader
+from .mapper import DataMapper
+
+logger = logging.getLogger(__name__)
+
+# Membros buscados por query (limite do IN no Oracle)
+MEMBER_BATCH = 1000
+
+
+class StarSchemaBuilder:
+    """
+    Mantém as dimensões e monta o fato largo a partir do fato estreito.
+
+    Métodos principais:
+    - get_dimensions(): Dimensões usadas pelos joins (atualiza as velhas)
+    - refresh_dimension(): Extrai uma dimensão e grava no Data Lake
+    - denormalize(): Junta as dimensões ao fato (busca membros novos)
+    - rebuild(): Refaz as colunas descritivas de um fato já gravado
+    """
+
+    DIMENSIONS = {
+        "dim_parceiros": DimParceirosExtractor,
+        "dim_produtos": DimProdutosExtractor,
+        "dim_vendedores": DimVendedoresExtractor,
+        "dim_tipos_operacao": DimTiposOperacaoExtractor,
+    }
+
+    def __init__(self, upload_to_cloud: bool = False):
+        """
+        Args:
+            upload_to_cloud: Enviar dimensões atualizadas aqui para o Azure
+                             (a carga agendada das dimensões já envia)
+        """
+        self.loader = DataLakeLoader(upload_to_cloud=upload_to_cloud)
+        self.mapper = DataMapper()
+        self._cache: Dict[str, pd.DataFrame] = {}
+
+    # =========================================================================
+    # DIMENSÕES
+    # =========================================================================
+
+    @staticmethod
+    def dimension_path(name: str):
+        return RAW_DATA_DIR / name / f"{name}.parquet"
+
+    def _is_fresh(self, name: str) -> bool:
+        path = self.dimension_path(name)
+        if not path.exists():
+            return False
+        max_age = EXTRACTION_CONFIG.get("dimension_max_age_hours", 24) * 3600
+        return time.time() - path.stat().st_mtime <= max_age
+
+    def _read(self, name: str) -> pd.DataFrame:
+        key = self.DIMENSIONS[name].KEY
+        df = pd.read_parquet(self.dimension_path(name))
+        # Chave única: get_indexer exige índice sem repetição
+        return df.drop_duplicates(subset=[key], keep="last").reset_index(drop=True)
+
+    def refresh_dimension(self, name: str) -> Dict[str, Any]:
+        """
+        Extrai a dimensão do Sankhya e grava no Data Lake.
+
+        Args:
+            name: Nome da dimensão (ex: 'dim_produtos')
+
+        Returns:
+            Resultado da carga (success, records...)
+        """
+        extractor = self.DIMENSIONS[name]()
+
+        if name in ENTITY_LIMITS:
+            limits = ENTITY_LIMITS[name]
+            df = extractor.extract_by_range(
+                id_column=limits["id_column"],
+                id_max=limits["id_max"],
+                range_size=EXTRACTION_CONFIG.get("default_range_size", 5000)
+            )
+        else:
+            df = extractor.extract()
+
+        if df.empty:
+            return {"success": False, "error": f"Dimensão {name} vazia"}
+
+        result = self.loader.load(df, name, layer="raw")
+        if result.get("success"):
+            extractor.commit_checkpoint()
+            self._cache.pop(name, None)
+        return result
+
+    def get_dimensions(self, joins: List[Dict[str, Any]]) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Carrega as dimensões usadas pelos joins (atualizando as ausentes/velhas).
+
+        Args:
+            joins: Joins do extractor (DIMENSIONS)
+
+        Returns:
+            Dict {nome: DataFrame}, ou None se alguma dimensão não está disponível
+        """
+        dimensions = {}
+        for name in dict.fromkeys(join["dimension"] for join in joins):
+            if not self._is_fresh(name):
+                logger.info(f"[{name}] Dimensão ausente ou desatualizada, extraindo...")
+                try:
+                    result = self.refresh_dimension(name)
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+
+                if not result.get("success"):
+                    if not self.dimension_path(name).exists():
+                        logger.error(f"[{name}] Dimensão indisponível: {result.get('error')}")
+                        return None
+                    logger.warning(f"[{name}] Atualização falhou, usando a dimensão anterior")
+                self._cache.pop(name, None)
+
+            if name not in self._cache:
+                self._cache[name] = self._read(name)
+            dimensions[name] = self._cache[name]
+        return dimensions
+
+    def _add_members(self, name: str, keys: List[int]) -> int:
+        """Busca membros que faltam na dimensão e grava a dimensão ampliada."""
+        extractor = self.DIMENSIONS[name]()
+        novos = [
+            extractor.extract(codigos=keys[i:i + MEMBER_BATCH])
+            for i in range(0, len(keys), MEMBER_BATCH)
+        ]
+        novos = [df for df in novos if not df.empty]
+        if not novos:
+            return 0
+
+        dim = pd.concat([self._cache[name]] + novos, ignore_index=True)
+        dim = dim.drop_duplicates(subset=[extractor.KEY], keep="last").reset_index(drop=True)
+
+        # Acrescentar membros não é uma atualização completa: mantém a data do arquivo
+        path = self.dimension_path(name)
+        mtime = path.stat().st_mtime
+        self.loader.load(dim, name, layer="raw")
+        os.utime(path, (time.time(), mtime))
+
+        self._cache[name] = dim
+        return sum(len(df) for df in novos)
+
+    # =========================================================================
+    # FATOS
+    # =========================================================================
+
+    def denormalize(
+        self,
+        df: pd.DataFrame,
+        joins: List[Dict[str, Any]],
+        dimensions: Dict[str, pd.DataFrame]
+    ) -> pd.DataFrame:
+        """
+        Junta as dimensões ao fato estreito.
+
+        Chaves do fato que não existem na dimensão são buscadas no Sankhya
+        (membros novos) antes do join.
+
+        Args:
+            df: Fato estreito
+            joins: Joins do extractor (DIMENSIONS)
+            dimensions: Dimensões de get_dimensions()
+
+        Returns:
+            Fato com as colunas descritivas
+        """
+        for join in joins:
+            name = join["dimension"]
+            dim = dimensions[name]
+            dim_key = join.get("dim_key", join["key"])
+
+            keys = pd.to_numeric(df[join["key"]], errors="coerce")
+            positions = self.mapper.lookup_positions(keys, dim[dim_key])
+            missing = keys[(positions < 0) & keys.notna()].unique()
+
+            if len(missing):
+                try:
+                    added = self._add_members(name, sorted(int(k) for k in missing))
+                    logger.info(f"[{name}] {added} de {len(missing)} membros novos acrescentados")
+                    dimensions[name] = self._cache[name]
+                except Exception as e:
+                    logger.warning(f"[{name}] Não foi possível buscar membros novos: {e}")
+
+        return self.mapper.denormalize(df, joins, dimensions)
+
+    def rebuild(self, entity: str, joins: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Refaz as colunas descritivas de um fato já gravado com as dimensões atuais.
+
+        Args:
+            entity: Entidade do fato (ex: 'vendas')
+            joins: Joins do extractor (DIMENSIONS)
+
+        Returns:
+            Resultado da carga
+        """
+        path = RAW_DATA_DIR / entity / f"{entity}.parquet"
+        if not path.exists():
+            return {"success": False, "error": f"{path} não existe"}
+
+        dimensions = self.get_dimensions(joins)
+        if dimensions is None:
+            return {"success": False, "error": "Dimensões indisponíveis"}
+
+        df = self.denormalize(pd.read_parquet(path), joins, dimensions)
+        return self.loader.load(df, entity, layer="raw")
@@ -9,6 +9,7 @@ dos outros agentes (Cientista, Analista, Engenheiro).
 from .forecast_tool import forecast_demand, ForecastTool
 from .kpi_tool import get_kpis, KPITool
 from .anomaly_tool import detect_anomalies, generate_anomaly_alerts
+from .segment_tool import get_segments
 
 __all__ = [
     "forecast_demand",
@@ -17,4 +18,5 @@ __all__ = [
     "KPITool",
     "detect_anomalies",
     "generate_anomaly_alerts",
+    "get_segments",
 ]
@@ -6,22 +6,115 @@ Permite que o LLM detecte anomalias nos dados de vendas usando Isolation Forest.
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 
 from langchain_core.tools import tool
 
+from src.agents.shared.tools.cache import cached_tool
+
 logger = logging.getLogger(__name__)
 
 # Diretório raiz
 ROOT_DIR = Path(__file__).parent.parent.parent.parent.parent
 
 
+def _fit_detector(data_type: str, segment_by: Optional[str]) -> Tuple[Any, Optional[str]]:
+    """
+    Carrega os dados e treina um detector.
+
+    Returns:
+        Tupla (detector treinado ou None, mensagem de erro)
+    """
+    import pandas as pd
+    from src.agents.scientist.anomaly import AnomalyDetector, SegmentedAnomalyDetector
+
+    # Determinar arquivo de dados
+    if data_type == "vendas":
+        data_path = ROOT_DIR / "src/data/raw/vendas/vendas.parquet"
+        entity_type = "vendas"
+    elif data_type == "estoque":
+        data_path = ROOT_DIR / "src/data/raw/estoque/estoque.parquet"
+        entity_type = "estoque"
+    else:
+        return None, f"Tipo de dados '{data_type}' não suportado. Use 'vendas' ou 'estoque'."
+
+    if segment_by not in (None, "empresa", "produto"):
+        return None, f"Segmentação '{segment_by}' não suportada. Use 'empresa' ou 'produto'."
+
+    # Verificar se arquivo existe
+    if not data_path.exists():
+        return None, f"Dados não encontrados em: {data_path}. Execute a extração primeiro."
+
+    # Carregar dados
+    logger.info(f"Carregando dados de: {data_path}")
+    df = pd.read_parquet(data_path)
+
+    if df.empty:
+        return None, "DataFrame vazio após carregamento."
+
+    # Criar e treinar detector
+    logger.info(f"Treinando detector de anomalias ({entity_type})...")
+    if segment_by == "empresa":
+        detector = SegmentedAnomalyDetector()
+        result = detector.fit(df, entity_type=entity_type, segment_by="CODEMP")
+    elif segment_by == "produto":
+        from src.agents.scientist.clustering import ProductSegmentation, get_segment_lookup
+
+        # Segmentos publicados evitam re-treinar a segmentação a cada chamada
+        segmenter = get_segment_lookup("produtos", refresh=True)
+        if not segmenter.is_loaded:
+            segmenter = ProductSegmentation()
+            seg_result = segmenter.fit(df)
+            if not seg_result.get("success"):
+                return None, f"Erro na segmentação de produtos: {seg_result.get('error')}"
+        detector = SegmentedAnomalyDetector()
+        result = detector.fit(df, entity_type=entity_type, segment_by=segmenter)
+    else:
+        detector = AnomalyDetector()
+        result = detector.fit(df, entity_type=entity_type)
+
+    if not result.get("success"):
+        return None, f"Erro no treinamento: {result.get('error')}"
+
+    return detector, None
+
+
+def _get_detector(data_type: str, segment_by: Optional[str] = None) -> Tuple[Any, Optional[str]]:
+    """
+    Detector treinado compartilhado do processo.
+
+    Fica em memória até a próxima carga do Engenheiro (versão dos dados):
+    detect_anomalies e generate_anomaly_alerts não retreinam a cada pergunta.
+
+    Returns:
+        Tupla (detector treinado ou None, mensagem de erro)
+    """
+    from src.agents.shared.services import get_service
+
+    detectors = get_service("anomaly_detectors")
+    segment_by = segment_by or None
+    key = (data_type, segment_by)
+
+    # Lock por chave: chamadas em paralelo treinam uma vez so
+    with detectors.lock(key):
+        detector = detectors.get(key)
+        if detector is not None:
+            return detector, None
+
+        detector, erro = _fit_detector(data_type, segment_by)
+        if detector is not None:
+            detectors[key] = detector
+        return detector, erro
+
+
 @tool
+@cached_tool()
 def detect_anomalies(
     data_type: str = "vendas",
     top_n: int = 10,
-    min_severity: str = "media"
+    min_severity: str = "media",
+    segment_by: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Detecta anomalias nos dados de vendas ou estoque usando Isolation Forest.
@@ -36,6 +129,8 @@ def detect_anomalies(
         data_type: Tipo de dados ('vendas' ou 'estoque')
         top_n: Número de anomalias para retornar (default: 10)
         min_severity: Severidade mínima ('baixa', 'media', 'alta', 'critica')
+        segment_by: Um modelo por segmento: 'empresa' (CODEMP) ou 'produto'
+            (segmentos de ProductSegmentation). None = modelo global.
 
     Returns:
         Dict com resumo das anomalias encontradas:
@@ -43,52 +138,12 @@ def detect_anomalies(
         - taxa_anomalias: Percentual
         - por_severidade: Contagem por nível
         - top_anomalias: Lista das piores anomalias
+        - por_segmento: Contagem por segmento (se segment_by)
     """
     try:
-        import pandas as pd
-        from src.agents.scientist.anomaly import AnomalyDetector
-
-        # Determinar arquivo de dados
-        if data_type == "vendas":
-            data_path = ROOT_DIR / "src/data/raw/vendas/vendas.parquet"
-            entity_type = "vendas"
-        elif data_type == "estoque":
-            data_path = ROOT_DIR / "src/data/raw/estoque/estoque.parquet"
-            entity_type = "estoque"
-        else:
-            return {
-                "success": False,
-                "error": f"Tipo de dados '{data_type}' não suportado. Use 'vendas' ou 'estoque'."
-            }
-
-        # Verificar se arquivo existe
-        if not data_path.exists():
-            return {
-                "success": False,
-                "error": f"Dados não encontrados em: {data_path}. Execute a extração primeiro."
-            }
-
-        # Carregar dados
-        logger.info(f"Carregando dados de: {data_path}")
-        df = pd.read_parquet(data_path)
-
-        if df.empty:
-            return {
-                "success": False,
-                "error": "DataFrame vazio após carregamento."
-            }
-
-        # Criar e treinar detector
-        logger.info(f"Treinando detector de anomalias ({entity_type})...")
-        detector = AnomalyDetector()
-
-        result = detector.fit(df, entity_type=entity_type)
-
-        if not result.get("success"):
-            return {
-                "success": False,
-                "error": f"Erro no treinamento: {result.get('error')}"
-            }
+        detector, erro = _get_detector(data_type, segment_by)
+        if detector is None:
+            return {"success": False, "error": erro}
 
         # Obter resumo
         resumo = detector.get_anomalies_summary(top_n=top_n)
@@ -109,7 +164,7 @@ def detect_anomalies(
             if severidade_ordem.index(a.get("severidade", "baixa")) >= min_idx
         ]
 
-        return {
+        resultado = {
             "success": True,
             "data_type": data_type,
             "total_registros": resumo.get("total_registros", 0),
@@ -121,6 +176,12 @@ def detect_anomalies(
             "filtro_severidade": min_severity
         }
 
+        if "por_segmento" in resumo:
+            resultado["segmentado_por"] = resumo.get("segmentado_por")
+            resultado["por_segmento"] = resumo["por_segmento"]
+
+        return resultado
+
     except ImportError as e:
         logger.error(f"Erro de importação: {e}")
         return {
@@ -136,6 +197,7 @@ def detect_anomalies(
 
 
 @tool
+@cached_tool()
 def generate_anomaly_alerts(
     min_severity: str = "alta",
     format_type: str = "text"
@@ -156,28 +218,14 @@ def generate_anomaly_alerts(
         Dict com alertas formatados
     """
     try:
-        import pandas as pd
-        from src.agents.scientist.anomaly import AnomalyDetector, AlertGenerator
-
-        # Carregar dados de vendas
-        data_path = ROOT_DIR / "src/data/raw/vendas/vendas.parquet"
-
-        if not data_path.exists():
-            return {
-                "success": False,
-                "error": "Dados de vendas não encontrados."
-            }
-
-        df = pd.read_parquet(data_path)
-
-        # Detectar anomalias
-        detector = AnomalyDetector()
-        result = detector.fit(df, entity_type="vendas")
+        from src.agents.scientist.anomaly import AlertGenerator
 
-        if not result.get("success"):
+        # Detectar anomalias (detector de vendas compartilhado com detect_anomalies)
+        detector, erro = _get_detector("vendas")
+        if detector is None:
             return {
                 "success": False,
-                "error": f"Erro na detecção: {result.get('error')}"
+                "error": f"Erro na detecção: {erro}"
             }
 
         # Obter resumo
@@ -12,6 +12,8 @@ from pathlib import Path
 
 from langchain_core.tools import tool
 
+from src.agents.shared.tools.cache import cached_tool
+
 logger = logging.getLogger(__name__)
 
 # Diretório de modelos
@@ -34,7 +36,14 @@ def _find_model_for_product(codprod: int) -> Optional[Path]:
     return sorted(models)[-1]
 
 
+def _forecast_version() -> tuple:
+    """Mesmo carimbo do predictor compartilhado (dados + modelos de demanda)."""
+    from src.agents.shared.services import get_services
+    return get_services().stamp("predictor")
+
+
 @tool
+@cached_tool(version=_forecast_version)
 def forecast_demand(codprod: int, periods: int = 30) -> Dict[str, Any]:
     """
     Faz previsão de demanda para um produto.
@@ -57,12 +66,12 @@ def forecast_demand(codprod: int, periods: int = 30) -> Dict[str, Any]:
         model_path = _find_model_for_product(codprod)
 
         if model_path:
-            # Carregar modelo treinado
-            from ...scientist.forecasting import DemandForecastModel
-            model = DemandForecastModel.load(str(model_path))
+            # Predictor compartilhado: o modelo fica em memoria entre chamadas
+            from ...shared.services import get_service
+            predictor = get_service("predictor")
 
             # Gerar previsão
-            result = model.get_forecast_summary(periods=periods)
+            result = predictor.forecast_product(codprod, periods=periods)
 
             if result.get("success"):
                 return {
@@ -12,10 +12,19 @@ from datetime import datetime, timedelta
 
 from langchain_core.tools import tool
 
+from src.utils.data_version import get_data_version
+from src.agents.shared.tools.cache import cached_tool
+
 logger = logging.getLogger(__name__)
 
 
+def _kpis_version() -> tuple:
+    """Versao dos dados + dia atual (periodos relativos a hoje)."""
+    return get_data_version(), datetime.now().date().isoformat()
+
+
 @tool
+@cached_tool(version=_kpis_version)
 def get_kpis(
     modulo: str = "vendas",
     periodo: str = "mes_atual"
@@ -31,21 +40,28 @@ def get_kpis(
 
     Args:
         modulo: Módulo de KPIs. Opções: "vendas", "compras", "estoque"
-        periodo: Período para calcular. Opções: "mes_atual", "mes_anterior", "ano"
+        periodo: Período para calcular. Opções: "hoje", "semana" (últimos 7 dias),
+            "mes_atual", "mes_anterior", "ano"
 
     Returns:
         Dict com os KPIs calculados
     """
     try:
-        # Importar facade do analista
-        from ...analyst import Analista
+        # Analista compartilhado do processo (loader com cache do lake)
+        from ...shared.services import get_service
 
-        analista = Analista()
+        analista = get_service("analista")
 
         # Definir datas baseado no período
         hoje = datetime.now()
 
-        if periodo == "mes_atual":
+        if periodo == "hoje":
+            data_inicio = hoje
+            data_fim = hoje
+        elif periodo == "semana":
+            data_inicio = hoje - timedelta(days=6)
+            data_fim = hoje
+        elif periodo == "mes_atual":
             data_inicio = hoje.replace(day=1)
             data_fim = hoje
         elif periodo == "mes_anterior":
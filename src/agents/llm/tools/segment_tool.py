@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Tool de Segmentos para o Agente LLM.
+
+Consulta o segmento (VIP, Regular, Estrela, ...) de clientes ou produtos
+a partir das atribuições publicadas pelo Cientista (SegmentLookup).
+"""
+
+import logging
+from typing import Dict, Any
+
+from langchain_core.tools import tool
+
+logger = logging.getLogger(__name__)
+
+# Máximo de códigos detalhados na resposta
+MAX_CODIGOS = 50
+
+TIPOS = {
+    "cliente": "clientes",
+    "clientes": "clientes",
+    "produto": "produtos",
+    "produtos": "produtos",
+}
+
+
+@tool
+def get_segments(tipo: str = "cliente", codigos: str = "") -> Dict[str, Any]:
+    """
+    Consulta o segmento de clientes ou produtos.
+
+    Use esta ferramenta quando o usuário perguntar:
+    - Qual o segmento/perfil de um cliente (VIP, Regular, Esporádico, Inativo)
+    - Qual a categoria de um produto (Estrela, Vaca Leiteira, Abacaxi)
+    - Quantos clientes/produtos existem em cada segmento (sem códigos)
+
+    Args:
+        tipo: 'cliente' (CODPARC) ou 'produto' (CODPROD)
+        codigos: Códigos separados por vírgula (vazio = resumo por segmento)
+
+    Returns:
+        Dict com o segmento de cada código ou o resumo por segmento
+    """
+    try:
+        from ...scientist.clustering import get_segment_lookup
+
+        kind = TIPOS.get(tipo.lower().strip())
+        if kind is None:
+            return {
+                "success": False,
+                "error": f"Tipo '{tipo}' inválido. Use 'cliente' ou 'produto'."
+            }
+
+        lookup = get_segment_lookup(kind, refresh=True)
+        if not lookup.is_loaded:
+            return {
+                "success": False,
+                "error": f"Segmentação de {kind} não publicada. "
+                         "Execute primeiro: python scripts/segmentar_clientes.py"
+            }
+
+        # Sem códigos: resumo por segmento
+        keys = [c.strip() for c in str(codigos).split(",") if c.strip()]
+        if not keys:
+            return lookup.get_stats()
+
+        try:
+            keys = [int(float(k)) for k in keys]
+        except ValueError:
+            return {"success": False, "error": f"Códigos inválidos: {codigos}"}
+
+        resultados = [lookup.get(k) for k in keys[:MAX_CODIGOS]]
+
+        return {
+            "success": True,
+            "tipo": kind,
+            "encontrados": sum(r is not None for r in resultados),
+            "nao_encontrados": [k for k, r in zip(keys, resultados) if r is None],
+            "segmentos": [r for r in resultados if r is not None],
+        }
+
+    except Exception as e:
+        logger.error(f"Erro ao consultar segmentos: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
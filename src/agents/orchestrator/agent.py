@@ -15,15 +15,20 @@ Uso:
     resposta = agent.ask("Qual a previsão de vendas do produto 261301?")
 """
 
+import os
 import logging
 from typing import Optional, Dict, Any
 
 from ..base import BaseAgent
-from ..llm.tools import forecast_demand, get_kpis, detect_anomalies, generate_anomaly_alerts
+from ..llm.tools import forecast_demand, get_kpis, detect_anomalies, generate_anomaly_alerts, get_segments
 from ..shared.rag import DocumentRetriever, search_documentation
+from .router import IntentRouter
 
 logger = logging.getLogger(__name__)
 
+# Perguntas simples respondidas sem o LLM (0 = sempre usar o LLM)
+FAST_ROUTER = os.getenv("FAST_ROUTER", "1") != "0"
+
 # Prompt do Orquestrador
 ORCHESTRATOR_PROMPT = """Você é o Orquestrador do Data Hub da MMarra Distribuidora.
 
@@ -59,19 +64,25 @@ FERRAMENTAS DISPONÍVEIS:
 3. get_kpis(modulo, periodo) - Métricas e indicadores
    - Use quando perguntarem sobre faturamento, margem, KPIs
    - modulo: "vendas", "compras" ou "estoque"
-   - periodo: "mes_atual", "mes_anterior" ou "ano"
+   - periodo: "hoje", "semana", "mes_atual", "mes_anterior" ou "ano"
 
-4. detect_anomalies(data_type, top_n, min_severity) - DETECTA ANOMALIAS
+4. detect_anomalies(data_type, top_n, min_severity, segment_by) - DETECTA ANOMALIAS
    - Use quando perguntarem sobre vendas estranhas, valores anormais, transações suspeitas
    - data_type: "vendas" ou "estoque"
    - top_n: número de anomalias para mostrar (padrão 10)
    - min_severity: "baixa", "media", "alta" ou "critica"
+   - segment_by: "empresa" ou "produto" para comparar cada venda com o próprio segmento (opcional)
 
 5. generate_anomaly_alerts(min_severity, format_type) - GERA ALERTAS
    - Use quando pedirem alertas ou notificações de problemas
    - min_severity: severidade mínima para alertar
    - format_type: "text", "markdown" ou "html"
 
+6. get_segments(tipo, codigos) - SEGMENTO DE CLIENTES/PRODUTOS
+   - Use quando perguntarem o perfil/segmento de um cliente ou a categoria de um produto
+   - tipo: "cliente" ou "produto"
+   - codigos: códigos separados por vírgula (vazio = quantidade por segmento)
+
 REGRAS:
 - Sempre responda em português brasileiro
 - Use search_documentation PRIMEIRO para perguntas técnicas
@@ -85,6 +96,7 @@ EXEMPLOS:
 - "Quais bugs existem no WMS?" → Use search_documentation("bugs problemas WMS")
 - "Qual a previsão de vendas do produto 261301?" → Use forecast_demand
 - "Qual o faturamento do mês?" → Use get_kpis(modulo="vendas")
+- "O cliente 1234 é VIP?" → Use get_segments(tipo="cliente", codigos="1234")
 """
 
 
@@ -98,7 +110,8 @@ class OrchestratorAgent(BaseAgent):
     def __init__(
         self,
         model: Optional[str] = None,
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        fast_router: bool = FAST_ROUTER
     ):
         """
         Inicializa o Orquestrador.
@@ -106,6 +119,7 @@ class OrchestratorAgent(BaseAgent):
         Args:
             model: Modelo LLM (default: llama-3.1-70b-versatile)
             temperature: Temperatura do modelo
+            fast_router: Responder perguntas simples sem o LLM (IntentRouter)
         """
         # Configurar tools (RAG primeiro para priorizar busca na documentação)
         tools = [
@@ -113,7 +127,8 @@ class OrchestratorAgent(BaseAgent):
             forecast_demand,
             get_kpis,
             detect_anomalies,
-            generate_anomaly_alerts
+            generate_anomaly_alerts,
+            get_segments
         ]
 
         super().__init__(
@@ -124,6 +139,8 @@ class OrchestratorAgent(BaseAgent):
             temperature=temperature
         )
 
+        self.router = IntentRouter({t.name: t for t in tools}) if fast_router else None
+
         logger.info("Orquestrador inicializado com RAG, previsão, KPIs e detecção de anomalias")
 
     def ask(self, question: str) -> str:
@@ -136,6 +153,14 @@ class OrchestratorAgent(BaseAgent):
         Returns:
             Resposta do agente
         """
+        # Perguntas frequentes e inequívocas: resposta direta das tools
+        if self.router is not None:
+            resposta = self.router.answer(question)
+            if resposta is not None:
+                self.memory.append({"role": "user", "content": question})
+                self.memory.append({"role": "assistant", "content": resposta})
+                return resposta
+
         return self.run(question)
 
     def chat(self):
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Roteador Rápido de Intenções
+
+Perguntas frequentes e simples ("faturamento do mês", "ticket médio da
+semana", "previsão do produto 261301", "segmento do cliente 1234") são
+reconhecidas por padrões e respondidas chamando as tools diretamente,
+sem passar pelo LLM (duas chamadas ao Groq a menos).
+
+Na dúvida o roteador não responde (retorna None) e a pergunta segue
+para o LLM:
+- mais de uma métrica, produto ou período na mesma pergunta
+- período que a tool não tem ("ontem", "trimestre", "dia 10"); o mês
+  atual só é assumido quando a pergunta não cita período nenhum
+- comparações, explicações, filtros por cliente/vendedor etc.
+- tool com erro
+
+Uso:
+    router = IntentRouter()
+    resposta = router.answer("Qual o faturamento do mês?")  # None = usar o LLM
+"""
+
+import logging
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Máximo de palavras de uma pergunta "simples"
+MAX_PALAVRAS = 14
+
+# Métricas de KPI: (padrão, módulo, chave do KPI, rótulo)
+KPI_METRICAS: List[Tuple[str, str, str, str]] = [
+    (r"\bticket medio\b", "vendas", "ticket_medio", "Ticket médio"),
+    (r"\b(faturamento|faturei|faturou|faturamos|receita)\b", "vendas", "faturamento_total", "Faturamento"),
+    (r"\b(quantos|quantidade de|qtd( de)?|numero de|total de) pedidos de compra\b",
+     "compras", "qtd_pedidos", "Pedidos de compra"),
+    (r"\b((volume|total|valor) (de |das |em )?compras|quanto (compramos|comprei|comprou))\b",
+     "compras", "volume_compras", "Volume de compras"),
+    (r"\b(quantos|quantidade de|qtd( de)?|numero de|total de) pedidos( de venda)?\b",
+     "vendas", "qtd_pedidos", "Pedidos de venda"),
+    (r"\b(quantos )?produtos (estao )?sem estoque\b", "estoque", "produtos_sem_estoque", "Produtos sem estoque"),
+    (r"\b((unidades|total) (em|de|no) estoque|estoque total)\b",
+     "estoque", "estoque_total_unidades", "Unidades em estoque"),
+]
+
+# Períodos da tool get_kpis: (padrão, periodo, rótulo); a ordem importa
+KPI_PERIODOS: List[Tuple[str, str, str]] = [
+    (r"\b(mes passado|mes anterior|ultimo mes)\b", "mes_anterior", "mês anterior"),
+    (r"\b(semana|ultimos sete dias)\b", "semana", "últimos 7 dias"),
+    (r"\bhoje\b", "hoje", "hoje"),
+    (r"\b(ano|anual|no ano)\b", "ano", "ano"),
+    (r"\b(mes|mensal|mes atual)\b", "mes_atual", "mês atual"),
+]
+PERIODO_PADRAO = ("mes_atual", "mês atual")
+
+# Qualquer menção a tempo que sobre depois do período reconhecido: sem
+# certeza do período, a pergunta vai para o LLM (em vez de cair no padrão)
+TEMPORAIS = (
+    r"\b(hoje|ontem|anteontem|amanha|dias?|diari\w*|semana\w*|quinzen\w*|mes(es)?|mensal\w*|"
+    r"bimestr\w*|trimestr\w*|semestr\w*|anos?|anual\w*|periodo|data|desde|ate|entre|ultim\w*|passad\w*)\b"
+)
+
+# Palavras que pedem raciocínio, comparação ou filtros que as tools não têm
+BLOQUEIOS_KPI = (
+    r"\b(por ?que|compar\w*|versus|vs|diferenca|explic\w*|analis\w*|tendencia|crescimento|"
+    r"caiu|subiu|melhor|pior|ranking|top|maior\w*|menor\w*|cliente\w*|vendedor\w*|fornecedor\w*|"
+    r"empresa|filial|loja\w*|produto|grafico|relatorio|meta|previs\w*|liquid\w*|brut\w*)\b"
+    # Períodos que a tool não tem: datas, meses pelo nome, "ano passado", "30 dias"
+    r"|\b((ano|semana) (passad[oa]|anterior)|\d+\s*(dias?|semanas?|mes(es)?|anos?)|(19|20)\d{2})\b"
+    r"|\b(ontem|anteontem|semanal|quinzen\w*|trimestr\w*|semestr\w*|dia\s*\d+)\b"
+    r"|\b(janeiro|fevereiro|marco|abril|maio|junho|julho|agosto|setembro|outubro|novembro|dezembro)\b"
+)
+BLOQUEIOS_PREVISAO = r"\b(por ?que|compar\w*|versus|vs|explic\w*|cliente\w*|categoria|grupo|todos)\b"
+
+PREVISAO = r"\b(previs\w*|prever|projec\w*|demanda|quanto (vai|vamos|deve|devemos) vender)\b"
+PRODUTO = r"\b(?:produto|codprod|cod\.? produto|item|peca)\s*(?:n[o.]?\s*|codigo\s*|cod\.?\s*)?(\d{3,})\b"
+
+SEGMENTO = r"\b(segmento|perfil|classificacao|classificado|categoria|vip)\b"
+SEGMENTO_CHAVE = r"\b(cliente|produto)\s*(?:codigo\s*|cod\.?\s*)?(\d+)\b"
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com espaços simples."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"[^\w.\s]", " ", texto)
+    return " ".join(texto.split())
+
+
+def _numero(valor: float, casas: int = 0) -> str:
+    """Formata número no padrão brasileiro (1.234,5)."""
+    texto = f"{valor:,.{casas}f}"
+    return texto.replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _data(iso: str) -> str:
+    """YYYY-MM-DD -> DD/MM/YYYY."""
+    ano, mes, dia = iso[:10].split("-")
+    return f"{dia}/{mes}/{ano}"
+
+
+@dataclass
+class Intent:
+    """Intenção reconhecida: tool a chamar, argumentos e formatação da resposta."""
+
+    nome: str
+    tool: str
+    args: Dict[str, Any]
+    contexto: Dict[str, Any] = field(default_factory=dict)
+
+
+class IntentRouter:
+    """
+    Reconhece intenções frequentes e responde sem o LLM.
+
+    Métodos principais:
+    - match(): Intenção da pergunta (None se não tiver certeza)
+    - answer(): Resposta formatada (None = encaminhar ao LLM)
+    - get_stats(): Perguntas respondidas por intenção e encaminhadas
+    """
+
+    def __init__(self, tools: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            tools: Nome -> tool (None = tools padrão do Data Hub)
+        """
+        if tools is None:
+            from ..llm.tools import forecast_demand, get_kpis, get_segments
+            tools = {t.name: t for t in (get_kpis, forecast_demand, get_segments)}
+
+        self.tools = tools
+        self.stats: Dict[str, Any] = {"respondidas": 0, "encaminhadas": 0, "por_intencao": {}}
+
+        self._matchers: List[Callable[[str], Optional[Intent]]] = [
+            self._match_previsao,
+            self._match_segmento,
+            self._match_kpi,
+        ]
+        self._formatters: Dict[str, Callable[[Intent, Dict[str, Any]], Optional[str]]] = {
+            "kpi": self._format_kpi,
+            "previsao": self._format_previsao,
+            "segmento": self._format_segmento,
+        }
+
+    # -------------------------------------------------------------------------
+    # Reconhecimento
+    # -------------------------------------------------------------------------
+
+    def match(self, question: str) -> Optional[Intent]:
+        """
+        Reconhece a intenção da pergunta.
+
+        Args:
+            question: Pergunta em linguagem natural
+
+        Returns:
+            Intent, ou None se a pergunta não for simples/inequívoca
+        """
+        texto = normalizar(question)
+        if not texto or len(texto.split()) > MAX_PALAVRAS:
+            return None
+
+        intents = [i for i in (m(texto) for m in self._matchers) if i is not None]
+
+        # Mais de uma intenção possível: o LLM decide
+        if len(intents) != 1 or intents[0].tool not in self.tools:
+            return None
+        return intents[0]
+
+    def _match_kpi(self, texto: str) -> Optional[Intent]:
+        if re.search(BLOQUEIOS_KPI, texto):
+            return None
+
+        metricas = []
+        restante = texto
+        for padrao, modulo, chave, rotulo in KPI_METRICAS:
+            if re.search(padrao, restante):
+                metricas.append((modulo, chave, rotulo))
+                restante = re.sub(padrao, " ", restante)
+        if len(metricas) != 1:
+            return None
+        modulo, chave, rotulo = metricas[0]
+
+        periodos = []
+        for padrao, periodo, periodo_rotulo in KPI_PERIODOS:
+            if re.search(padrao, restante):
+                periodos.append((periodo, periodo_rotulo))
+                restante = re.sub(padrao, " ", restante)
+        if len(periodos) > 1 or re.search(TEMPORAIS, restante):
+            return None
+        periodo, periodo_rotulo = periodos[0] if periodos else PERIODO_PADRAO
+
+        return Intent(
+            nome="kpi",
+            tool="get_kpis",
+            args={"modulo": modulo, "periodo": periodo},
+            contexto={"kpi": chave, "rotulo": rotulo, "periodo": periodo_rotulo},
+        )
+
+    def _match_previsao(self, texto: str) -> Optional[Intent]:
+        if not re.search(PREVISAO, texto) or re.search(BLOQUEIOS_PREVISAO, texto):
+            return None
+
+        produtos = set(re.findall(PRODUTO, texto))
+        if len(produtos) != 1:
+            return None
+
+        # Horizonte: "60 dias", "2 semanas", "3 meses" (padrão 30 dias)
+        periods = 30
+        horizonte = re.findall(r"\b(\d{1,3})\s*(dias?|semanas?|meses|mes)\b", texto)
+        if len(horizonte) > 1:
+            return None
+        if horizonte:
+            n, unidade = int(horizonte[0][0]), horizonte[0][1]
+            periods = n * (7 if unidade.startswith("semana") else 30 if unidade.startswith("mes") else 1)
+        elif re.search(r"\bproxima semana\b", texto):
+            periods = 7
+        if not 1 <= periods <= 365:
+            return None
+
+        codprod = int(produtos.pop())
+        return Intent(nome="previsao", tool="forecast_demand", args={"codprod": codprod, "periods": periods})
+
+    def _match_segmento(self, texto: str) -> Optional[Intent]:
+        if not re.search(SEGMENTO, texto) or re.search(PREVISAO, texto):
+            return None
+
+        chaves = set(re.findall(SEGMENTO_CHAVE, texto))
+        if len(chaves) != 1:
+            return None
+
+        tipo, codigo = chaves.pop()
+        return Intent(nome="segmento", tool="get_segments", args={"tipo": tipo, "codigos": codigo})
+
+    # -------------------------------------------------------------------------
+    # Resposta
+    # -------------------------------------------------------------------------
+
+    def answer(self, question: str) -> Optional[str]:
+        """
+        Responde a pergunta sem o LLM, se possível.
+
+        Args:
+            question: Pergunta em linguagem natural
+
+        Returns:
+            Resposta formatada, ou None para encaminhar ao LLM
+        """
+        inicio = time.perf_counter()
+        intent = self.match(question)
+        if intent is None:
+            self.stats["encaminhadas"] += 1
+            return None
+
+        try:
+            result = self.tools[intent.tool].invoke(intent.args)
+            resposta = None
+            if isinstance(result, dict) and result.get("success"):
+                resposta = self._formatters[intent.nome](intent, result)
+        except Exception as e:
+            logger.warning(f"Rota rápida '{intent.nome}' falhou, usando o LLM: {e}")
+            resposta = None
+
+        if resposta is None:
+            self.stats["encaminhadas"] += 1
+            return None
+
+        self.stats["respondidas"] += 1
+        self.stats["por_intencao"][intent.nome] = self.stats["por_intencao"].get(intent.nome, 0) + 1
+        logger.info(f"Rota rápida: {intent.nome} {intent.args} ({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+        return resposta
+
+    def _format_kpi(self, intent: Intent, result: Dict[str, Any]) -> Optional[str]:
+        kpi = result.get("kpis", {}).get(intent.contexto["kpi"])
+        if not isinstance(kpi, dict) or "formatted" not in kpi:
+            return None
+
+        modulo = intent.args["modulo"]
+        if modulo == "estoque":
+            return f"{intent.contexto['rotulo']}: **{kpi['formatted']}**"
+
+        periodo = result.get("periodo", {})
+        datas = ""
+        if isinstance(periodo, dict) and periodo.get("inicio"):
+            datas = f" ({_data(periodo['inicio'])} a {_data(periodo['fim'])})"
+        return f"{intent.contexto['rotulo']} de {modulo} — {intent.contexto['periodo']}{datas}: **{kpi['formatted']}**"
+
+    def _format_previsao(self, intent: Intent, result: Dict[str, Any]) -> Optional[str]:
+        previsao = result.get("previsao", {})
+        if "total" not in previsao:
+            return None
+
+        linhas = [
+            f"Previsão de demanda do produto {intent.args['codprod']} para os próximos "
+            f"{intent.args['periods']} dias: **{_numero(previsao['total'])} unidades** "
+            f"(média de {_numero(previsao.get('media_diaria', 0), 1)} por dia)."
+        ]
+
+        intervalo = previsao.get("intervalo_confianca", {})
+        if intervalo:
+            linhas.append(
+                f"Intervalo de confiança ({intervalo.get('nivel', '80%')}): "
+                f"{_numero(intervalo['minimo'])} a {_numero(intervalo['maximo'])} unidades."
+            )
+
+        tendencia = result.get("tendencia", {})
+        if isinstance(tendencia, dict) and tendencia.get("direcao"):
+            linhas.append(f"Tendência: {tendencia['direcao']} ({tendencia.get('variacao_pct', 0):+.1f}%).")
+
+        return "\n".join(linhas)
+
+    def _format_segmento(self, intent: Intent, result: Dict[str, Any]) -> Optional[str]:
+        rotulo = "Cliente" if intent.args["tipo"] == "cliente" else "Produto"
+        segmentos = result.get("segmentos", [])
+        if not segmentos:
+            return f"{rotulo} {intent.args['codigos']} não encontrado na segmentação publicada."
+        return f"{rotulo} {intent.args['codigos']}: segmento **{segmentos[0]['segmento']}**."
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Perguntas respondidas (por intenção) e encaminhadas ao LLM."""
+        total = self.stats["respondidas"] + self.stats["encaminhadas"]
+        return {
+            **self.stats,
+            "taxa_rota_rapida": round(self.stats["respondidas"] / total, 3) if total else 0.0,
+        }
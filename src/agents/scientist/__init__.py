@@ -26,8 +26,8 @@ Exemplo de uso:
 
 from .config import SCIENTIST_CONFIG, FORECAST_CONFIG, ANOMALY_CONFIG, CLUSTERING_CONFIG
 from .forecasting import DemandForecastModel, DemandPreprocessor, DemandPredictor
-from .anomaly import AnomalyDetector, AlertGenerator
-from .clustering import CustomerSegmentation, ProductSegmentation
+from .anomaly import AnomalyDetector, SegmentedAnomalyDetector, AlertGenerator
+from .clustering import CustomerSegmentation, ProductSegmentation, SegmentLookup, get_segment_lookup
 
 __all__ = [
     # Config
@@ -41,8 +41,11 @@ __all__ = [
     'DemandPredictor',
     # Anomaly
     'AnomalyDetector',
+    'SegmentedAnomalyDetector',
     'AlertGenerator',
     # Clustering
     'CustomerSegmentation',
     'ProductSegmentation',
+    'SegmentLookup',
+    'get_segment_lookup',
 ]
@@ -6,6 +6,7 @@ Usa Isolation Forest para detectar padroes anomalos em vendas, compras e estoque
 
 Classes:
 - AnomalyDetector: Detecta anomalias
+- SegmentedAnomalyDetector: Um modelo por segmento (empresa, produto, cliente)
 - AlertGenerator: Gera alertas baseados em anomalias
 
 Exemplo:
@@ -17,9 +18,11 @@ Exemplo:
 """
 
 from .detector import AnomalyDetector
+from .segmented import SegmentedAnomalyDetector
 from .alerts import AlertGenerator
 
 __all__ = [
     'AnomalyDetector',
+    'SegmentedAnomalyDetector',
     'AlertGenerator',
 ]
@@ -37,8 +37,15 @@ class AnomalyDetector:
     - fit(): Treina o detector
     - detect(): Detecta anomalias em novos dados
     - get_anomalies_summary(): Retorna dict estruturado (para LLM)
+
+    Para historicos grandes, fit() entra em modo large_data (treino em
+    amostra estratificada + pontuacao em blocos), guardando apenas o
+    necessario para get_anomalies_summary().
     """
 
+    # Identificadores incluidos nas anomalias retornadas
+    ID_COLUMNS = ["NUNOTA", "CODPROD", "CODPARC", "DTNEG"]
+
     def __init__(self, config: Optional[Dict] = None):
         """
         Inicializa o detector.
@@ -53,14 +60,17 @@ class AnomalyDetector:
         self.model: Optional[IsolationForest] = None
         self.scaler: Optional[StandardScaler] = None
         self.feature_columns: List[str] = []
+        self.large_data_config = ANOMALY_CONFIG.get("large_data", {})
         self.df_with_scores: Optional[pd.DataFrame] = None
+        self.scoring_summary: Optional[Dict[str, Any]] = None
         self.metadata: Dict[str, Any] = {}
 
     def fit(
         self,
         df: pd.DataFrame,
         feature_columns: Optional[List[str]] = None,
-        entity_type: str = "vendas"
+        entity_type: str = "vendas",
+        large_data: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Treina o detector de anomalias.
@@ -69,17 +79,17 @@ class AnomalyDetector:
             df: DataFrame com os dados
             feature_columns: Colunas a usar como features (opcional)
             entity_type: Tipo de entidade ('vendas', 'compras', 'estoque')
+            large_data: Forca o modo de grandes volumes (None = automatico
+                pelo numero de linhas, ver ANOMALY_CONFIG["large_data"])
 
         Returns:
             Dict com metadados do treinamento
         """
-        df_copy = df.copy()
-
         # Determinar features
         if feature_columns:
             self.feature_columns = feature_columns
         else:
-            self.feature_columns = self._get_default_features(df_copy, entity_type)
+            self.feature_columns = self._get_default_features(df, entity_type)
 
         if not self.feature_columns:
             return {
@@ -88,7 +98,7 @@ class AnomalyDetector:
             }
 
         # Filtrar apenas colunas existentes
-        self.feature_columns = [c for c in self.feature_columns if c in df_copy.columns]
+        self.feature_columns = [c for c in self.feature_columns if c in df.columns]
 
         if len(self.feature_columns) < 1:
             return {
@@ -96,49 +106,46 @@ class AnomalyDetector:
                 "error": f"Features nao encontradas: {feature_columns}"
             }
 
-        # Preparar dados
-        X = df_copy[self.feature_columns].copy()
+        if large_data is None:
+            threshold = self.large_data_config.get("auto_threshold_rows", 500_000)
+            large_data = len(df) >= threshold
 
-        # Converter para numerico e preencher NaN
-        for col in X.columns:
-            X[col] = pd.to_numeric(X[col], errors='coerce')
-        X = X.fillna(0)
+        self.df_with_scores = None
+        self.scoring_summary = None
+
+        if large_data:
+            return self._fit_large(df, entity_type)
+
+        # Preparar dados (float32, sem copiar o DataFrame)
+        X = self._prepare_features(df)
 
         # Normalizar
         self.scaler = StandardScaler()
         X_scaled = self.scaler.fit_transform(X)
 
         # Criar e treinar modelo
-        self.model = IsolationForest(
-            contamination=self.config.get("contamination", 0.05),
-            n_estimators=self.config.get("n_estimators", 100),
-            max_samples=self.config.get("max_samples", "auto"),
-            random_state=self.config.get("random_state", 42),
-            n_jobs=-1
-        )
-
-        # Treinar
+        self.model = self._create_model(self.config.get("max_samples", "auto"))
         self.model.fit(X_scaled)
 
         # Calcular scores para todos os dados
+        # (predict() == -1 equivale a decision_function() < 0)
         scores = self.model.decision_function(X_scaled)
-        predictions = self.model.predict(X_scaled)
+        is_anomaly = scores < 0
 
-        # Adicionar ao DataFrame
-        self.df_with_scores = df_copy.copy()
-        self.df_with_scores["_anomaly_score"] = scores
-        self.df_with_scores["_is_anomaly"] = predictions == -1
+        # Adicionar ao DataFrame (unica copia)
+        self.df_with_scores = df.assign(_anomaly_score=scores, _is_anomaly=is_anomaly)
 
         # Metadados
-        n_anomalies = (predictions == -1).sum()
+        n_anomalies = int(is_anomaly.sum())
         self.metadata = {
             "entity_type": entity_type,
             "trained_at": datetime.now().isoformat(),
-            "n_samples": len(df_copy),
+            "mode": "padrao",
+            "n_samples": len(df),
             "n_features": len(self.feature_columns),
             "features": self.feature_columns,
-            "n_anomalies": int(n_anomalies),
-            "anomaly_rate": float(n_anomalies / len(df_copy) * 100),
+            "n_anomalies": n_anomalies,
+            "anomaly_rate": float(n_anomalies / len(df) * 100),
         }
 
         return {
@@ -146,6 +153,153 @@ class AnomalyDetector:
             **self.metadata
         }
 
+    def _fit_large(self, df: pd.DataFrame, entity_type: str) -> Dict[str, Any]:
+        """
+        Treina e pontua em modo de grandes volumes.
+
+        - Treina em amostra estratificada com max_samples limitado
+        - Pontua o DataFrame em blocos de chunk_size linhas
+        - Guarda apenas top-K, histograma de severidade e estatisticas
+        """
+        cfg = self.large_data_config
+        n_rows = len(df)
+
+        # Treinar em amostra
+        sample_pos = self._stratified_sample_positions(df)
+        X_train = self._prepare_features(df.iloc[sample_pos])
+
+        self.scaler = StandardScaler()
+        X_train = self.scaler.fit_transform(X_train)
+
+        max_samples = min(cfg.get("max_samples", 512), len(sample_pos))
+        self.model = self._create_model(max_samples)
+        self.model.fit(X_train)
+        del X_train
+
+        # Pontuar em blocos
+        chunk_size = max(1, cfg.get("chunk_size", 100_000))
+        top_k = max(1, cfg.get("top_k", 100))
+
+        top_pos = np.empty(0, dtype=np.int64)
+        top_scores = np.empty(0, dtype=np.float64)
+        severity_counts = {"critica": 0, "alta": 0, "media": 0, "baixa": 0}
+        n_features = len(self.feature_columns)
+        feat_sum = np.zeros(n_features, dtype=np.float64)
+        feat_min = np.full(n_features, np.inf)
+        feat_max = np.full(n_features, -np.inf)
+        n_anomalies = 0
+
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            X = self._prepare_features(df.iloc[start:stop])
+            scores = self.model.decision_function(self.scaler.transform(X))
+
+            mask = scores < 0
+            n_chunk = int(mask.sum())
+            if n_chunk == 0:
+                continue
+
+            n_anomalies += n_chunk
+            chunk_scores = scores[mask]
+            X_anom = X[mask]
+
+            for severity, count in self._severity_histogram(chunk_scores).items():
+                severity_counts[severity] += count
+
+            feat_sum += X_anom.sum(axis=0, dtype=np.float64)
+            feat_min = np.minimum(feat_min, X_anom.min(axis=0))
+            feat_max = np.maximum(feat_max, X_anom.max(axis=0))
+
+            # Manter apenas os top_k menores scores (piores anomalias)
+            top_pos = np.concatenate([top_pos, np.flatnonzero(mask) + start])
+            top_scores = np.concatenate([top_scores, chunk_scores])
+            if len(top_scores) > top_k:
+                keep = np.argpartition(top_scores, top_k - 1)[:top_k]
+                top_pos, top_scores = top_pos[keep], top_scores[keep]
+
+        order = np.argsort(top_scores, kind="stable")
+        top_pos, top_scores = top_pos[order], top_scores[order]
+
+        keep_cols = self.feature_columns + [c for c in self.ID_COLUMNS if c in df.columns]
+        top_rows = df.iloc[top_pos][keep_cols].assign(_anomaly_score=top_scores)
+
+        stats = {}
+        if n_anomalies:
+            for j, col in enumerate(self.feature_columns):
+                stats[col] = {
+                    "media_anomalias": round(float(feat_sum[j] / n_anomalies), 2),
+                    "max_anomalias": round(float(feat_max[j]), 2),
+                    "min_anomalias": round(float(feat_min[j]), 2),
+                }
+
+        self.scoring_summary = {
+            "total_registros": n_rows,
+            "total_anomalias": n_anomalies,
+            "por_severidade": severity_counts,
+            "estatisticas": stats,
+            "top_rows": top_rows,
+        }
+
+        self.metadata = {
+            "entity_type": entity_type,
+            "trained_at": datetime.now().isoformat(),
+            "mode": "large_data",
+            "n_samples": n_rows,
+            "n_train_samples": int(len(sample_pos)),
+            "max_samples": int(max_samples),
+            "n_features": n_features,
+            "features": self.feature_columns,
+            "n_anomalies": n_anomalies,
+            "anomaly_rate": float(n_anomalies / n_rows * 100) if n_rows else 0.0,
+        }
+
+        logger.info(
+            f"Modo large_data: {n_rows} linhas pontuadas em blocos de {chunk_size}, "
+            f"treino com {len(sample_pos)} amostras"
+        )
+
+        return {
+            "success": True,
+            **self.metadata
+        }
+
+    def _create_model(self, max_samples: Any) -> "IsolationForest":
+        """Cria o Isolation Forest com os parametros configurados."""
+        return IsolationForest(
+            contamination=self.config.get("contamination", 0.05),
+            n_estimators=self.config.get("n_estimators", 100),
+            max_samples=max_samples,
+            random_state=self.config.get("random_state", 42),
+            n_jobs=-1
+        )
+
+    def _prepare_features(self, df: pd.DataFrame) -> np.ndarray:
+        """Monta matriz float32 das features (NaN -> 0) sem copiar o DataFrame."""
+        X = np.empty((len(df), len(self.feature_columns)), dtype=np.float32)
+        for j, col in enumerate(self.feature_columns):
+            X[:, j] = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(dtype=np.float32)
+        return X
+
+    def _stratified_sample_positions(self, df: pd.DataFrame) -> np.ndarray:
+        """Retorna posicoes de uma amostra estratificada para treino."""
+        cfg = self.large_data_config
+        sample_size = cfg.get("train_sample_size", 200_000)
+        random_state = self.config.get("random_state", 42)
+
+        if len(df) <= sample_size:
+            return np.arange(len(df))
+
+        frac = sample_size / len(df)
+        strat_col = cfg.get("stratify_column")
+
+        if strat_col and strat_col in df.columns:
+            strata = pd.Series(pd.factorize(df[strat_col])[0])
+            sample = strata.groupby(strata).sample(frac=frac, random_state=random_state)
+            return np.sort(sample.index.to_numpy())
+
+        rng = np.random.default_rng(random_state)
+        return np.sort(rng.choice(len(df), size=sample_size, replace=False))
+
     def detect(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Detecta anomalias em novos dados.
@@ -159,25 +313,13 @@ class AnomalyDetector:
         if self.model is None:
             raise ValueError("Modelo nao treinado. Execute fit() primeiro.")
 
-        df_copy = df.copy()
-
-        # Preparar features
-        X = df_copy[self.feature_columns].copy()
-        for col in X.columns:
-            X[col] = pd.to_numeric(X[col], errors='coerce')
-        X = X.fillna(0)
-
-        # Normalizar
-        X_scaled = self.scaler.transform(X)
+        # Preparar features e normalizar
+        X_scaled = self.scaler.transform(self._prepare_features(df))
 
         # Prever
         scores = self.model.decision_function(X_scaled)
-        predictions = self.model.predict(X_scaled)
-
-        df_copy["_anomaly_score"] = scores
-        df_copy["_is_anomaly"] = predictions == -1
 
-        return df_copy
+        return df.assign(_anomaly_score=scores, _is_anomaly=scores < 0)
 
     def get_anomalies_summary(
         self,
@@ -198,6 +340,9 @@ class AnomalyDetector:
             - top_anomalias: piores casos
             - por_severidade: agrupado por nivel
         """
+        if self.scoring_summary is not None:
+            return self._get_large_summary(top_n)
+
         if self.df_with_scores is None:
             return {
                 "success": False,
@@ -207,7 +352,7 @@ class AnomalyDetector:
         df = self.df_with_scores
 
         # Filtrar anomalias
-        anomalias = df[df["_is_anomaly"]].copy()
+        anomalias = df[df["_is_anomaly"]]
 
         if anomalias.empty:
             return {
@@ -222,29 +367,7 @@ class AnomalyDetector:
         top_anomalias = anomalias.nsmallest(top_n, "_anomaly_score")
 
         # Preparar lista de anomalias
-        anomalias_list = []
-        for idx, row in top_anomalias.iterrows():
-            anomalia = {
-                "score": round(float(row["_anomaly_score"]), 4),
-                "severidade": self._get_severity(row["_anomaly_score"]),
-            }
-
-            # Adicionar colunas relevantes
-            for col in self.feature_columns:
-                if col in row.index:
-                    anomalia[col] = row[col]
-
-            # Adicionar identificadores se existirem
-            for id_col in ["NUNOTA", "CODPROD", "CODPARC", "DTNEG"]:
-                if id_col in row.index:
-                    value = row[id_col]
-                    if pd.notna(value):
-                        if isinstance(value, (pd.Timestamp, datetime)):
-                            anomalia[id_col] = str(value.date())
-                        else:
-                            anomalia[id_col] = value
-
-            anomalias_list.append(anomalia)
+        anomalias_list = [self._format_anomaly(row) for _, row in top_anomalias.iterrows()]
 
         # Agrupar por severidade
         severidade_counts = self._count_by_severity(anomalias)
@@ -264,6 +387,65 @@ class AnomalyDetector:
             "metadata": self.metadata
         }
 
+    def _get_large_summary(self, top_n: int) -> Dict[str, Any]:
+        """Monta o resumo a partir do estado retido no modo large_data."""
+        summary = self.scoring_summary
+        total = summary["total_registros"]
+        n_anomalies = summary["total_anomalias"]
+
+        if n_anomalies == 0:
+            return {
+                "success": True,
+                "total_anomalias": 0,
+                "taxa_anomalias": 0,
+                "mensagem": "Nenhuma anomalia detectada",
+                "metadata": self.metadata
+            }
+
+        if top_n > len(summary["top_rows"]) and len(summary["top_rows"]) < n_anomalies:
+            logger.warning(
+                f"top_n={top_n} maior que o top_k retido ({len(summary['top_rows'])}). "
+                f"Aumente ANOMALY_CONFIG['large_data']['top_k']."
+            )
+
+        top_rows = summary["top_rows"].head(top_n)
+
+        return {
+            "success": True,
+            "total_anomalias": int(n_anomalies),
+            "taxa_anomalias": round(float(n_anomalies / total * 100), 2),
+            "total_registros": total,
+            "por_severidade": dict(summary["por_severidade"]),
+            "top_anomalias": [self._format_anomaly(row) for _, row in top_rows.iterrows()],
+            "estatisticas": summary["estatisticas"],
+            "features_analisadas": self.feature_columns,
+            "metadata": self.metadata
+        }
+
+    def _format_anomaly(self, row: pd.Series) -> Dict[str, Any]:
+        """Converte uma linha anomala em dict para o resumo."""
+        anomalia = {
+            "score": round(float(row["_anomaly_score"]), 4),
+            "severidade": self._get_severity(row["_anomaly_score"]),
+        }
+
+        # Adicionar colunas relevantes
+        for col in self.feature_columns:
+            if col in row.index:
+                anomalia[col] = row[col]
+
+        # Adicionar identificadores se existirem
+        for id_col in self.ID_COLUMNS:
+            if id_col in row.index:
+                value = row[id_col]
+                if pd.notna(value):
+                    if isinstance(value, (pd.Timestamp, datetime)):
+                        anomalia[id_col] = str(value.date())
+                    else:
+                        anomalia[id_col] = value
+
+        return anomalia
+
     def _get_default_features(
         self,
         df: pd.DataFrame,
@@ -296,13 +478,27 @@ class AnomalyDetector:
 
     def _count_by_severity(self, df: pd.DataFrame) -> Dict[str, int]:
         """Conta anomalias por severidade."""
-        counts = {"critica": 0, "alta": 0, "media": 0, "baixa": 0}
+        return self._severity_histogram(df["_anomaly_score"].to_numpy())
+
+    def _severity_histogram(self, scores: np.ndarray) -> Dict[str, int]:
+        """Conta scores por severidade (vetorizado)."""
+        thresholds = ANOMALY_CONFIG.get("alerts", {}).get("severity_thresholds", {})
 
-        for score in df["_anomaly_score"]:
-            severity = self._get_severity(score)
-            counts[severity] += 1
+        # Mesmos cortes de _get_severity(): score < limite
+        bins = [
+            thresholds.get("critical", -0.8),
+            thresholds.get("high", -0.6),
+            thresholds.get("medium", -0.4),
+        ]
+        idx = np.searchsorted(bins, scores, side="right")
+        counts = np.bincount(idx, minlength=4)
 
-        return counts
+        return {
+            "critica": int(counts[0]),
+            "alta": int(counts[1]),
+            "media": int(counts[2]),
+            "baixa": int(counts[3]),
+        }
 
     def _calculate_anomaly_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Calcula estatisticas das anomalias."""
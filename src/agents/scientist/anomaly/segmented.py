@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+"""
+Detector de Anomalias Segmentado
+
+Treina um Isolation Forest por segmento (empresa, grupo de produto ou
+segmento de cliente) em vez de um modelo global. Assim uma venda grande
+de peca de caminhao e comparada com vendas do mesmo segmento, e anomalias
+em itens baratos deixam de ser mascaradas pelos tickets altos.
+
+Os segmentos sao treinados em paralelo (pool de threads por padrao, ou de
+processos iniciados com spawn: fork a partir de um processo com threads
+pode travar). A matriz de features e gravada uma unica vez em arquivo .npy
+e aberta em memmap pelos workers, que leem apenas as linhas do proprio
+segmento.
+
+IMPORTANTE:
+- Retorna DADOS ESTRUTURADOS (dict), nao texto
+- O Agente LLM chama get_anomalies_summary() via tool
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple, Union
+
+import pandas as pd
+import numpy as np
+
+from .detector import AnomalyDetector, IsolationForest, StandardScaler
+from ..config import ANOMALY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Segmento que agrupa os segmentos pequenos demais para ter modelo proprio
+OTHER_SEGMENT = "_outros"
+
+
+def _fit_segment(
+    features_path: str,
+    positions: np.ndarray,
+    config: Dict[str, Any],
+    max_samples: Any
+) -> Tuple[np.ndarray, Any, Any]:
+    """
+    Treina e pontua um segmento (executado no worker).
+
+    Le apenas as linhas do segmento a partir da matriz em memmap.
+
+    Returns:
+        Tupla (scores, scaler, model)
+    """
+    X = np.load(features_path, mmap_mode="r")[positions]
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    model = IsolationForest(
+        contamination=config.get("contamination", 0.05),
+        n_estimators=config.get("n_estimators", 100),
+        max_samples=max_samples,
+        random_state=config.get("random_state", 42),
+        n_jobs=1  # Paralelismo fica entre segmentos
+    )
+    model.fit(X_scaled)
+
+    scores = model.decision_function(X_scaled).astype(np.float32)
+    return scores, scaler, model
+
+
+class SegmentedAnomalyDetector(AnomalyDetector):
+    """
+    Detecta anomalias com um modelo por segmento.
+
+    Segmentacao aceita:
+    - Nome de coluna do DataFrame (ex: 'CODEMP', 'CODGRUPOPROD')
+    - ProductSegmentation treinado (mapeia CODPROD -> segmento)
+    - CustomerSegmentation treinado (mapeia CODPARC -> segmento)
+    - SegmentLookup (segmentos publicados, sem re-treinar o segmentador)
+
+    Exemplo:
+        detector = SegmentedAnomalyDetector()
+        detector.fit(df_vendas, segment_by="CODEMP")
+        resultado = detector.get_anomalies_summary()
+        # -> resumo combinado + "por_segmento"
+    """
+
+    def __init__(self, config: Optional[Dict] = None, segment_config: Optional[Dict] = None):
+        """
+        Inicializa o detector segmentado.
+
+        Args:
+            config: Configuracoes do Isolation Forest (opcional)
+            segment_config: Configuracoes de segmentacao (opcional)
+        """
+        super().__init__(config)
+        self.segment_config = segment_config or ANOMALY_CONFIG.get("segmented", {})
+        self.segment_by: Optional[str] = None
+        self.segment_models: Dict[Any, Tuple[Any, Any]] = {}
+        self.segment_results: Dict[Any, Dict[str, Any]] = {}
+        self._segment_mapper: Optional[Tuple[str, Any]] = None
+        self.unscored_rows = 0
+
+    def fit(
+        self,
+        df: pd.DataFrame,
+        feature_columns: Optional[List[str]] = None,
+        entity_type: str = "vendas",
+        segment_by: Union[str, Any, None] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Treina um modelo por segmento.
+
+        Args:
+            df: DataFrame com os dados
+            feature_columns: Colunas a usar como features (opcional)
+            entity_type: Tipo de entidade ('vendas', 'compras', 'estoque')
+            segment_by: Coluna ou segmentador treinado (None = config)
+
+        Returns:
+            Dict com metadados do treinamento
+        """
+        if feature_columns:
+            self.feature_columns = [c for c in feature_columns if c in df.columns]
+        else:
+            self.feature_columns = self._get_default_features(df, entity_type)
+
+        if not self.feature_columns:
+            return {
+                "success": False,
+                "error": "Nenhuma feature valida encontrada nos dados"
+            }
+
+        if segment_by is None:
+            segment_by = self.segment_config.get("default_segment_by", "CODEMP")
+
+        segments = self._resolve_segments(df, segment_by)
+        if segments is None:
+            return {
+                "success": False,
+                "error": f"Nao foi possivel segmentar por {self.segment_by}"
+            }
+
+        groups, unscored = self._group_positions(segments)
+        if not groups:
+            return {
+                "success": False,
+                "error": "Nenhum segmento com dados suficientes"
+            }
+
+        self.segment_models = {}
+        self.segment_results = {}
+        self.unscored_rows = unscored
+        self.df_with_scores = None
+        self.scoring_summary = None
+
+        # Features gravadas uma vez; workers abrem em memmap
+        tmp_dir = tempfile.mkdtemp(prefix="anomaly_segments_")
+        try:
+            features_path = os.path.join(tmp_dir, "features.npy")
+            X = np.lib.format.open_memmap(
+                features_path, mode="w+", dtype=np.float32,
+                shape=(len(df), len(self.feature_columns))
+            )
+            X[:] = self._prepare_features(df)
+            X.flush()
+            del X
+
+            fitted = self._fit_segments_parallel(features_path, groups)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        # Resumo por segmento
+        top_k = max(1, self.segment_config.get("top_k_per_segment", 50))
+        keep_cols = self.feature_columns + [c for c in self.ID_COLUMNS if c in df.columns]
+        n_anomalies = 0
+
+        for label, positions in groups.items():
+            scores, scaler, model = fitted[label]
+            self.segment_models[label] = (scaler, model)
+
+            mask = scores < 0
+            n_seg = int(mask.sum())
+            n_anomalies += n_seg
+
+            anom_pos = positions[mask]
+            anom_scores = scores[mask]
+            if len(anom_scores) > top_k:
+                keep = np.argpartition(anom_scores, top_k - 1)[:top_k]
+                anom_pos, anom_scores = anom_pos[keep], anom_scores[keep]
+            order = np.argsort(anom_scores, kind="stable")
+
+            self.segment_results[label] = {
+                "registros": int(len(positions)),
+                "anomalias": n_seg,
+                "por_severidade": self._severity_histogram(scores[mask]),
+                "top_rows": df.iloc[anom_pos[order]][keep_cols].assign(
+                    _anomaly_score=anom_scores[order].astype(np.float64)
+                ),
+            }
+
+        self.metadata = {
+            "entity_type": entity_type,
+            "trained_at": datetime.now().isoformat(),
+            "mode": "segmentado",
+            "segment_by": self.segment_by,
+            "n_segments": len(groups),
+            "n_samples": len(df),
+            "n_features": len(self.feature_columns),
+            "features": self.feature_columns,
+            "n_anomalies": n_anomalies,
+            "anomaly_rate": float(n_anomalies / len(df) * 100),
+            "n_unscored": unscored,
+        }
+
+        return {
+            "success": True,
+            **self.metadata
+        }
+
+    def _resolve_segments(self, df: pd.DataFrame, segment_by: Any) -> Optional[pd.Series]:
+        """Retorna o segmento de cada linha do DataFrame."""
+        # Segmentos publicados (SegmentLookup): consulta por indice
+        if getattr(segment_by, "key_col", None) and hasattr(segment_by, "enrich"):
+            if not segment_by.is_loaded:
+                logger.warning(f"Segmentos de {segment_by.kind} nao publicados")
+                return None
+            self.segment_by = f"segmento_{segment_by.kind.rstrip('s')}"
+            self._segment_mapper = (segment_by.key_col, segment_by)
+
+        # Segmentador de produtos (ProductSegmentation)
+        elif getattr(segment_by, "df_products", None) is not None:
+            mapping = segment_by.df_products.set_index("codprod")
+            mapping = mapping.get("segment_label", mapping["cluster"]).to_dict()
+            self.segment_by = "segmento_produto"
+            self._segment_mapper = ("CODPROD", mapping)
+
+        # Segmentador de clientes (CustomerSegmentation)
+        elif getattr(segment_by, "df_rfm", None) is not None:
+            rfm = segment_by.df_rfm
+            mapping = rfm.set_index(rfm.columns[0])
+            mapping = mapping.get("segment_label", mapping["cluster"]).to_dict()
+            self.segment_by = "segmento_cliente"
+            self._segment_mapper = ("CODPARC", mapping)
+
+        elif isinstance(segment_by, str):
+            self.segment_by = segment_by
+            self._segment_mapper = None
+            if segment_by not in df.columns:
+                logger.warning(f"Coluna de segmento {segment_by} nao encontrada")
+                return None
+            return df[segment_by]
+
+        else:
+            self.segment_by = str(segment_by)
+            logger.warning("Segmentador nao treinado ou tipo nao suportado")
+            return None
+
+        key_col, mapping = self._segment_mapper
+        if key_col not in df.columns:
+            logger.warning(f"Coluna {key_col} necessaria para {self.segment_by} nao encontrada")
+            return None
+
+        return self._map_segments(df)
+
+    def _map_segments(self, df: pd.DataFrame) -> pd.Series:
+        """Aplica o mapeamento chave -> segmento (dict ou SegmentLookup)."""
+        key_col, mapping = self._segment_mapper
+        if isinstance(mapping, dict):
+            return df[key_col].map(mapping)
+        return mapping.enrich(df[[key_col]])["segmento"]
+
+    def _group_positions(self, segments: pd.Series) -> Tuple[Dict[Any, np.ndarray], int]:
+        """
+        Agrupa posicoes por segmento, juntando os pequenos em _outros.
+
+        Returns:
+            Tupla (grupos, linhas sem score); _outros com menos de 2 linhas
+            nao e treinado e suas linhas ficam sem score
+        """
+        min_rows = self.segment_config.get("min_segment_rows", 1000)
+
+        codes, uniques = pd.factorize(segments, sort=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        order = np.argsort(codes, kind="stable")
+        bounds = np.cumsum(np.concatenate([[0], counts]))
+        # Linhas sem segmento (code -1) ficam no inicio da ordenacao
+        n_missing = int((codes < 0).sum())
+
+        groups: Dict[Any, np.ndarray] = {}
+        small: List[np.ndarray] = [order[:n_missing]]
+
+        for i, label in enumerate(uniques.tolist()):
+            positions = order[n_missing + bounds[i]:n_missing + bounds[i + 1]]
+            if len(positions) >= min_rows:
+                groups[label] = np.sort(positions)
+            else:
+                small.append(positions)
+
+        others = np.sort(np.concatenate(small)) if small else np.empty(0, dtype=np.int64)
+        unscored = 0
+        if len(others) >= 2:
+            groups[OTHER_SEGMENT] = others
+        elif len(others):
+            unscored = len(others)
+            logger.warning(
+                f"Segmento {OTHER_SEGMENT} com {unscored} linha(s): insuficiente para treinar, "
+                f"linha(s) sem score"
+            )
+
+        return groups, unscored
+
+    def _fit_segments_parallel(
+        self,
+        features_path: str,
+        groups: Dict[Any, np.ndarray]
+    ) -> Dict[Any, Tuple[np.ndarray, Any, Any]]:
+        """Treina os segmentos em paralelo."""
+        max_workers = self.segment_config.get("max_workers") or os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, len(groups)))
+
+        if self.segment_config.get("executor", "thread") == "process":
+            # spawn: fork herdaria locks de outras threads (ex.: logging) e pode travar
+            pool_cls = ProcessPoolExecutor
+            pool_kwargs = {"mp_context": multiprocessing.get_context("spawn")}
+        else:
+            pool_cls = ThreadPoolExecutor
+            pool_kwargs = {}
+
+        logger.info(
+            f"Treinando {len(groups)} segmentos ({self.segment_by}) "
+            f"com {max_workers} workers ({pool_cls.__name__})"
+        )
+
+        max_samples = self.config.get("max_samples", "auto")
+        fitted = {}
+
+        with pool_cls(max_workers=max_workers, **pool_kwargs) as executor:
+            futures = {
+                label: executor.submit(_fit_segment, features_path, positions, self.config, max_samples)
+                for label, positions in groups.items()
+            }
+            for label, future in futures.items():
+                fitted[label] = future.result()
+
+        return fitted
+
+    def detect(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Detecta anomalias em novos dados usando o modelo de cada segmento.
+
+        Linhas de segmentos sem modelo usam o modelo _outros (se existir);
+        caso contrario ficam com score NaN e _is_anomaly False.
+
+        Args:
+            df: DataFrame com novos dados
+
+        Returns:
+            DataFrame com colunas _segment, _anomaly_score e _is_anomaly
+        """
+        if not self.segment_models:
+            raise ValueError("Modelo nao treinado. Execute fit() primeiro.")
+
+        if self._segment_mapper:
+            segments = self._map_segments(df)
+        else:
+            segments = df[self.segment_by]
+
+        segments = segments.where(segments.isin(list(self.segment_models)), OTHER_SEGMENT)
+        X = self._prepare_features(df)
+        scores = np.full(len(df), np.nan)
+
+        for label, (scaler, model) in self.segment_models.items():
+            mask = (segments == label).to_numpy()
+            if mask.any():
+                scores[mask] = model.decision_function(scaler.transform(X[mask]))
+
+        if np.isnan(scores).any():
+            logger.warning("Algumas linhas nao tem modelo de segmento; score NaN")
+
+        return df.assign(_segment=segments.to_numpy(), _anomaly_score=scores, _is_anomaly=scores < 0)
+
+    def get_anomalies_summary(self, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Retorna resumo combinado das anomalias de todos os segmentos.
+
+        ESTE E O METODO QUE O AGENTE LLM CHAMA VIA TOOL.
+
+        Args:
+            top_n: Numero de maiores anomalias a retornar (no total)
+
+        Returns:
+            Dict no mesmo formato de AnomalyDetector.get_anomalies_summary(),
+            com top_anomalias marcadas por segmento e a chave "por_segmento"
+        """
+        if not self.segment_results:
+            return {
+                "success": False,
+                "error": "Modelo nao treinado. Execute fit() primeiro."
+            }
+
+        total = sum(r["registros"] for r in self.segment_results.values())
+        unscored = self.unscored_rows
+        n_anomalies = sum(r["anomalias"] for r in self.segment_results.values())
+
+        severidade = {"critica": 0, "alta": 0, "media": 0, "baixa": 0}
+        por_segmento = []
+        candidatos = []
+
+        for label, result in self.segment_results.items():
+            for sev, count in result["por_severidade"].items():
+                severidade[sev] += count
+
+            por_segmento.append({
+                "segmento": label,
+                "registros": result["registros"],
+                "anomalias": result["anomalias"],
+                "taxa_anomalias": round(result["anomalias"] / result["registros"] * 100, 2),
+                "por_severidade": result["por_severidade"],
+            })
+
+            if not result["top_rows"].empty:
+                candidatos.append(result["top_rows"].assign(_segment=label))
+
+        por_segmento = sorted(por_segmento, key=lambda x: x["anomalias"], reverse=True)
+
+        if n_anomalies == 0:
+            return {
+                "success": True,
+                "total_anomalias": 0,
+                "taxa_anomalias": 0,
+                "mensagem": "Nenhuma anomalia detectada",
+                "registros_sem_score": unscored,
+                "por_segmento": por_segmento,
+                "metadata": self.metadata
+            }
+
+        top_rows = pd.concat(candidatos).nsmallest(top_n, "_anomaly_score")
+        top_anomalias = []
+        for _, row in top_rows.iterrows():
+            anomalia = self._format_anomaly(row)
+            anomalia["segmento"] = row["_segment"]
+            top_anomalias.append(anomalia)
+
+        return {
+            "success": True,
+            "total_anomalias": int(n_anomalies),
+            "taxa_anomalias": round(float(n_anomalies / total * 100), 2),
+            "total_registros": total + unscored,
+            "registros_sem_score": unscored,
+            "por_severidade": severidade,
+            "top_anomalias": top_anomalias,
+            "por_segmento": por_segmento,
+            "segmentado_por": self.segment_by,
+            "features_analisadas": self.feature_columns,
+            "metadata": self.metadata
+        }
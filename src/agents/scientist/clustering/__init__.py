@@ -7,6 +7,7 @@ Usa K-Means para segmentar clientes e produtos.
 Classes:
 - CustomerSegmentation: Segmentacao RFM de clientes
 - ProductSegmentation: Segmentacao de produtos por performance
+- SegmentLookup: Consulta O(1) de segmentos publicados
 
 Exemplo:
     from src.agents.scientist.clustering import CustomerSegmentation
@@ -18,8 +19,11 @@ Exemplo:
 
 from .customers import CustomerSegmentation
 from .products import ProductSegmentation
+from .lookup import SegmentLookup, get_segment_lookup
 
 __all__ = [
     'CustomerSegmentation',
     'ProductSegmentation',
+    'SegmentLookup',
+    'get_segment_lookup',
 ]
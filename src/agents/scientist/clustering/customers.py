@@ -13,20 +13,24 @@ IMPORTANTE:
 """
 
 import logging
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 import pandas as pd
 import numpy as np
 
 try:
-    from sklearn.cluster import KMeans
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
     from sklearn.preprocessing import StandardScaler
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
 
-from ..config import CLUSTERING_CONFIG
+from ..config import CLUSTERING_CONFIG, SCIENTIST_CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +44,13 @@ class CustomerSegmentation:
     - Regular: Frequencia e valor medios
     - Esporadico: Baixa frequencia
     - Inativo: Muito tempo sem comprar
+
+    Para bases grandes (~100k parceiros):
+    - fit(auto_k=True) escolhe k avaliando varios valores em paralelo
+    - Acima de minibatch_threshold clientes usa MiniBatchKMeans
+    - save()/load() persistem o modelo escolhido
+    - fit_from_store() usa o RFM incremental da feature store
+    - save() publica CODPARC -> segmento para o SegmentLookup
     """
 
     def __init__(self, config: Optional[Dict] = None):
@@ -54,12 +65,14 @@ class CustomerSegmentation:
 
         self.config = config or CLUSTERING_CONFIG.get("customers", {})
         self.kmeans_config = CLUSTERING_CONFIG.get("kmeans", {})
+        self.scalable_config = CLUSTERING_CONFIG.get("scalable", {})
 
         self.model: Optional[KMeans] = None
         self.scaler: Optional[StandardScaler] = None
         self.df_rfm: Optional[pd.DataFrame] = None
         self.segment_profiles: Dict[int, Dict] = {}
         self.metadata: Dict[str, Any] = {}
+        self._key_index: Optional[pd.Index] = None
 
     def fit(
         self,
@@ -68,7 +81,8 @@ class CustomerSegmentation:
         date_col: str = "DTNEG",
         value_col: str = "VLRNOTA",
         n_clusters: Optional[int] = None,
-        reference_date: Optional[str] = None
+        reference_date: Optional[str] = None,
+        auto_k: bool = False
     ) -> Dict[str, Any]:
         """
         Calcula RFM e segmenta clientes.
@@ -78,8 +92,9 @@ class CustomerSegmentation:
             customer_col: Coluna de identificacao do cliente
             date_col: Coluna de data
             value_col: Coluna de valor
-            n_clusters: Numero de clusters (None = automatico)
+            n_clusters: Numero de clusters (None = default_n_clusters)
             reference_date: Data de referencia para calculo de recencia
+            auto_k: Se True, escolhe k automaticamente em n_clusters_range
 
         Returns:
             Dict com metadados da segmentacao
@@ -89,6 +104,50 @@ class CustomerSegmentation:
             df, customer_col, date_col, value_col, reference_date
         )
 
+        return self._fit_rfm(df_rfm, n_clusters, auto_k)
+
+    def fit_from_store(
+        self,
+        store=None,
+        n_clusters: Optional[int] = None,
+        reference_date: Optional[str] = None,
+        auto_k: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Segmenta clientes a partir do RFM incremental da feature store.
+
+        Evita reagregar todo o historico de vendas a cada treino.
+
+        Args:
+            store: SalesFeatureStore (None = singleton get_feature_store())
+            n_clusters: Numero de clusters (None = default_n_clusters)
+            reference_date: Data de referencia para recencia (None = watermark)
+            auto_k: Se True, escolhe k automaticamente em n_clusters_range
+
+        Returns:
+            Dict com metadados da segmentacao
+        """
+        if store is None:
+            from src.agents.shared.features import get_feature_store
+            store = get_feature_store()
+
+        df_rfm = store.get_customer_rfm(reference_date=reference_date)
+
+        result = self._fit_rfm(df_rfm, n_clusters, auto_k)
+        if result.get("success"):
+            self.metadata["source"] = "feature_store"
+            self.metadata["watermark"] = store.manifest.get("watermark")
+            result.update(source="feature_store", watermark=self.metadata["watermark"])
+
+        return result
+
+    def _fit_rfm(
+        self,
+        df_rfm: pd.DataFrame,
+        n_clusters: Optional[int],
+        auto_k: bool
+    ) -> Dict[str, Any]:
+        """Treina o K-Means sobre o DataFrame RFM ja calculado."""
         if df_rfm.empty:
             return {
                 "success": False,
@@ -96,25 +155,25 @@ class CustomerSegmentation:
             }
 
         self.df_rfm = df_rfm
-
-        # Determinar numero de clusters
-        if n_clusters is None:
-            n_clusters = self.config.get("default_n_clusters", 4)
+        self._key_index = None
 
         # Normalizar features
         features = ["recency", "frequency", "monetary"]
-        X = df_rfm[features].values
+        X = df_rfm[features].to_numpy(dtype=np.float64)
 
         self.scaler = StandardScaler()
         X_scaled = self.scaler.fit_transform(X)
 
-        # Treinar K-Means
-        self.model = KMeans(
-            n_clusters=n_clusters,
-            n_init=self.kmeans_config.get("n_init", 10),
-            max_iter=self.kmeans_config.get("max_iter", 300),
-            random_state=self.kmeans_config.get("random_state", 42)
-        )
+        # Determinar numero de clusters
+        k_evaluation = None
+        if n_clusters is None and auto_k:
+            n_clusters, k_evaluation = self._select_n_clusters(X_scaled)
+        elif n_clusters is None:
+            n_clusters = self.config.get("default_n_clusters", 4)
+
+        # Treinar K-Means (MiniBatch para bases grandes)
+        use_minibatch = len(df_rfm) >= self.scalable_config.get("minibatch_threshold", 20_000)
+        self.model = self._create_model(n_clusters, minibatch=use_minibatch)
 
         self.df_rfm["cluster"] = self.model.fit_predict(X_scaled)
 
@@ -128,15 +187,106 @@ class CustomerSegmentation:
         self.metadata = {
             "n_customers": len(df_rfm),
             "n_clusters": n_clusters,
+            "algorithm": "MiniBatchKMeans" if use_minibatch else "KMeans",
             "trained_at": datetime.now().isoformat(),
             "features": features,
         }
+        if k_evaluation is not None:
+            self.metadata["auto_k"] = k_evaluation
 
         return {
             "success": True,
             **self.metadata
         }
 
+    def _create_model(self, n_clusters: int, minibatch: bool = False):
+        """Cria KMeans ou MiniBatchKMeans com a configuracao do projeto."""
+        if minibatch:
+            return MiniBatchKMeans(
+                n_clusters=n_clusters,
+                batch_size=self.scalable_config.get("batch_size", 4096),
+                n_init=self.scalable_config.get("minibatch_n_init", 3),
+                max_iter=self.kmeans_config.get("max_iter", 300),
+                random_state=self.kmeans_config.get("random_state", 42)
+            )
+
+        return KMeans(
+            n_clusters=n_clusters,
+            n_init=self.kmeans_config.get("n_init", 10),
+            max_iter=self.kmeans_config.get("max_iter", 300),
+            random_state=self.kmeans_config.get("random_state", 42)
+        )
+
+    def _select_n_clusters(self, X_scaled: np.ndarray) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Escolhe k avaliando n_clusters_range em paralelo sobre uma amostra.
+
+        Returns:
+            Tupla (k escolhido, dict com avaliacao de cada k)
+        """
+        k_min, k_max = self.kmeans_config.get("n_clusters_range", (2, 10))
+        sample_size = self.scalable_config.get("auto_k_sample_size", 10_000)
+        metric = self.scalable_config.get("auto_k_metric", "silhouette")
+        random_state = self.kmeans_config.get("random_state", 42)
+
+        if len(X_scaled) > sample_size:
+            rng = np.random.default_rng(random_state)
+            X_sample = X_scaled[rng.choice(len(X_scaled), size=sample_size, replace=False)]
+        else:
+            X_sample = X_scaled
+
+        candidates = [k for k in range(k_min, k_max + 1) if k < len(X_sample)]
+        if not candidates:
+            return self.config.get("default_n_clusters", 4), None
+
+        def evaluate(k: int) -> Dict[str, Any]:
+            model = self._create_model(k, minibatch=len(X_sample) >= 5000)
+            labels = model.fit_predict(X_sample)
+            return {
+                "k": k,
+                "inertia": float(model.inertia_),
+                "silhouette": float(silhouette_score(
+                    X_sample, labels,
+                    sample_size=min(len(X_sample), 5000),
+                    random_state=random_state
+                )),
+            }
+
+        max_workers = self.scalable_config.get("auto_k_max_workers") or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(candidates))) as executor:
+            results = list(executor.map(evaluate, candidates))
+
+        if metric == "inertia":
+            best_k = self._elbow_k(results)
+        else:
+            best_k = max(results, key=lambda r: r["silhouette"])["k"]
+
+        logger.info(f"auto_k ({metric}): k={best_k} entre {candidates}")
+
+        return best_k, {
+            "metric": metric,
+            "sample_size": int(len(X_sample)),
+            "chosen_k": best_k,
+            "candidates": results,
+        }
+
+    @staticmethod
+    def _elbow_k(results: List[Dict[str, Any]]) -> int:
+        """Cotovelo: k com maior distancia a reta entre o primeiro e o ultimo ponto."""
+        if len(results) < 3:
+            return results[0]["k"]
+
+        ks = np.array([r["k"] for r in results], dtype=float)
+        inertias = np.array([r["inertia"] for r in results], dtype=float)
+
+        # Normalizar eixos e medir distancia a reta
+        ks_n = (ks - ks[0]) / (ks[-1] - ks[0])
+        span = inertias[0] - inertias[-1]
+        in_n = (inertias - inertias[-1]) / span if span else np.zeros_like(inertias)
+        distances = np.abs(ks_n + in_n - 1) / np.sqrt(2)
+
+        return int(ks[int(np.argmax(distances))])
+
     def _calculate_rfm(
         self,
         df: pd.DataFrame,
@@ -145,22 +295,26 @@ class CustomerSegmentation:
         value_col: str,
         reference_date: Optional[str]
     ) -> pd.DataFrame:
-        """Calcula metricas RFM."""
-        df_copy = df.copy()
-
+        """Calcula metricas RFM em uma unica agregacao."""
         # Verificar se colunas existem
-        if customer_col not in df_copy.columns:
-            logger.warning(f"Coluna {customer_col} nao encontrada. Colunas disponiveis: {list(df_copy.columns)}")
+        if customer_col not in df.columns:
+            logger.warning(f"Coluna {customer_col} nao encontrada. Colunas disponiveis: {list(df.columns)}")
             return pd.DataFrame()
 
-        if date_col not in df_copy.columns:
-            logger.warning(f"Coluna {date_col} nao encontrada. Colunas disponiveis: {list(df_copy.columns)}")
+        if date_col not in df.columns:
+            logger.warning(f"Coluna {date_col} nao encontrada. Colunas disponiveis: {list(df.columns)}")
             return pd.DataFrame()
 
-        if value_col not in df_copy.columns:
-            logger.warning(f"Coluna {value_col} nao encontrada. Colunas disponiveis: {list(df_copy.columns)}")
+        if value_col not in df.columns:
+            logger.warning(f"Coluna {value_col} nao encontrada. Colunas disponiveis: {list(df.columns)}")
             return pd.DataFrame()
 
+        # Copiar apenas as colunas usadas
+        use_cols = [customer_col, date_col, value_col]
+        if "NUNOTA" in df.columns:
+            use_cols.append("NUNOTA")
+        df_copy = df[use_cols].copy()
+
         # Verificar se coluna de data tem dados validos ANTES de converter
         n_nulos_antes = df_copy[date_col].isna().sum()
         n_total = len(df_copy)
@@ -191,47 +345,49 @@ class CustomerSegmentation:
         else:
             ref_date = df_copy[date_col].max()
 
-        # Calcular RFM por cliente
-        # Recency: dias desde a ultima compra
-        recency = df_copy.groupby(customer_col)[date_col].max().reset_index()
-        recency["recency"] = (ref_date - recency[date_col]).dt.days
-        recency = recency[[customer_col, "recency"]]
-
-        # Frequency: numero de transacoes unicas
+        # Frequency: numero de transacoes unicas (ou linhas, sem NUNOTA)
         if "NUNOTA" in df_copy.columns:
-            frequency = df_copy.groupby(customer_col)["NUNOTA"].nunique().reset_index()
-            frequency.columns = [customer_col, "frequency"]
+            frequency = ("NUNOTA", "nunique")
         else:
-            frequency = df_copy.groupby(customer_col).size().reset_index()
-            frequency.columns = [customer_col, "frequency"]
+            frequency = (date_col, "size")
 
-        # Monetary: valor total
-        monetary = df_copy.groupby(customer_col)[value_col].sum().reset_index()
-        monetary.columns = [customer_col, "monetary"]
+        # Recency, Frequency e Monetary em um unico groupby
+        rfm = df_copy.groupby(customer_col, sort=True).agg(
+            last_purchase=(date_col, "max"),
+            frequency=frequency,
+            monetary=(value_col, "sum"),
+        ).reset_index()
 
-        # Merge
-        rfm = recency.merge(frequency, on=customer_col)
-        rfm = rfm.merge(monetary, on=customer_col)
+        rfm["recency"] = (ref_date - rfm.pop("last_purchase")).dt.days
+        rfm = rfm[[customer_col, "recency", "frequency", "monetary"]]
 
         # Remover clientes sem compras
-        rfm = rfm[rfm["monetary"] > 0]
+        rfm = rfm[rfm["monetary"] > 0].reset_index(drop=True)
 
         return rfm
 
     def _calculate_segment_profiles(self) -> None:
         """Calcula perfil de cada segmento."""
+        self.segment_profiles = {}
+
         if self.df_rfm is None:
             return
 
-        for cluster in self.df_rfm["cluster"].unique():
-            segment = self.df_rfm[self.df_rfm["cluster"] == cluster]
+        profiles = self.df_rfm.groupby("cluster").agg(
+            n_customers=("recency", "size"),
+            recency_mean=("recency", "mean"),
+            frequency_mean=("frequency", "mean"),
+            monetary_mean=("monetary", "mean"),
+            monetary_total=("monetary", "sum"),
+        )
 
-            self.segment_profiles[cluster] = {
-                "n_customers": len(segment),
-                "recency_mean": float(segment["recency"].mean()),
-                "frequency_mean": float(segment["frequency"].mean()),
-                "monetary_mean": float(segment["monetary"].mean()),
-                "monetary_total": float(segment["monetary"].sum()),
+        for cluster, row in profiles.iterrows():
+            self.segment_profiles[int(cluster)] = {
+                "n_customers": int(row["n_customers"]),
+                "recency_mean": float(row["recency_mean"]),
+                "frequency_mean": float(row["frequency_mean"]),
+                "monetary_mean": float(row["monetary_mean"]),
+                "monetary_total": float(row["monetary_total"]),
             }
 
     def _assign_segment_labels(self) -> None:
@@ -357,12 +513,15 @@ class CustomerSegmentation:
         if self.df_rfm is None:
             return None
 
-        customer = self.df_rfm[self.df_rfm.iloc[:, 0] == codparc]
+        # Indice hash da coluna chave (construido uma vez por treino)
+        if self._key_index is None:
+            self._key_index = pd.Index(self.df_rfm.iloc[:, 0])
 
-        if customer.empty:
+        pos = self._key_index.get_indexer([codparc])[0]
+        if pos < 0:
             return None
 
-        row = customer.iloc[0]
+        row = self.df_rfm.iloc[pos]
         return {
             "codparc": codparc,
             "segmento": row.get("segment_label", f"Cluster {row['cluster']}"),
@@ -373,3 +532,93 @@ class CustomerSegmentation:
                 "monetary": float(row["monetary"]),
             }
         }
+
+    def publish_segments(self, path: Optional[str] = None) -> str:
+        """
+        Publica CODPARC -> segmento para o SegmentLookup.
+
+        Args:
+            path: Diretorio de destino (None = models/clustering)
+
+        Returns:
+            Caminho da tabela publicada
+        """
+        if self.df_rfm is None:
+            raise ValueError("Modelo nao treinado")
+
+        from .lookup import SegmentLookup
+
+        return SegmentLookup.publish(
+            "clientes", self.df_rfm, self.df_rfm.columns[0],
+            self.segment_profiles, self.metadata, path=path
+        )
+
+    def save(self, path: Optional[str] = None, publish: bool = True) -> str:
+        """
+        Salva a segmentacao treinada (modelo, scaler, perfis e RFM).
+
+        Args:
+            path: Caminho para salvar (opcional)
+            publish: Publicar tambem as atribuicoes para o SegmentLookup
+
+        Returns:
+            Caminho do arquivo salvo
+        """
+        if self.model is None:
+            raise ValueError("Modelo nao treinado")
+
+        if path is None:
+            models_dir = SCIENTIST_CONFIG.get("models_dir") / "clustering"
+            models_dir.mkdir(parents=True, exist_ok=True)
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = models_dir / f"customer_segmentation_{timestamp}.pkl"
+
+        data = {
+            "model": self.model,
+            "scaler": self.scaler,
+            "segment_profiles": self.segment_profiles,
+            "metadata": self.metadata,
+            "config": self.config,
+            "df_rfm": self.df_rfm,
+        }
+
+        with open(path, "wb") as f:
+            pickle.dump(data, f)
+
+        logger.info(f"Segmentacao de clientes salva em: {path}")
+
+        if publish:
+            self.publish_segments(os.path.dirname(str(path)))
+
+        return str(path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "CustomerSegmentation":
+        """
+        Carrega segmentacao salva.
+
+        Args:
+            path: Caminho do arquivo (None = mais recente em models/clustering)
+
+        Returns:
+            Instancia treinada
+        """
+        if path is None:
+            models_dir = SCIENTIST_CONFIG.get("models_dir") / "clustering"
+            models = sorted(models_dir.glob("customer_segmentation_*.pkl"))
+            if not models:
+                raise FileNotFoundError(f"Nenhuma segmentacao de clientes salva em {models_dir}")
+            path = models[-1]
+
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+
+        instance = cls(config=data.get("config"))
+        instance.model = data.get("model")
+        instance.scaler = data.get("scaler")
+        instance.segment_profiles = data.get("segment_profiles", {})
+        instance.metadata = data.get("metadata", {})
+        instance.df_rfm = data.get("df_rfm")
+
+        return instance
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Servico de Consulta de Segmentos
+
+Atribuicoes de segmento (CODPARC/CODPROD -> segmento, cluster, metricas)
+publicadas apos o treino e servidas por indice hash, sem reprocessar o
+DataFrame do segmentador a cada consulta.
+
+Arquivos (em models/clustering/):
+- segments_clientes.parquet / segments_produtos.parquet: uma linha por chave
+- segments_clientes.json / segments_produtos.json: perfis e metadados
+
+Uso:
+    lookup = get_segment_lookup("clientes")   # carregado uma vez por processo
+    lookup.get(12345)                          # -> dict
+    lookup.get_many([1, 2, 3])                 # -> DataFrame
+    df = lookup.enrich(df_vendas)              # adiciona coluna "segmento"
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+from ..config import SCIENTIST_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Chave de cada tipo de segmentacao
+SEGMENT_KEYS = {
+    "clientes": "CODPARC",
+    "produtos": "CODPROD",
+}
+
+
+class SegmentLookup:
+    """
+    Consulta O(1) de segmento por chave (cliente ou produto).
+
+    Metodos principais:
+    - publish(): Persiste as atribuicoes de um segmentador treinado
+    - get(): Segmento e perfil de uma chave
+    - get_many(): Consulta em lote (DataFrame alinhado as chaves)
+    - enrich(): Adiciona segmento a um DataFrame pela coluna chave
+    """
+
+    def __init__(self, kind: str = "clientes", path: Optional[Union[str, Path]] = None):
+        """
+        Carrega as atribuicoes publicadas.
+
+        Args:
+            kind: 'clientes' ou 'produtos'
+            path: Diretorio dos arquivos (None = models/clustering)
+        """
+        if kind not in SEGMENT_KEYS:
+            raise ValueError(f"Tipo '{kind}' invalido. Use: {list(SEGMENT_KEYS.keys())}")
+
+        self.kind = kind
+        self.key_col = SEGMENT_KEYS[kind]
+        self.path = Path(path) if path else self._default_dir()
+
+        self.table: Optional[pd.DataFrame] = None
+        self.index: Optional[pd.Index] = None
+        self.profiles: Dict[str, Dict] = {}
+        self.metadata: Dict[str, Any] = {}
+        self._mtime: Optional[float] = None
+
+        self.load()
+
+    @staticmethod
+    def _default_dir() -> Path:
+        return SCIENTIST_CONFIG.get("models_dir") / "clustering"
+
+    @property
+    def table_path(self) -> Path:
+        return self.path / f"segments_{self.kind}.parquet"
+
+    @property
+    def info_path(self) -> Path:
+        return self.path / f"segments_{self.kind}.json"
+
+    # -------------------------------------------------------------------------
+    # Publicacao
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def publish(
+        cls,
+        kind: str,
+        df: pd.DataFrame,
+        key_col: str,
+        profiles: Dict[int, Dict],
+        metadata: Optional[Dict[str, Any]] = None,
+        path: Optional[Union[str, Path]] = None
+    ) -> str:
+        """
+        Persiste as atribuicoes de segmento de um segmentador treinado.
+
+        Args:
+            kind: 'clientes' ou 'produtos'
+            df: DataFrame do segmentador (df_rfm ou df_products)
+            key_col: Coluna chave em df
+            profiles: segment_profiles do segmentador
+            metadata: Metadados do treino
+            path: Diretorio de destino (None = models/clustering)
+
+        Returns:
+            Caminho da tabela salva
+        """
+        if kind not in SEGMENT_KEYS:
+            raise ValueError(f"Tipo '{kind}' invalido. Use: {list(SEGMENT_KEYS.keys())}")
+
+        out_dir = Path(path) if path else cls._default_dir()
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        table = df.rename(columns={key_col: SEGMENT_KEYS[kind]})
+        if "segment_label" not in table.columns:
+            table = table.assign(segment_label=table["cluster"].map(lambda c: f"Cluster {c}"))
+
+        info = {
+            "kind": kind,
+            "published_at": datetime.now().isoformat(),
+            "n_keys": len(table),
+            "profiles": {str(c): p for c, p in profiles.items()},
+            "metadata": metadata or {},
+        }
+
+        # Escrita atomica: leitores nunca veem arquivo parcial
+        table_path = out_dir / f"segments_{kind}.parquet"
+        info_path = out_dir / f"segments_{kind}.json"
+
+        table.to_parquet(f"{table_path}.tmp", index=False)
+        with open(f"{info_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=2, ensure_ascii=False, default=str)
+
+        os.replace(f"{info_path}.tmp", info_path)
+        os.replace(f"{table_path}.tmp", table_path)
+
+        logger.info(f"Segmentos de {kind} publicados: {len(table)} chaves em {table_path}")
+        return str(table_path)
+
+    # -------------------------------------------------------------------------
+    # Carregamento
+    # -------------------------------------------------------------------------
+
+    def load(self) -> bool:
+        """
+        Carrega tabela e perfis publicados.
+
+        Returns:
+            True se carregou
+        """
+        if not self.table_path.exists():
+            logger.warning(f"Segmentos de {self.kind} nao publicados em {self.path}")
+            return False
+
+        table = pd.read_parquet(self.table_path)
+
+        info = {}
+        if self.info_path.exists():
+            with open(self.info_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+
+        # Chave unica (o indice hash exige); mantem a ultima ocorrencia
+        table = table.drop_duplicates(subset=[self.key_col], keep="last")
+
+        self.table = table.drop(columns=[self.key_col]).reset_index(drop=True)
+        self.index = pd.Index(table[self.key_col].to_numpy())
+        self.profiles = info.get("profiles", {})
+        self.metadata = info.get("metadata", {})
+        self._mtime = self.table_path.stat().st_mtime
+
+        # Construir a tabela hash agora (e nao na primeira consulta)
+        self.index.get_indexer(self.index[:1])
+
+        logger.info(f"Segmentos de {self.kind} carregados: {len(self.index)} chaves")
+        return True
+
+    def is_stale(self) -> bool:
+        """True se houve nova publicacao depois do carregamento."""
+        if not self.table_path.exists():
+            return False
+        return self._mtime != self.table_path.stat().st_mtime
+
+    def refresh(self) -> bool:
+        """Recarrega se houve nova publicacao."""
+        if self.is_stale():
+            return self.load()
+        return False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.index is not None
+
+    # -------------------------------------------------------------------------
+    # Consulta
+    # -------------------------------------------------------------------------
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        """
+        Retorna segmento, cluster, metricas e perfil de uma chave.
+
+        Args:
+            key: CODPARC ou CODPROD
+
+        Returns:
+            Dict com o segmento (None se a chave nao existir)
+        """
+        if not self.is_loaded:
+            return None
+
+        try:
+            pos = self.index.get_loc(key)
+        except (KeyError, TypeError):
+            return None
+
+        row = self.table.iloc[pos]
+        cluster = int(row["cluster"])
+        metricas = {
+            c: (row[c].item() if hasattr(row[c], "item") else row[c])
+            for c in self.table.columns if c not in ("cluster", "segment_label")
+        }
+
+        return {
+            self.key_col.lower(): key,
+            "segmento": row["segment_label"],
+            "cluster_id": cluster,
+            "metricas": metricas,
+            "perfil_segmento": self.profiles.get(str(cluster), {}),
+        }
+
+    def get_many(self, keys: Iterable[Any]) -> pd.DataFrame:
+        """
+        Consulta em lote.
+
+        Args:
+            keys: Lista/array/Series de chaves
+
+        Returns:
+            DataFrame alinhado as chaves (linhas sem segmento ficam NaN)
+        """
+        keys = pd.Index(keys)
+        if not self.is_loaded:
+            return pd.DataFrame({self.key_col: keys, "segmento": None, "cluster_id": np.nan})
+
+        positions = self.index.get_indexer(keys)
+        found = positions >= 0
+
+        result = self.table.iloc[np.where(found, positions, 0)].reset_index(drop=True)
+        result = result.rename(columns={"segment_label": "segmento", "cluster": "cluster_id"})
+        result = result.astype({"cluster_id": "float64"})
+        result.loc[~found, :] = np.nan
+        result.insert(0, self.key_col, keys.to_numpy())
+
+        return result
+
+    def enrich(
+        self,
+        df: pd.DataFrame,
+        key_col: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        prefix: str = ""
+    ) -> pd.DataFrame:
+        """
+        Adiciona colunas de segmento a um DataFrame.
+
+        Args:
+            df: DataFrame com a coluna chave
+            key_col: Coluna chave em df (None = CODPARC/CODPROD)
+            columns: Colunas a adicionar (None = ['segmento'])
+            prefix: Prefixo dos nomes das novas colunas
+
+        Returns:
+            Copia de df com as colunas de segmento
+        """
+        key_col = key_col or self.key_col
+        columns = columns or ["segmento"]
+
+        if key_col not in df.columns:
+            logger.warning(f"Coluna {key_col} nao encontrada para enriquecer com segmentos")
+            return df
+
+        # Consultar apenas chaves unicas e expandir por codigo
+        codes, uniques = pd.factorize(df[key_col])
+        found = self.get_many(uniques)
+
+        # Ultima posicao (None) atende chaves nulas (codigo -1)
+        new_columns = {}
+        for col in columns:
+            values = found[col].to_numpy()
+            values = np.append(values, np.nan if values.dtype.kind == "f" else None)
+            new_columns[f"{prefix}{col}"] = values[codes]
+
+        return df.assign(**new_columns)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Resumo das atribuicoes carregadas."""
+        if not self.is_loaded:
+            return {"success": False, "error": f"Segmentos de {self.kind} nao publicados"}
+
+        counts = self.table["segment_label"].value_counts()
+        return {
+            "success": True,
+            "tipo": self.kind,
+            "total_chaves": len(self.index),
+            "por_segmento": {str(k): int(v) for k, v in counts.items()},
+            "treinado_em": self.metadata.get("trained_at"),
+        }
+
+
+# Instancias por processo (uma por tipo)
+_lookups: Dict[str, SegmentLookup] = {}
+_lookups_lock = threading.Lock()
+
+
+def get_segment_lookup(kind: str = "clientes", refresh: bool = False) -> SegmentLookup:
+    """
+    Retorna o SegmentLookup do processo (carregado uma unica vez).
+
+    Args:
+        kind: 'clientes' ou 'produtos'
+        refresh: Recarregar se houve nova publicacao
+
+    Returns:
+        SegmentLookup
+    """
+    with _lookups_lock:
+        lookup = _lookups.get(kind)
+        if lookup is None:
+            lookup = SegmentLookup(kind)
+            _lookups[kind] = lookup
+        elif refresh:
+            lookup.refresh()
+        return lookup
@@ -39,6 +39,8 @@ class ProductSegmentation:
 
     Metodos principais:
     - fit(): Segmenta produtos
+    - fit_from_store(): Segmenta a partir da feature store incremental
+    - publish_segments(): Publica CODPROD -> segmento (SegmentLookup)
     - get_segmentation_summary(): Retorna dict estruturado (para LLM)
     """
 
@@ -60,6 +62,7 @@ class ProductSegmentation:
         self.df_products: Optional[pd.DataFrame] = None
         self.segment_profiles: Dict[int, Dict] = {}
         self.metadata: Dict[str, Any] = {}
+        self._key_index: Optional[pd.Index] = None
 
     def fit(
         self,
@@ -89,6 +92,41 @@ class ProductSegmentation:
             df, product_col, quantity_col, value_col, cost_col
         )
 
+        return self._fit_products(df_products, n_clusters)
+
+    def fit_from_store(
+        self,
+        store=None,
+        n_clusters: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Segmenta produtos a partir das metricas incrementais da feature store.
+
+        Args:
+            store: SalesFeatureStore (None = singleton get_feature_store())
+            n_clusters: Numero de clusters (None = automatico)
+
+        Returns:
+            Dict com metadados da segmentacao
+        """
+        if store is None:
+            from src.agents.shared.features import get_feature_store
+            store = get_feature_store()
+
+        result = self._fit_products(store.get_product_metrics(), n_clusters)
+        if result.get("success"):
+            self.metadata["source"] = "feature_store"
+            self.metadata["watermark"] = store.manifest.get("watermark")
+            result.update(source="feature_store", watermark=self.metadata["watermark"])
+
+        return result
+
+    def _fit_products(
+        self,
+        df_products: pd.DataFrame,
+        n_clusters: Optional[int]
+    ) -> Dict[str, Any]:
+        """Treina o K-Means sobre as metricas de produto ja calculadas."""
         if df_products.empty:
             return {
                 "success": False,
@@ -96,6 +134,7 @@ class ProductSegmentation:
             }
 
         self.df_products = df_products
+        self._key_index = None
 
         # Determinar numero de clusters
         if n_clusters is None:
@@ -190,6 +229,8 @@ class ProductSegmentation:
 
     def _calculate_segment_profiles(self) -> None:
         """Calcula perfil de cada segmento."""
+        self.segment_profiles = {}
+
         if self.df_products is None:
             return
 
@@ -352,12 +393,15 @@ class ProductSegmentation:
         if self.df_products is None:
             return None
 
-        product = self.df_products[self.df_products["codprod"] == codprod]
+        # Indice hash de codprod (construido uma vez por treino)
+        if self._key_index is None:
+            self._key_index = pd.Index(self.df_products["codprod"])
 
-        if product.empty:
+        pos = self._key_index.get_indexer([codprod])[0]
+        if pos < 0:
             return None
 
-        row = product.iloc[0]
+        row = self.df_products.iloc[pos]
         return {
             "codprod": codprod,
             "segmento": row.get("segment_label", f"Cluster {row['cluster']}"),
@@ -369,3 +413,23 @@ class ProductSegmentation:
                 "margem": float(row.get("margem", 0)) if "margem" in row else None,
             }
         }
+
+    def publish_segments(self, path: Optional[str] = None) -> str:
+        """
+        Publica CODPROD -> segmento para o SegmentLookup.
+
+        Args:
+            path: Diretorio de destino (None = models/clustering)
+
+        Returns:
+            Caminho da tabela publicada
+        """
+        if self.df_products is None:
+            raise ValueError("Modelo nao treinado")
+
+        from .lookup import SegmentLookup
+
+        return SegmentLookup.publish(
+            "produtos", self.df_products, "codprod",
+            self.segment_profiles, self.metadata, path=path
+        )
@@ -115,6 +115,48 @@ ANOMALY_CONFIG = {
         "random_state": 42,
     },
 
+    # Modo de grandes volumes (historico completo de vendas)
+    # Treina em amostra estratificada e pontua em blocos, mantendo
+    # em memoria apenas o top-K e os contadores do resumo.
+    "large_data": {
+        # Ativar automaticamente a partir deste numero de linhas
+        "auto_threshold_rows": 500_000,
+
+        # Tamanho maximo da amostra de treino
+        "train_sample_size": 200_000,
+
+        # Coluna usada para estratificar a amostra (se existir)
+        "stratify_column": "CODEMP",
+
+        # Limite de amostras por arvore (substitui "auto" neste modo)
+        "max_samples": 512,
+
+        # Linhas pontuadas por bloco
+        "chunk_size": 100_000,
+
+        # Quantidade de piores anomalias retidas para o resumo
+        "top_k": 100,
+    },
+
+    # Modelos por segmento (empresa, grupo de produto, segmento de cliente)
+    "segmented": {
+        # Segmentacao padrao (coluna do DataFrame)
+        "default_segment_by": "CODEMP",
+
+        # Segmentos menores que isso sao agrupados em "_outros"
+        "min_segment_rows": 1000,
+
+        # Workers para treinar os segmentos em paralelo (None = n CPUs)
+        "max_workers": None,
+
+        # Tipo de pool: 'thread' (padrao; o Isolation Forest libera o GIL) ou
+        # 'process' (workers iniciados com spawn, features em memmap)
+        "executor": "thread",
+
+        # Piores anomalias retidas por segmento
+        "top_k_per_segment": 50,
+    },
+
     # Features para deteccao
     "features": {
         "vendas": [
@@ -190,6 +232,27 @@ CLUSTERING_CONFIG = {
         },
     },
 
+    # Modo escalavel (bases grandes de parceiros)
+    "scalable": {
+        # A partir deste numero de clientes usa MiniBatchKMeans
+        "minibatch_threshold": 20_000,
+
+        # Tamanho do lote do MiniBatchKMeans
+        "batch_size": 4096,
+
+        # Inicializacoes do MiniBatchKMeans (mais barato que o KMeans)
+        "minibatch_n_init": 3,
+
+        # Selecao automatica de k (avaliada em amostra)
+        "auto_k_sample_size": 10_000,
+
+        # Criterio: 'silhouette' (maior) ou 'inertia' (cotovelo)
+        "auto_k_metric": "silhouette",
+
+        # Workers para avaliar os k em paralelo (None = n CPUs)
+        "auto_k_max_workers": None,
+    },
+
     # Segmentacao de produtos
     "products": {
         "features": {
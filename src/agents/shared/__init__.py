@@ -2,10 +2,17 @@
 """Módulos compartilhados entre agentes."""
 
 from .rag import DocumentRetriever, DocumentStore, search_documentation, get_embeddings
+from .features import SalesFeatureStore, get_feature_store
+from .services import ServiceRegistry, get_services, get_service
 
 __all__ = [
     "DocumentRetriever",
     "DocumentStore",
     "search_documentation",
     "get_embeddings",
+    "SalesFeatureStore",
+    "get_feature_store",
+    "ServiceRegistry",
+    "get_services",
+    "get_service",
 ]
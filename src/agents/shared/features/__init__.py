@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+Feature Store compartilhada entre agentes
+
+Agregados incrementais de vendas (RFM de clientes e metricas de
+produtos) consumidos pela segmentacao e pelos KPIs.
+"""
+
+from .store import SalesFeatureStore, get_feature_store
+
+__all__ = [
+    "SalesFeatureStore",
+    "get_feature_store",
+]
@@ -0,0 +1,833 @@
+# -*- coding: utf-8 -*-
+"""
+Feature Store de Vendas (agregados incrementais)
+
+Mantem agregados por chave atualizados apenas com o delta diario:
+- Clientes (CODPARC): primeira/ultima compra, frequencia, valor total
+- Produtos (CODPROD): volume, receita, custo, numero de notas
+
+A recencia nao e armazenada: e calculada na leitura a partir da
+ultima compra e da data de referencia.
+
+Cada nota aplicada fica registrada com dois marcadores de alteracao
+(hash do cabecalho: cliente, data, VLRNOTA, STATUSNOTA, PENDENTE, DTALTER;
+hash da soma dos itens) e a sua contribuicao, num registro append-only
+particionado por delta (ledger/notas_NNNNNN.parquet, ledger/itens_NNNNNN.parquet).
+Cada update grava so a sua particao e as tabelas de clientes/produtos:
+- reaplicar o mesmo delta (re-extracao de um dia) nao duplica os agregados
+- nota que volta alterada (cancelada, VLRNOTA editado, pendente faturada)
+  tem a contribuicao antiga revertida: clientes sao recalculados pelo
+  indice de notas em memoria; produtos tem as somas subtraidas (itens
+  antigos lidos so das particoes dessas notas) e so sao relidos de todas as
+  particoes quando a nota estava na primeira/ultima venda do produto
+- delta so de cabecalho (sem CODPROD/QTDNEG/VLRTOT) compara so o marcador
+  do cabecalho e mantem os itens registrados (recalcula so clientes)
+
+Limitacao: nota excluida do ERP (cancelamento que remove o TGFCAB) nao
+aparece no delta; use remove([nunota, ...]) ou rebuild() com o historico.
+
+Consumido por:
+- CustomerSegmentation.fit_from_store()
+- ProductSegmentation.fit_from_store()
+- VendasKPI.calculate_from_store() / Analista.kpis(periodo="historico")
+
+Uso:
+    store = get_feature_store()
+    store.update(df_vendas_do_dia)
+    df_rfm = store.get_customer_rfm()
+"""
+
+import json
+import logging
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Diretorio raiz do projeto
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent.parent
+
+# Diretorio padrao das tabelas de features
+FEATURES_DIR = PROJECT_ROOT / "src" / "data" / "features"
+
+
+class SalesFeatureStore:
+    """
+    Agregados de clientes e produtos atualizados por delta.
+
+    Tabelas persistidas (parquet, ordenadas pela chave):
+    - clientes.parquet: CODPARC, first_purchase, last_purchase, frequency, monetary
+    - produtos.parquet: CODPROD, volume_vendas, receita_total, custo_total,
+      n_notas, first_sale, last_sale
+    - ledger/notas_NNNNNN.parquet: notas de um delta (NUNOTA, marcadores,
+      cliente, data, valor, removed, has_items); a versao mais recente vale
+    - ledger/itens_NNNNNN.parquet: itens dessas notas (NUNOTA, produto,
+      quantidade, valor, custo, data)
+    - manifest.json: watermark, ultima particao (ledger_seq) e historico
+
+    Em memoria fica so o indice de notas (uma linha por NUNOTA, com a
+    particao dos seus itens em items_part); os itens ficam em disco.
+    """
+
+    CUSTOMER_COLUMNS = ["first_purchase", "last_purchase", "frequency", "monetary"]
+    PRODUCT_COLUMNS = [
+        "volume_vendas", "receita_total", "custo_total",
+        "n_notas", "first_sale", "last_sale",
+    ]
+
+    # Regras de combinacao com o delta
+    MERGE_RULES = {
+        "first_purchase": "min",
+        "last_purchase": "max",
+        "frequency": "sum",
+        "monetary": "sum",
+        "volume_vendas": "sum",
+        "receita_total": "sum",
+        "custo_total": "sum",
+        "n_notas": "sum",
+        "first_sale": "min",
+        "last_sale": "max",
+    }
+
+    # Quantidade de atualizacoes mantidas no manifest
+    MAX_HISTORY = 30
+
+    # Colunas do cabecalho que, quando presentes, entram no marcador de alteracao
+    CHANGE_COLUMNS = ["STATUSNOTA", "PENDENTE", "DTALTER"]
+
+    NOTE_LEDGER_COLUMNS = ["NUNOTA", "marker", "item_marker", "customer", "date", "value"]
+    ITEM_LEDGER_COLUMNS = ["NUNOTA", "product", "quantity", "value", "cost", "date"]
+
+    # Subdiretorio das particoes do registro
+    LEDGER_DIR = "ledger"
+
+    # Marcador das notas gravadas antes do registro de contribuicoes (so idempotencia);
+    # em item_marker, nota registrada sem itens
+    LEGACY_MARKER = 0
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, autosave: bool = True):
+        """
+        Inicializa a store (carrega tabelas existentes, se houver).
+
+        Args:
+            path: Diretorio das tabelas (None = src/data/features)
+            autosave: Salvar em disco apos cada update()
+        """
+        self.path = Path(path) if path else FEATURES_DIR
+        self.autosave = autosave
+
+        self.customers = self._empty_customers()
+        self.products = self._empty_products()
+        self.notes = self._empty_notes()
+        self.manifest: Dict[str, Any] = {
+            "watermark": None,
+            "updated_at": None,
+            "n_updates": 0,
+            "ledger_seq": 0,
+            "history": [],
+        }
+
+        # Particoes ainda nao gravadas [(seq, notas, itens)]; _reset apaga o registro no save()
+        self._pending: List[Tuple[int, pd.DataFrame, pd.DataFrame]] = []
+        self._reset = False
+
+        self.load()
+
+    # -------------------------------------------------------------------------
+    # Atualizacao
+    # -------------------------------------------------------------------------
+
+    def update(
+        self,
+        df: pd.DataFrame,
+        customer_col: str = "CODPARC",
+        product_col: str = "CODPROD",
+        date_col: str = "DTNEG",
+        note_value_col: str = "VLRNOTA",
+        quantity_col: str = "QTDNEG",
+        item_value_col: str = "VLRTOT",
+        cost_col: Optional[str] = None,
+        delta_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Aplica um delta de vendas (cabecalho + itens) aos agregados.
+
+        Notas ja aplicadas e inalteradas sao ignoradas; notas alteradas
+        substituem a contribuicao anterior. O valor da nota e contado uma
+        unica vez por NUNOTA (o DataFrame tem uma linha por item).
+
+        Args:
+            df: DataFrame do delta (ex: vendas do dia)
+            customer_col: Coluna do cliente
+            product_col: Coluna do produto
+            date_col: Coluna de data
+            note_value_col: Valor da nota (cabecalho)
+            quantity_col: Quantidade do item
+            item_value_col: Valor total do item
+            cost_col: Custo do item (opcional, para margem)
+            delta_id: Identificador do delta no historico (ex: data)
+
+        Returns:
+            Dict com estatisticas da atualizacao
+        """
+        required = ["NUNOTA", customer_col, date_col, note_value_col]
+        missing = [c for c in required if c not in df.columns]
+        if missing:
+            return {
+                "success": False,
+                "error": f"Colunas obrigatorias faltando: {missing}"
+            }
+
+        nunotas = pd.to_numeric(df["NUNOTA"], errors="coerce")
+        valid = nunotas.notna().to_numpy()
+        df = df.loc[valid].assign(NUNOTA=nunotas.to_numpy()[valid].astype(np.int64))
+
+        has_items = all(c in df.columns for c in (product_col, quantity_col, item_value_col))
+        markers = self._note_markers(
+            df, customer_col, date_col, note_value_col,
+            [c for c in (quantity_col, item_value_col, cost_col) if has_items and c and c in df.columns]
+        )
+
+        # Notas novas ou com marcador diferente do registrado; os itens so
+        # sao comparados quando o delta os traz
+        known, stored, stored_items = self._lookup_notes(markers.index.to_numpy())
+        legacy = known & (stored == self.LEGACY_MARKER)
+        changed = stored != markers["marker"].to_numpy()
+        if has_items:
+            changed |= stored_items != markers["item_marker"].to_numpy()
+        changed &= known & ~legacy
+        apply = ~known | changed
+        apply_notas = markers.index.to_numpy()[apply]
+        changed_notas = markers.index.to_numpy()[changed]
+
+        is_new = df["NUNOTA"].isin(apply_notas).to_numpy()
+        stats = {
+            "success": True,
+            "delta_id": delta_id,
+            "linhas_delta": len(nunotas),
+            "linhas_aplicadas": int(is_new.sum()),
+            "notas_novas": int(apply.sum() - changed.sum()),
+            "notas_alteradas": int(changed.sum()),
+            "clientes_atualizados": 0,
+            "clientes_novos": 0,
+            "produtos_atualizados": 0,
+        }
+
+        if not apply.any():
+            logger.info(f"Feature store: delta sem notas novas ou alteradas ({len(nunotas)} linhas)")
+            return stats
+
+        delta = df.loc[is_new]
+        dates = pd.to_datetime(delta[date_col], errors="coerce")
+
+        # Contribuicoes do delta no formato do registro
+        cab = delta.assign(**{date_col: dates}).drop_duplicates(subset=["NUNOTA"])
+        item_markers = markers.loc[cab["NUNOTA"], "item_marker"].to_numpy()
+        if not has_items:
+            # Itens registrados continuam valendo
+            item_markers = np.where(
+                known[apply], stored_items[apply], self.LEGACY_MARKER
+            )[np.searchsorted(apply_notas, cab["NUNOTA"].to_numpy())]
+        note_rows = pd.DataFrame({
+            "NUNOTA": cab["NUNOTA"].to_numpy(),
+            "marker": markers.loc[cab["NUNOTA"], "marker"].to_numpy(),
+            "item_marker": item_markers,
+            "customer": cab[customer_col].to_numpy(),
+            "date": cab[date_col].to_numpy(),
+            "value": cab[note_value_col].to_numpy(),
+        })
+
+        item_rows = self._empty_items()
+        if has_items:
+            item_rows = pd.DataFrame({
+                "NUNOTA": delta["NUNOTA"].to_numpy(),
+                "product": delta[product_col].to_numpy(),
+                "quantity": delta[quantity_col].to_numpy(),
+                "value": delta[item_value_col].to_numpy(),
+                "cost": delta[cost_col].to_numpy() if cost_col and cost_col in delta.columns else np.nan,
+                "date": dates.to_numpy(),
+            }).dropna(subset=["product"])
+
+        cust_delta = self._customer_aggregates(note_rows)
+        stats["clientes_novos"] = int((~cust_delta.index.isin(self.customers.index)).sum())
+        stats["clientes_atualizados"] = len(cust_delta)
+        stats["produtos_atualizados"] = int(item_rows["product"].nunique())
+
+        # Contribuicao anterior das notas alteradas (antes de registrar a nova versao)
+        old_customers = self.notes.loc[changed_notas, "customer"]
+        old_items = self._read_items(changed_notas) if has_items else self._empty_items()
+
+        self._add_partition(note_rows, item_rows)
+
+        if len(changed_notas):
+            self._recompute_customers(old_customers.to_numpy(), note_rows["customer"].to_numpy())
+        else:
+            self.customers = self._merge(self.customers, cust_delta)
+        if has_items:
+            self._apply_items(old_items, item_rows)
+
+        self._update_manifest(dates.max(), stats)
+
+        if self.autosave:
+            self.save()
+
+        logger.info(
+            f"Feature store: {stats['notas_novas']} notas novas, {stats['notas_alteradas']} alteradas, "
+            f"{stats['clientes_atualizados']} clientes, {stats['produtos_atualizados']} produtos"
+        )
+
+        return stats
+
+    def remove(self, nunotas) -> Dict[str, Any]:
+        """
+        Reverte notas excluidas no ERP (ex: canceladas, fora do TGFCAB).
+
+        Args:
+            nunotas: NUNOTA das notas a remover
+
+        Returns:
+            Dict com estatisticas da remocao
+        """
+        nunotas = np.unique(pd.to_numeric(pd.Series(nunotas), errors="coerce").dropna().astype(np.int64))
+        known, stored, _ = self._lookup_notes(nunotas)
+        removable = nunotas[known & (stored != self.LEGACY_MARKER)]
+
+        if len(removable):
+            old_customers = self.notes.loc[removable, "customer"].to_numpy()
+            old_items = self._read_items(removable)
+
+            tombstones = pd.DataFrame({
+                "NUNOTA": removable,
+                "marker": self.LEGACY_MARKER,
+                "item_marker": self.LEGACY_MARKER,
+                "customer": np.nan,
+                "date": pd.NaT,
+                "value": np.nan,
+            })
+            self._add_partition(tombstones, self._empty_items(), removed=True)
+
+            self._recompute_customers(old_customers, np.empty(0))
+            self._apply_items(old_items, self._empty_items())
+            if self.autosave:
+                self.save()
+
+        logger.info(f"Feature store: {len(removable)} notas removidas")
+        return {
+            "success": True,
+            "notas_removidas": int(len(removable)),
+            "notas_sem_registro": int(len(nunotas) - len(removable)),
+        }
+
+    def rebuild(self, df: pd.DataFrame, **kwargs) -> Dict[str, Any]:
+        """
+        Recria a store do zero a partir do historico completo.
+
+        Args:
+            df: DataFrame com todo o historico de vendas
+            **kwargs: Mesmos argumentos de update()
+
+        Returns:
+            Dict com estatisticas da atualizacao
+        """
+        self.customers = self._empty_customers()
+        self.products = self._empty_products()
+        self.notes = self._empty_notes()
+        self.manifest = {"watermark": None, "updated_at": None, "n_updates": 0, "ledger_seq": 0, "history": []}
+        self._pending = []
+        self._reset = True
+
+        kwargs.setdefault("delta_id", "rebuild")
+        return self.update(df, **kwargs)
+
+    def _note_markers(
+        self,
+        df: pd.DataFrame,
+        customer_col: str,
+        date_col: str,
+        note_value_col: str,
+        item_cols: list
+    ) -> pd.DataFrame:
+        """
+        Marcadores de alteracao por NUNOTA: marker (cabecalho) e item_marker
+        (soma dos itens; LEGACY_MARKER se o delta nao tem itens).
+        """
+        head_cols = [customer_col, date_col, note_value_col] + [
+            c for c in self.CHANGE_COLUMNS if c in df.columns
+        ]
+        per_note = df.groupby("NUNOTA", sort=True)[head_cols].first()
+        markers = pd.DataFrame({"marker": self._hash_rows(per_note)}, index=per_note.index)
+
+        markers["item_marker"] = self.LEGACY_MARKER
+        if item_cols:
+            item_sums = df[item_cols].apply(pd.to_numeric, errors="coerce").groupby(df["NUNOTA"]).sum()
+            markers["item_marker"] = self._hash_rows(item_sums.loc[per_note.index])
+        return markers
+
+    def _hash_rows(self, frame: pd.DataFrame) -> np.ndarray:
+        markers = pd.util.hash_pandas_object(frame.astype(str), index=False).to_numpy().view(np.int64)
+        return np.where(markers == self.LEGACY_MARKER, 1, markers)
+
+    def _lookup_notes(self, nunotas: np.ndarray):
+        """Busca no indice de notas: (ja aplicada?, marcador, marcador dos itens)."""
+        pos = self.notes.index.get_indexer(nunotas)
+        known = pos >= 0
+        if not known.any():
+            zeros = np.full(len(nunotas), self.LEGACY_MARKER, dtype=np.int64)
+            return known, zeros, zeros
+
+        marker = np.where(known, self.notes["marker"].to_numpy()[pos], self.LEGACY_MARKER)
+        item_marker = np.where(known, self.notes["item_marker"].to_numpy()[pos], self.LEGACY_MARKER)
+        return known, marker, item_marker
+
+    def _add_partition(self, note_rows: pd.DataFrame, item_rows: pd.DataFrame, removed: bool = False) -> None:
+        """Registra uma particao (gravada no save()) e atualiza o indice de notas."""
+        seq = self.manifest.get("ledger_seq", 0) + 1
+        self.manifest["ledger_seq"] = seq
+
+        notes = note_rows[self.NOTE_LEDGER_COLUMNS].assign(
+            removed=removed,
+            has_items=note_rows["NUNOTA"].isin(item_rows["NUNOTA"]).to_numpy(),
+        )
+        self._pending.append((seq, notes, item_rows[self.ITEM_LEDGER_COLUMNS]))
+
+        notes = notes.set_index("NUNOTA")
+        index = self.notes.drop(index=self.notes.index.intersection(notes.index))
+        if removed:
+            self.notes = index
+            return
+
+        # Nota sem itens neste delta continua apontando para a particao anterior
+        previous = self.notes["items_part"].reindex(notes.index).fillna(-1).to_numpy(dtype=np.int64)
+        rows = notes[self.NOTE_LEDGER_COLUMNS[1:]].assign(
+            items_part=np.where(notes["has_items"].to_numpy(), seq, previous)
+        )
+        self.notes = rows if index.empty else pd.concat([index, rows])
+
+    def _item_partitions(self) -> List[Tuple[int, Any]]:
+        """Particoes de itens [(seq, caminho ou DataFrame pendente)]."""
+        parts: Dict[int, Any] = {}
+        ledger = self.path / self.LEDGER_DIR
+        if ledger.exists() and not self._reset:
+            for path in ledger.glob("itens_*.parquet"):
+                seq = int(path.stem.split("_")[1])
+                if seq <= self.manifest.get("ledger_seq", 0):
+                    parts[seq] = path
+        for seq, _, items in self._pending:
+            parts[seq] = items
+        return sorted(parts.items())
+
+    def _read_partition(self, part: Any, column: str, values) -> pd.DataFrame:
+        values = list(values)
+        if isinstance(part, pd.DataFrame):
+            return part[part[column].isin(values)]
+        return pd.read_parquet(part, filters=[(column, "in", values)])
+
+    def _read_items(self, nunotas: np.ndarray) -> pd.DataFrame:
+        """Itens vigentes das notas, lidos so das particoes onde estao."""
+        items_part = self.notes["items_part"].reindex(nunotas)
+        items_part = items_part[items_part >= 0]
+        if items_part.empty:
+            return self._empty_items()
+
+        parts = dict(self._item_partitions())
+        frames = [
+            self._read_partition(parts[seq], "NUNOTA", notas.index.to_numpy())
+            for seq, notas in items_part.groupby(items_part)
+            if seq in parts
+        ]
+        return pd.concat(frames, ignore_index=True) if frames else self._empty_items()
+
+    def _scan_items(self, products: pd.Index) -> pd.DataFrame:
+        """Itens vigentes dos produtos em todas as particoes (so para recalculo de bordas)."""
+        frames = []
+        for seq, part in self._item_partitions():
+            items = self._read_partition(part, "product", products)
+            if not items.empty:
+                frames.append(items.assign(seq=seq))
+        if not frames:
+            return self._empty_items()
+
+        items = pd.concat(frames, ignore_index=True)
+        live = items["seq"].to_numpy() == self.notes["items_part"].reindex(items["NUNOTA"]).to_numpy()
+        return items.loc[live, self.ITEM_LEDGER_COLUMNS]
+
+    def _recompute_customers(self, old_customers: np.ndarray, new_customers: np.ndarray) -> None:
+        """Recalcula os clientes afetados a partir do indice de notas (sem ler disco)."""
+        customers = pd.Index(old_customers).union(pd.Index(new_customers)).dropna()
+        notes = self.notes[self.notes["customer"].isin(customers)].reset_index()
+        self.customers = self._recompute(self.customers, customers, self._customer_aggregates(notes))
+
+    def _apply_items(self, old_items: pd.DataFrame, new_items: pd.DataFrame) -> None:
+        """
+        Troca a contribuicao dos itens antigos pela dos novos nos produtos.
+
+        Somas sao subtraidas; produto cuja primeira/ultima venda (ou todas
+        as notas) vinha dos itens antigos e relido das particoes.
+        """
+        new_agg = self._product_aggregates(new_items)
+        if old_items.empty:
+            self.products = self._merge(self.products, new_agg)
+            return
+
+        old_agg = self._product_aggregates(old_items)
+        current = self.products.reindex(old_agg.index)
+        boundary = old_agg.index[(
+            (old_agg["first_sale"] <= current["first_sale"]) |
+            (old_agg["last_sale"] >= current["last_sale"]) |
+            (old_agg["n_notas"] >= current["n_notas"]) |
+            current["n_notas"].isna()
+        ).to_numpy()]
+
+        rest = old_agg.index.difference(boundary)
+        base = self.products
+        for col in ("volume_vendas", "receita_total", "n_notas"):
+            base.loc[rest, col] = base.loc[rest, col] - old_agg.loc[rest, col]
+        base.loc[rest, "custo_total"] = base.loc[rest, "custo_total"] - old_agg.loc[rest, "custo_total"].fillna(0)
+
+        base = self._merge(base, new_agg.drop(index=new_agg.index.intersection(boundary)))
+        self.products = self._recompute(base, boundary, self._product_aggregates(self._scan_items(boundary)))
+
+    def _recompute(self, base: pd.DataFrame, keys: pd.Index, fresh: pd.DataFrame) -> pd.DataFrame:
+        """Substitui as linhas de keys pelos agregados recalculados (chave sem notas sai)."""
+        base = base.drop(index=base.index.intersection(keys))
+        if fresh.empty:
+            return base
+        fresh = fresh[base.columns].astype(base.dtypes.to_dict())
+        return fresh if base.empty else pd.concat([base, fresh]).sort_index()
+
+    def _customer_aggregates(self, notes: pd.DataFrame) -> pd.DataFrame:
+        """Agregados por cliente a partir de notas (uma linha por nota)."""
+        cab = notes.dropna(subset=["date", "customer"])
+        return cab.groupby("customer", sort=True).agg(
+            first_purchase=("date", "min"),
+            last_purchase=("date", "max"),
+            frequency=("NUNOTA", "size"),
+            monetary=("value", "sum"),
+        ).rename_axis("CODPARC")
+
+    def _product_aggregates(self, items: pd.DataFrame) -> pd.DataFrame:
+        """Agregados por produto a partir de itens."""
+        if items.empty:
+            return self._empty_products()
+
+        grouped = items.groupby("product", sort=True)
+        products = grouped.agg(
+            volume_vendas=("quantity", "sum"),
+            receita_total=("value", "sum"),
+            n_notas=("NUNOTA", "nunique"),
+            first_sale=("date", "min"),
+            last_sale=("date", "max"),
+        )
+        products["custo_total"] = grouped["cost"].sum(min_count=1)
+        return products[self.PRODUCT_COLUMNS].rename_axis("CODPROD")
+
+    def _merge(self, base: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+        """Combina o delta com a tabela base tocando apenas as chaves do delta."""
+        if base.empty:
+            return delta[base.columns].astype(base.dtypes.to_dict())
+
+        existing = delta.index.intersection(base.index)
+
+        for col in delta.columns:
+            if not len(existing):
+                break
+
+            old = base.loc[existing, col]
+            new = delta.loc[existing, col]
+            rule = self.MERGE_RULES[col]
+
+            if rule == "min":
+                base.loc[existing, col] = old.where((old <= new) | new.isna(), new)
+            elif rule == "max":
+                base.loc[existing, col] = old.where((old >= new) | new.isna(), new)
+            else:
+                base.loc[existing, col] = pd.concat([old, new], axis=1).sum(axis=1, min_count=1)
+
+        new_keys = delta.index.difference(base.index)
+        if len(new_keys):
+            base = pd.concat([base, delta.loc[new_keys, base.columns]]).sort_index()
+
+        return base
+
+    def _update_manifest(self, max_date, stats: Dict[str, Any]) -> None:
+        """Atualiza watermark (maior data vista) e historico."""
+        watermark = self.watermark
+        if pd.notna(max_date) and (watermark is None or max_date > watermark):
+            self.manifest["watermark"] = pd.Timestamp(max_date).isoformat()
+
+        self.manifest["updated_at"] = datetime.now().isoformat()
+        self.manifest["n_updates"] = self.manifest.get("n_updates", 0) + 1
+
+        history = self.manifest.setdefault("history", [])
+        history.append({
+            "delta_id": stats.get("delta_id"),
+            "applied_at": self.manifest["updated_at"],
+            "notas_novas": stats["notas_novas"],
+            "notas_alteradas": stats.get("notas_alteradas", 0),
+            "linhas_aplicadas": stats["linhas_aplicadas"],
+        })
+        del history[:-self.MAX_HISTORY]
+
+    # -------------------------------------------------------------------------
+    # Leitura
+    # -------------------------------------------------------------------------
+
+    @property
+    def watermark(self) -> Optional[pd.Timestamp]:
+        """Maior data de venda ja aplicada."""
+        value = self.manifest.get("watermark")
+        return pd.Timestamp(value) if value else None
+
+    @property
+    def is_empty(self) -> bool:
+        """True se nenhuma venda foi aplicada."""
+        return self.customers.empty and self.products.empty
+
+    def get_customer_rfm(
+        self,
+        reference_date: Optional[str] = None,
+        customer_col: str = "CODPARC"
+    ) -> pd.DataFrame:
+        """
+        Retorna RFM por cliente no formato de CustomerSegmentation.
+
+        Args:
+            reference_date: Data de referencia para recencia (None = watermark)
+            customer_col: Nome da coluna de cliente no resultado
+
+        Returns:
+            DataFrame [customer_col, recency, frequency, monetary]
+        """
+        if self.customers.empty:
+            return pd.DataFrame()
+
+        ref_date = pd.to_datetime(reference_date) if reference_date else self.watermark
+        if ref_date is None:
+            ref_date = self.customers["last_purchase"].max()
+
+        rfm = pd.DataFrame({
+            customer_col: self.customers.index.to_numpy(),
+            "recency": (ref_date - self.customers["last_purchase"]).dt.days.to_numpy(),
+            "frequency": self.customers["frequency"].to_numpy(),
+            "monetary": self.customers["monetary"].to_numpy(),
+        })
+
+        return rfm[rfm["monetary"] > 0].reset_index(drop=True)
+
+    def get_product_metrics(self) -> pd.DataFrame:
+        """
+        Retorna metricas por produto no formato de ProductSegmentation.
+
+        Returns:
+            DataFrame [codprod, volume_vendas, receita_total,
+                       (custo_total, margem), receita_unitaria]
+        """
+        if self.products.empty:
+            return pd.DataFrame()
+
+        products = pd.DataFrame({
+            "codprod": self.products.index.to_numpy(),
+            "volume_vendas": self.products["volume_vendas"].to_numpy(),
+            "receita_total": self.products["receita_total"].to_numpy(),
+        })
+
+        custo = self.products["custo_total"].to_numpy()
+        if not np.isnan(custo).all():
+            products["custo_total"] = np.nan_to_num(custo)
+            products["margem"] = (
+                (products["receita_total"] - products["custo_total"]) /
+                products["receita_total"] * 100
+            ).replace([np.inf, -np.inf], np.nan).fillna(0)
+
+        products["receita_unitaria"] = (
+            products["receita_total"] / products["volume_vendas"]
+        ).replace([np.inf, -np.inf], np.nan).fillna(0)
+
+        return products
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna resumo da store."""
+        return {
+            "path": str(self.path),
+            "clientes": len(self.customers),
+            "produtos": len(self.products),
+            "notas": int(len(self.notes)),
+            "watermark": self.manifest.get("watermark"),
+            "updated_at": self.manifest.get("updated_at"),
+            "n_updates": self.manifest.get("n_updates", 0),
+        }
+
+    # -------------------------------------------------------------------------
+    # Persistencia
+    # -------------------------------------------------------------------------
+
+    def save(self) -> str:
+        """
+        Salva as tabelas em disco.
+
+        Returns:
+            Diretorio da store
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.customers.rename_axis("CODPARC").reset_index().to_parquet(
+            self.path / "clientes.parquet", index=False
+        )
+        self.products.rename_axis("CODPROD").reset_index().to_parquet(
+            self.path / "produtos.parquet", index=False
+        )
+        # Registro: so as particoes novas (append-only)
+        ledger = self.path / self.LEDGER_DIR
+        if self._reset:
+            shutil.rmtree(ledger, ignore_errors=True)
+            self._reset = False
+        ledger.mkdir(exist_ok=True)
+        for seq, notes, items in self._pending:
+            notes.to_parquet(ledger / f"notas_{seq:06d}.parquet", index=False)
+            if not items.empty:
+                items.to_parquet(ledger / f"itens_{seq:06d}.parquet", index=False)
+        self._pending = []
+
+        # Formato anterior (um arquivo reescrito a cada update), migrado no load()
+        for name in ("notas.parquet", "itens.parquet"):
+            (self.path / name).unlink(missing_ok=True)
+
+        # Manifest por ultimo: particoes acima de ledger_seq sao ignoradas no load()
+        with open(self.path / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+
+        return str(self.path)
+
+    def load(self) -> bool:
+        """
+        Carrega tabelas do disco (se existirem).
+
+        Returns:
+            True se carregou
+        """
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.exists():
+            return False
+
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+            customers = pd.read_parquet(self.path / "clientes.parquet")
+            self.customers = customers.set_index("CODPARC")[self.CUSTOMER_COLUMNS]
+
+            products = pd.read_parquet(self.path / "produtos.parquet")
+            self.products = products.set_index("CODPROD")[self.PRODUCT_COLUMNS]
+
+            self.manifest.setdefault("ledger_seq", 0)
+            self.notes = self._load_ledger()
+            self._load_legacy_notes()
+
+            logger.info(
+                f"Feature store carregada: {len(self.customers)} clientes, "
+                f"{len(self.products)} produtos (watermark {self.manifest.get('watermark')})"
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao carregar feature store: {e}")
+            return False
+
+    def _load_ledger(self) -> pd.DataFrame:
+        """Indice de notas a partir das particoes (versao mais recente de cada NUNOTA)."""
+        ledger = self.path / self.LEDGER_DIR
+        last_seq = self.manifest.get("ledger_seq", 0)
+        parts = sorted(
+            (int(p.stem.split("_")[1]), p) for p in ledger.glob("notas_*.parquet")
+        ) if ledger.exists() else []
+
+        frames = [pd.read_parquet(path).assign(seq=seq) for seq, path in parts if seq <= last_seq]
+        if not frames:
+            return self._empty_notes()
+        notes = pd.concat(frames, ignore_index=True)
+
+        # Depois da ultima remocao de cada nota
+        removed_at = notes[notes["removed"]].groupby("NUNOTA")["seq"].max()
+        notes = notes[notes["seq"].to_numpy() > notes["NUNOTA"].map(removed_at).fillna(-1).to_numpy()]
+
+        items_part = notes[notes["has_items"]].groupby("NUNOTA")["seq"].max()
+        latest = notes.drop_duplicates("NUNOTA", keep="last").set_index("NUNOTA")
+        latest = latest[~latest["removed"]]
+        return latest[self.NOTE_LEDGER_COLUMNS[1:]].assign(
+            items_part=items_part.reindex(latest.index).fillna(-1).to_numpy(dtype=np.int64)
+        )
+
+    def _load_legacy_notes(self) -> None:
+        """Migra notas.parquet/itens.parquet (formato anterior) para uma particao."""
+        notes_path = self.path / "notas.parquet"
+        if not notes_path.exists():
+            return
+
+        notes = pd.read_parquet(notes_path)
+        notes = notes[~notes["NUNOTA"].isin(self.notes.index)]
+        if "marker" not in notes.columns:
+            # Store anterior ao registro: so NUNOTA (alteracoes exigem rebuild)
+            logger.warning("Feature store sem registro de contribuicoes: notas alteradas so com rebuild()")
+            notes = notes.assign(marker=self.LEGACY_MARKER, customer=np.nan, date=pd.NaT, value=np.nan)
+        if "item_marker" not in notes.columns:
+            notes = notes.assign(item_marker=self.LEGACY_MARKER)
+
+        items_path = self.path / "itens.parquet"
+        items = pd.read_parquet(items_path) if items_path.exists() else self._empty_items()
+        self._add_partition(notes.reset_index(drop=True), items[items["NUNOTA"].isin(notes["NUNOTA"])])
+
+    def _empty_customers(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "first_purchase": pd.Series(dtype="datetime64[ns]"),
+            "last_purchase": pd.Series(dtype="datetime64[ns]"),
+            "frequency": pd.Series(dtype="int64"),
+            "monetary": pd.Series(dtype="float64"),
+        }, index=pd.Index([], dtype="int64", name="CODPARC"))
+
+    def _empty_notes(self) -> pd.DataFrame:
+        """Indice de notas (NUNOTA no indice; NUNOTA vira coluna nas particoes)."""
+        return pd.DataFrame({
+            "marker": pd.Series(dtype="int64"),
+            "item_marker": pd.Series(dtype="int64"),
+            "customer": pd.Series(dtype="float64"),
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "value": pd.Series(dtype="float64"),
+            "items_part": pd.Series(dtype="int64"),
+        }, index=pd.Index([], dtype="int64", name="NUNOTA"))
+
+    def _empty_items(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "NUNOTA": pd.Series(dtype="int64"),
+            "product": pd.Series(dtype="float64"),
+            "quantity": pd.Series(dtype="float64"),
+            "value": pd.Series(dtype="float64"),
+            "cost": pd.Series(dtype="float64"),
+            "date": pd.Series(dtype="datetime64[ns]"),
+        })
+
+    def _empty_products(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "volume_vendas": pd.Series(dtype="float64"),
+            "receita_total": pd.Series(dtype="float64"),
+            "custo_total": pd.Series(dtype="float64"),
+            "n_notas": pd.Series(dtype="int64"),
+            "first_sale": pd.Series(dtype="datetime64[ns]"),
+            "last_sale": pd.Series(dtype="datetime64[ns]"),
+        }, index=pd.Index([], dtype="int64", name="CODPROD"))
+
+
+# Singleton
+_feature_store = None
+
+
+def get_feature_store() -> SalesFeatureStore:
+    """Retorna instancia singleton da feature store."""
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = SalesFeatureStore()
+    return _feature_store
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Ranking BM25 para RAG
+
+Alternativa ao TF-IDF + cosseno para bases dominadas por nomes de
+tabelas/campos do Sankhya (TGFCAB, TIPMOV, CODTIPOPER).
+
+- Tokenizador ciente de identificadores: mantem o identificador inteiro
+  e tambem suas partes (AD_NUMPEDIDO -> ad_numpedido, ad, numpedido;
+  extractByRange -> extractbyrange, extract, by, range; c.CODPARC -> codparc)
+- Remove acentos (a documentacao mistura "movimentacao" e "movimentação")
+- Postings em arrays (formato CSC) com o peso BM25 de cada par
+  termo/chunk pre-calculado: a busca so soma pesos
+"""
+
+import logging
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple, Optional, Any
+
+import numpy as np
+from scipy.sparse import csr_matrix, csc_matrix
+
+from .storage import TermTable, save_array, load_array
+
+logger = logging.getLogger(__name__)
+
+# Parametros BM25 (Okapi)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Identificadores: letras/digitos com _ e . internos (c.CODPARC, AD_NUMPEDIDO)
+_IDENT_RE = re.compile(r"[a-z0-9]+(?:[_.][a-z0-9]+)*", re.IGNORECASE)
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+def strip_accents(text: str) -> str:
+    """Remove acentos (movimentação -> movimentacao)."""
+    normalized = unicodedata.normalize("NFKD", text)
+    return normalized.encode("ascii", "ignore").decode("ascii")
+
+
+def tokenize_code(text: str) -> List[str]:
+    """
+    Tokeniza texto e identificadores de codigo/SQL.
+
+    Args:
+        text: Texto livre, markdown, SQL ou Python
+
+    Returns:
+        Lista de tokens (minusculos, sem acento, com as partes dos identificadores)
+    """
+    tokens = []
+
+    for match in _IDENT_RE.finditer(strip_accents(text)):
+        ident = match.group(0)
+
+        # Prefixo de alias SQL (c.CODPARC -> CODPARC) e atributos (self.store -> store)
+        parts = ident.split(".")
+        for part in parts:
+            lower = part.lower()
+            if len(lower) > 1:
+                tokens.append(lower)
+
+            # snake_case e camelCase: adicionar as partes
+            pieces = [p for chunk in part.split("_") for p in _CAMEL_RE.findall(chunk)]
+            if len(pieces) > 1:
+                tokens.extend(p.lower() for p in pieces if len(p) > 1)
+
+    return tokens
+
+
+def count_terms(texts: List[str], vocabulary: Dict[str, int]) -> csr_matrix:
+    """
+    Contagem de tokens (tokenize_code) por texto.
+
+    O vocabulario so cresce: termos novos recebem o proximo id, entao
+    contagens geradas em momentos diferentes continuam compativeis.
+
+    Args:
+        texts: Textos (chunks)
+        vocabulary: termo -> id (atualizado com os termos novos)
+
+    Returns:
+        Matriz CSR (textos x len(vocabulary)) com as contagens
+    """
+    term_ids: List[int] = []
+    indptr = [0]
+    for text in texts:
+        term_ids.extend(vocabulary.setdefault(t, len(vocabulary)) for t in tokenize_code(text))
+        indptr.append(len(term_ids))
+
+    counts = csr_matrix(
+        (np.ones(len(term_ids), dtype=np.int32), np.asarray(term_ids, dtype=np.int32), indptr),
+        shape=(len(texts), len(vocabulary))
+    )
+    counts.sum_duplicates()
+    return counts
+
+
+class BM25Index:
+    """
+    Indice invertido com pontuacao BM25.
+
+    Arrays (CSC por termo):
+    - indptr[t]:indptr[t+1] delimita as postings do termo t
+    - doc_ids: chunk de cada posting
+    - weights: peso BM25 pre-calculado (idf * tf saturado e normalizado)
+    - doc_len: tamanho (em tokens) de cada chunk
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+
+        self.vocabulary: Mapping[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.weights = np.empty(0, dtype=np.float32)
+        self.doc_len = np.empty(0, dtype=np.float32)
+        self.idf = np.empty(0, dtype=np.float32)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_len)
+
+    def fit(self, texts: List[str]) -> "BM25Index":
+        """
+        Constroi o indice a partir dos textos dos chunks.
+
+        Args:
+            texts: Texto de cada chunk (a posicao e o id do chunk)
+
+        Returns:
+            self
+        """
+        vocabulary: Dict[str, int] = {}
+        return self.fit_counts(count_terms(texts, vocabulary), vocabulary)
+
+    def fit_counts(self, counts: csr_matrix, vocabulary: Dict[str, int]) -> "BM25Index":
+        """
+        Constroi o indice a partir de contagens (count_terms).
+
+        Args:
+            counts: Contagens (chunks x termos)
+            vocabulary: termo -> id (colunas de counts)
+
+        Returns:
+            self
+        """
+        # CSC: postings de cada termo ja agrupadas e ordenadas por chunk
+        postings = csc_matrix(counts, dtype=np.float32)
+        postings.sort_indices()
+        n_docs = postings.shape[0]
+
+        self.vocabulary = vocabulary
+        self.doc_len = np.asarray(postings.sum(axis=1), dtype=np.float32).ravel()
+        self.indptr = postings.indptr.astype(np.int64)
+        self.doc_ids = postings.indices.astype(np.int32)
+
+        # idf Okapi com +1 (sempre positivo)
+        df = np.diff(self.indptr)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        tf = postings.data
+        post_terms = np.repeat(np.arange(len(df)), df)
+        avgdl = float(self.doc_len.mean()) if n_docs else 0.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len[self.doc_ids] / max(avgdl, 1e-9))
+        self.weights = (
+            self.idf[post_terms] * tf * (self.k1 + 1) / (tf + norm)
+        ).astype(np.float32)
+
+        logger.info(f"BM25 treinado com {n_docs} chunks ({len(vocabulary)} termos)")
+        return self
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pontua os chunks que contem termos da query.
+
+        Returns:
+            Tupla (ids dos chunks candidatos, scores)
+        """
+        counts: Dict[int, int] = {}
+        for token in tokenize_code(query):
+            term = self.vocabulary.get(token)
+            if term is not None:
+                counts[term] = counts.get(term, 0) + 1
+
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows = []
+        weights = []
+        for term, qtf in counts.items():
+            start, end = self.indptr[term], self.indptr[term + 1]
+            rows.append(self.doc_ids[start:end])
+            weights.append(self.weights[start:end] * qtf)
+
+        candidates, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights))
+
+        return candidates, scores
+
+    def save(self, path: Path) -> None:
+        """Grava o indice em arrays .npy (mapeaveis) e vocabulario compacto."""
+        for name in ("indptr", "doc_ids", "weights", "doc_len", "idf"):
+            save_array(path / f"bm25_{name}.npy", getattr(self, name))
+
+        # So termos com postings (o vocabulario incremental guarda termos removidos)
+        TermTable.write(path, "bm25", self.vocabulary, keep=np.diff(self.indptr) > 0)
+
+    @classmethod
+    def load(cls, path: Path, k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        """Abre o indice gravado por save() (mmap, sem copiar os arrays)."""
+        index = cls(k1=k1, b=b)
+        for name in ("indptr", "doc_ids", "weights", "doc_len", "idf"):
+            setattr(index, name, load_array(path / f"bm25_{name}.npy"))
+        index.vocabulary = TermTable(path, "bm25")
+        return index
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["BM25Index"]:
+        """Recria o indice do formato antigo (index.pkl; None se ausente)."""
+        if not data:
+            return None
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.vocabulary = data["vocabulary"]
+        index.indptr = data["indptr"]
+        index.doc_ids = data["doc_ids"]
+        index.weights = data["weights"]
+        index.doc_len = data["doc_len"]
+        index.idf = data["idf"]
+        return index
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Deteccao de Chunks Duplicados (MinHash + LSH)
+
+Fontes que se sobrepoem (copias de queries, relatorios diarios quase
+iguais, trechos repetidos entre docs) geram chunks iguais ou quase
+iguais. Cada chunk recebe uma assinatura MinHash dos seus shingles
+(sequencias de palavras); chunks com similaridade de Jaccard estimada
+acima do limite sao mantidos uma unica vez (o primeiro na ordem das fontes).
+
+- Assinaturas sao estaveis (hash crc32 + permutacoes com semente fixa):
+  podem ser salvas nos segmentos do indice incremental
+- LSH por bandas: so pares que coincidem em alguma banda sao comparados
+"""
+
+import logging
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Palavras por shingle
+SHINGLE_SIZE = 4
+
+# Permutacoes da assinatura (BANDS x ROWS)
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Similaridade (Jaccard estimada) a partir da qual o chunk e duplicado
+NEAR_DUP_THRESHOLD = 0.85
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+_WORD_RE = re.compile(r"\w+")
+
+# Permutacoes fixas (a assinatura precisa ser a mesma entre execucoes)
+_rng = np.random.RandomState(20240601)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+
+
+def _shingles(text: str) -> np.ndarray:
+    """Hashes (crc32) dos shingles de palavras do texto."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    return np.unique(np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)
+    ))
+
+
+def minhash_signatures(texts: List[str]) -> np.ndarray:
+    """
+    Assinaturas MinHash dos textos.
+
+    Args:
+        texts: Textos (chunks)
+
+    Returns:
+        Array (len(texts), NUM_PERM) uint32; texto sem palavras = linha com o hash maximo
+    """
+    signatures = np.full((len(texts), NUM_PERM), _MAX_HASH, dtype=np.uint32)
+
+    for i, text in enumerate(texts):
+        hashes = _shingles(text)
+        if len(hashes):
+            permuted = (hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME
+            signatures[i] = permuted.min(axis=0)
+
+    return signatures
+
+
+def find_duplicates(signatures: np.ndarray, threshold: float = NEAR_DUP_THRESHOLD) -> np.ndarray:
+    """
+    Marca os chunks duplicados de um chunk anterior.
+
+    Args:
+        signatures: Assinaturas (minhash_signatures), na ordem de prioridade
+        threshold: Jaccard estimada minima para considerar duplicado
+
+    Returns:
+        Array de int: posicao do chunk mantido equivalente, ou -1 se o chunk e unico
+    """
+    n = len(signatures)
+    duplicate_of = np.full(n, -1, dtype=np.int64)
+    buckets: List[dict] = [{} for _ in range(BANDS)]
+
+    for i in range(n):
+        signature = signatures[i]
+
+        # Sem palavras: nao ha o que comparar
+        if signature[0] == _MAX_HASH and (signature == _MAX_HASH).all():
+            continue
+
+        keys = [signature[b * ROWS:(b + 1) * ROWS].tobytes() for b in range(BANDS)]
+
+        # Candidatos: chunks mantidos que coincidem em alguma banda
+        candidates = {buckets[b][key] for b, key in enumerate(keys) if key in buckets[b]}
+        for j in sorted(candidates):
+            if np.mean(signatures[j] == signature) >= threshold:
+                duplicate_of[i] = j
+                break
+
+        if duplicate_of[i] < 0:
+            for b, key in enumerate(keys):
+                buckets[b].setdefault(key, i)
+
+    return duplicate_of
@@ -6,55 +6,212 @@ Versao simplificada usando TF-IDF (funciona offline).
 """
 
 import logging
-from typing import List, Optional
+from typing import Dict, List, Mapping, Optional, Tuple
 from functools import lru_cache
 
 import numpy as np
+from scipy.sparse import csr_matrix, diags
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
 
 logger = logging.getLogger(__name__)
 
+# Tamanho maximo do vocabulario (unigramas + bigramas)
+MAX_FEATURES = 50_000
+
 
 class TfidfEmbeddings:
     """
     Embeddings simples usando TF-IDF.
     Funciona 100% offline, sem dependencias externas.
+
+    Os vetores sao esparsos (CSR, float32) e normalizados (L2):
+    o produto escalar entre eles ja e a similaridade de cosseno.
     """
 
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=1000,
-            ngram_range=(1, 2),
-            stop_words=None  # Manter stopwords para PT-BR
-        )
+    def __init__(self, max_features: Optional[int] = MAX_FEATURES):
+        self.max_features = max_features
+        self.vectorizer = self._new_vectorizer()
         self._fitted = False
         self._documents: List[str] = []
 
+        # Estado treinado: termo -> coluna (dict ou TermTable) e idf
+        self.vocabulary: Mapping[str, int] = {}
+        self.idf = np.empty(0, dtype=np.float32)
+        self._vectorizer_ready = False
+        self._analyzer = self.vectorizer.build_analyzer()
+
+    def _new_vectorizer(self) -> TfidfVectorizer:
+        return TfidfVectorizer(
+            max_features=self.max_features,
+            ngram_range=(1, 2),
+            stop_words=None,  # Manter stopwords para PT-BR
+            dtype=np.float32
+        )
+
+    @property
+    def dimension(self) -> int:
+        """Tamanho do vocabulario treinado."""
+        if not self._fitted:
+            return 0
+        return len(self.vocabulary)
+
     def fit(self, documents: List[str]):
         """Treina o vetorizador com documentos."""
         self._documents = documents
         if documents:
             self.vectorizer.fit(documents)
+            self.vocabulary = self.vectorizer.vocabulary_
+            self.idf = self.vectorizer.idf_.astype(np.float32)
+            self._vectorizer_ready = True
             self._fitted = True
-            logger.info(f"TF-IDF treinado com {len(documents)} documentos")
+            logger.info(
+                f"TF-IDF treinado com {len(documents)} documentos "
+                f"({self.dimension} termos)"
+            )
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Gera embeddings para lista de textos."""
+    def transform(self, texts: List[str]) -> csr_matrix:
+        """Gera vetores esparsos (CSR) para lista de textos."""
         if not self._fitted:
-            # Se nao treinado, treinar com os proprios textos
             self.fit(texts)
 
-        vectors = self.vectorizer.transform(texts).toarray()
-        return vectors.tolist()
+        # Vocabulario carregado do disco: montar o vetorizador sklearn so quando usado
+        if not self._vectorizer_ready:
+            self.vectorizer = self._new_vectorizer()
+            self.vectorizer.vocabulary_ = dict(self.vocabulary.items())
+            self.vectorizer.idf_ = np.asarray(self.idf)
+            self._vectorizer_ready = True
+
+        return self.vectorizer.transform(texts).tocsr()
+
+    def set_vocabulary(self, vocabulary: Mapping[str, int], idf: np.ndarray) -> None:
+        """
+        Define um estado ja treinado (ex.: carregado do indice em disco).
+
+        Args:
+            vocabulary: termo -> coluna (dict ou TermTable)
+            idf: idf de cada coluna
+        """
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self._vectorizer_ready = False
+        self._fitted = True
+
+    def count_terms(self, texts: List[str], vocabulary: Dict[str, int]) -> csr_matrix:
+        """
+        Contagem de termos (unigramas + bigramas) por texto.
+
+        O vocabulario so cresce: termos novos recebem o proximo id, entao
+        contagens geradas em momentos diferentes continuam compativeis.
+
+        Args:
+            texts: Textos (chunks)
+            vocabulary: termo -> id (atualizado com os termos novos)
+
+        Returns:
+            Matriz CSR (textos x len(vocabulary)) com as contagens
+        """
+        analyzer = self._analyzer
+
+        indptr = [0]
+        indices: List[int] = []
+        data: List[int] = []
+        for text in texts:
+            counts: Dict[int, int] = {}
+            for token in analyzer(text):
+                term = vocabulary.setdefault(token, len(vocabulary))
+                counts[term] = counts.get(term, 0) + 1
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+
+        return csr_matrix(
+            (np.asarray(data, dtype=np.int32), np.asarray(indices, dtype=np.int32), indptr),
+            shape=(len(texts), len(vocabulary))
+        )
+
+    def fit_counts(self, counts: csr_matrix, vocabulary: Dict[str, int]) -> csr_matrix:
+        """
+        Treina o TF-IDF a partir de contagens (sem re-tokenizar os textos).
+
+        Equivale a fit + transform nos textos originais: seleciona os
+        max_features termos mais frequentes, idf suavizado do sklearn e
+        normalizacao L2. Empates de frequencia no corte saem em ordem
+        alfabetica; o sklearn desempata com argsort nao estavel, entao o
+        vocabulario pode diferir nos termos empatados no limite.
+
+        Args:
+            counts: Contagens (chunks x termos) de count_terms()
+            vocabulary: termo -> id (colunas de counts)
+
+        Returns:
+            Vetores TF-IDF esparsos (CSR, float32)
+        """
+        counts = counts.tocsr()
+        totals = np.asarray(counts.sum(axis=0)).ravel()
+
+        # Termos presentes no corpus (o vocabulario pode ter termos de arquivos removidos)
+        selected = np.flatnonzero(totals > 0)
+
+        terms = np.empty(len(vocabulary), dtype=object)
+        terms[list(vocabulary.values())] = list(vocabulary.keys())
+
+        if self.max_features and len(selected) > self.max_features:
+            # Mais frequentes primeiro; empates por termo (nao por ordem de insercao)
+            top = np.lexsort((terms[selected].astype(str), -totals[selected]))[:self.max_features]
+            selected = np.sort(selected[top])
+
+        sub = counts[:, selected].astype(np.float32)
+        df = np.diff(sub.tocsc().indptr)
+        n_docs = sub.shape[0]
+        idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+
+        self.set_vocabulary({terms[col]: j for j, col in enumerate(selected)}, idf)
+
+        logger.info(f"TF-IDF treinado com {n_docs} documentos ({self.dimension} termos)")
+        return normalize(sub @ diags(idf), norm="l2", copy=False).astype(np.float32).tocsr()
+
+    def query_terms(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vetoriza uma query direto para (ids dos termos, pesos).
+
+        Mesmo resultado de transform([text]) sem o custo do sklearn
+        para um unico texto curto.
+        """
+        if not self._fitted:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        counts = {}
+        for token in self._analyzer(text):
+            term = self.vocabulary.get(token)
+            if term is not None:
+                counts[term] = counts.get(term, 0) + 1
+
+        terms = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self.idf[terms]
+
+        norm = np.linalg.norm(weights)
+        if norm > 0:
+            weights /= norm
+
+        return terms, weights
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Gera embeddings densos para lista de textos (interface LangChain)."""
+        return self.transform(texts).toarray().tolist()
 
     def embed_query(self, text: str) -> List[float]:
-        """Gera embedding para uma query."""
+        """
+        Gera embedding denso para uma query (interface LangChain).
+
+        Sem treino retorna um vetor zerado com max_features posicoes (mesmo
+        formato de antes do treino existir).
+        """
         if not self._fitted:
-            logger.warning("Vetorizador nao treinado. Retornando vetor vazio.")
-            return [0.0] * 1000
+            logger.warning("Vetorizador nao treinado. Retornando vetor zerado.")
+            return [0.0] * (self.max_features or 0)
 
-        vector = self.vectorizer.transform([text]).toarray()[0]
-        return vector.tolist()
+        return self.transform([text]).toarray()[0].tolist()
 
 
 _embeddings_instance: Optional[TfidfEmbeddings] = None
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Manifesto do Indice RAG (reconstrucao incremental)
+
+Guarda, por arquivo indexado: hash do conteudo -> segmento -> chunks.
+Na reconstrucao so os arquivos novos/alterados sao lidos, divididos em
+chunks e contados; arquivos removidos saem do manifesto.
+
+Arquivos (em src/data/rag_index/):
+- manifest.json: caminho -> hash, tamanho, mtime, segmento, ids dos chunks
+- segments/<caminho>_<hash>.npz: chunks, contagens de termos e assinaturas
+  MinHash de um arquivo
+- vocab_tfidf.txt / vocab_bm25.txt: vocabularios (so crescem, um termo por linha)
+
+Os segmentos guardam contagens brutas (nao pesos): idf e selecao de
+termos sao recalculados a partir delas, sem re-tokenizar o corpus.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .dedup import minhash_signatures
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(data: bytes) -> str:
+    """Hash (sha1) do conteudo de um arquivo."""
+    return hashlib.sha1(data).hexdigest()
+
+
+class IndexManifest:
+    """
+    Estado incremental do indice RAG.
+
+    Metodos principais:
+    - load() / save(): Le e grava manifesto e vocabularios
+    - is_unchanged(): Arquivo igual ao indexado (tamanho + mtime)
+    - write_segment() / read_segment(): Chunks e contagens de um arquivo
+    - reset(): Apaga o estado (proxima reconstrucao e completa)
+    """
+
+    def __init__(self, index_path: Path):
+        self.index_path = Path(index_path)
+        self.segments_dir = self.index_path / "segments"
+        self.manifest_path = self.index_path / "manifest.json"
+
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.vocab_tfidf: Dict[str, int] = {}
+        self.vocab_bm25: Dict[str, int] = {}
+        self._saved_sizes = {"tfidf": 0, "bm25": 0}
+
+    def _vocab_path(self, name: str) -> Path:
+        return self.index_path / f"vocab_{name}.txt"
+
+    # -------------------------------------------------------------------------
+    # Persistencia
+    # -------------------------------------------------------------------------
+
+    def load(self) -> bool:
+        """
+        Carrega manifesto e vocabularios.
+
+        Returns:
+            True se havia manifesto
+        """
+        if not self.manifest_path.exists():
+            return False
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != MANIFEST_VERSION:
+            logger.warning("Manifesto RAG de outra versao; reconstrucao completa")
+            return False
+
+        self.entries = data.get("files", {})
+        self.vocab_tfidf = self._read_vocab("tfidf")
+        self.vocab_bm25 = self._read_vocab("bm25")
+        self._saved_sizes = {"tfidf": len(self.vocab_tfidf), "bm25": len(self.vocab_bm25)}
+        return True
+
+    def _read_vocab(self, name: str) -> Dict[str, int]:
+        """Le um vocabulario (linha = id); descarta linha final incompleta."""
+        path = self._vocab_path(name)
+        if not path.exists():
+            return {}
+
+        raw = path.read_bytes()
+        complete = raw.rfind(b"\n") + 1
+        if complete < len(raw):
+            # Escrita interrompida: a linha parcial nunca chegou ao manifesto
+            with open(path, "r+b") as f:
+                f.truncate(complete)
+
+        terms = raw[:complete].decode("utf-8").split("\n")[:-1]
+        return {term: i for i, term in enumerate(terms)}
+
+    def _append_vocab(self, name: str, vocabulary: Dict[str, int]) -> None:
+        """Acrescenta ao arquivo apenas os termos novos."""
+        start = self._saved_sizes[name]
+        if len(vocabulary) == start:
+            return
+
+        new_terms = list(vocabulary.keys())[start:]
+        with open(self._vocab_path(name), "a", encoding="utf-8", newline="\n") as f:
+            f.write("\n".join(new_terms) + "\n")
+        self._saved_sizes[name] = len(vocabulary)
+
+    def save(self) -> None:
+        """
+        Grava vocabularios (append) e manifesto (atomico).
+
+        Ordem: segmentos -> vocabularios -> manifesto. Um manifesto gravado
+        so referencia segmentos e termos ja persistidos.
+        """
+        self.index_path.mkdir(parents=True, exist_ok=True)
+        self._append_vocab("tfidf", self.vocab_tfidf)
+        self._append_vocab("bm25", self.vocab_bm25)
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "updated_at": datetime.now().isoformat(),
+            "files": self.entries,
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def reset(self) -> None:
+        """Apaga manifesto, segmentos e vocabularios."""
+        shutil.rmtree(self.segments_dir, ignore_errors=True)
+        for path in (self.manifest_path, self._vocab_path("tfidf"), self._vocab_path("bm25")):
+            if path.exists():
+                path.unlink()
+
+        self.entries = {}
+        self.vocab_tfidf = {}
+        self.vocab_bm25 = {}
+        self._saved_sizes = {"tfidf": 0, "bm25": 0}
+
+    # -------------------------------------------------------------------------
+    # Arquivos e segmentos
+    # -------------------------------------------------------------------------
+
+    def is_unchanged(self, rel_path: str, stat: os.stat_result) -> bool:
+        """True se tamanho e mtime batem com os do arquivo indexado."""
+        entry = self.entries.get(rel_path)
+        return (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and (self.segments_dir / entry["segment"]).exists()
+        )
+
+    def write_segment(
+        self,
+        rel_path: str,
+        file_hash: str,
+        texts: List[str],
+        tfidf_counts: csr_matrix,
+        bm25_counts: csr_matrix,
+        signatures: np.ndarray
+    ) -> str:
+        """
+        Grava chunks e contagens de um arquivo.
+
+        O nome inclui o hash do conteudo: a versao anterior continua valida
+        ate o novo manifesto ser gravado.
+
+        Returns:
+            Nome do segmento
+        """
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{content_hash(rel_path.encode('utf-8'))[:12]}_{file_hash[:12]}.npz"
+
+        arrays = {"texts": np.array(texts, dtype=str), "minhash": signatures}
+        for prefix, counts in (("tfidf", tfidf_counts), ("bm25", bm25_counts)):
+            arrays[f"{prefix}_indptr"] = counts.indptr.astype(np.int64)
+            arrays[f"{prefix}_indices"] = counts.indices.astype(np.int32)
+            arrays[f"{prefix}_data"] = counts.data.astype(np.int32)
+
+        tmp_path = self.segments_dir / f"{name}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self.segments_dir / name)
+
+        return name
+
+    def read_segment(self, name: str) -> Tuple[List[str], csr_matrix, csr_matrix, np.ndarray]:
+        """
+        Le um segmento com as contagens no tamanho atual dos vocabularios.
+
+        Returns:
+            Tupla (textos dos chunks, contagens TF-IDF, contagens BM25, assinaturas MinHash)
+        """
+        with np.load(self.segments_dir / name, allow_pickle=False) as data:
+            texts = data["texts"].tolist()
+            counts = []
+            for prefix, vocabulary in (("tfidf", self.vocab_tfidf), ("bm25", self.vocab_bm25)):
+                counts.append(csr_matrix(
+                    (data[f"{prefix}_data"], data[f"{prefix}_indices"], data[f"{prefix}_indptr"]),
+                    shape=(len(texts), len(vocabulary))
+                ))
+
+            # Segmentos gravados antes da deduplicacao nao tem assinaturas
+            signatures = data["minhash"] if "minhash" in data.files else minhash_signatures(texts)
+
+        return texts, counts[0], counts[1], signatures
+
+    def remove_segments(self, names: List[str]) -> None:
+        """Apaga segmentos que sairam do manifesto."""
+        for name in names:
+            path = self.segments_dir / name
+            if path.exists():
+                path.unlink()
+
+    def get_file(self, rel_path: str) -> Optional[Dict[str, Any]]:
+        """Entrada do manifesto de um arquivo (None se nao indexado)."""
+        return self.entries.get(rel_path)
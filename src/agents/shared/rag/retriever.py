@@ -7,13 +7,16 @@ informacoes na documentacao do projeto.
 """
 
 import logging
+import os
 from typing import List, Optional, Dict, Any
 from functools import lru_cache
 
 from langchain_core.documents import Document
 from langchain_core.tools import tool
 
-from .vectorstore import DocumentStore
+from .vectorstore import DocumentStore, DEFAULT_SCORER, INDEX_DIR
+from .storage import META_FILE
+from ..tools.cache import cached_tool
 
 logger = logging.getLogger(__name__)
 
@@ -29,16 +32,19 @@ class DocumentRetriever:
         retriever = DocumentRetriever()
         contexto = retriever.get_context("como consultar estoque")
         # contexto eh uma string formatada com os documentos relevantes
+
+        retriever = DocumentRetriever(scorer="bm25")  # ranking BM25
     """
 
-    def __init__(self, auto_build: bool = True):
+    def __init__(self, auto_build: bool = True, scorer: Optional[str] = None):
         """
         Inicializa o retriever.
 
         Args:
             auto_build: Se True, constroi o indice se nao existir
+            scorer: Ranking 'tfidf' ou 'bm25' (None = RAG_SCORER do .env ou tfidf)
         """
-        self.store = DocumentStore()
+        self.store = DocumentStore(scorer=scorer or os.getenv("RAG_SCORER", DEFAULT_SCORER))
 
         # Tentar carregar indice existente
         if not self.store.load_index():
@@ -60,18 +66,16 @@ class DocumentRetriever:
         Args:
             query: Texto de busca
             k: Numero maximo de resultados
-            min_score: Score minimo (0.0 a 1.0, maior = mais similar)
+            min_score: Score minimo (maior = mais similar; cosseno 0-1 no tfidf, sem teto no bm25)
 
         Returns:
             Lista de documentos relevantes
         """
         results = self.store.search_with_scores(query, k=k)
 
-        # Filtrar por score minimo (FAISS retorna distancia, menor = melhor)
-        # Convertemos para score: score = 1 / (1 + distancia)
+        # Filtrar por score minimo (store retorna similaridade, maior = melhor)
         filtered = []
-        for doc, distance in results:
-            score = 1 / (1 + distance)
+        for doc, score in results:
             if score >= min_score:
                 doc.metadata["relevance_score"] = round(score, 3)
                 filtered.append(doc)
@@ -147,7 +151,11 @@ class DocumentRetriever:
 
     def rebuild_index(self) -> int:
         """Reconstroi o indice do zero."""
-        return self.store.build_index(force=True)
+        return self.store.build_index(force=True, incremental=False)
+
+    def refresh_index(self) -> Dict[str, Any]:
+        """Atualiza o indice so com os arquivos novos/alterados/removidos."""
+        return self.store.update_index()
 
 
 def get_retriever() -> DocumentRetriever:
@@ -158,11 +166,20 @@ def get_retriever() -> DocumentRetriever:
     return _retriever_instance
 
 
+def get_index_version() -> int:
+    """Versao do indice RAG (mtime do index.json, gravado a cada reconstrucao)."""
+    try:
+        return (INDEX_DIR / META_FILE).stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
 # =============================================================================
 # TOOL PARA OS AGENTES
 # =============================================================================
 
 @tool
+@cached_tool(version=get_index_version)
 def search_documentation(query: str) -> str:
     """
     Busca informacoes na documentacao do projeto.
@@ -181,7 +198,9 @@ def search_documentation(query: str) -> str:
     Returns:
         Contexto relevante da documentacao do projeto
     """
-    retriever = get_retriever()
+    from ..services import get_service
+
+    retriever = get_service("retriever")
     return retriever.get_context(query, k=5)
 
 
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Formato em Disco do Indice RAG (sem pickle, mapeado em memoria)
+
+Todos os arquivos sao abertos com mmap: carregar o indice so abre
+arquivos (milissegundos) e processos diferentes (chat_ia.py, MCP,
+retriever) compartilham as mesmas paginas do sistema operacional.
+
+- *.npy: arrays (postings TF-IDF/BM25, idf, tamanhos), np.load(mmap_mode="r")
+- chunks.jsonl + chunks_offsets.npy: texto e metadados de cada chunk,
+  lidos sob demanda pela posicao
+- terms_<nome>.bin + terms_<nome>_offsets.npy + terms_<nome>_ids.npy:
+  vocabulario ordenado (UTF-8) com busca binaria
+- index.json: versao e tamanhos (gravado por ultimo)
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from langchain_core.documents import Document
+
+INDEX_FORMAT_VERSION = 1
+META_FILE = "index.json"
+
+
+class Postings(NamedTuple):
+    """Listas invertidas em formato CSC (uma lista de chunks por termo)."""
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+
+
+def save_array(path: Path, array: np.ndarray) -> None:
+    """Grava um array .npy (atomico)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def load_array(path: Path) -> np.ndarray:
+    """Abre um array .npy mapeado em memoria (somente leitura)."""
+    return np.load(path, mmap_mode="r", allow_pickle=False)
+
+
+def _open_blob(path: Path) -> np.ndarray:
+    """Mapeia um arquivo binario (vazio = array vazio; mmap nao aceita tamanho 0)."""
+    if path.stat().st_size == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def _write_blob(path: Path, records: List[bytes]) -> np.ndarray:
+    """Grava registros concatenados e retorna os offsets (n + 1)."""
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for i, record in enumerate(records):
+            f.write(record)
+            offsets[i + 1] = offsets[i] + len(record)
+    os.replace(tmp_path, path)
+    return offsets
+
+
+class ChunkTable:
+    """
+    Texto e metadados dos chunks, lidos sob demanda.
+
+    Sequencia somente leitura de Document: table[i] le apenas o
+    registro i do arquivo mapeado.
+    """
+
+    def __init__(self, path: Path, name: str = "chunks"):
+        self._blob = _open_blob(path / f"{name}.jsonl")
+        self._offsets = load_array(path / f"{name}_offsets.npy")
+
+    @staticmethod
+    def write(path: Path, documents: List[Document], name: str = "chunks") -> None:
+        """Grava os chunks (um JSON por linha) e seus offsets."""
+        records = [
+            (json.dumps(
+                {"page_content": doc.page_content, "metadata": doc.metadata},
+                ensure_ascii=False
+            ) + "\n").encode("utf-8")
+            for doc in documents
+        ]
+        offsets = _write_blob(path / f"{name}.jsonl", records)
+        save_array(path / f"{name}_offsets.npy", offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> Document:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        record = json.loads(self._blob[self._offsets[i]:self._offsets[i + 1]].tobytes())
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def __iter__(self) -> Iterator[Document]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class TermTable:
+    """
+    Vocabulario compacto (termo -> id) com busca binaria.
+
+    Termos ordenados pelos bytes UTF-8 em um unico arquivo; substitui o
+    dict do vocabulario sem precisar montar o dict no carregamento.
+    """
+
+    def __init__(self, path: Path, name: str):
+        self._blob = _open_blob(path / f"terms_{name}.bin")
+        self._offsets = load_array(path / f"terms_{name}_offsets.npy")
+        self._ids = load_array(path / f"terms_{name}_ids.npy")
+
+    @staticmethod
+    def write(path: Path, name: str, vocabulary: Dict[str, int], keep: Optional[np.ndarray] = None) -> None:
+        """
+        Grava o vocabulario ordenado.
+
+        Args:
+            path: Diretorio do indice
+            name: Nome da tabela (tfidf, bm25)
+            vocabulary: termo -> id
+            keep: Mascara por id dos termos a gravar (None = todos)
+        """
+        items = sorted(
+            (term.encode("utf-8"), term_id) for term, term_id in vocabulary.items()
+            if keep is None or keep[term_id]
+        )
+        offsets = _write_blob(path / f"terms_{name}.bin", [term for term, _ in items])
+        save_array(path / f"terms_{name}_offsets.npy", offsets)
+        save_array(path / f"terms_{name}_ids.npy", np.array([i for _, i in items], dtype=np.int64))
+
+    def _term(self, pos: int) -> bytes:
+        return self._blob[self._offsets[pos]:self._offsets[pos + 1]].tobytes()
+
+    def get(self, term: str, default: Optional[int] = None) -> Optional[int]:
+        """Id do termo (default se ausente)."""
+        key = term.encode("utf-8")
+        lo, hi = 0, len(self._ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < len(self._ids) and self._term(lo) == key:
+            return int(self._ids[lo])
+        return default
+
+    def __contains__(self, term: str) -> bool:
+        return self.get(term) is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        for pos in range(len(self._ids)):
+            yield self._term(pos).decode("utf-8"), int(self._ids[pos])
+
+
+def write_meta(path: Path, meta: Dict[str, Any]) -> None:
+    """Grava index.json (marca o indice como completo)."""
+    tmp_path = path / f"{META_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_FORMAT_VERSION, **meta}, f, indent=2)
+    os.replace(tmp_path, path / META_FILE)
+
+
+def read_meta(path: Path) -> Optional[Dict[str, Any]]:
+    """Le index.json (None se ausente ou de outra versao)."""
+    meta_path = path / META_FILE
+    if not meta_path.exists():
+        return None
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta if meta.get("version") == INDEX_FORMAT_VERSION else None
@@ -4,19 +4,44 @@ Vector Store Simples para RAG
 
 Usa TF-IDF + Cosine Similarity para busca.
 Funciona 100% offline, sem dependencias externas.
+
+Vetores ficam em matriz esparsa (CSR) e a busca percorre apenas as
+listas invertidas (postings) dos termos da query, com selecao
+parcial do top-k.
+
+Dois rankings disponiveis (ambos construidos no build_index):
+- "tfidf": TF-IDF + cosseno (padrao)
+- "bm25": BM25 com tokenizador de identificadores Sankhya
+
+Reconstrucao incremental (update_index): um manifesto guarda o hash de
+cada arquivo; so arquivos novos/alterados sao re-lidos e contados.
+
+Indice em disco sem pickle e mapeado em memoria (ver storage.py):
+load_index() so abre os arquivos.
+
+Cada arquivo e indexado uma vez (caminho canonico) e chunks quase
+iguais sao descartados (MinHash, ver dedup.py).
 """
 
 import logging
+import os
 import pickle
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Tuple
 
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import csr_matrix, issparse, vstack
 
 from langchain_core.documents import Document
 
 from .embeddings import get_embeddings, TfidfEmbeddings
+from .bm25 import BM25Index, count_terms
+from .manifest import IndexManifest, content_hash
+from .dedup import minhash_signatures, find_duplicates
+from .storage import (
+    ChunkTable, TermTable, Postings,
+    save_array, load_array, write_meta, read_meta,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,10 +51,17 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent.parent.parent
 # Diretorio para salvar o indice
 INDEX_DIR = PROJECT_ROOT / "src" / "data" / "rag_index"
 
+# Formato antigo (pickle), convertido no primeiro load_index()
+LEGACY_INDEX_FILE = "index.pkl"
+
 # Configuracoes de chunking
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
 
+# Rankings disponiveis
+SCORERS = ("tfidf", "bm25")
+DEFAULT_SCORER = "tfidf"
+
 
 def simple_text_splitter(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
     """Divide texto em chunks simples."""
@@ -66,6 +98,7 @@ class DocumentStore:
     Uso:
         store = DocumentStore()
         store.build_index()  # Primeira vez
+        store.update_index()  # Apos novos relatorios/docs (so o que mudou)
         docs = store.search("como consultar estoque")
     """
 
@@ -113,16 +146,37 @@ class DocumentStore:
         {"path": "output/reports", "glob": "*.md", "desc": "Relatorios MD gerados"},
     ]
 
-    def __init__(self, index_path: Optional[Path] = None):
-        """Inicializa o DocumentStore."""
+    def __init__(self, index_path: Optional[Path] = None, scorer: str = DEFAULT_SCORER):
+        """
+        Inicializa o DocumentStore.
+
+        Args:
+            index_path: Diretorio do indice (None = src/data/rag_index)
+            scorer: Ranking padrao da busca ('tfidf' ou 'bm25')
+        """
+        if scorer not in SCORERS:
+            raise ValueError(f"Scorer '{scorer}' invalido. Use: {SCORERS}")
+
         self.index_path = index_path or INDEX_DIR
+        self.scorer = scorer
         self.embeddings: TfidfEmbeddings = get_embeddings()
         self.documents: List[Document] = []
-        self.vectors: Optional[np.ndarray] = None
+        self._postings: Optional[Postings] = None
+        self.bm25: Optional[BM25Index] = None
+
+    def _scan_files(self) -> List[Tuple[str, Path, str]]:
+        """
+        Lista os arquivos de todas as fontes configuradas, cada um uma unica vez.
 
-    def _load_documents(self) -> List[Document]:
-        """Carrega todos os documentos das fontes configuradas."""
-        all_docs = []
+        Fontes se sobrepoem (queries com **/*.sql e queries/compras,
+        docs/de-para e docs/de-para/sankhya): o caminho e canonizado
+        (resolve) e o arquivo fica com a fonte mais especifica.
+
+        Returns:
+            Lista de (descricao da fonte, arquivo, caminho relativo ao projeto)
+        """
+        root = PROJECT_ROOT.resolve()
+        found: Dict[Path, Tuple[int, str, Path]] = {}
 
         for source in self.DOCUMENT_SOURCES:
             source_path = PROJECT_ROOT / source["path"]
@@ -134,8 +188,6 @@ class DocumentStore:
             glob_pattern = source["glob"]
             desc = source["desc"]
 
-            logger.info(f"Carregando {desc} de {source_path}")
-
             try:
                 # Buscar arquivos
                 files = list(source_path.glob(glob_pattern.replace("**/", "")))
@@ -146,155 +198,415 @@ class DocumentStore:
                         if subdir.is_dir():
                             files.extend(subdir.glob(glob_pattern.split("/")[-1]))
 
+                depth = len(Path(source["path"]).parts)
                 for file_path in files:
-                    if file_path.is_file():
-                        try:
-                            content = file_path.read_text(encoding="utf-8")
-
-                            # Dividir em chunks
-                            chunks = simple_text_splitter(content)
-
-                            for i, chunk in enumerate(chunks):
-                                doc = Document(
-                                    page_content=chunk,
-                                    metadata={
-                                        "source_type": desc,
-                                        "file_name": file_path.name,
-                                        "file_path": str(file_path.relative_to(PROJECT_ROOT)),
-                                        "chunk_index": i
-                                    }
-                                )
-                                all_docs.append(doc)
-
-                            logger.debug(f"  {file_path.name}: {len(chunks)} chunks")
-
-                        except Exception as e:
-                            logger.warning(f"  Erro ao carregar {file_path}: {e}")
+                    if not file_path.is_file():
+                        continue
+                    canonical = file_path.resolve()
+                    current = found.get(canonical)
+                    if current is None or depth > current[0]:
+                        found[canonical] = (depth, desc, file_path)
 
             except Exception as e:
                 logger.error(f"Erro ao processar {source_path}: {e}")
 
-        logger.info(f"Total de documentos/chunks carregados: {len(all_docs)}")
-        return all_docs
+        return [
+            (desc, file_path, os.path.relpath(canonical, root).replace(os.sep, "/"))
+            for canonical, (_, desc, file_path) in found.items()
+        ]
 
-    def build_index(self, force: bool = False) -> int:
+    def build_index(self, force: bool = False, incremental: bool = True) -> int:
         """
         Constroi o indice a partir dos documentos.
 
         Args:
             force: Se True, reconstroi mesmo se ja existir
+            incremental: Reaproveitar arquivos inalterados (False = do zero)
 
         Returns:
             Numero de chunks indexados
         """
         # Verificar se ja existe
-        if not force and (self.index_path / "index.pkl").exists():
+        if not force and self.has_index():
             logger.info("Indice ja existe. Use force=True para reconstruir.")
             self.load_index()
             return len(self.documents)
 
-        logger.info("Construindo indice RAG...")
+        if not incremental:
+            IndexManifest(self.index_path).reset()
 
-        # Carregar documentos
-        self.documents = self._load_documents()
+        self.update_index()
+        return len(self.documents)
+
+    def update_index(self) -> Dict[str, Any]:
+        """
+        Atualiza o indice apenas com os arquivos novos, alterados ou removidos.
+
+        Arquivos com mesmo tamanho/mtime (ou mesmo hash) reaproveitam o
+        segmento salvo; TF-IDF e BM25 sao recalculados a partir das
+        contagens, sem re-tokenizar o corpus.
+
+        Returns:
+            Dict com arquivos adicionados/alterados/removidos/inalterados
+        """
+        logger.info("Atualizando indice RAG...")
+
+        manifest = IndexManifest(self.index_path)
+        manifest.load()
+
+        files = self._scan_files()
+        stats = {"adicionados": 0, "alterados": 0, "removidos": 0, "inalterados": 0}
 
-        if not self.documents:
+        entries: Dict[str, Dict[str, Any]] = {}
+        segments: Dict[str, Tuple[List[str], csr_matrix, csr_matrix, np.ndarray]] = {}
+
+        for _, file_path, rel_path in files:
+            try:
+                stat = file_path.stat()
+                old = manifest.get_file(rel_path)
+
+                if manifest.is_unchanged(rel_path, stat):
+                    entries[rel_path] = dict(old, chunk_ids=[])
+                    stats["inalterados"] += 1
+                    continue
+
+                raw = file_path.read_bytes()
+                file_hash = content_hash(raw)
+
+                # Tocado, mas com o mesmo conteudo
+                if (
+                    old is not None
+                    and old["hash"] == file_hash
+                    and (manifest.segments_dir / old["segment"]).exists()
+                ):
+                    entries[rel_path] = dict(old, size=stat.st_size, mtime_ns=stat.st_mtime_ns, chunk_ids=[])
+                    stats["inalterados"] += 1
+                    continue
+
+                # Dividir em chunks, contar termos e assinar (unica etapa que le o texto)
+                texts = simple_text_splitter(raw.decode("utf-8"))
+                tfidf_counts = self.embeddings.count_terms(texts, manifest.vocab_tfidf)
+                bm25_counts = count_terms(texts, manifest.vocab_bm25)
+                signatures = minhash_signatures(texts)
+
+                segment = manifest.write_segment(
+                    rel_path, file_hash, texts, tfidf_counts, bm25_counts, signatures
+                )
+                segments[rel_path] = (texts, tfidf_counts, bm25_counts, signatures)
+                entries[rel_path] = {
+                    "hash": file_hash,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "segment": segment,
+                    "n_chunks": len(texts),
+                    "chunk_ids": [],
+                }
+                stats["alterados" if old is not None else "adicionados"] += 1
+                logger.debug(f"  {file_path.name}: {len(texts)} chunks")
+
+            except Exception as e:
+                logger.warning(f"  Erro ao carregar {file_path}: {e}")
+
+        removed = [p for p in manifest.entries if p not in entries]
+        stats["removidos"] = len(removed)
+
+        changed = stats["adicionados"] + stats["alterados"] + stats["removidos"]
+        if changed == 0 and read_meta(self.index_path) is not None:
+            logger.info("Indice RAG ja atualizado")
+            if self._postings is None:
+                self.load_index()
+            return {**stats, "total_chunks": len(self.documents)}
+
+        stats["chunks_duplicados"] = self._compile(files, entries, segments, manifest)
+
+        # Segmentos substituidos ou de arquivos removidos (apos o novo manifesto)
+        obsolete = [
+            e["segment"] for p, e in manifest.entries.items()
+            if p not in entries or entries[p]["segment"] != e["segment"]
+        ]
+        manifest.entries = entries
+        manifest.save()
+        manifest.remove_segments(obsolete)
+
+        logger.info(
+            f"Indice RAG atualizado: {stats['adicionados']} novos, {stats['alterados']} alterados, "
+            f"{stats['removidos']} removidos, {stats['inalterados']} inalterados"
+        )
+        return {**stats, "total_chunks": len(self.documents)}
+
+    def _compile(
+        self,
+        files: List[Tuple[str, Path, str]],
+        entries: Dict[str, Dict[str, Any]],
+        segments: Dict[str, Tuple[List[str], csr_matrix, csr_matrix, np.ndarray]],
+        manifest: IndexManifest
+    ) -> int:
+        """
+        Monta documentos, TF-IDF e BM25 a partir dos segmentos e salva o indice.
+
+        Chunks quase iguais a um chunk anterior (MinHash) sao indexados uma vez.
+
+        Returns:
+            Numero de chunks descartados como duplicados
+        """
+        chunk_files = []
+        texts: List[str] = []
+        tfidf_rows = []
+        bm25_rows = []
+        signatures = []
+
+        n_tfidf = len(manifest.vocab_tfidf)
+        n_bm25 = len(manifest.vocab_bm25)
+
+        for desc, file_path, rel_path in files:
+            entry = entries.get(rel_path)
+            if entry is None:
+                continue
+
+            if rel_path not in segments:
+                segments[rel_path] = manifest.read_segment(entry["segment"])
+            file_texts, tfidf_counts, bm25_counts, file_signatures = segments[rel_path]
+
+            chunk_files.extend((desc, file_path.name, rel_path, i) for i in range(len(file_texts)))
+            texts.extend(file_texts)
+            signatures.append(file_signatures)
+
+            # Contagens no tamanho final dos vocabularios
+            tfidf_rows.append(csr_matrix(tfidf_counts, shape=(len(file_texts), n_tfidf)))
+            bm25_rows.append(csr_matrix(bm25_counts, shape=(len(file_texts), n_bm25)))
+
+        # Duplicados: mantem o primeiro (ordem das fontes)
+        if texts:
+            keep = find_duplicates(np.concatenate(signatures)) < 0
+        else:
+            keep = np.zeros(0, dtype=bool)
+        n_duplicates = int((~keep).sum())
+
+        documents: List[Document] = []
+        for pos in np.flatnonzero(keep):
+            desc, file_name, rel_path, i = chunk_files[pos]
+            entries[rel_path]["chunk_ids"].append(len(documents))
+            documents.append(Document(
+                page_content=texts[pos],
+                metadata={
+                    "source_type": desc,
+                    "file_name": file_name,
+                    "file_path": rel_path,
+                    "chunk_index": i
+                }
+            ))
+
+        self.documents = documents
+        logger.info(f"Total de documentos/chunks: {len(documents)} ({n_duplicates} duplicados descartados)")
+
+        if not documents:
             logger.warning("Nenhum documento encontrado para indexar!")
-            return 0
-
-        # Criar embeddings
-        logger.info(f"Criando embeddings para {len(self.documents)} chunks...")
-        texts = [doc.page_content for doc in self.documents]
-
-        # Treinar o vetorizador e obter vetores
-        self.embeddings.fit(texts)
-        self.vectors = np.array(self.embeddings.embed_documents(texts))
-
-        # Salvar indice
-        self.index_path.mkdir(parents=True, exist_ok=True)
-        with open(self.index_path / "index.pkl", "wb") as f:
-            pickle.dump({
-                "documents": self.documents,
-                "vectors": self.vectors,
-                "vectorizer": self.embeddings.vectorizer
-            }, f)
-
-        logger.info(f"Indice salvo em: {self.index_path}")
-        return len(self.documents)
+            self._postings = None
+            self.bm25 = None
+            return n_duplicates
+
+        tfidf_counts = vstack(tfidf_rows, format="csr")[keep]
+        bm25_counts = vstack(bm25_rows, format="csr")[keep]
+
+        vectors = self.embeddings.fit_counts(tfidf_counts, manifest.vocab_tfidf)
+        self._set_postings(vectors)
+        self.bm25 = BM25Index().fit_counts(bm25_counts, manifest.vocab_bm25)
+
+        self._save_index()
+        return n_duplicates
+
+    def _save_index(self) -> None:
+        """Grava o indice em arrays mapeaveis (sem pickle); index.json por ultimo."""
+        path = self.index_path
+        path.mkdir(parents=True, exist_ok=True)
+
+        ChunkTable.write(path, list(self.documents))
+
+        save_array(path / "tfidf_indptr.npy", self._postings.indptr)
+        save_array(path / "tfidf_indices.npy", self._postings.indices)
+        save_array(path / "tfidf_data.npy", self._postings.data)
+        save_array(path / "tfidf_idf.npy", np.asarray(self.embeddings.idf, dtype=np.float32))
+        TermTable.write(path, "tfidf", dict(self.embeddings.vocabulary.items()))
+
+        self.bm25.save(path)
+
+        write_meta(path, {
+            "n_chunks": len(self.documents),
+            "n_terms_tfidf": self.embeddings.dimension,
+            "bm25": {"k1": self.bm25.k1, "b": self.bm25.b},
+        })
+
+        # Formato antigo (pickle) deixa de ser usado
+        legacy = path / LEGACY_INDEX_FILE
+        if legacy.exists():
+            legacy.unlink()
+
+        logger.info(f"Indice salvo em: {path}")
+
+    def has_index(self) -> bool:
+        """True se ha indice salvo (formato atual ou antigo)."""
+        return read_meta(self.index_path) is not None or (self.index_path / LEGACY_INDEX_FILE).exists()
 
     def load_index(self) -> bool:
-        """Carrega indice existente."""
-        index_file = self.index_path / "index.pkl"
+        """
+        Abre o indice salvo.
 
-        if not index_file.exists():
-            logger.warning(f"Indice nao encontrado em: {index_file}")
+        Arrays, chunks e vocabularios sao mapeados em memoria: nada e lido
+        ate a primeira busca, e so as paginas usadas sao carregadas.
+        """
+        meta = read_meta(self.index_path)
+        if meta is None:
+            if (self.index_path / LEGACY_INDEX_FILE).exists():
+                return self._load_legacy_index()
+            logger.warning(f"Indice nao encontrado em: {self.index_path}")
             return False
 
-        logger.info(f"Carregando indice de: {index_file}")
+        path = self.index_path
+        self.documents = ChunkTable(path)
+        self._postings = Postings(
+            load_array(path / "tfidf_indptr.npy"),
+            load_array(path / "tfidf_indices.npy"),
+            load_array(path / "tfidf_data.npy"),
+        )
+        self.embeddings.set_vocabulary(TermTable(path, "tfidf"), load_array(path / "tfidf_idf.npy"))
+        self.bm25 = BM25Index.load(path, **meta.get("bm25", {}))
+
+        logger.info(f"Indice carregado: {len(self.documents)} documentos")
+        return True
+
+    def _load_legacy_index(self) -> bool:
+        """Carrega index.pkl (formato antigo) e converte para o formato atual."""
+        index_file = self.index_path / LEGACY_INDEX_FILE
+        logger.info(f"Convertendo indice antigo: {index_file}")
 
         with open(index_file, "rb") as f:
             data = pickle.load(f)
 
         self.documents = data["documents"]
-        self.vectors = data["vectors"]
-        self.embeddings.vectorizer = data["vectorizer"]
-        self.embeddings._fitted = True
+        vectorizer = data["vectorizer"]
+        self.embeddings.set_vocabulary(vectorizer.vocabulary_, vectorizer.idf_.astype(np.float32))
 
-        logger.info(f"Indice carregado: {len(self.documents)} documentos")
-        return True
+        # Indices antigos guardavam matriz densa
+        vectors = data["vectors"]
+        if not issparse(vectors):
+            vectors = csr_matrix(vectors, dtype=np.float32)
+        self._set_postings(vectors)
+
+        # Indices sem BM25: construir a partir dos chunks carregados
+        self.bm25 = BM25Index.from_dict(data.get("bm25"))
+        if self.bm25 is None:
+            self.bm25 = BM25Index().fit([doc.page_content for doc in self.documents])
 
-    def search(self, query: str, k: int = 5) -> List[Document]:
+        self._save_index()
+        return self.load_index()
+
+    def search(self, query: str, k: int = 5, scorer: Optional[str] = None) -> List[Document]:
         """
         Busca documentos similares a query.
 
         Args:
             query: Texto de busca
             k: Numero de resultados
+            scorer: Ranking ('tfidf' ou 'bm25'; None = padrao do store)
 
         Returns:
-            Lista de documentos relevantes
+            Lista de documentos relevantes (copias com "relevance_score" no
+            metadata; os chunks do indice nao sao alterados)
         """
-        if self.vectors is None or len(self.documents) == 0:
+        if self._postings is None or len(self.documents) == 0:
             if not self.load_index():
                 logger.error("Indice nao disponivel. Execute build_index() primeiro.")
                 return []
 
-        # Obter embedding da query
-        query_vector = np.array([self.embeddings.embed_query(query)])
-
-        # Calcular similaridade
-        similarities = cosine_similarity(query_vector, self.vectors)[0]
+        # Pontuar apenas os chunks que compartilham termos com a query
+        if (scorer or self.scorer) == "bm25":
+            candidates, scores = self.bm25.score(query)
+        else:
+            candidates, scores = self._score(query)
 
-        # Ordenar por similaridade
-        top_indices = np.argsort(similarities)[::-1][:k]
+        # Selecao parcial do top-k (sem ordenar todos os candidatos)
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind="stable")]
 
-        # Retornar documentos com scores
+        # Copias com score: buscas simultaneas nao disputam o metadata do chunk
         results = []
-        for idx in top_indices:
-            doc = self.documents[idx]
-            doc.metadata["relevance_score"] = float(similarities[idx])
-            results.append(doc)
+        for pos in top:
+            doc = self.documents[candidates[pos]]
+            results.append(Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "relevance_score": float(scores[pos])}
+            ))
 
         return results
 
-    def search_with_scores(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+    def _set_postings(self, vectors: csr_matrix) -> None:
+        """Monta o indice invertido (CSC: uma lista de chunks por termo)."""
+        postings = vectors.tocsc()
+        postings.sort_indices()
+        self._postings = Postings(
+            postings.indptr.astype(np.int64),
+            postings.indices.astype(np.int32),
+            postings.data.astype(np.float32),
+        )
+
+    def _score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Similaridade de cosseno via postings dos termos da query.
+
+        Returns:
+            Tupla (ids dos chunks candidatos, scores)
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+
+        terms, query_weights = self.embeddings.query_terms(query)
+        if len(terms) == 0:
+            return empty
+
+        postings = self._postings
+        starts = postings.indptr[terms]
+        ends = postings.indptr[terms + 1]
+
+        rows = [postings.indices[a:b] for a, b in zip(starts, ends)]
+        weights = [postings.data[a:b] * w for a, b, w in zip(starts, ends, query_weights)]
+        if not any(len(r) for r in rows):
+            return empty
+
+        # Acumular contribuicao de cada termo por chunk candidato
+        candidates, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights))
+
+        return candidates, scores
+
+    def search_with_scores(
+        self,
+        query: str,
+        k: int = 5,
+        scorer: Optional[str] = None
+    ) -> List[Tuple[Document, float]]:
         """Busca documentos com scores."""
-        docs = self.search(query, k)
+        docs = self.search(query, k, scorer=scorer)
         return [(doc, doc.metadata.get("relevance_score", 0)) for doc in docs]
 
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estatisticas do indice."""
         return {
-            "status": "ativo" if self.vectors is not None else "nao_inicializado",
+            "status": "ativo" if self._postings is not None else "nao_inicializado",
             "total_chunks": len(self.documents) if self.documents else 0,
+            "scorer": self.scorer,
+            "vocabulario": self.embeddings.dimension,
+            "vocabulario_bm25": len(self.bm25.vocabulary) if self.bm25 is not None else 0,
+            "postings": len(self._postings.indices) if self._postings is not None else 0,
             "index_path": str(self.index_path),
         }
 
 
-def build_rag_index(force: bool = False) -> int:
+def build_rag_index(force: bool = False, incremental: bool = True) -> int:
     """Funcao de conveniencia para construir o indice."""
     store = DocumentStore()
-    return store.build_index(force=force)
+    return store.build_index(force=force, incremental=incremental)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de Servicos do Processo
+
+Instancias "quentes" compartilhadas por tools e agentes: criadas na
+primeira chamada e mantidas vivas (com seus caches) durante o processo.
+A segunda pergunta de um chat reaproveita dados do lake, modelos e
+indice ja carregados.
+
+Cada servico pode ter um "carimbo" (ex.: versao dos dados, mtime do
+indice RAG). Quando o carimbo muda, o hook de refresh do servico e
+chamado (ou a instancia e recriada na proxima chamada).
+
+Servicos padrao:
+- data_loader: AnalystDataLoader (cache de leituras do lake)
+- analista: Analista usando o data_loader compartilhado
+- predictor: DemandPredictor (cache de modelos de demanda)
+- retriever: DocumentRetriever do RAG (recarrega o indice ao reconstruir)
+- anomaly_detectors: detectores de anomalia treinados, por (dados, segmentacao)
+
+Uso:
+    from src.agents.shared.services import get_service, get_services
+
+    analista = get_service("analista")
+    get_services().refresh()            # forcar refresh de todos
+    get_services().refresh("predictor")
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ServiceSpec:
+    """Como criar, carimbar e atualizar um servico."""
+
+    factory: Callable[["ServiceRegistry"], Any]
+    stamp: Optional[Callable[[], Any]] = None
+    refresh: Optional[Callable[[Any], None]] = None
+    depends: Tuple[str, ...] = ()
+
+
+class KeyedInstances(dict):
+    """
+    Dict de instancias por chave com um lock por chave.
+
+    Quem cria a instancia de uma chave segura o lock dela; chamadas
+    simultaneas com a mesma chave esperam e reaproveitam a instancia
+    (chaves diferentes nao se bloqueiam).
+
+    Metodos principais:
+    - lock(): Lock da chave (criado no primeiro uso)
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._locks: Dict[Any, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def lock(self, key: Any) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+
+class ServiceRegistry:
+    """
+    Singletons preguicosos com refresh por carimbo.
+
+    Metodos principais:
+    - register(): Define um servico (fabrica, carimbo, hook de refresh)
+    - get(): Instancia do servico (cria na primeira chamada)
+    - stamp(): Carimbo atual de um servico
+    - refresh(): Atualiza um servico (ou todos)
+    - get_stats(): Servicos criados, criacoes e refreshes
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, ServiceSpec] = {}
+        self._instances: Dict[str, Any] = {}
+        self._stamps: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self.stats = {"created": 0, "refreshed": 0}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[["ServiceRegistry"], Any],
+        stamp: Optional[Callable[[], Any]] = None,
+        refresh: Optional[Callable[[Any], None]] = None,
+        depends: Tuple[str, ...] = ()
+    ) -> None:
+        """
+        Registra (ou substitui) um servico.
+
+        Args:
+            name: Nome do servico
+            factory: Cria a instancia; recebe o registro (para dependencias)
+            stamp: Carimbo dos dados de que o servico depende (None = nunca muda)
+            refresh: Atualiza a instancia quando o carimbo muda (None = recriar)
+            depends: Servicos usados pela instancia (verificados antes dela)
+        """
+        with self._lock:
+            self._specs[name] = ServiceSpec(factory, stamp, refresh, tuple(depends))
+            self._instances.pop(name, None)
+            self._stamps.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """
+        Retorna a instancia do servico.
+
+        Args:
+            name: Nome do servico
+
+        Returns:
+            Instancia (criada ou atualizada se o carimbo mudou)
+        """
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(f"Servico '{name}' nao registrado. Disponiveis: {sorted(self._specs)}")
+
+        # Dependencias primeiro: a instancia guarda referencias a elas
+        for dependency in spec.depends:
+            self.get(dependency)
+
+        stamp = self.stamp(name)
+
+        with self._lock:
+            if name in self._instances and self._stamps.get(name) != stamp:
+                logger.info(f"Servico {name}: dados mudaram, atualizando")
+                self._refresh(name)
+
+            if name not in self._instances:
+                logger.debug(f"Criando servico: {name}")
+                self._instances[name] = spec.factory(self)
+                self.stats["created"] += 1
+
+            self._stamps[name] = stamp
+            return self._instances[name]
+
+    def stamp(self, name: str) -> Any:
+        """Carimbo atual do servico (ex.: chave de caches que dependem dele)."""
+        spec = self._specs[name]
+        return spec.stamp() if spec.stamp else None
+
+    def _refresh(self, name: str) -> None:
+        spec = self._specs[name]
+        instance = self._instances.get(name)
+        if instance is None:
+            return
+
+        if spec.refresh is None:
+            del self._instances[name]
+        else:
+            try:
+                spec.refresh(instance)
+            except Exception as e:
+                logger.warning(f"Erro no refresh do servico {name}, recriando: {e}")
+                del self._instances[name]
+        self.stats["refreshed"] += 1
+
+    def refresh(self, name: Optional[str] = None) -> None:
+        """Atualiza um servico (None = todos os ja criados)."""
+        with self._lock:
+            for service in ([name] if name else list(self._instances)):
+                self._refresh(service)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Servicos registrados, criados e contadores."""
+        with self._lock:
+            return {
+                **self.stats,
+                "registered": sorted(self._specs),
+                "active": sorted(self._instances),
+            }
+
+
+# =============================================================================
+# SERVICOS PADRAO
+# =============================================================================
+
+def _data_stamp() -> int:
+    from src.utils.data_version import get_data_version
+    return get_data_version()
+
+
+def _models_stamp() -> tuple:
+    """
+    Versao dos dados + (quantidade, mtime mais recente) dos modelos de demanda.
+
+    O nome demand_model_{codprod}_{timestamp}.pkl ordena por produto, nao
+    por data: o retreino de qualquer produto so aparece no mtime.
+    """
+    from src.agents.scientist.config import SCIENTIST_CONFIG
+
+    models_dir = SCIENTIST_CONFIG.get("models_dir") / "demand"
+    mtimes = []
+    if models_dir.exists():
+        for path in models_dir.glob("demand_model_*.pkl"):
+            try:
+                mtimes.append(path.stat().st_mtime_ns)
+            except OSError:
+                continue
+    return _data_stamp(), len(mtimes), max(mtimes, default=0)
+
+
+def _index_stamp() -> int:
+    from .rag.retriever import get_index_version
+    return get_index_version()
+
+
+def _create_data_loader(registry: ServiceRegistry):
+    from src.agents.analyst.data_loader import AnalystDataLoader
+    return AnalystDataLoader()
+
+
+def _create_analista(registry: ServiceRegistry):
+    from src.agents.analyst import Analista
+    return Analista(loader=registry.get("data_loader"))
+
+
+def _create_predictor(registry: ServiceRegistry):
+    from src.agents.scientist.forecasting.predictor import DemandPredictor
+    return DemandPredictor(data_loader=registry.get("data_loader"))
+
+
+def _create_retriever(registry: ServiceRegistry):
+    from .rag.retriever import get_retriever
+    return get_retriever()
+
+
+def _register_defaults(registry: ServiceRegistry) -> None:
+    registry.register("data_loader", _create_data_loader, stamp=_data_stamp,
+                      refresh=lambda loader: loader.clear_cache())
+    registry.register("analista", _create_analista, depends=("data_loader",))
+    registry.register("predictor", _create_predictor, stamp=_models_stamp,
+                      refresh=lambda predictor: predictor.clear_cache(), depends=("data_loader",))
+    registry.register("retriever", _create_retriever, stamp=_index_stamp,
+                      refresh=lambda retriever: retriever.store.load_index())
+    # (data_type, segment_by) -> detector treinado; dados novos = dict novo
+    registry.register("anomaly_detectors", lambda registry: KeyedInstances(), stamp=_data_stamp)
+
+
+_registry: Optional[ServiceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_services() -> ServiceRegistry:
+    """Retorna o registro de servicos do processo (singleton)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ServiceRegistry()
+            _register_defaults(_registry)
+        return _registry
+
+
+def get_service(name: str) -> Any:
+    """Atalho para get_services().get(name)."""
+    return get_services().get(name)
@@ -1 +1,9 @@
 """Tools compartilhadas entre agentes."""
+
+from .cache import ToolResultCache, cached_tool, get_tool_cache
+
+__all__ = [
+    "ToolResultCache",
+    "cached_tool",
+    "get_tool_cache",
+]
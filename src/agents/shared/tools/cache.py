@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de Resultados das Tools do LLM
+
+Perguntas repetidas (ou reformuladas com os mesmos argumentos) na mesma
+conversa ou entre usuarios reaproveitam o resultado da tool.
+
+- Chave: nome da tool + argumentos normalizados (defaults aplicados,
+  texto sem diferenca de caixa/espacos) + versao dos dados
+- Versao dos dados: src/utils/data_version.py (incrementada a cada carga do
+  Engenheiro); nova carga = chaves novas, entradas antigas descartadas
+- LRU limitado em bytes + TTL por entrada
+- Persistencia opcional em SQLite (TOOL_CACHE_PATH), compartilhada entre processos
+- Resultados guardados como JSON (valor que nao decodifica = miss)
+- Chamadas simultaneas com a mesma chave executam a tool uma unica vez
+
+Uso:
+    @tool
+    @cached_tool(ttl=600)
+    def get_kpis(modulo: str = "vendas", periodo: str = "mes_atual"):
+        ...
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.utils.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Configuracao (.env)
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "600"))
+TOOL_CACHE_MAX_BYTES = int(float(os.getenv("TOOL_CACHE_MAX_MB", "64")) * 1024 * 1024)
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", "")  # vazio = so memoria
+
+
+def normalize_args(value: Any) -> Any:
+    """Normaliza argumentos para a chave (caixa, espacos, 30.0 == 30)."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {str(k): normalize_args(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize_args(v) for v in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    """Escalares numpy (int64, float32, bool_) viram tipos Python; o resto nao e cacheavel."""
+    item = getattr(value, "item", None)
+    if callable(item) and getattr(value, "ndim", None) == 0:
+        return item()
+    raise TypeError(f"{type(value).__name__} nao serializavel em JSON")
+
+
+def is_cacheable(result: Any) -> bool:
+    """Erros nao vao para o cache (a proxima chamada tenta de novo)."""
+    if isinstance(result, dict):
+        return result.get("success", True) is not False and "error" not in result
+    return result is not None
+
+
+class ToolResultCache:
+    """
+    Cache LRU (limitado em bytes) com TTL para resultados de tools.
+
+    Metodos principais:
+    - get_or_compute(): Resultado do cache ou executa a tool
+    - invalidate(): Remove entradas (todas ou de uma tool)
+    - get_stats(): Acertos, tamanho e entradas
+    """
+
+    def __init__(self, max_bytes: int = TOOL_CACHE_MAX_BYTES, persist_path: Optional[str] = None):
+        """
+        Args:
+            max_bytes: Tamanho maximo em memoria (resultados serializados)
+            persist_path: Arquivo SQLite para persistir entre processos (None = so memoria)
+        """
+        self.max_bytes = max_bytes
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        # chave -> (tool, expira_em, bytes serializados)
+        self._entries: "OrderedDict[str, Tuple[str, float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._versions: Dict[str, Any] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "disk_hits": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if self.persist_path:
+            self._open_db()
+
+    # -------------------------------------------------------------------------
+    # Persistencia
+    # -------------------------------------------------------------------------
+
+    def _open_db(self) -> None:
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.persist_path), timeout=5, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tool_cache ("
+            " key TEXT PRIMARY KEY, tool TEXT, version TEXT, expires_at REAL, value BLOB)"
+        )
+        self._db.execute("DELETE FROM tool_cache WHERE expires_at < ?", (time.time(),))
+        self._db.commit()
+
+    def _db_get(self, key: str) -> Optional[Tuple[str, float, bytes]]:
+        row = self._db.execute(
+            "SELECT tool, expires_at, value FROM tool_cache WHERE key = ?", (key,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def _db_set(self, key: str, tool: str, version: str, expires_at: float, value: bytes) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?, ?)",
+            (key, tool, version, expires_at, value)
+        )
+        self._db.commit()
+
+    # -------------------------------------------------------------------------
+    # Memoria (LRU em bytes)
+    # -------------------------------------------------------------------------
+
+    def _remember(self, key: str, tool: str, expires_at: float, value: bytes) -> None:
+        """Guarda em memoria e despeja as entradas menos usadas acima do limite."""
+        if len(value) > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old[2])
+
+        self._entries[key] = (tool, expires_at, value)
+        self._bytes += len(value)
+
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] >= time.time():
+                self._entries.move_to_end(key)
+                return entry[2]
+            self._entries.pop(key)
+            self._bytes -= len(entry[2])
+
+        if self._db is not None:
+            row = self._db_get(key)
+            if row is not None and row[1] >= time.time():
+                self.stats["disk_hits"] += 1
+                self._remember(key, *row)
+                return row[2]
+
+        return None
+
+    def _discard(self, key: str) -> None:
+        """Remove uma entrada (memoria e disco)."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+        if self._db is not None:
+            self._db.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _check_version(self, tool: str, version: Any) -> None:
+        """Versao nova dos dados: descarta as entradas antigas da tool."""
+        if self._versions.get(tool, version) != version:
+            self._drop(tool)
+            if self._db is not None:
+                self._db.execute(
+                    "DELETE FROM tool_cache WHERE tool = ? AND version != ?", (tool, str(version))
+                )
+                self._db.commit()
+            logger.info(f"Cache da tool {tool} invalidado (versao dos dados {version})")
+        self._versions[tool] = version
+
+    def _drop(self, tool: Optional[str]) -> None:
+        for key in [k for k, e in self._entries.items() if tool is None or e[0] == tool]:
+            self._bytes -= len(self._entries.pop(key)[2])
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def make_key(tool: str, args: Dict[str, Any], version: Any) -> str:
+        payload = json.dumps(
+            {"tool": tool, "args": args, "version": version},
+            sort_keys=True, default=str, ensure_ascii=False
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get_or_compute(
+        self,
+        tool: str,
+        args: Dict[str, Any],
+        version: Any,
+        compute: Callable[[], Any],
+        ttl: float = TOOL_CACHE_TTL
+    ) -> Any:
+        """
+        Retorna o resultado em cache ou executa compute().
+
+        Args:
+            tool: Nome da tool
+            args: Argumentos normalizados
+            version: Versao dos dados de que o resultado depende
+            compute: Funcao que executa a tool
+            ttl: Validade do resultado (segundos)
+
+        Returns:
+            Resultado da tool (copia independente do cache)
+        """
+        key = self.make_key(tool, args, version)
+
+        while True:
+            with self._lock:
+                self._check_version(tool, version)
+                cached = self._lookup(key)
+                if cached is not None:
+                    try:
+                        result = json.loads(cached)
+                    except ValueError as e:
+                        # Entrada corrompida ou de formato antigo: tratar como miss
+                        logger.debug(f"Cache de {tool} ilegivel, descartado: {e}")
+                        self._discard(key)
+                    else:
+                        self.stats["hits"] += 1
+                        return result
+
+                # Mesma chave ja em execucao em outra thread: aguardar
+                event = self._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    self.stats["misses"] += 1
+                    break
+            event.wait()
+            with self._lock:
+                if self._lookup(key) is None and key not in self._inflight:
+                    # A outra execucao falhou ou nao era cacheavel: executar aqui
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    self.stats["misses"] += 1
+                    break
+
+        try:
+            result = compute()
+            if is_cacheable(result):
+                try:
+                    value = json.dumps(result, ensure_ascii=False, default=_json_default).encode("utf-8")
+                except (TypeError, ValueError) as e:
+                    logger.debug(f"Resultado de {tool} nao serializavel: {e}")
+                else:
+                    expires_at = time.time() + ttl
+                    with self._lock:
+                        self._remember(key, tool, expires_at, value)
+                        if self._db is not None:
+                            self._db_set(key, tool, str(version), expires_at, value)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def invalidate(self, tool: Optional[str] = None) -> None:
+        """Remove entradas de uma tool (None = todas)."""
+        with self._lock:
+            self._drop(tool)
+            if self._db is not None:
+                if tool is None:
+                    self._db.execute("DELETE FROM tool_cache")
+                else:
+                    self._db.execute("DELETE FROM tool_cache WHERE tool = ?", (tool,))
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Acertos, erros e ocupacao do cache."""
+        with self._lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "persist_path": str(self.persist_path) if self.persist_path else None,
+            }
+
+
+_cache_instance: Optional[ToolResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """Retorna o cache de tools do processo (singleton)."""
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = ToolResultCache(persist_path=TOOL_CACHE_PATH or None)
+        return _cache_instance
+
+
+def cached_tool(
+    ttl: float = TOOL_CACHE_TTL,
+    version: Callable[[], Any] = get_data_version,
+    name: Optional[str] = None
+) -> Callable:
+    """
+    Decorator de cache para a funcao de uma tool (aplicar abaixo de @tool).
+
+    Args:
+        ttl: Validade do resultado (segundos)
+        version: Funcao que retorna a versao dos dados de que a tool depende
+        name: Nome no cache (None = nome da funcao)
+
+    Returns:
+        Decorator que preserva assinatura e docstring (usadas pelo @tool)
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        tool_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+
+            return get_tool_cache().get_or_compute(
+                tool_name,
+                normalize_args(dict(bound.arguments)),
+                version(),
+                lambda: func(*bound.args, **bound.kwargs),
+                ttl=ttl
+            )
+
+        wrapper.cache_clear = lambda: get_tool_cache().invalidate(tool_name)
+        return wrapper
+
+    return decorator
@@ -22,6 +22,7 @@ SANKHYA_X_TOKEN = os.getenv('SANKHYA_X_TOKEN')
 # URLs da API Sankhya
 SANKHYA_AUTH_URL = "https://api.sankhya.com.br/authenticate"
 SANKHYA_QUERY_URL = "https://api.sankhya.com.br/gateway/v1/mge/service.sbr?serviceName=DbExplorerSP.executeQuery&outputType=json"
+SANKHYA_SERVICE_URL = "https://api.sankhya.com.br/gateway/v1/mge/service.sbr"
 
 # Diretorios de dados
 DATA_DIR = ROOT_DIR / 'src' / 'data'
@@ -36,6 +37,31 @@ PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
 DEFAULT_BATCH_SIZE = 10000  # Registros por lote
 DEFAULT_TIMEOUT = 120  # Segundos
 
+# Controle das chamadas a API Sankhya, compartilhado por todos os clientes
+# (src/utils/api_governor.py)
+SANKHYA_GOVERNOR_CONFIG = {
+    "rate": 2.0,                 # Chamadas/s iniciais (sobe com sucessos, cai com 403/429)
+    "min_rate": 0.2,
+    "max_rate": 8.0,
+    "concurrency": 4,            # Chamadas simultaneas iniciais (AIMD)
+    "min_concurrency": 1,
+    "max_concurrency": 8,
+    "max_retries": 3,            # Tentativas por chamada (timeout, conexao, 5xx, 403/429)
+    "retry_interval": 2,         # Base do backoff exponencial (segundos)
+    "max_backoff": 60,
+    "failure_threshold": 5,      # Falhas seguidas para abrir o circuit breaker
+    "reset_timeout": 30,         # Pausa com o circuito aberto (dobra a cada reabertura)
+    "max_reset_timeout": 300,
+}
+
+# Escrita em lote no Sankhya (src/utils/sankhya_writer.py)
+WRITEBACK_CONFIG = {
+    "batch_size": 50,        # Registros por chamada DatasetSP.save (1 = saveRecord por registro)
+    "max_workers": 4,        # Chamadas simultaneas
+    "timeout": 60,
+    "state_dir": ROOT_DIR / "output" / "writeback",
+}
+
 # Azure Data Lake
 AZURE_STORAGE_ACCOUNT = os.getenv('AZURE_STORAGE_ACCOUNT', '')
 AZURE_STORAGE_KEY = os.getenv('AZURE_STORAGE_KEY', '')
@@ -17,7 +17,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 import logging
 import pandas as pd
 
-from src.utils.sankhya_client import SankhyaClient
+from src.utils.sankhya_client import SankhyaClient, SankhyaAPIError
 from src.utils.azure_storage import AzureDataLakeClient
 from src.config import RAW_DATA_DIR
 
@@ -148,7 +148,7 @@ class PipelineExtracao:
         id_max: int,
         faixa_size: int
     ) -> pd.DataFrame:
-        """Extrai dados em faixas para contornar limite da API"""
+        """Extrai dados em faixas para contornar limite da API (faixa com erro interrompe)"""
         all_dfs = []
         id_inicio = 0
         total = 0
@@ -158,7 +158,7 @@ class PipelineExtracao:
             where_faixa = f"{campo_id} >= {id_inicio} AND {campo_id} < {id_fim}"
             query = query_template.replace("{WHERE_FAIXA}", where_faixa)
 
-            result = self.sankhya.executar_query(query, timeout=180)
+            result = self.sankhya.executar_query(query, timeout=180, strict=True)
 
             if result and result.get("rows"):
                 rows = result["rows"]
@@ -258,13 +258,19 @@ class PipelineExtracao:
 
             # Extrair
             if config.get("usa_faixa"):
-                df = self._extrair_por_faixas(
-                    config["query_template"],
-                    config["campo_id"],
-                    config["colunas"],
-                    config["id_max"],
-                    config["faixa_size"]
-                )
+                try:
+                    df = self._extrair_por_faixas(
+                        config["query_template"],
+                        config["campo_id"],
+                        config["colunas"],
+                        config["id_max"],
+                        config["faixa_size"]
+                    )
+                except SankhyaAPIError as e:
+                    # Dados incompletos nao sobrescrevem a ultima extracao boa
+                    logger.error(f"  {nome}: extração interrompida ({e})")
+                    self.resultados.append({"entidade": nome, "registros": 0, "sucesso": False, "tamanho_mb": 0})
+                    continue
             else:
                 df = self._extrair_simples(config["query"], config["colunas"])
 
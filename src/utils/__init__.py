@@ -3,7 +3,11 @@
 Utilitarios do Data Hub
 """
 
-from .sankhya_client import SankhyaClient
+from .sankhya_client import SankhyaClient, SankhyaAPIError
+from .rate_limit import AdaptiveRateLimiter
+from .api_governor import ApiGovernor, get_governor
+from .token_provider import SankhyaTokenProvider, get_token_provider
+from .sankhya_writer import SankhyaBulkWriter
 
 # Azure e opcional - pode nao estar instalado
 try:
@@ -14,4 +18,4 @@ except ImportError:
     criar_estrutura_datalake = None
     _AZURE_AVAILABLE = False
 
-__all__ = ['SankhyaClient', 'AzureDataLakeClient', 'criar_estrutura_datalake', '_AZURE_AVAILABLE']
+__all__ = ['SankhyaClient', 'SankhyaAPIError', 'AdaptiveRateLimiter', 'ApiGovernor', 'get_governor', 'SankhyaTokenProvider', 'get_token_provider', 'SankhyaBulkWriter', 'AzureDataLakeClient', 'criar_estrutura_datalake', '_AZURE_AVAILABLE']
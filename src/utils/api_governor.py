@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+Controle Central de Chamadas a API Sankhya
+
+Um unico "governador" por processo, compartilhado por todos os
+SankhyaClient (extractors, pipelines, analista, escrita em lote), para
+que chamadas em paralelo rodem na maior taxa que a API aceita sem que
+falhas virem lacunas nos dados:
+
+- Token bucket adaptativo: limita chamadas/s (AdaptiveRateLimiter);
+  403/429 reduz a taxa, sucessos seguidos aumentam
+- Limite de concorrencia AIMD: chamadas simultaneas sobem +1 por
+  "janela" de sucessos e caem pela metade em bloqueio ou falha
+- Backoff exponencial com jitter: timeouts, erros de conexao, HTTP 5xx
+  e bloqueios sao repetidos (retry_interval * 2^n, ate max_backoff)
+- Circuit breaker: apos failure_threshold falhas seguidas o gateway e
+  considerado degradado e TODAS as threads pausam por reset_timeout;
+  depois uma unica chamada de teste decide se fecha ou reabre (com
+  pausa dobrada, ate max_reset_timeout)
+
+Erros definitivos (SQL invalido, 400, 404...) nao sao repetidos.
+
+Uso:
+    from src.utils.api_governor import get_governor
+
+    governor = get_governor()
+    response = governor.call(lambda: requests.post(...), max_retries=3)
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from src.config import SANKHYA_GOVERNOR_CONFIG
+
+from .rate_limit import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Status HTTP tratados como limite da API (reduz taxa e concorrencia)
+THROTTLE_STATUS = {403, 429}
+
+# Excecoes tratadas como falha transitoria do gateway
+TRANSIENT_ERRORS = (requests.Timeout, requests.ConnectionError)
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Limite de chamadas simultaneas com aumento aditivo e reducao multiplicativa.
+
+    Metodos principais:
+    - acquire() / release(): Ocupa e libera uma vaga
+    - on_success(): +1/limite por sucesso (+1 a cada "janela" completa)
+    - on_overload(): Limite pela metade (uma vez por janela de 1s)
+    """
+
+    def __init__(self, limit: int = 4, min_limit: int = 1, max_limit: int = 8):
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_overload(self) -> None:
+        with self._cond:
+            # Falhas simultaneas das chamadas em voo contam como uma so
+            now = time.monotonic()
+            if now - self._last_decrease >= 1.0:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._last_decrease = now
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"limit": int(self.limit), "in_flight": self._in_flight}
+
+
+class CircuitBreaker:
+    """
+    Pausa todas as chamadas quando o gateway esta degradado.
+
+    Estados: closed (normal), open (pausa), half_open (uma chamada de teste).
+
+    Metodos principais:
+    - acquire(): Bloqueia enquanto o circuito esta aberto
+    - record_success(): Fecha o circuito
+    - record_failure(): Conta falha (abre apos failure_threshold seguidas)
+    - release(): Libera a chamada de teste sem decidir o estado
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, max_reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = "closed"
+        self._failures = 0
+        self._timeout = reset_timeout
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._cond = threading.Condition()
+        self.stats = {"opened": 0}
+
+    def acquire(self) -> None:
+        with self._cond:
+            while True:
+                if self.state == "closed":
+                    return
+
+                now = time.monotonic()
+                if self.state == "open" and now >= self._open_until:
+                    logger.info("Circuit breaker: testando o gateway (half-open)")
+                    self.state = "half_open"
+
+                if self.state == "half_open" and not self._probe_in_flight:
+                    self._probe_in_flight = True
+                    return
+
+                wait = self._open_until - now if self.state == "open" else 1.0
+                self._cond.wait(max(wait, 0.01))
+
+    def record_success(self) -> None:
+        with self._cond:
+            if self.state != "closed":
+                logger.info("Circuit breaker: gateway respondendo, circuito fechado")
+            self.state = "closed"
+            self._failures = 0
+            self._timeout = self.reset_timeout
+            self._probe_in_flight = False
+            self._cond.notify_all()
+
+    def record_failure(self) -> None:
+        with self._cond:
+            self._failures += 1
+
+            if self.state == "half_open":
+                self._timeout = min(self.max_reset_timeout, self._timeout * 2)
+                self._open()
+            elif self.state == "closed" and self._failures >= self.failure_threshold:
+                self._open()
+
+            self._probe_in_flight = False
+            self._cond.notify_all()
+
+    def release(self) -> None:
+        with self._cond:
+            self._probe_in_flight = False
+            self._cond.notify_all()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self._open_until = time.monotonic() + self._timeout
+        self.stats["opened"] += 1
+        logger.warning(
+            f"Circuit breaker ABERTO: {self._failures} falhas seguidas, "
+            f"pausando chamadas por {self._timeout:.0f}s"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self.stats, "state": self.state, "failures": self._failures}
+
+
+class ApiGovernor:
+    """
+    Executa chamadas HTTP com limite de taxa, concorrencia, retry e circuit breaker.
+
+    Metodos principais:
+    - call(): Executa uma chamada governada e retorna a resposta final
+    - get_stats(): Taxa, concorrencia, estado do circuito e contadores
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            config: Parametros (None = SANKHYA_GOVERNOR_CONFIG)
+        """
+        config = {**SANKHYA_GOVERNOR_CONFIG, **(config or {})}
+        self.max_retries = config["max_retries"]
+        self.retry_interval = config["retry_interval"]
+        self.max_backoff = config["max_backoff"]
+
+        self.limiter = AdaptiveRateLimiter(
+            rate=config["rate"],
+            min_rate=config["min_rate"],
+            max_rate=config["max_rate"]
+        )
+        self.concurrency = AdaptiveConcurrencyLimit(
+            limit=config["concurrency"],
+            min_limit=config["min_concurrency"],
+            max_limit=config["max_concurrency"]
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=config["failure_threshold"],
+            reset_timeout=config["reset_timeout"],
+            max_reset_timeout=config["max_reset_timeout"]
+        )
+
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "transient_errors": 0, "gave_up": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _backoff(self, tentativa: int, retry_interval: float) -> None:
+        """Espera exponencial com jitter (metade fixa + metade aleatoria)."""
+        delay = min(self.max_backoff, retry_interval * 2 ** (tentativa - 1))
+        time.sleep(delay / 2 + random.uniform(0, delay / 2))
+
+    def call(
+        self,
+        send: Callable[[], requests.Response],
+        max_retries: Optional[int] = None,
+        retry_interval: Optional[float] = None
+    ) -> requests.Response:
+        """
+        Executa a chamada com as protecoes do governador.
+
+        Args:
+            send: Funcao que faz a requisicao e retorna a resposta
+            max_retries: Tentativas no total (None = padrao do governador)
+            retry_interval: Base do backoff em segundos (None = padrao)
+
+        Returns:
+            Ultima resposta recebida (sucesso, erro definitivo ou ultima falha)
+
+        Raises:
+            requests.RequestException: Se todas as tentativas falharam sem resposta
+        """
+        max_retries = max(1, max_retries or self.max_retries)
+        retry_interval = self.retry_interval if retry_interval is None else retry_interval
+
+        for tentativa in range(1, max_retries + 1):
+            ultima = tentativa == max_retries
+
+            self.breaker.acquire()
+            self.concurrency.acquire()
+            try:
+                self.limiter.acquire()
+                self._count("calls")
+                response = send()
+            except TRANSIENT_ERRORS as e:
+                self._count("transient_errors")
+                self.breaker.record_failure()
+                self.concurrency.on_overload()
+                if ultima:
+                    self._count("gave_up")
+                    raise
+                logger.warning(f"Falha transitoria na API ({type(e).__name__}), tentativa {tentativa}/{max_retries}")
+                self._count("retries")
+                self._backoff(tentativa, retry_interval)
+                continue
+            except Exception:
+                # Erro que nao e do gateway: libera a chamada de teste do circuito
+                self.breaker.release()
+                raise
+            finally:
+                self.concurrency.release()
+
+            status = response.status_code
+
+            if status in THROTTLE_STATUS:
+                # Gateway saudavel, mas no limite: reduz taxa e concorrencia
+                self._count("throttled")
+                self.breaker.record_success()
+                retry_after = response.headers.get("Retry-After") if response.headers else None
+                self.limiter.on_throttle(float(retry_after) if retry_after and retry_after.isdigit() else None)
+                self.concurrency.on_overload()
+            elif status >= 500:
+                self._count("transient_errors")
+                self.breaker.record_failure()
+                self.concurrency.on_overload()
+                logger.warning(f"HTTP {status} da API, tentativa {tentativa}/{max_retries}")
+            else:
+                self.breaker.record_success()
+                self.limiter.on_success()
+                self.concurrency.on_success()
+                return response
+
+            if ultima:
+                self._count("gave_up")
+                return response
+
+            self._count("retries")
+            if status >= 500:
+                self._backoff(tentativa, retry_interval)
+
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Taxa, concorrencia, estado do circuito e contadores."""
+        with self._lock:
+            stats = dict(self.stats)
+        limiter = self.limiter.get_stats()
+        return {
+            **stats,
+            "rate": limiter["rate"],
+            "rate_limiter": limiter,
+            "concurrency": self.concurrency.get_stats(),
+            "circuit": self.breaker.get_stats(),
+        }
+
+
+_governor: Optional[ApiGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> ApiGovernor:
+    """Retorna o governador de chamadas do processo (singleton)."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = ApiGovernor()
+        return _governor
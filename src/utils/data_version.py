@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Versao dos Dados do Data Lake
+
+Contador gravado em src/data/data_version.json e incrementado a cada
+carga do Engenheiro (DataLakeLoader). Caches que dependem dos dados
+(ex.: resultados das tools do LLM) usam a versao na chave e ficam
+invalidos automaticamente quando ha carga nova.
+
+Uso:
+    from src.utils.data_version import get_data_version, bump_data_version
+
+    versao = get_data_version()          # 0 se nunca houve carga
+    bump_data_version("vendas", records=1500)
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from src.config import DATA_DIR
+from src.utils.token_provider import _file_lock
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_FILE = DATA_DIR / "data_version.json"
+DATA_VERSION_LOCK = DATA_DIR / "data_version.lock"
+
+_lock = threading.Lock()
+_cache: Dict[str, Any] = {"mtime_ns": None, "data": {}}
+
+
+def _read(force: bool = False) -> Dict[str, Any]:
+    """Le o arquivo de versao (releitura so quando o mtime muda ou force=True)."""
+    try:
+        mtime_ns = DATA_VERSION_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    if force or _cache["mtime_ns"] != mtime_ns:
+        try:
+            with open(DATA_VERSION_FILE, "r", encoding="utf-8") as f:
+                _cache["data"] = json.load(f)
+            _cache["mtime_ns"] = mtime_ns
+        except (OSError, ValueError) as e:
+            logger.warning(f"Erro ao ler versao dos dados: {e}")
+            return _cache["data"]
+
+    return _cache["data"]
+
+
+def get_data_version(entity: Optional[str] = None) -> int:
+    """
+    Versao atual dos dados.
+
+    Args:
+        entity: Entidade (vendas, estoque, ...); None = versao global
+
+    Returns:
+        Versao (0 se nunca houve carga)
+    """
+    data = _read()
+    if entity is None:
+        return int(data.get("version", 0))
+    return int(data.get("entities", {}).get(entity, {}).get("version", 0))
+
+
+def get_data_version_info() -> Dict[str, Any]:
+    """Conteudo completo do arquivo de versao (global e por entidade)."""
+    return dict(_read())
+
+
+def bump_data_version(entity: str, **info) -> int:
+    """
+    Registra uma carga nova de uma entidade.
+
+    Args:
+        entity: Entidade carregada
+        **info: Informacoes extras da carga (records, layer, ...)
+
+    Returns:
+        Nova versao global
+    """
+    # Lock de thread + lock de arquivo: cargas em processos diferentes
+    # (scheduler, scripts) nao podem ler a mesma versao e perder um incremento
+    with _lock, _file_lock(DATA_VERSION_LOCK):
+        data = dict(_read(force=True))
+        version = int(data.get("version", 0)) + 1
+        agora = datetime.now().isoformat()
+
+        entities = dict(data.get("entities", {}))
+        entities[entity] = {"version": version, "updated_at": agora, **info}
+
+        data.update({"version": version, "updated_at": agora, "entities": entities})
+
+        DATA_VERSION_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{DATA_VERSION_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, DATA_VERSION_FILE)
+
+    logger.info(f"Versao dos dados: {version} ({entity})")
+    return version
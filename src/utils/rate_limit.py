@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Limitador de Taxa Adaptativo (token bucket + AIMD)
+
+Controla quantas chamadas por segundo vao para a API Sankhya:
+- Token bucket: ate `rate` chamadas/s, com rajada de ate `burst`
+- Sucesso: a cada `ramp_every` sucessos seguidos a taxa sobe `ramp_step`
+- 403/429 (limite da API): a taxa cai pela metade (`backoff_factor`) e
+  todas as threads pausam por `cooldown` segundos
+
+Compartilhado entre threads: um unico limitador por API/credencial.
+
+Uso:
+    limiter = AdaptiveRateLimiter(rate=2.0, max_rate=10.0)
+    limiter.acquire()          # bloqueia ate haver "ficha"
+    ... chamada ...
+    limiter.on_success()       # ou limiter.on_throttle()
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket com aumento aditivo e reducao multiplicativa da taxa.
+
+    Metodos principais:
+    - acquire(): Aguarda permissao para uma chamada
+    - on_success(): Registra sucesso (pode aumentar a taxa)
+    - on_throttle(): Registra bloqueio da API (reduz a taxa e pausa)
+    - get_stats(): Taxa atual e contadores
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        burst: Optional[float] = None,
+        ramp_every: int = 20,
+        ramp_step: float = 0.5,
+        backoff_factor: float = 0.5,
+        cooldown: float = 2.0
+    ):
+        """
+        Args:
+            rate: Chamadas por segundo iniciais
+            min_rate: Taxa minima apos reducoes
+            max_rate: Taxa maxima apos aumentos
+            burst: Chamadas acumuladas permitidas de uma vez (None = 1 segundo de taxa maxima)
+            ramp_every: Sucessos seguidos para aumentar a taxa
+            ramp_step: Aumento da taxa (chamadas/s) a cada ramp_every sucessos
+            backoff_factor: Multiplicador da taxa ao receber bloqueio
+            cooldown: Pausa de todas as threads ao receber bloqueio (segundos)
+        """
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst if burst is not None else max(1.0, max_rate)
+        self.ramp_every = ramp_every
+        self.ramp_step = ramp_step
+        self.backoff_factor = backoff_factor
+        self.cooldown = cooldown
+
+        self._tokens = 1.0
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._streak = 0
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "throttled": 0, "ramp_ups": 0, "waited_s": 0.0}
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        """Bloqueia ate a chamada poder ser feita."""
+        inicio = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now >= self._paused_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self.stats["acquired"] += 1
+                    self.stats["waited_s"] += now - inicio
+                    return
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    wait = (1.0 - self._tokens) / self.rate
+
+            time.sleep(min(max(wait, 0.001), 1.0))
+
+    def on_success(self) -> None:
+        """Sucesso: apos ramp_every seguidos, aumenta a taxa."""
+        with self._lock:
+            self._streak += 1
+            if self._streak >= self.ramp_every and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.ramp_step)
+                self._streak = 0
+                self.stats["ramp_ups"] += 1
+                logger.debug(f"Taxa aumentada para {self.rate:.2f}/s")
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Bloqueio da API (403/429): reduz a taxa e pausa todas as threads.
+
+        Bloqueios recebidos durante a pausa (chamadas que ja estavam em voo)
+        so estendem a pausa: a taxa cai uma vez por episodio.
+
+        Args:
+            retry_after: Pausa indicada pela API (segundos), se houver
+        """
+        with self._lock:
+            now = time.monotonic()
+            pause = retry_after if retry_after is not None else self.cooldown
+            self._streak = 0
+            self._tokens = 0.0
+            self.stats["throttled"] += 1
+
+            if now < self._paused_until:
+                self._paused_until = max(self._paused_until, now + pause)
+                return
+
+            self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+            self._paused_until = now + pause
+            logger.warning(f"API limitou as chamadas: taxa reduzida para {self.rate:.2f}/s, pausa de {pause:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Taxa atual e contadores."""
+        with self._lock:
+            return {**self.stats, "rate": round(self.rate, 3), "waited_s": round(self.stats["waited_s"], 2)}
@@ -1,137 +1,183 @@
 # -*- coding: utf-8 -*-
 """
 Cliente reutilizavel para API Sankhya
+
+Todas as chamadas passam pelo governador do processo (api_governor):
+limite de taxa e concorrencia, retry com backoff e circuit breaker.
+O token vem do provedor compartilhado (token_provider), com cache entre
+threads e processos.
 """
 
 import logging
 import requests
-from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 
 from src.config import (
-    SANKHYA_CLIENT_ID,
-    SANKHYA_CLIENT_SECRET,
-    SANKHYA_X_TOKEN,
-    SANKHYA_AUTH_URL,
     SANKHYA_QUERY_URL,
+    SANKHYA_SERVICE_URL,
     DEFAULT_TIMEOUT
 )
 
+from .api_governor import ApiGovernor, get_governor
+from .token_provider import SankhyaTokenProvider, get_token_provider
+
 logger = logging.getLogger(__name__)
 
 
+class SankhyaAPIError(Exception):
+    """Falha definitiva de uma chamada a API (apos as tentativas do governador)."""
+
+
 class SankhyaClient:
     """Cliente para interagir com a API Sankhya"""
 
-    def __init__(self):
-        self._access_token: Optional[str] = None
-        self._token_expiry: Optional[datetime] = None
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        retry_interval: Optional[float] = None,
+        governor: Optional[ApiGovernor] = None,
+        token_provider: Optional[SankhyaTokenProvider] = None
+    ):
+        """
+        Args:
+            max_retries: Tentativas por chamada (None = padrao do governador)
+            retry_interval: Base do backoff em segundos (None = padrao do governador)
+            governor: Governador de chamadas (None = o do processo, compartilhado)
+            token_provider: Provedor de token (None = o do processo, compartilhado)
+        """
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval
+        self.governor = governor or get_governor()
+        self.token_provider = token_provider or get_token_provider()
+
+    def _post(self, url: str, token: str, payload: Dict[str, Any], timeout: int) -> requests.Response:
+        """POST autenticado e governado; renova o token uma vez em caso de 401."""
+        for _ in range(2):
+            response = self.governor.call(
+                lambda: requests.post(
+                    url,
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Content-Type": "application/json"
+                    },
+                    json=payload,
+                    timeout=timeout
+                ),
+                max_retries=self.max_retries,
+                retry_interval=self.retry_interval
+            )
+
+            if response.status_code == 401 and self.token_provider.invalidate(token):
+                token = self.token_provider.get_token()
+                if token:
+                    continue
+            return response
+
+        return response
 
     def autenticar(self) -> bool:
         """
-        Autentica na API Sankhya e obtem access_token.
+        Garante um access_token valido (cache compartilhado; so chama a API
+        de autenticacao se nao houver token valido em memoria ou em disco).
         Retorna True se sucesso, False se falha.
         """
-        try:
-            response = requests.post(
-                SANKHYA_AUTH_URL,
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "X-Token": SANKHYA_X_TOKEN
-                },
-                data={
-                    "client_id": SANKHYA_CLIENT_ID,
-                    "client_secret": SANKHYA_CLIENT_SECRET,
-                    "grant_type": "client_credentials"
-                },
-                timeout=30
-            )
+        return self.token_provider.get_token() is not None
 
-            if response.status_code != 200:
-                logger.error(f"Erro na autenticacao: HTTP {response.status_code}")
-                return False
-
-            data = response.json()
-            self._access_token = data.get("access_token")
+    def executar_servico(
+        self,
+        service_name: str,
+        request_body: Dict[str, Any],
+        timeout: int = DEFAULT_TIMEOUT
+    ) -> Dict[str, Any]:
+        """
+        Chama um servico do Sankhya (CRUDServiceProvider.saveRecord, DatasetSP.save, ...).
 
-            # Token valido por 24h, renovar antes
-            expires_in = data.get("expires_in", 86400)
-            self._token_expiry = datetime.now() + timedelta(seconds=expires_in - 300)
+        Pode ser chamado de varias threads (a renovacao do token e unica).
+        Bloqueios (403/429), timeouts e 5xx sao repetidos pelo governador.
 
-            logger.info("Autenticacao realizada com sucesso")
-            return True
+        Args:
+            service_name: Nome do servico
+            request_body: Conteudo de "requestBody"
+            timeout: Timeout em segundos
 
-        except Exception as e:
-            logger.error(f"Erro ao autenticar: {e}")
-            return False
+        Returns:
+            Resposta JSON da API com "http_status"; em erro de rede/autenticacao,
+            {"http_status": 0, "status": "0", "statusMessage": erro}
+        """
+        token = self.token_provider.get_token()
+        if not token:
+            return {"http_status": 0, "status": "0", "statusMessage": "Falha na autenticacao"}
 
-    def _garantir_token(self) -> bool:
-        """Garante que o token esta valido, renovando se necessario"""
-        if self._access_token is None:
-            return self.autenticar()
+        try:
+            response = self._post(
+                f"{SANKHYA_SERVICE_URL}?serviceName={service_name}&outputType=json",
+                token,
+                {"serviceName": service_name, "requestBody": request_body},
+                timeout
+            )
+        except requests.RequestException as e:
+            return {"http_status": 0, "status": "0", "statusMessage": str(e)}
 
-        if self._token_expiry and datetime.now() >= self._token_expiry:
-            logger.info("Token expirado, renovando...")
-            return self.autenticar()
+        try:
+            result = response.json()
+        except ValueError:
+            result = {"status": "0", "statusMessage": f"HTTP {response.status_code}: {response.text[:200]}"}
 
-        return True
+        result["http_status"] = response.status_code
+        return result
 
     def executar_query(
         self,
         sql: str,
-        timeout: int = DEFAULT_TIMEOUT
+        timeout: int = DEFAULT_TIMEOUT,
+        strict: bool = False
     ) -> Optional[Dict[str, Any]]:
         """
         Executa uma query SQL via API Sankhya.
 
+        Timeouts, erros de conexao, 5xx e bloqueios (403/429) sao repetidos
+        com backoff pelo governador antes de desistir.
+
         Args:
             sql: Query SQL a executar
             timeout: Timeout em segundos
+            strict: Levantar SankhyaAPIError em vez de retornar None
 
         Returns:
             Dict com 'rows' e 'fieldsMetadata', ou None em caso de erro
+
+        Raises:
+            SankhyaAPIError: Se strict=True e a query falhou
         """
-        if not self._garantir_token():
-            logger.error("Falha ao obter token de autenticacao")
+        def falha(msg: str) -> None:
+            logger.error(msg)
+            if strict:
+                raise SankhyaAPIError(msg)
             return None
 
-        try:
-            response = requests.post(
-                SANKHYA_QUERY_URL,
-                headers={
-                    "Authorization": f"Bearer {self._access_token}",
-                    "Content-Type": "application/json"
-                },
-                json={"requestBody": {"sql": sql}},
-                timeout=timeout
-            )
+        token = self.token_provider.get_token()
+        if not token:
+            return falha("Falha ao obter token de autenticacao")
 
-            if response.status_code == 401:
-                # Token expirou, tentar renovar
-                logger.warning("Token expirado (401), renovando...")
-                self._access_token = None
-                if not self.autenticar():
-                    return None
-                return self.executar_query(sql, timeout)
+        try:
+            response = self._post(SANKHYA_QUERY_URL, token, {"requestBody": {"sql": sql}}, timeout)
+        except requests.Timeout:
+            return falha(f"Timeout na query (>{timeout}s)")
+        except requests.RequestException as e:
+            return falha(f"Erro ao executar query: {e}")
 
-            if response.status_code != 200:
-                logger.error(f"Erro HTTP: {response.status_code}")
-                return None
+        if response.status_code != 200:
+            return falha(f"Erro HTTP: {response.status_code}")
 
+        try:
             result = response.json()
+        except ValueError:
+            return falha(f"Resposta invalida da API: {response.text[:200]}")
 
-            if result.get("status") != "1":
-                logger.error(f"Erro na query: {result.get('statusMessage')}")
-                return None
+        if result.get("status") != "1":
+            return falha(f"Erro na query: {result.get('statusMessage')}")
 
-            return result.get("responseBody", {})
-
-        except requests.Timeout:
-            logger.error(f"Timeout na query (>{timeout}s)")
-            return None
-        except Exception as e:
-            logger.error(f"Erro ao executar query: {e}")
-            return None
+        return result.get("responseBody", {})
 
     def executar_query_paginada(
         self,
@@ -149,6 +195,9 @@ class SankhyaClient:
 
         Returns:
             Lista com todas as rows concatenadas
+
+        Raises:
+            SankhyaAPIError: Se uma pagina falhar (nunca retorna lista parcial)
         """
         all_rows = []
         offset = 0
@@ -161,7 +210,7 @@ class SankhyaClient:
             FETCH NEXT {limite_por_pagina} ROWS ONLY
             """
 
-            result = self.executar_query(sql_paginada)
+            result = self.executar_query(sql_paginada, strict=True)
 
             if not result:
                 break
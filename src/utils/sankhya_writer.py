@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+Escrita em Lote no Sankhya (write-back)
+
+Atualiza muitos registros de uma entidade sem o loop sequencial com
+sleep fixo dos scripts de manutencao:
+
+- Lotes: varios registros por chamada DatasetSP.save; se o lote falhar,
+  os registros sao reenviados um a um (CRUDServiceProvider.saveRecord)
+  para isolar o registro com erro
+- Limite de taxa, retry e circuit breaker: governador de chamadas do
+  SankhyaClient, compartilhado com os demais clientes do processo
+- Concorrencia limitada: max_workers chamadas simultaneas
+- Retomavel e idempotente: cada registro gravado vai para o diario do job
+  (chave + hash dos valores). Rodar de novo pula o que ja foi gravado com
+  os mesmos valores, e so reenvia pendentes, erros e valores alterados
+- Registro de erros: errors.jsonl com chave, valores e erro
+
+Estado em WRITEBACK_CONFIG["state_dir"]/<job>/ (journal.jsonl, errors.jsonl).
+
+Uso:
+    from src.utils import SankhyaBulkWriter
+
+    writer = SankhyaBulkWriter("Parceiro", key_fields=["CODPARC"], job_name="emails_parceiros")
+    resultado = writer.run([{"CODPARC": 10, "EMAIL": "a@b.com"}, ...])
+    erros = writer.get_errors()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config import WRITEBACK_CONFIG
+
+from .sankhya_client import SankhyaClient
+
+logger = logging.getLogger(__name__)
+
+# Lotes que falharam inteiros mas passaram registro a registro antes de
+# desistir do DatasetSP.save (ex.: servico nao liberado para o usuario)
+MAX_BATCH_FALLBACKS = 3
+
+
+def _to_str(value: Any) -> str:
+    """Valor no formato texto da API (None vira vazio)."""
+    return "" if value is None else str(value)
+
+
+class SankhyaBulkWriter:
+    """
+    Grava registros de uma entidade do Sankhya em lote, com retomada.
+
+    Metodos principais:
+    - run(): Envia os registros pendentes e retorna o resumo
+    - get_errors(): Registros que falharam (ainda nao gravados)
+    - reset(): Apaga o estado do job (proxima execucao envia tudo)
+    """
+
+    def __init__(
+        self,
+        entity: str,
+        key_fields: Sequence[str],
+        job_name: str,
+        client: Optional[SankhyaClient] = None,
+        batch_size: int = WRITEBACK_CONFIG["batch_size"],
+        max_workers: int = WRITEBACK_CONFIG["max_workers"],
+        timeout: int = WRITEBACK_CONFIG["timeout"],
+        state_dir: Optional[Path] = None,
+        fieldset: Optional[Sequence[str]] = None
+    ):
+        """
+        Args:
+            entity: Entidade do Sankhya (ex.: "Parceiro")
+            key_fields: Campos da chave primaria (ex.: ["CODPARC"])
+            job_name: Nome do job (pasta do estado; mesmo nome = retomada)
+            client: SankhyaClient (None = novo cliente)
+            batch_size: Registros por chamada (1 = saveRecord por registro)
+            max_workers: Chamadas simultaneas
+            timeout: Timeout de cada chamada (segundos)
+            state_dir: Pasta base do estado dos jobs
+            fieldset: Campos extras retornados pelo saveRecord (ex.: ["NOMEPARC"])
+        """
+        self.entity = entity
+        self.key_fields = list(key_fields)
+        self.job_name = job_name
+        self.client = client or SankhyaClient()
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.fieldset = list(fieldset or [])
+
+        self.job_dir = Path(state_dir or WRITEBACK_CONFIG["state_dir"]) / job_name
+        self.journal_file = self.job_dir / "journal.jsonl"
+        self.errors_file = self.job_dir / "errors.jsonl"
+
+        self._lock = threading.Lock()
+        self._use_batch = self.batch_size > 1
+        self._batch_fallbacks = 0
+        self.stats = {"chamadas": 0, "lotes": 0, "fallbacks": 0, "atualizados": 0, "erros": 0}
+
+    # =========================================================================
+    # ESTADO DO JOB
+    # =========================================================================
+
+    def _key(self, record: Dict[str, Any]) -> str:
+        return "|".join(_to_str(record[field]) for field in self.key_fields)
+
+    def _hash(self, record: Dict[str, Any]) -> str:
+        values = {k: _to_str(v) for k, v in record.items() if k not in self.key_fields}
+        raw = json.dumps(values, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    def _read_jsonl(self, path: Path) -> List[Dict[str, Any]]:
+        if not path.exists():
+            return []
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Linha cortada por uma interrupcao no meio da escrita
+                    logger.warning(f"Linha invalida ignorada em {path.name}")
+        return entries
+
+    def _load_done(self) -> Dict[str, str]:
+        """Chave -> hash dos valores ja gravados."""
+        return {entry["key"]: entry["hash"] for entry in self._read_jsonl(self.journal_file)}
+
+    def _append(self, path: Path, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        with self._lock:
+            with open(path, "a+b") as f:
+                # Linha cortada por interrupcao: terminar antes de anexar
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+            with open(path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+
+    def get_errors(self) -> List[Dict[str, Any]]:
+        """
+        Registros com erro que ainda nao foram gravados.
+
+        Returns:
+            Lista (ultimo erro por chave) com chave, valores e erro
+        """
+        done = self._load_done()
+        latest: Dict[str, Dict[str, Any]] = {}
+        for entry in self._read_jsonl(self.errors_file):
+            latest[entry["key"]] = entry
+        return [entry for key, entry in latest.items() if done.get(key) != entry.get("hash")]
+
+    def reset(self) -> None:
+        """Apaga diario e erros do job."""
+        if self.job_dir.exists():
+            shutil.rmtree(self.job_dir)
+        logger.info(f"Estado do job {self.job_name} apagado")
+
+    # =========================================================================
+    # CHAMADAS A API
+    # =========================================================================
+
+    def _call(self, service_name: str, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        """Chama o servico (limite de taxa e retry ficam com o governador do cliente)."""
+        with self._lock:
+            self.stats["chamadas"] += 1
+        return self.client.executar_servico(service_name, request_body, timeout=self.timeout)
+
+    def _save_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Grava um registro via CRUDServiceProvider.saveRecord."""
+        fields = [f for f in record if f not in self.key_fields]
+        fieldset = self.key_fields + [f for f in self.fieldset if f not in record] + fields
+
+        request_body = {
+            "dataSet": {
+                "rootEntity": self.entity,
+                "includePresentationFields": "S",
+                "dataRow": {
+                    "key": {k: {"$": _to_str(record[k])} for k in self.key_fields},
+                    "localFields": {f: {"$": _to_str(record[f])} for f in fields}
+                },
+                "entity": {"fieldset": {"list": ",".join(fieldset)}}
+            }
+        }
+        return self._call("CRUDServiceProvider.saveRecord", request_body)
+
+    def _save_dataset(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Grava varios registros numa chamada DatasetSP.save."""
+        value_fields = []
+        for record in records:
+            value_fields.extend(f for f in record if f not in self.key_fields and f not in value_fields)
+        fields = self.key_fields + value_fields
+        index = {field: str(i) for i, field in enumerate(fields)}
+
+        request_body = {
+            "entityName": self.entity,
+            "standAlone": False,
+            "fields": fields,
+            "records": [
+                {
+                    "pk": {k: _to_str(record[k]) for k in self.key_fields},
+                    "values": {index[f]: _to_str(record[f]) for f in value_fields if f in record}
+                }
+                for record in records
+            ]
+        }
+        return self._call("DatasetSP.save", request_body)
+
+    # =========================================================================
+    # EXECUCAO
+    # =========================================================================
+
+    def _record_results(
+        self,
+        results: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> Tuple[int, int]:
+        """Grava diario/erros de um lote. Retorna (atualizados, erros)."""
+        agora = datetime.now().isoformat(timespec="seconds")
+        done, errors = [], []
+
+        for record, result in results:
+            entry = {"key": self._key(record), "hash": self._hash(record), "ts": agora}
+            if result.get("status") == "1":
+                done.append(entry)
+            else:
+                errors.append({
+                    **entry,
+                    "record": record,
+                    "erro": result.get("statusMessage") or f"HTTP {result.get('http_status')}",
+                })
+
+        self._append(self.journal_file, done)
+        self._append(self.errors_file, errors)
+        with self._lock:
+            self.stats["atualizados"] += len(done)
+            self.stats["erros"] += len(errors)
+        return len(done), len(errors)
+
+    def _process_batch(self, batch: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Envia um lote (DatasetSP.save, com fallback registro a registro)."""
+        if self._use_batch and len(batch) > 1:
+            result = self._save_dataset(batch)
+            with self._lock:
+                self.stats["lotes"] += 1
+            if result.get("status") == "1":
+                return self._record_results([(record, result) for record in batch])
+
+            logger.warning(
+                f"Lote de {len(batch)} registros falhou ({result.get('statusMessage')}), "
+                f"enviando registro a registro"
+            )
+            with self._lock:
+                self.stats["fallbacks"] += 1
+
+        results = [(record, self._save_record(record)) for record in batch]
+
+        if self._use_batch and len(batch) > 1 and all(r.get("status") == "1" for _, r in results):
+            # O lote falhou mas cada registro passou: DatasetSP.save indisponivel?
+            with self._lock:
+                self._batch_fallbacks += 1
+                if self._batch_fallbacks >= MAX_BATCH_FALLBACKS and self._use_batch:
+                    self._use_batch = False
+                    logger.warning("DatasetSP.save falhando; usando saveRecord para o restante do job")
+
+        return self._record_results(results)
+
+    def run(
+        self,
+        records: Iterable[Dict[str, Any]],
+        retry_errors: bool = True,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Envia os registros que ainda nao foram gravados com estes valores.
+
+        Args:
+            records: Dicts com os campos da chave e os campos a gravar
+            retry_errors: Reenviar registros que falharam em execucoes anteriores
+            on_progress: Chamado apos cada lote com o progresso
+
+        Returns:
+            Resumo: total, pulados, enviados, atualizados, erros, estado do governador
+        """
+        inicio = time.time()
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+
+        # Ultima versao de cada chave
+        unique: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            missing = [k for k in self.key_fields if record.get(k) in (None, "")]
+            if missing:
+                raise ValueError(f"Registro sem chave {missing}: {record}")
+            unique[self._key(record)] = dict(record)
+
+        done = self._load_done()
+        failed = set() if retry_errors else {e["key"] for e in self.get_errors()}
+
+        pending = [
+            record for key, record in unique.items()
+            if done.get(key) != self._hash(record) and key not in failed
+        ]
+        skipped = len(unique) - len(pending)
+
+        logger.info(
+            f"Job {self.job_name}: {len(unique)} registros, {skipped} ja gravados, "
+            f"{len(pending)} a enviar ({self.max_workers} threads, lotes de {self.batch_size})"
+        )
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        progress = {"total": len(pending), "atualizados": 0, "erros": 0}
+
+        if batches:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            try:
+                futures = [executor.submit(self._process_batch, batch) for batch in batches]
+                for future in as_completed(futures):
+                    ok, err = future.result()
+                    progress["atualizados"] += ok
+                    progress["erros"] += err
+                    if on_progress:
+                        on_progress({**progress, "rate": self.client.governor.get_stats()["rate"]})
+            finally:
+                # Interrupcao: o diario ja tem os lotes concluidos
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        duracao = time.time() - inicio
+        logger.info(
+            f"Job {self.job_name}: {progress['atualizados']} atualizados, "
+            f"{progress['erros']} erros em {duracao:.1f}s"
+        )
+
+        return {
+            "success": progress["erros"] == 0,
+            "job": self.job_name,
+            "total": len(unique),
+            "pulados": skipped,
+            "enviados": len(pending),
+            "atualizados": progress["atualizados"],
+            "erros": progress["erros"],
+            "duracao_s": round(duracao, 1),
+            "chamadas": self.stats["chamadas"],
+            "fallbacks": self.stats["fallbacks"],
+            "api": self.client.governor.get_stats(),
+            "errors_file": str(self.errors_file),
+        }
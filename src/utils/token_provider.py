@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Token Compartilhado da API Sankhya
+
+Um unico access_token para todos os clientes (extractors, analista,
+pipelines, escrita em lote, servidor MCP) e todos os processos da maquina:
+
+- Memoria: token valido e devolvido sem I/O
+- Disco: cache em SANKHYA_TOKEN_CACHE (padrao ~/.cache/mmarra/sankhya_token.json),
+  lido por todos os processos; gravacao atomica, so o dono le (0600)
+- Single-flight: a renovacao acontece sob lock de thread + lock de arquivo;
+  quem espera relê o cache e reaproveita o token renovado por outro
+- Renovacao proativa: thread em segundo plano renova REFRESH_MARGIN
+  segundos antes do expires_in (chamadas nao esperam a autenticacao)
+- 401: invalidate(token) descarta so o token rejeitado (se outro cliente
+  ja renovou, nada e feito)
+
+O cache e separado por credencial (hash de client_id + X-Token).
+
+Uso:
+    from src.utils.token_provider import get_token_provider
+
+    token = get_token_provider().get_token()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+
+from src.config import (
+    SANKHYA_CLIENT_ID,
+    SANKHYA_CLIENT_SECRET,
+    SANKHYA_X_TOKEN,
+    SANKHYA_AUTH_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_FILE = Path(os.getenv(
+    "SANKHYA_TOKEN_CACHE",
+    str(Path.home() / ".cache" / "mmarra" / "sankhya_token.json")
+))
+
+# Renovacao em segundo plano: segundos antes de expirar
+REFRESH_MARGIN = 300
+
+# Abaixo disso o token e tratado como vencido (renovacao sincrona)
+MIN_VALIDITY = 30
+
+# Validade assumida quando a API nao informa expires_in (24h)
+DEFAULT_EXPIRES_IN = 86400
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Lock exclusivo entre processos (fcntl no Linux/Mac, msvcrt no Windows)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK desiste apos ~10s; continuar esperando
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SankhyaTokenProvider:
+    """
+    Fornece o access_token da API Sankhya com cache entre threads e processos.
+
+    Metodos principais:
+    - get_token(): Token valido (renova se necessario)
+    - invalidate(): Descarta um token rejeitado pela API (401)
+    - get_stats(): Autenticacoes feitas, leituras do cache, expiracao
+    """
+
+    def __init__(
+        self,
+        cache_file: Path = TOKEN_CACHE_FILE,
+        refresh_margin: int = REFRESH_MARGIN,
+        background: bool = True
+    ):
+        """
+        Args:
+            cache_file: Arquivo do cache compartilhado
+            refresh_margin: Renovar este numero de segundos antes de expirar
+            background: Renovar em segundo plano antes de expirar
+        """
+        self.cache_file = Path(cache_file)
+        self.lock_file = self.cache_file.with_suffix(".lock")
+        self.refresh_margin = refresh_margin
+        self.background = background
+
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lifetime = float(DEFAULT_EXPIRES_IN)
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._credential = hashlib.sha256(
+            f"{SANKHYA_CLIENT_ID}:{SANKHYA_X_TOKEN}".encode("utf-8")
+        ).hexdigest()[:16]
+        self.stats = {"authentications": 0, "disk_hits": 0, "background_refreshes": 0, "errors": 0}
+
+    # =========================================================================
+    # CACHE EM DISCO
+    # =========================================================================
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("credential") != self._credential or not data.get("access_token"):
+            return None
+        return data
+
+    def _write_cache(self, token: str, expires_at: float, expires_in: int) -> None:
+        data = {
+            "credential": self._credential,
+            "access_token": token,
+            "expires_at": expires_at,
+            "expires_in": expires_in,
+        }
+        tmp = self.cache_file.with_suffix(".tmp")
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            # Sem cache em disco o token continua valendo para este processo
+            logger.warning(f"Nao foi possivel gravar o cache do token: {e}")
+
+    def _adopt(self, data: Optional[Dict[str, Any]], min_validity: float) -> bool:
+        """Usa o token do cache em disco se ainda tiver a validade minima."""
+        if data and data["expires_at"] - time.time() > min_validity:
+            self._token = data["access_token"]
+            self._expires_at = data["expires_at"]
+            self._lifetime = float(data.get("expires_in") or DEFAULT_EXPIRES_IN)
+            self.stats["disk_hits"] += 1
+            return True
+        return False
+
+    # =========================================================================
+    # AUTENTICACAO
+    # =========================================================================
+
+    def _authenticate(self) -> bool:
+        """Chama /authenticate e grava o token (memoria + disco)."""
+        try:
+            response = requests.post(
+                SANKHYA_AUTH_URL,
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                    "X-Token": SANKHYA_X_TOKEN
+                },
+                data={
+                    "client_id": SANKHYA_CLIENT_ID,
+                    "client_secret": SANKHYA_CLIENT_SECRET,
+                    "grant_type": "client_credentials"
+                },
+                timeout=30
+            )
+
+            if response.status_code != 200:
+                logger.error(f"Erro na autenticacao: HTTP {response.status_code}")
+                self.stats["errors"] += 1
+                return False
+
+            data = response.json()
+            token = data.get("access_token")
+            if not token:
+                logger.error("Autenticacao sem access_token na resposta")
+                self.stats["errors"] += 1
+                return False
+
+            expires_in = int(data.get("expires_in") or DEFAULT_EXPIRES_IN)
+            self._token = token
+            self._expires_at = time.time() + expires_in
+            self._lifetime = float(expires_in)
+            self._write_cache(token, self._expires_at, expires_in)
+            self.stats["authentications"] += 1
+
+            logger.info("Autenticacao realizada com sucesso")
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao autenticar: {e}")
+            self.stats["errors"] += 1
+            return False
+
+    def _refresh(self, min_validity: float, rejected: Optional[str] = None) -> bool:
+        """
+        Renovacao single-flight (chamar com self._lock).
+
+        Sob o lock de arquivo, relê o disco: se outro processo ja renovou
+        (e o token nao e o rejeitado), usa o dele.
+        """
+        with _file_lock(self.lock_file):
+            data = self._read_cache()
+            if data and data["access_token"] != rejected and self._adopt(data, min_validity):
+                return True
+            return self._authenticate()
+
+    def _valid(self, min_validity: float) -> bool:
+        return self._token is not None and self._expires_at - time.time() > min_validity
+
+    def get_token(self) -> Optional[str]:
+        """
+        Retorna um token valido.
+
+        Returns:
+            access_token, ou None se a autenticacao falhou
+        """
+        if self._valid(self._min_validity()):
+            return self._token
+
+        with self._lock:
+            min_validity = self._min_validity()
+            if not self._valid(min_validity):
+                # Outro processo pode ter renovado: disco antes da API
+                if not self._adopt(self._read_cache(), min_validity):
+                    if not self._refresh(min_validity):
+                        return None
+            token = self._token
+
+        self._start_background()
+        return token
+
+    def invalidate(self, token: Optional[str]) -> bool:
+        """
+        Descarta um token rejeitado pela API (401) e renova.
+
+        Args:
+            token: Token que recebeu 401 (None = descartar o atual)
+
+        Returns:
+            True se ha um token novo disponivel
+        """
+        with self._lock:
+            if self._token is not None and token is not None and self._token != token:
+                return True  # outro cliente ja renovou
+            logger.warning("Token rejeitado (401), renovando...")
+            rejected = token or self._token
+            self._token = None
+            self._expires_at = 0.0
+            return self._refresh(self._min_validity(), rejected=rejected)
+
+    # =========================================================================
+    # RENOVACAO EM SEGUNDO PLANO
+    # =========================================================================
+
+    def _start_background(self) -> None:
+        if not self.background or (self._refresher is not None and self._refresher.is_alive()):
+            return
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(
+                    target=self._background_loop, name="sankhya-token-refresh", daemon=True
+                )
+                self._refresher.start()
+
+    def _min_validity(self) -> float:
+        """Validade minima para usar o token (limitada para tokens curtos)."""
+        return min(MIN_VALIDITY, self._lifetime / 4)
+
+    def _margin(self) -> float:
+        """Antecedencia da renovacao (no maximo metade da validade do token)."""
+        return min(self.refresh_margin, self._lifetime / 2)
+
+    def _background_loop(self) -> None:
+        while True:
+            margin = self._margin()
+            wait = self._expires_at - margin - time.time()
+            if wait > 0:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue
+
+            with self._lock:
+                # Outra thread pode ter renovado enquanto esperava o lock
+                if self._valid(margin):
+                    continue
+                ok = self._refresh(margin) and self._valid(margin)
+                if ok:
+                    self.stats["background_refreshes"] += 1
+
+            if not ok:
+                # API fora: tentar de novo em 1 min (o token atual pode ainda valer)
+                self._wakeup.wait(60)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Autenticacoes, leituras do cache e validade restante."""
+        return {
+            **self.stats,
+            "expires_in": max(0, int(self._expires_at - time.time())) if self._token else 0,
+            "cache_file": str(self.cache_file),
+        }
+
+
+_provider: Optional[SankhyaTokenProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_token_provider() -> SankhyaTokenProvider:
+    """Retorna o provedor de token do processo (singleton)."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = SankhyaTokenProvider()
+        return _provider
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Extração por Faixas com Checkpoint (src/agents/engineer/extractors/checkpoint.py)
+
+Uma faixa que falha não vira lacuna: rodar de novo com os mesmos
+parâmetros pula as concluídas e repete só a que falhou.
+
+Uso:
+    python -m pytest tests/test_checkpoint.py -q
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.agents.engineer.extractors.checkpoint import RangeCrawl
+
+
+class FetchFake:
+    """Devolve os IDs da faixa; falha nas faixas de `falhar` enquanto estiverem lá."""
+
+    def __init__(self, falhar=()):
+        self.falhar = set(falhar)
+        self.chamadas = []
+
+    def __call__(self, inicio, fim):
+        self.chamadas.append(inicio)
+        if inicio in self.falhar:
+            raise TimeoutError(f"faixa {inicio} caiu")
+        return pd.DataFrame({"ID": range(inicio, fim)})
+
+
+def crawl(staging, fetch, params=None):
+    return RangeCrawl("vendas", fetch=fetch, id_max=29, range_size=10,
+                      params=params or {"query": "q"}, staging_dir=staging)
+
+
+def test_retoma_apos_faixa_com_falha(tmp_path):
+    fetch = FetchFake(falhar={10})
+    primeira = crawl(tmp_path, fetch)
+    resultado = primeira.run()
+
+    assert not resultado["success"]
+    assert resultado["failed"] == ["0000000010-0000000020"]
+    assert primeira.commit(tmp_path / "vendas.parquet")["success"] is False
+    assert not (tmp_path / "vendas.parquet").exists()
+
+    # Nova execução (outro processo): só a faixa que falhou é buscada
+    fetch.falhar.clear()
+    fetch.chamadas.clear()
+    retomada = crawl(tmp_path, fetch)
+    resultado = retomada.run()
+
+    assert resultado["success"]
+    assert fetch.chamadas == [10]
+    assert resultado["skipped"] == 2 and resultado["rows"] == 30
+
+    commit = retomada.commit(tmp_path / "vendas.parquet")
+    assert commit["success"] and commit["records"] == 30
+    assert pd.read_parquet(tmp_path / "vendas.parquet")["ID"].tolist() == list(range(30))
+    assert not retomada.stage_dir.exists()
+
+
+def test_reset_extrai_tudo_de_novo(tmp_path):
+    fetch = FetchFake()
+    crawl(tmp_path, fetch).run()
+    fetch.chamadas.clear()
+
+    resultado = crawl(tmp_path, fetch).run(reset=True)
+    assert sorted(fetch.chamadas) == [0, 10, 20]
+    assert resultado["skipped"] == 0
+
+
+def test_outra_extracao_da_entidade_nao_apaga_staging_em_uso(tmp_path):
+    primeira = crawl(tmp_path, FetchFake(falhar={20}), params={"query": "a"})
+    primeira.run()
+
+    segunda = crawl(tmp_path, FetchFake(), params={"query": "b"})
+    segunda.run()
+    assert primeira.manifest_file.exists()
+
+    # Staging parado há mais de max_age_hours sai na próxima extração nova
+    manifest = json.loads(primeira.manifest_file.read_text(encoding="utf-8"))
+    manifest["created_at"] = manifest["updated_at"] = "2000-01-01T00:00:00"
+    primeira.manifest_file.write_text(json.dumps(manifest), encoding="utf-8")
+
+    crawl(tmp_path, FetchFake(), params={"query": "c"}).run()
+    assert not primeira.stage_dir.exists()
+    assert segunda.manifest_file.exists()
+
+
+def test_faixa_vazia_conta_como_concluida(tmp_path):
+    def fetch(inicio, fim):
+        return pd.DataFrame({"ID": []}) if inicio == 10 else pd.DataFrame({"ID": range(inicio, fim)})
+
+    retomada = crawl(tmp_path, fetch)
+    resultado = retomada.run()
+    assert resultado["success"] and resultado["rows"] == 20
+    assert len(retomada.load()) == 20
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Feature Store de Vendas (src/agents/shared/features/store.py)
+
+O resultado incremental (update/remove) tem de bater com rebuild() sobre
+o historico equivalente.
+
+Uso:
+    python -m pytest tests/test_feature_store.py -q
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.agents.shared.features.store import SalesFeatureStore
+
+COLUNAS = ["NUNOTA", "CODPARC", "DTNEG", "VLRNOTA", "STATUSNOTA", "CODPROD", "QTDNEG", "VLRTOT"]
+
+
+def vendas(linhas):
+    return pd.DataFrame(linhas, columns=COLUNAS)
+
+
+def assert_store_igual(store, esperado):
+    pd.testing.assert_frame_equal(store.customers, esperado.customers, check_dtype=False, check_index_type=False)
+    pd.testing.assert_frame_equal(store.products, esperado.products, check_dtype=False, check_index_type=False)
+
+
+@pytest.fixture
+def inicial():
+    return vendas([
+        (1, 10, "2026-01-01", 100, "L", 5, 1, 100),
+        (2, 10, "2026-01-05", 50, "A", 6, 2, 30),
+        (2, 10, "2026-01-05", 50, "A", 5, 1, 20),
+        (3, 20, "2026-01-03", 70, "L", 7, 1, 70),
+    ])
+
+
+def reconstruida(tmp_path, df):
+    store = SalesFeatureStore(tmp_path / "rebuild")
+    store.rebuild(df)
+    return store
+
+
+def test_reaplicar_mesmo_delta_nao_duplica(tmp_path, inicial):
+    store = SalesFeatureStore(tmp_path / "store")
+    store.update(inicial)
+    stats = store.update(inicial)
+
+    assert stats["notas_novas"] == 0 and stats["notas_alteradas"] == 0
+    assert_store_igual(store, reconstruida(tmp_path, inicial))
+
+
+def test_nota_alterada_reverte_contribuicao(tmp_path, inicial):
+    store = SalesFeatureStore(tmp_path / "store")
+    store.update(inicial)
+
+    # Nota 2 faturada com outro valor; nota 3 muda de cliente e data
+    alteradas = vendas([
+        (2, 10, "2026-01-06", 80, "L", 6, 2, 60),
+        (2, 10, "2026-01-06", 80, "L", 5, 1, 20),
+        (3, 30, "2026-01-09", 70, "L", 7, 1, 70),
+    ])
+    stats = store.update(alteradas)
+
+    assert stats["notas_alteradas"] == 2
+    historico = pd.concat([inicial[inicial["NUNOTA"] == 1], alteradas])
+    assert_store_igual(store, reconstruida(tmp_path, historico))
+
+
+def test_delta_so_cabecalho_mantem_itens(tmp_path, inicial):
+    store = SalesFeatureStore(tmp_path / "store")
+    store.update(inicial)
+    produtos = store.products.copy()
+
+    cabecalho = inicial[inicial["NUNOTA"] == 3][["NUNOTA", "CODPARC", "DTNEG", "VLRNOTA", "STATUSNOTA"]]
+
+    # Mesmo cabecalho: nada muda
+    stats = store.update(cabecalho)
+    assert stats["notas_alteradas"] == 0
+    pd.testing.assert_frame_equal(store.products, produtos)
+
+    # Cabecalho alterado: recalcula clientes, itens registrados continuam
+    stats = store.update(cabecalho.assign(VLRNOTA=90))
+    assert stats["notas_alteradas"] == 1
+    assert 7 in store.products.index
+    pd.testing.assert_frame_equal(store.products, produtos)
+    assert store.customers.loc[20, "monetary"] == 90
+
+    # Itens reaparecem iguais: nota nao muda de novo
+    stats = store.update(inicial[inicial["NUNOTA"] == 3].assign(VLRNOTA=90))
+    assert stats["notas_alteradas"] == 0
+
+
+def test_remove_e_recarga(tmp_path, inicial):
+    path = tmp_path / "store"
+    store = SalesFeatureStore(path)
+    store.update(inicial)
+
+    recarregada = SalesFeatureStore(path)
+    stats = recarregada.remove([3, 99])
+
+    assert stats == {"success": True, "notas_removidas": 1, "notas_sem_registro": 1}
+    assert 20 not in recarregada.customers.index
+    assert_store_igual(recarregada, reconstruida(tmp_path, inicial[inicial["NUNOTA"] != 3]))
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do Roteador Rápido (src/agents/orchestrator/router.py)
+
+Perguntas com período ou qualificador que a tool get_kpis não tem devem
+ir para o LLM (match() == None), em vez de cair no mês atual.
+
+Uso:
+    python -m pytest tests/test_router.py -q
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.agents.orchestrator.router import IntentRouter
+
+
+@pytest.fixture
+def router():
+    # match() só consulta os nomes das tools
+    return IntentRouter(tools={"get_kpis": None, "forecast_demand": None, "get_segments": None})
+
+
+@pytest.mark.parametrize("pergunta", [
+    "faturamento de ontem",
+    "quantos pedidos tivemos ontem?",
+    "faturamento do trimestre",
+    "faturamento desse semestre",
+    "faturamento semanal",
+    "faturamento da quinzena",
+    "faturamento do dia 10",
+    "faturamento do dia",
+    "faturamento líquido do mês",
+    "faturamento bruto do mês",
+    "faturamento da loja 2",
+    "faturamento dos últimos 30 dias",
+    "faturamento do ano passado",
+])
+def test_kpi_encaminha_ao_llm(router, pergunta):
+    assert router.match(pergunta) is None
+
+
+@pytest.mark.parametrize("pergunta, periodo", [
+    ("Qual o faturamento do mês?", "mes_atual"),
+    ("qual o faturamento?", "mes_atual"),
+    ("faturamento de hoje", "hoje"),
+    ("ticket médio da semana", "semana"),
+    ("faturamento do mês passado", "mes_anterior"),
+    ("quantos pedidos no ano", "ano"),
+])
+def test_kpi_periodo(router, pergunta, periodo):
+    intent = router.match(pergunta)
+    assert intent is not None
+    assert intent.tool == "get_kpis"
+    assert intent.args["periodo"] == periodo
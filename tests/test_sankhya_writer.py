@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Escrita em Lote no Sankhya (src/utils/sankhya_writer.py)
+
+Rodar o mesmo job de novo pula o que já foi gravado com os mesmos
+valores e reenvia só pendentes, erros e valores alterados.
+
+Uso:
+    python -m pytest tests/test_sankhya_writer.py -q
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.sankhya_writer import SankhyaBulkWriter
+
+
+class GovernorFake:
+    def get_stats(self):
+        return {"rate": 1.0}
+
+
+class ClienteFake:
+    """Registra as chamadas; CODPARC em `rejeitar` volta com erro no saveRecord."""
+
+    def __init__(self, rejeitar=(), dataset_ok=True):
+        self.rejeitar = set(rejeitar)
+        self.dataset_ok = dataset_ok
+        self.governor = GovernorFake()
+        self.gravados = []
+        self._lock = threading.Lock()
+
+    def executar_servico(self, service_name, request_body, timeout=None):
+        if service_name == "DatasetSP.save":
+            if not self.dataset_ok:
+                return {"status": "0", "statusMessage": "servico nao liberado"}
+            with self._lock:
+                self.gravados.extend(int(r["pk"]["CODPARC"]) for r in request_body["records"])
+            return {"status": "1"}
+
+        codparc = int(request_body["dataSet"]["dataRow"]["key"]["CODPARC"]["$"])
+        if codparc in self.rejeitar:
+            return {"status": "0", "statusMessage": f"parceiro {codparc} bloqueado"}
+        with self._lock:
+            self.gravados.append(codparc)
+        return {"status": "1"}
+
+
+def registros(email="a@b.com"):
+    return [{"CODPARC": codparc, "EMAIL": email} for codparc in (1, 2, 3)]
+
+
+def writer(tmp_path, cliente, batch_size=1):
+    return SankhyaBulkWriter("Parceiro", key_fields=["CODPARC"], job_name="emails",
+                             client=cliente, batch_size=batch_size, max_workers=2,
+                             state_dir=tmp_path)
+
+
+def test_retomada_pula_gravados_e_reenvia_erros(tmp_path):
+    cliente = ClienteFake(rejeitar={2})
+    resultado = writer(tmp_path, cliente).run(registros())
+
+    assert resultado["atualizados"] == 2 and resultado["erros"] == 1
+    assert [e["key"] for e in writer(tmp_path, cliente).get_errors()] == ["2"]
+
+    # Segunda execução: so o registro com erro volta a ser enviado
+    cliente.rejeitar.clear()
+    cliente.gravados.clear()
+    retomado = writer(tmp_path, cliente)
+    resultado = retomado.run(registros())
+
+    assert cliente.gravados == [2]
+    assert resultado["pulados"] == 2 and resultado["enviados"] == 1 and resultado["success"]
+    assert retomado.get_errors() == []
+
+
+def test_valor_alterado_e_reenviado(tmp_path):
+    cliente = ClienteFake()
+    writer(tmp_path, cliente).run(registros())
+    cliente.gravados.clear()
+
+    novos = registros()
+    novos[0]["EMAIL"] = "novo@b.com"
+    resultado = writer(tmp_path, cliente).run(novos)
+
+    assert cliente.gravados == [1]
+    assert resultado["pulados"] == 2
+
+
+def test_sem_retry_errors_nao_reenvia_falhas(tmp_path):
+    cliente = ClienteFake(rejeitar={3})
+    writer(tmp_path, cliente).run(registros())
+    cliente.rejeitar.clear()
+    cliente.gravados.clear()
+
+    resultado = writer(tmp_path, cliente).run(registros(), retry_errors=False)
+    assert cliente.gravados == []
+    assert resultado["enviados"] == 0
+
+
+def test_lote_recusado_cai_para_registro_a_registro(tmp_path):
+    cliente = ClienteFake(rejeitar={2}, dataset_ok=False)
+    bulk = writer(tmp_path, cliente, batch_size=3)
+    resultado = bulk.run(registros())
+
+    assert sorted(cliente.gravados) == [1, 3]
+    assert resultado["fallbacks"] == 1 and resultado["erros"] == 1
+
+
+def test_diario_com_linha_cortada(tmp_path):
+    cliente = ClienteFake()
+    bulk = writer(tmp_path, cliente)
+    bulk.run(registros())
+
+    # Interrupcao no meio da escrita deixa a ultima linha pela metade
+    with open(bulk.journal_file, "a", encoding="utf-8") as f:
+        f.write('{"key": "9", "ha')
+    cliente.gravados.clear()
+
+    resultado = writer(tmp_path, cliente).run(registros())
+    assert cliente.gravados == [] and resultado["pulados"] == 3
+
+    # Entrada nova depois da linha cortada continua legivel
+    novos = registros()
+    novos[1]["EMAIL"] = "novo@b.com"
+    writer(tmp_path, cliente).run(novos)
+    cliente.gravados.clear()
+
+    resultado = writer(tmp_path, cliente).run(novos)
+    assert cliente.gravados == [] and resultado["pulados"] == 3
+
+
+def test_registro_sem_chave(tmp_path):
+    with pytest.raises(ValueError):
+        writer(tmp_path, ClienteFake()).run([{"CODPARC": None, "EMAIL": "x"}])
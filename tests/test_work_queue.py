@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da Fila de Trabalho (src/agents/engineer/extractors/work_queue.py)
+
+Lease vencido volta para a fila, o ack de um lease perdido é recusado e
+cada tarefa tem no máximo max_attempts tentativas.
+
+Uso:
+    python -m pytest tests/test_work_queue.py -q
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.agents.engineer.extractors.work_queue import QueueWorker, WorkQueue
+
+TAREFAS = {"0000000000-0000000010": {"query": "SELECT 1", "columns": ["ID"]}}
+TASK_ID = "0000000000-0000000010"
+
+
+@pytest.fixture
+def fila(tmp_path):
+    return WorkQueue(tmp_path / "fila", lease_seconds=600, max_attempts=2)
+
+
+def test_lease_vencido_e_reivindicado_e_ack_antigo_recusado(fila):
+    fila.enqueue("job", TAREFAS)
+
+    primeira = fila.claim("w1")
+    assert primeira["attempt"] == 1
+    assert fila.claim("w2") is None  # lease de w1 ainda vale
+
+    # w1 caiu: lease vence e w2 assume a tarefa
+    assert fila.expire("w1") == 1
+    segunda = fila.claim("w2")
+    assert segunda["task_id"] == TASK_ID and segunda["attempt"] == 2
+
+    # Resultado atrasado de w1 não vale mais
+    assert not fila.renew(primeira)
+    assert not fila.ack(primeira, rows=5, file=None)
+    assert fila.ack(segunda, rows=3, file=None)
+
+    assert fila.finished("job") == [
+        {"task_id": TASK_ID, "status": "done", "rows": 3, "file": None, "error": None}
+    ]
+
+
+def test_lease_sem_renovacao_vence_sozinho(tmp_path):
+    fila = WorkQueue(tmp_path / "fila", lease_seconds=0, max_attempts=2)
+    fila.enqueue("job", TAREFAS)
+
+    primeira = fila.claim("w1")
+    segunda = fila.claim("w2")
+    assert segunda["attempt"] == 2
+    assert not fila.ack(primeira, rows=1, file=None)
+
+
+def test_falhas_ate_max_attempts(fila):
+    fila.enqueue("job", TAREFAS)
+
+    task = fila.claim("w1")
+    assert fila.fail(task, "timeout")
+    assert fila.progress("job") == {"job": {"pending": 1}}
+
+    task = fila.claim("w1")
+    assert task["attempt"] == 2
+    assert fila.fail(task, "timeout de novo")
+
+    assert fila.claim("w1") is None
+    [outcome] = fila.finished("job")
+    assert outcome["status"] == "failed" and outcome["error"] == "timeout de novo"
+
+
+def test_lease_vencido_na_ultima_tentativa_vira_falha(fila):
+    fila.enqueue("job", TAREFAS)
+    fila.claim("w1")
+    fila.expire("w1")
+    fila.claim("w2")
+    fila.expire("w2")
+
+    assert fila.claim("w3") is None
+    [outcome] = fila.finished("job")
+    assert outcome["status"] == "failed"
+    assert "Lease expirado" in outcome["error"]
+
+
+def test_reenfileirar_mantem_concluidas_e_repete_falhas(fila):
+    tarefas = {**TAREFAS, "0000000010-0000000020": {"query": "SELECT 2", "columns": ["ID"]}}
+    fila.enqueue("job", tarefas)
+
+    task = fila.claim("w1")
+    fila.ack(task, rows=0, file=None)
+    for _ in range(2):
+        fila.fail(fila.claim("w1"), "erro")
+
+    # Coordenador reinicia: só a falha volta para a fila
+    assert fila.enqueue("job", tarefas) == 1
+    assert fila.claim("w1")["task_id"] == "0000000010-0000000020"
+
+
+class ClienteFake:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def executar_query(self, sql, timeout=None, strict=False):
+        return {"rows": self.rows}
+
+
+def test_worker_grava_chunk_e_confirma(fila):
+    fila.enqueue("job", TAREFAS)
+    worker = QueueWorker(fila, worker_id="w1")
+    worker._client = ClienteFake([[1], [2], [3]])
+
+    assert worker.run(job="job") == 1
+
+    [outcome] = fila.finished("job")
+    assert outcome["status"] == "done" and outcome["rows"] == 3
+    assert os.path.exists(outcome["file"])